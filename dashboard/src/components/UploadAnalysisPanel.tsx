@@ -27,7 +27,8 @@ import {
   YAxis,
 } from "recharts";
 
-import { db } from "@/lib/firebase";
+import { httpsCallable } from "firebase/functions";
+import { db, functions } from "@/lib/firebase";
 import { uploadWavWithProgress, type UploadHandle } from "@/lib/firebaseStorage";
 import { BatDetectionRow, type ReviewAction } from "./BatDetectionRow";
 
@@ -70,6 +71,15 @@ interface UploadJob {
   // 10× slowdown of the uploaded WAV so ultrasonic bat calls become
   // audible (40 kHz → 4 kHz). Hosted in Firebase Storage under audio/.
   timeExpandedAudioUrl?: string;
+  // Long recordings only (the PNGs above cover an excerpt): a map-style
+  // tile pyramid over the whole file, zoomable in time.
+  spectrogramTiles?: SpectrogramTiles;
+  // Artifacts are rendered on demand: the Cloud Function lists what can
+  // be rendered for this job, and the dashboard calls render_artifact
+  // for each one the first time it is shown. The result lands in the
+  // matching URL field above via the job snapshot.
+  artifactKey?: string;
+  artifactVariants?: ArtifactVariant[];
   // True when the user opted into Permissive Night Mode thresholds for
   // this specific upload. Used purely as a UI badge so reviewers can
   // tell relaxed-threshold runs apart from default-threshold runs.
@@ -754,9 +764,12 @@ function ExpandedJobView({
   return (
     <div className="px-4 pb-4 pt-1 border-t border-gray-100 space-y-4">
       {/* ── Spectrogram (with optional overlay toggle) ── */}
-      {job.spectrogramUrl && (
+      {(job.spectrogramUrl || canRender(job, "viridis_clean")) && (
         <SpectrogramView job={job} />
       )}
+      {(job.spectrogramTiles || canRender(job, "tiles")) && (
+        <FullRecordingView job={job} />
+      )}
 
       {/* ── Error / zero-detection messaging ── */}
       {job.status === "error" && (
@@ -789,24 +802,8 @@ function ExpandedJobView({
       {metrics && <MetricsGrid metrics={metrics} />}
 
       {/* ── Time-expanded audio ── */}
-      {job.timeExpandedAudioUrl && (
-        <div>
-          <p className="text-[10px] uppercase tracking-wide text-gray-500 mb-1.5">
-            Time-expanded audio (10× slowdown · ultrasonic → audible)
-          </p>
-          <audio
-            controls
-            preload="none"
-            src={job.timeExpandedAudioUrl}
-            className="w-full h-10"
-          >
-            Your browser does not support audio playback.
-          </audio>
-          <p className="text-[10px] text-gray-400 mt-1">
-            The original file is at 256 kHz; playback at 25.6 kHz
-            pitch-shifts every call into the human hearing range.
-          </p>
-        </div>
+      {(job.timeExpandedAudioUrl || canRender(job, "time_expanded")) && (
+        <TimeExpandedAudio job={job} />
       )}
 
       {/* ── Histogram + call-density timeline side-by-side ── */}
@@ -857,6 +854,210 @@ function ExpandedJobView({
 
 type Palette = "viridis" | "sonobat";
 
+type ArtifactVariant =
+  | "viridis_clean"
+  | "viridis_annotated"
+  | "sonobat_clean"
+  | "sonobat_annotated"
+  | "time_expanded"
+  | "tiles";
+
+const renderArtifact = httpsCallable<
+  { jobId: string; variant: ArtifactVariant },
+  { variant: ArtifactVariant; value: unknown }
+>(functions, "render_artifact", { timeout: 540_000 });
+
+// Shared across cards so re-mounting an expanded card (or two toggles
+// landing on the same variant) never fires a second render.
+const artifactRequests = new Map<string, Promise<unknown>>();
+
+function canRender(job: UploadJob, variant: ArtifactVariant): boolean {
+  return job.status === "done" && !!job.artifactVariants?.includes(variant);
+}
+
+// Asks for ``variant`` once, when ``want`` is true and the job does not
+// have it yet (``have``). The value itself arrives through the job
+// snapshot; this only tracks the request.
+function useArtifact(
+  job: UploadJob,
+  variant: ArtifactVariant,
+  have: boolean,
+  want = true,
+): { rendering: boolean; error: string | null } {
+  const [rendering, setRendering] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    if (have || !want || !canRender(job, variant)) return;
+    const key = `${job.id}/${variant}`;
+    let req = artifactRequests.get(key);
+    if (!req) {
+      req = renderArtifact({ jobId: job.id, variant });
+      artifactRequests.set(key, req);
+      // Let a failed render be retried on the next view.
+      req.catch(() => artifactRequests.delete(key));
+    }
+    let live = true;
+    setRendering(true);
+    setError(null);
+    // On success stay "rendering" until the snapshot brings the value.
+    // So do "already rendered" / "being rendered elsewhere" refusals.
+    req.catch((e: unknown) => {
+      if (!live) return;
+      const code = (e as { code?: string }).code;
+      if (code === "functions/already-exists" || code === "functions/aborted") return;
+      setError(e instanceof Error ? e.message : String(e));
+      setRendering(false);
+    });
+    return () => {
+      live = false;
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [job.id, job.status, variant, have, want]);
+
+  return { rendering: rendering && !have, error };
+}
+
+// Manifest written by the Cloud Function next to the tiles. Tile z/x
+// covers columns [x·tileSize, (x+1)·tileSize) of zoom level z; one
+// column is colSeconds · 2^(maxZoom − z) seconds, and every tile spans
+// 0 – maxFreqKhz top to bottom.
+interface SpectrogramTiles {
+  urlTemplate: string; // contains {z} and {x}
+  tileSize: number;
+  maxZoom: number;
+  columns: number; // at maxZoom
+  colSeconds: number;
+  durationSeconds: number;
+  maxFreqKhz: number;
+  palette: string;
+}
+
+function TiledSpectrogram({ tiles }: { tiles: SpectrogramTiles }) {
+  // One tile column per screen pixel; zooming switches level, dragging
+  // pans. Only the tiles intersecting the viewport are requested.
+  const ref = useRef<HTMLDivElement>(null);
+  const drag = useRef<{ x: number; start: number } | null>(null);
+  const [width, setWidth] = useState(0);
+  const [zoom, setZoom] = useState(0);
+  const [start, setStart] = useState(0);
+
+  useEffect(() => {
+    const el = ref.current;
+    if (!el) return;
+    const ro = new ResizeObserver(() => setWidth(el.clientWidth));
+    ro.observe(el);
+    setWidth(el.clientWidth);
+    // Open at the deepest level where the whole recording still fits.
+    const fit = Math.floor(
+      Math.log2((el.clientWidth * 2 ** tiles.maxZoom) / tiles.columns),
+    );
+    setZoom(Math.max(0, Math.min(tiles.maxZoom, fit)));
+    return () => ro.disconnect();
+  }, [tiles]);
+
+  const secPerPx = tiles.colSeconds * 2 ** (tiles.maxZoom - zoom);
+  const span = width * secPerPx;
+  const levelCols = Math.ceil(tiles.columns / 2 ** (tiles.maxZoom - zoom));
+  const tileSec = tiles.tileSize * secPerPx;
+
+  function clampStart(s: number, spanSec = span) {
+    return Math.max(0, Math.min(s, tiles.durationSeconds - spanSec));
+  }
+
+  function changeZoom(delta: number) {
+    const next = Math.max(0, Math.min(tiles.maxZoom, zoom + delta));
+    if (next === zoom) return;
+    const centre = start + span / 2;
+    const nextSpan = span / 2 ** (next - zoom);
+    setZoom(next);
+    setStart(clampStart(centre - nextSpan / 2, nextSpan));
+  }
+
+  const visible: { x: number; left: number; w: number }[] = [];
+  if (width > 0) {
+    const last = Math.ceil(levelCols / tiles.tileSize) - 1;
+    for (
+      let x = Math.max(0, Math.floor(start / tileSec));
+      x <= Math.min(last, Math.floor((start + span) / tileSec));
+      x++
+    ) {
+      visible.push({
+        x,
+        left: (x * tileSec - start) / secPerPx,
+        w: Math.min(tiles.tileSize, levelCols - x * tiles.tileSize),
+      });
+    }
+  }
+
+  return (
+    <div>
+      <div className="flex items-center justify-between mb-1.5">
+        <p className="text-[10px] uppercase tracking-wide text-gray-500">
+          Full recording · {start.toFixed(1)}–
+          {Math.min(start + span, tiles.durationSeconds).toFixed(1)} s ·
+          0–{Math.round(tiles.maxFreqKhz)} kHz
+        </p>
+        <div className="flex text-[11px] rounded-md border border-gray-200 overflow-hidden">
+          <button
+            type="button"
+            onClick={() => changeZoom(-1)}
+            disabled={zoom === 0}
+            className="px-2.5 py-1 bg-white text-gray-700 hover:bg-gray-50 disabled:opacity-40"
+            title="Zoom out"
+          >
+            −
+          </button>
+          <button
+            type="button"
+            onClick={() => changeZoom(1)}
+            disabled={zoom === tiles.maxZoom}
+            className="px-2.5 py-1 bg-white text-gray-700 hover:bg-gray-50 border-l border-gray-200 disabled:opacity-40"
+            title="Zoom in"
+          >
+            +
+          </button>
+        </div>
+      </div>
+      <div
+        ref={ref}
+        className="relative h-48 overflow-hidden rounded-lg border border-gray-200 bg-gray-900 cursor-grab active:cursor-grabbing select-none touch-none"
+        onPointerDown={(e) => {
+          drag.current = { x: e.clientX, start };
+          e.currentTarget.setPointerCapture(e.pointerId);
+        }}
+        onPointerMove={(e) => {
+          if (!drag.current) return;
+          setStart(
+            clampStart(drag.current.start - (e.clientX - drag.current.x) * secPerPx),
+          );
+        }}
+        onPointerUp={() => {
+          drag.current = null;
+        }}
+      >
+        {visible.map(({ x, left, w }) => (
+          // eslint-disable-next-line @next/next/no-img-element
+          <img
+            key={`${zoom}/${x}`}
+            src={tiles.urlTemplate
+              .replace("{z}", String(zoom))
+              .replace("{x}", String(x))}
+            alt=""
+            draggable={false}
+            className="absolute top-0 h-full"
+            style={{ left, width: w }}
+          />
+        ))}
+      </div>
+      <p className="text-[10px] text-gray-400 mt-1">
+        Whole recording ({tiles.palette}). Drag to pan, +/− to zoom — down to{" "}
+        {(tiles.colSeconds * 1000).toFixed(0)} ms per pixel.
+      </p>
+    </div>
+  );
+}
+
 function SpectrogramView({ job }: { job: UploadJob }) {
   // Two independent toggles: palette + overlay. Default palette is
   // viridis (perceptually uniform, safe for figures); default overlay
@@ -879,16 +1080,19 @@ function SpectrogramView({ job }: { job: UploadJob }) {
   }
 
   const sonobatAvailable = !!(
-    job.spectrogramSonobatUrl || job.spectrogramSonobatAnnotatedUrl
+    job.spectrogramSonobatUrl ||
+    job.spectrogramSonobatAnnotatedUrl ||
+    canRender(job, "sonobat_clean")
   );
   const hasOverlayToggle = !!(
-    job.spectrogramUrl && job.spectrogramAnnotatedUrl
+    (job.spectrogramUrl && job.spectrogramAnnotatedUrl) ||
+    canRender(job, "viridis_annotated")
   );
 
   // Resolve to a concrete URL. Falls back sensibly so legacy uploads
   // (which only have the viridis URLs) still render when the user's
   // last-used palette was sonobat.
-  const src =
+  const legacySrc =
     palette === "sonobat" && showOverlay && job.spectrogramSonobatAnnotatedUrl
       ? job.spectrogramSonobatAnnotatedUrl
       : palette === "sonobat" && job.spectrogramSonobatUrl
@@ -897,6 +1101,20 @@ function SpectrogramView({ job }: { job: UploadJob }) {
       ? job.spectrogramAnnotatedUrl
       : job.spectrogramUrl;
 
+  // On-demand jobs: the exact variant the toggles ask for, rendered the
+  // first time it is picked.
+  const variant: ArtifactVariant = `${
+    palette === "sonobat" && sonobatAvailable ? "sonobat" : "viridis"
+  }_${showOverlay && hasOverlayToggle ? "annotated" : "clean"}`;
+  const variantUrl = {
+    viridis_clean: job.spectrogramUrl,
+    viridis_annotated: job.spectrogramAnnotatedUrl,
+    sonobat_clean: job.spectrogramSonobatUrl,
+    sonobat_annotated: job.spectrogramSonobatAnnotatedUrl,
+  }[variant as Exclude<ArtifactVariant, "time_expanded" | "tiles">];
+  const { rendering, error } = useArtifact(job, variant, !!variantUrl);
+  const src = variantUrl ?? (canRender(job, variant) ? undefined : legacySrc);
+
   return (
     <div>
       <div className="flex items-center justify-between mb-1.5">
@@ -952,7 +1170,7 @@ function SpectrogramView({ job }: { job: UploadJob }) {
           )}
         </div>
       </div>
-      {src && (
+      {src ? (
         // eslint-disable-next-line @next/next/no-img-element
         <img
           src={src}
@@ -961,6 +1179,14 @@ function SpectrogramView({ job }: { job: UploadJob }) {
           })`}
           className="w-full rounded-lg border border-gray-200 bg-gray-50"
         />
+      ) : (
+        <div className="flex aspect-[3/1] w-full items-center justify-center rounded-lg border border-gray-200 bg-gray-50 text-xs text-gray-500">
+          {error
+            ? `Couldn't render this spectrogram: ${error}`
+            : rendering
+            ? "Rendering spectrogram…"
+            : "Spectrogram not available."}
+        </div>
       )}
       <p className="text-[10px] text-gray-400 mt-1">
         {palette === "sonobat"
@@ -977,6 +1203,83 @@ function SpectrogramView({ job }: { job: UploadJob }) {
   );
 }
 
+function TimeExpandedAudio({ job }: { job: UploadJob }) {
+  // Rendered on first request only — most reviewers never play it.
+  const [want, setWant] = useState(false);
+  const { rendering, error } = useArtifact(
+    job,
+    "time_expanded",
+    !!job.timeExpandedAudioUrl,
+    want,
+  );
+
+  return (
+    <div>
+      <p className="text-[10px] uppercase tracking-wide text-gray-500 mb-1.5">
+        Time-expanded audio (10× slowdown · ultrasonic → audible)
+      </p>
+      {job.timeExpandedAudioUrl ? (
+        <audio
+          controls
+          preload="none"
+          src={job.timeExpandedAudioUrl}
+          className="w-full h-10"
+        >
+          Your browser does not support audio playback.
+        </audio>
+      ) : (
+        <button
+          type="button"
+          onClick={() => setWant(true)}
+          disabled={rendering}
+          className="text-[11px] font-medium px-2.5 py-1 rounded-md border border-gray-200 bg-white text-gray-700 hover:bg-gray-50 disabled:opacity-60"
+        >
+          {rendering ? "Rendering audio…" : "Render time-expanded audio"}
+        </button>
+      )}
+      <p className="text-[10px] text-gray-400 mt-1">
+        {error
+          ? `Couldn't render the audio: ${error}`
+          : "The original file is at 256 kHz; playback at 25.6 kHz pitch-shifts every call into the human hearing range."}
+      </p>
+    </div>
+  );
+}
+
+function FullRecordingView({ job }: { job: UploadJob }) {
+  // The tile pyramid is a full pass over the file, so it is only
+  // rendered once someone opens it.
+  const [want, setWant] = useState(false);
+  const { rendering, error } = useArtifact(
+    job,
+    "tiles",
+    !!job.spectrogramTiles,
+    want,
+  );
+
+  if (job.spectrogramTiles) {
+    return <TiledSpectrogram tiles={job.spectrogramTiles} />;
+  }
+  return (
+    <div className="flex items-center gap-2">
+      <button
+        type="button"
+        onClick={() => setWant(true)}
+        disabled={rendering}
+        className="text-[11px] font-medium px-2.5 py-1 rounded-md border border-gray-200 bg-white text-gray-700 hover:bg-gray-50 disabled:opacity-60"
+        title="Zoomable spectrogram of the whole recording"
+      >
+        {rendering ? "Rendering full recording…" : "Open full-recording view"}
+      </button>
+      {error && (
+        <span className="text-[10px] text-rose-600">
+          Couldn&apos;t render: {error}
+        </span>
+      )}
+    </div>
+  );
+}
+
 function MetricsGrid({ metrics }: { metrics: JobMetrics }) {
   const cards: { label: string; value: string; hint?: string }[] = [
     { label: "Calls", value: String(metrics.count) },
@@ -1,5 +1,7 @@
 import { initializeApp, getApps } from "firebase/app";
+import { initializeAppCheck, ReCaptchaV3Provider } from "firebase/app-check";
 import { getFirestore } from "firebase/firestore";
+import { getFunctions } from "firebase/functions";
 
 // Vercel env vars may contain literal \n from copy-paste — strip them
 const clean = (val: string | undefined) =>
@@ -14,5 +16,20 @@ const firebaseConfig = {
   appId: clean(process.env.NEXT_PUBLIC_FIREBASE_APP_ID),
 };
 
-const app = getApps().length === 0 ? initializeApp(firebaseConfig) : getApps()[0];
+const isNewApp = getApps().length === 0;
+const app = isNewApp ? initializeApp(firebaseConfig) : getApps()[0];
+
+// App Check vouches for this dashboard to the callable functions
+// (render_artifact refuses calls with neither sign-in nor App Check).
+// Browser only, and once per app instance.
+const recaptchaSiteKey = clean(process.env.NEXT_PUBLIC_RECAPTCHA_SITE_KEY);
+if (isNewApp && typeof window !== "undefined" && recaptchaSiteKey) {
+  initializeAppCheck(app, {
+    provider: new ReCaptchaV3Provider(recaptchaSiteKey),
+    isTokenAutoRefreshEnabled: true,
+  });
+}
+
 export const db = getFirestore(app);
+// Same region as the Cloud Functions in functions/main.py.
+export const functions = getFunctions(app, "us-central1");
@@ -7,21 +7,33 @@ Accepts .wav uploads via POST /analyze and runs both:
 
 Results are written to the same PostgreSQL tables (with source='upload')
 so they flow through the existing sync → Firestore → dashboard pipeline.
+
+POST /analyze/stream takes the WAV as the raw request body, writes it
+to disk as it arrives, and answers with Server-Sent Events: progress
+and partial results per block / window, then the same payload
+/analyze returns. Both endpoints run the analysis on a worker thread,
+never on the event loop.
 """
 
+import asyncio
+import json
 import os
+import shutil
 import uuid
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from tempfile import NamedTemporaryFile
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
 import librosa
 import numpy as np
 import psycopg2
 import soundfile as sf
-from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from psycopg2.extras import execute_values
 
 # ---------------------------------------------------------------------------
@@ -65,6 +77,20 @@ ENABLE_GROUPS_CLASSIFIER = os.getenv("ENABLE_GROUPS_CLASSIFIER", "false").lower(
 GROUPS_MODEL_PATH = os.getenv("MODEL_PATH", "/app/models/groups_model.pt")
 GROUPS_MODEL_VERSION = os.getenv("MODEL_VERSION", "groups_v1_post_epfu_partial_2026-04-17")
 CLASSIFIER_DET_THRESHOLD = 0.5  # Matches training filter
+# Uploads are read this many seconds at a time (whole seconds, so AST's
+# 1-second grid lines up across blocks) — a full-night file never sits
+# in memory.
+AST_BLOCK_S = int(os.getenv("AST_BLOCK_S", "60"))
+# 1-second windows per AST forward pass. Larger batches amortise the
+# per-call overhead; 16 × 1024 fbank frames stays well inside Pi memory.
+AST_BATCH_SIZE = max(1, int(os.getenv("AST_BATCH_SIZE", "16")))
+# Analyses run here, off the event loop. The models are process-wide
+# singletons and a full analysis already uses every core, so one at a
+# time by default; later requests wait their turn (the stream says so).
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "1"))
+_analysis_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+# Raw-body uploads to /analyze/stream are refused past this size.
+MAX_UPLOAD_BYTES = int(os.getenv("ANALYSIS_MAX_UPLOAD_BYTES", str(4 * 1024 ** 3)))
 
 
 def get_groups_classifier():
@@ -128,11 +154,14 @@ def get_db_connection():
 #  AST classification (1-second windows)
 # ---------------------------------------------------------------------------
 
-def run_ast(audio: np.ndarray, orig_sr: int, top_k: int = 5):
-    """Run AST on 1-second windows, return list of classification dicts."""
+def run_ast(audio: np.ndarray, orig_sr: int, top_k: int = 5, time_offset_s: int = 0):
+    """Run AST on 1-second windows, return list of classification dicts.
+
+    ``time_offset_s`` is where ``audio`` starts in the file, so results
+    from successive blocks share one timeline. Windows go through the
+    extractor and model ``AST_BATCH_SIZE`` at a time.
+    """
     import torch
-    from maad.spl import wav2dBSPL
-    from maad.util import mean_dB
 
     ast = get_ast_classifier()
     model = ast["model"]
@@ -144,89 +173,124 @@ def run_ast(audio: np.ndarray, orig_sr: int, top_k: int = 5):
 
     window = target_sr  # 1 second
     n_windows = max(1, len(audio_16k) // window)
+    kept = [i for i in range(n_windows)
+            if len(audio_16k[i * window : (i + 1) * window]) >= window // 2]
+    if not kept:
+        return []
 
-    results = []
-    for i in range(n_windows):
-        chunk = audio_16k[i * window : (i + 1) * window]
-        if len(chunk) < window // 2:
-            continue
+    # SPL from the original-rate audio, every window at once
+    spl = _window_spl(audio, orig_sr, n_windows)
 
-        # Classify
+    k = min(top_k, model.config.num_labels)
+    results = []
+    for b in range(0, len(kept), AST_BATCH_SIZE):
+        batch = kept[b : b + AST_BATCH_SIZE]
+        chunks = [audio_16k[i * window : (i + 1) * window] for i in batch]
         with torch.no_grad():
-            inputs = extractor(chunk, sampling_rate=target_sr, return_tensors="pt")
-            logits = model(**inputs).logits[0]
-            proba = torch.sigmoid(logits)
-            top_indices = torch.argsort(proba)[-top_k:].flip(dims=(0,)).tolist()
-
-        # SPL from the original-rate chunk
-        orig_window = orig_sr  # 1 second in original samples
-        orig_chunk = audio[i * orig_window : (i + 1) * orig_window]
-        spl = _safe_spl(orig_chunk)
-
-        for idx in top_indices:
-            results.append({
-                "time_offset_s": i,
-                "label": model.config.id2label[idx],
-                "score": round(proba[idx].item(), 4),
-                "spl": round(spl, 1),
-            })
+            inputs = extractor(chunks, sampling_rate=target_sr, return_tensors="pt")
+            proba = torch.sigmoid(model(**inputs).logits)
+            scores, indices = torch.topk(proba, k, dim=1)
+
+        for i, row_scores, row_indices in zip(batch, scores.tolist(), indices.tolist()):
+            for score, idx in zip(row_scores, row_indices):
+                results.append({
+                    "time_offset_s": time_offset_s + i,
+                    "label": model.config.id2label[idx],
+                    "score": round(score, 4),
+                    "spl": round(float(spl[i]), 1),
+                })
 
     return results
 
 
-def _safe_spl(audio: np.ndarray, gain: float = 25, sensitivity: float = -18) -> float:
+def _window_spl(audio: np.ndarray, orig_sr: int, n_windows: int,
+                gain: float = 25, sensitivity: float = -18) -> np.ndarray:
+    """Mean dB SPL of each 1-second window of ``audio``, in one pass.
+
+    Same numbers as maad's ``mean_dB(wav2dBSPL(window))`` per window
+    (energy mean of the per-sample levels), without the per-window calls.
+    """
     from maad.spl import wav2dBSPL
-    from maad.util import mean_dB
 
+    audio = audio[: n_windows * orig_sr]
     audio_safe = np.where(audio == 0, 1e-10, audio)
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", RuntimeWarning)
-        x = wav2dBSPL(audio_safe, gain=gain, sensitivity=sensitivity, Vadc=1.25)
-        return float(mean_dB(x, axis=0))
+        power = 10 ** (wav2dBSPL(audio_safe, gain=gain, sensitivity=sensitivity, Vadc=1.25) / 10)
+        starts = np.arange(n_windows) * orig_sr
+        starts = starts[starts < len(power)]
+        spl = np.full(n_windows, np.nan)
+        if len(starts):
+            counts = np.diff(np.append(starts, len(power)))
+            spl[: len(starts)] = 10 * np.log10(np.add.reduceat(power, starts, dtype=np.float64) / counts)
+        return spl
+
+
+def iter_ast_blocks(wav_path: str, top_k: int = 5) -> Iterator[list]:
+    """``run_ast`` over the file ``AST_BLOCK_S`` seconds at a time, one
+    list of classifications per block."""
+    sr = sf.info(wav_path).samplerate
+    blocks = sf.blocks(wav_path, blocksize=sr * AST_BLOCK_S, dtype="float32", always_2d=True)
+    for i, block in enumerate(blocks):
+        yield run_ast(block.mean(axis=1), orig_sr=sr, top_k=top_k,
+                      time_offset_s=i * AST_BLOCK_S)
+
+
+def run_ast_blocks(wav_path: str, top_k: int = 5):
+    return [r for block in iter_ast_blocks(wav_path, top_k) for r in block]
 
 
 # ---------------------------------------------------------------------------
-#  BatDetect2 analysis (full file)
+#  BatDetect2 analysis (windowed, see bat_pipeline.iter_audio_windows)
 # ---------------------------------------------------------------------------
 
-def run_batdetect(wav_path: str):
-    """Run BatDetect2 on the wav file, return list of detection dicts.
+def iter_batdetect(wav_path: str) -> Iterator[Tuple[object, list]]:
+    """BatDetect2 (+ groups classifier) window by window.
+
+    Yields ``(window, pairs)`` with each window's owned ``(det, pred)``
+    pairs in file time. Calls on a window boundary can be seen by both
+    neighbours; ``run_batdetect`` merges them once every window is in.
 
     When ENABLE_GROUPS_CLASSIFIER is on, we also run the groups classifier
     head over the 32-dim features BatDetect2 emits, and attach
     `predicted_class` + `prediction_confidence` to each detection.
-    Raw `species` (UK BatDetect2 label) is always included for legacy
-    compatibility and thesis comparison.
     """
     from batdetect2 import api as bat_api
+    from src import bat_pipeline
 
     if ENABLE_GROUPS_CLASSIFIER:
         # process_audio gives us features; classify above det_prob > 0.5
-        audio = bat_api.load_audio(wav_path)
-        detections, features, _ = bat_api.process_audio(audio)
-
-        if not detections:
-            return []
-
-        mask = np.array([d.get("det_prob", 0.0) > CLASSIFIER_DET_THRESHOLD for d in detections])
-        if not mask.any():
-            return []
-
-        high_conf_dets = [d for d, m in zip(detections, mask) if m]
-        high_conf_feats = features[mask]
-
         from src.classifier import classify
         model, ckpt = get_groups_classifier()
-        preds = classify(high_conf_feats, model, ckpt)
-        pairs = list(zip(high_conf_dets, preds))
+        config = None
     else:
         # Legacy path — raw BatDetect2 only
         config = get_bat_config()
-        results = bat_api.process_file(wav_path, config=config)
-        pred_dict = results.get("pred_dict", {})
-        detections = pred_dict.get("annotation", [])
-        pairs = [(d, None) for d in detections]
+    target_sr = int((config or bat_api.get_config()).get("target_samp_rate", 256000))
+
+    # Window by window so long uploads stay in bounded memory.
+    for win in bat_pipeline.iter_audio_windows(wav_path, target_sr):
+        detections, features, _ = bat_api.process_audio(win.audio, config=config)
+        owned = [i for i, d in enumerate(detections) if bat_pipeline.owns_detection(win, d)]
+        if ENABLE_GROUPS_CLASSIFIER:
+            owned = [i for i in owned if detections[i].get("det_prob", 0.0) > CLASSIFIER_DET_THRESHOLD]
+            preds = classify(features[owned], model, ckpt) if owned else []
+        else:
+            preds = [None] * len(owned)
+        pairs = []
+        for i, pred in zip(owned, preds):
+            det = bat_pipeline.shift_detection(detections[i], win.offset_s)
+            det["_window"] = win.index
+            pairs.append((det, pred))
+        yield win, pairs
+
+
+def _bat_rows(pairs) -> list:
+    """``(det, pred)`` pairs → the detection dicts /analyze returns.
 
+    Raw `species` (UK BatDetect2 label) is always included for legacy
+    compatibility and thesis comparison.
+    """
     out = []
     for det, pred in pairs:
         species = det.get("class", "Unknown")
@@ -249,6 +313,206 @@ def run_batdetect(wav_path: str):
     return out
 
 
+def run_batdetect(wav_path: str):
+    """Run BatDetect2 on the wav file, return list of detection dicts."""
+    from src import bat_pipeline
+
+    pairs = [p for _, window_pairs in iter_batdetect(wav_path) for p in window_pairs]
+    pairs = bat_pipeline.merge_boundary_duplicates(pairs, key=lambda p: p[0])
+    return _bat_rows(pairs)
+
+
+# ---------------------------------------------------------------------------
+#  Analysis — one generator behind both endpoints
+# ---------------------------------------------------------------------------
+
+def _store_ast(conn, results, device_label, sync_id, now) -> None:
+    rows = [
+        (r["label"], r["score"], r["spl"], device_label, sync_id, now, "upload")
+        for r in results
+    ]
+    if not rows:
+        return
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO classifications
+                (label, score, spl, device, sync_id, sync_time, source)
+            VALUES %s
+        """, rows)
+    conn.commit()
+
+
+def _store_bat(conn, results, device_label, sync_id, now) -> None:
+    rows = [
+        (
+            d["species"], d["common_name"], d["detection_prob"],
+            d["start_time"], d["end_time"], d["low_freq"],
+            d["high_freq"], d["duration_ms"],
+            device_label, sync_id, now, "upload",
+            d.get("predicted_class"),
+            d.get("prediction_confidence"),
+            d.get("model_version"),
+        )
+        for d in results
+    ]
+    if not rows:
+        return
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO bat_detections
+                (species, common_name, detection_prob, start_time,
+                 end_time, low_freq, high_freq, duration_ms,
+                 device, sync_id, detection_time, source,
+                 predicted_class, prediction_confidence, model_version)
+            VALUES %s
+        """, rows)
+    conn.commit()
+
+
+def analysis_events(
+    wav_path: str,
+    filename: str,
+    run_ast_model: bool = True,
+    run_batdetect_model: bool = True,
+    top_k: int = 5,
+    device_label: Optional[str] = "upload",
+) -> Iterator[Tuple[str, dict]]:
+    """Analyse ``wav_path`` → ``(event, data)`` pairs; the last is ``done``.
+
+    Blocking — runs on ``_analysis_pool``. Intermediate events:
+
+    * ``progress`` — ``{stage, done, total}`` after each AST block /
+      BatDetect2 window
+    * ``ast`` — that block's classifications (already stored)
+    * ``detections`` — that window's detections. Provisional: a call on
+      a window boundary can appear twice here; ``done`` has the merged
+      list, and only that list is stored.
+
+    ``done`` carries the response /analyze returns.
+    """
+    from src import bat_pipeline
+
+    info = sf.info(wav_path)
+    sr = info.samplerate
+    duration_s = info.frames / sr
+    sync_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+
+    response = {
+        "filename": filename,
+        "sample_rate": sr,
+        "duration_seconds": round(duration_s, 2),
+        "channels": "mono",
+        "sync_id": sync_id,
+        "ast_classifications": [],
+        "bat_detections": [],
+        "summary": {},
+    }
+    yield "started", {k: response[k] for k in ("filename", "sample_rate", "duration_seconds", "sync_id")}
+
+    conn = get_db_connection()
+    try:
+        # ── AST ── stored block by block
+        if run_ast_model:
+            print(f"[ANALYSIS] Running AST on {filename} ({duration_s:.1f}s, {sr} Hz)")
+            n_blocks = max(1, -(-info.frames // (sr * AST_BLOCK_S)))
+            for i, block in enumerate(iter_ast_blocks(wav_path, top_k=top_k)):
+                _store_ast(conn, block, device_label, sync_id, now)
+                response["ast_classifications"].extend(block)
+                yield "ast", {"block": i, "classifications": block}
+                yield "progress", {"stage": "ast", "done": i + 1, "total": n_blocks}
+            print(f"[ANALYSIS] AST: {len(response['ast_classifications'])} classifications stored")
+
+        # ── BatDetect2 ── stored once boundary duplicates are merged
+        if run_batdetect_model:
+            print(f"[ANALYSIS] Running BatDetect2 on {filename}")
+            n_windows = max(1, -(-duration_s // bat_pipeline.STREAM_WINDOW_S))
+            pairs = []
+            for win, window_pairs in iter_batdetect(wav_path):
+                pairs.extend(window_pairs)
+                yield "detections", {"window": win.index, "detections": _bat_rows(window_pairs)}
+                yield "progress", {"stage": "batdetect", "done": win.index + 1, "total": int(n_windows)}
+            pairs = bat_pipeline.merge_boundary_duplicates(pairs, key=lambda p: p[0])
+            bat_results = _bat_rows(pairs)
+            _store_bat(conn, bat_results, device_label, sync_id, now)
+            response["bat_detections"] = bat_results
+            if bat_results:
+                print(f"[ANALYSIS] BatDetect2: {len(bat_results)} detections stored")
+    finally:
+        conn.close()
+
+    # ── Summary ──
+    n_segments = len(set(r["time_offset_s"] for r in response["ast_classifications"])) if response["ast_classifications"] else 0
+    species_found = list(set(d["species"] for d in response["bat_detections"]))
+    response["summary"] = {
+        "ast_segments_analysed": n_segments,
+        "ast_total_classifications": len(response["ast_classifications"]),
+        "bat_detections_count": len(response["bat_detections"]),
+        "bat_species_found": species_found,
+        "stored_in_db": True,
+        "will_sync_to_cloud": True,
+    }
+
+    print(f"[ANALYSIS] Done: {n_segments} AST segments, {len(response['bat_detections'])} bat detections")
+    yield "done", response
+
+
+def _run_to_completion(wav_path: str, **kwargs) -> dict:
+    """``analysis_events`` → final response; removes ``wav_path``."""
+    try:
+        for event, data in analysis_events(wav_path, **kwargs):
+            if event == "done":
+                return data
+        raise RuntimeError("analysis ended without a result")
+    finally:
+        os.unlink(wav_path)
+
+
+def _sse(event: str, data: dict) -> str:
+    from src import bat_pipeline
+    return f"event: {event}\ndata: {json.dumps(data, default=bat_pipeline.json_default)}\n\n"
+
+
+def _start_analysis(wav_path: str, **kwargs) -> asyncio.Queue:
+    """Submit ``analysis_events`` to ``_analysis_pool`` right away →
+    the queue its events arrive on (``None`` once it has finished).
+
+    The worker owns ``wav_path`` from here on and removes it however the
+    analysis ends, so the spooled upload never outlives it — even when
+    the client is gone before the response body is first iterated. A
+    client that disconnects stops receiving events, not the analysis:
+    results still land in Postgres, exactly as for /analyze.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def produce():
+        emit = lambda item: loop.call_soon_threadsafe(queue.put_nowait, item)  # noqa: E731
+        try:
+            for item in analysis_events(wav_path, **kwargs):
+                emit(item)
+        except Exception as e:
+            print(f"[ANALYSIS] Error: {e}")
+            emit(("error", {"detail": str(e)}))
+        finally:
+            os.unlink(wav_path)
+            emit(None)
+
+    try:
+        loop.run_in_executor(_analysis_pool, produce)
+    except BaseException:
+        os.unlink(wav_path)
+        raise
+    return queue
+
+
+async def _relay_events(queue: asyncio.Queue):
+    """SSE body: the events of a ``_start_analysis`` run as they happen."""
+    yield _sse("queued", {"workers": ANALYSIS_WORKERS})
+    while (item := await queue.get()) is not None:
+        yield _sse(*item)
+
+
 # ---------------------------------------------------------------------------
 #  API endpoints
 # ---------------------------------------------------------------------------
@@ -277,109 +541,77 @@ async def analyze(
     if not file.filename or not file.filename.lower().endswith(".wav"):
         raise HTTPException(status_code=400, detail="Only .wav files are accepted")
 
-    # Save upload to temp file
+    # Spool the upload to disk in 1 MB chunks rather than reading it
+    # into memory whole — on a worker thread, as is everything below.
     with NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        content = await file.read()
-        tmp.write(content)
+        await run_in_threadpool(shutil.copyfileobj, file.file, tmp, 1024 * 1024)
         tmp_path = tmp.name
 
     try:
-        # Read audio
-        audio, sr = sf.read(tmp_path, dtype="float32")
-        if audio.ndim > 1:
-            audio = audio.mean(axis=1)  # stereo → mono
-
-        duration_s = len(audio) / sr
-        sync_id = str(uuid.uuid4())
-        now = datetime.utcnow()
-
-        response = {
-            "filename": file.filename,
-            "sample_rate": sr,
-            "duration_seconds": round(duration_s, 2),
-            "channels": "mono",
-            "sync_id": sync_id,
-            "ast_classifications": [],
-            "bat_detections": [],
-            "summary": {},
-        }
+        return await asyncio.get_running_loop().run_in_executor(
+            _analysis_pool,
+            lambda: _run_to_completion(
+                tmp_path, filename=file.filename, run_ast_model=run_ast_model,
+                run_batdetect_model=run_batdetect_model, top_k=top_k,
+                device_label=device_label,
+            ),
+        )
+    except Exception as e:
+        print(f"[ANALYSIS] Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        conn = get_db_connection()
 
-        # ── AST ──
-        if run_ast_model:
-            print(f"[ANALYSIS] Running AST on {file.filename} ({duration_s:.1f}s, {sr} Hz)")
-            ast_results = run_ast(audio, orig_sr=sr, top_k=top_k)
-            response["ast_classifications"] = ast_results
-
-            # Store in DB
-            rows = [
-                (r["label"], r["score"], r["spl"], device_label, sync_id, now, "upload")
-                for r in ast_results
-            ]
-            if rows:
-                with conn.cursor() as cur:
-                    execute_values(cur, """
-                        INSERT INTO classifications
-                            (label, score, spl, device, sync_id, sync_time, source)
-                        VALUES %s
-                    """, rows)
-                conn.commit()
-                print(f"[ANALYSIS] AST: {len(rows)} classifications stored")
-
-        # ── BatDetect2 ──
-        if run_batdetect_model:
-            print(f"[ANALYSIS] Running BatDetect2 on {file.filename}")
-            bat_results = run_batdetect(tmp_path)
-            response["bat_detections"] = bat_results
+@app.post("/analyze/stream")
+async def analyze_stream(
+    request: Request,
+    filename: str = Query(...),
+    run_ast_model: bool = Query(default=True),
+    run_batdetect_model: bool = Query(default=True),
+    top_k: int = Query(default=5),
+    device_label: Optional[str] = Query(default="upload"),
+):
+    """Analyse a .wav sent as the raw request body; answer over SSE.
 
-            if bat_results:
-                rows = [
-                    (
-                        d["species"], d["common_name"], d["detection_prob"],
-                        d["start_time"], d["end_time"], d["low_freq"],
-                        d["high_freq"], d["duration_ms"],
-                        device_label, sync_id, now, "upload",
-                        d.get("predicted_class"),
-                        d.get("prediction_confidence"),
-                        d.get("model_version"),
-                    )
-                    for d in bat_results
-                ]
-                with conn.cursor() as cur:
-                    execute_values(cur, """
-                        INSERT INTO bat_detections
-                            (species, common_name, detection_prob, start_time,
-                             end_time, low_freq, high_freq, duration_ms,
-                             device, sync_id, detection_time, source,
-                             predicted_class, prediction_confidence, model_version)
-                        VALUES %s
-                    """, rows)
-                conn.commit()
-                print(f"[ANALYSIS] BatDetect2: {len(bat_results)} detections stored")
+    The body goes to disk chunk by chunk as it arrives (no multipart
+    spool, no in-memory copy), e.g.::
 
-        conn.close()
+        curl -N --data-binary @night.wav -H 'Content-Type: audio/wav' \\
+            'http://<pi>:8080/analyze/stream?filename=night.wav'
 
-        # ── Summary ──
-        n_segments = len(set(r["time_offset_s"] for r in response["ast_classifications"])) if response["ast_classifications"] else 0
-        species_found = list(set(d["species"] for d in response["bat_detections"]))
-        response["summary"] = {
-            "ast_segments_analysed": n_segments,
-            "ast_total_classifications": len(response["ast_classifications"]),
-            "bat_detections_count": len(response["bat_detections"]),
-            "bat_species_found": species_found,
-            "stored_in_db": True,
-            "will_sync_to_cloud": True,
-        }
-
-        print(f"[ANALYSIS] Done: {n_segments} AST segments, {len(response['bat_detections'])} bat detections")
-        return response
+    Events: ``queued``, ``started``, then ``progress`` / ``ast`` /
+    ``detections`` as blocks finish, and finally ``done`` (the /analyze
+    response) or ``error``.
+    """
+    if not filename.lower().endswith(".wav"):
+        raise HTTPException(status_code=400, detail="Only .wav files are accepted")
 
-    except Exception as e:
-        print(f"[ANALYSIS] Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        os.unlink(tmp_path)
+    tmp = NamedTemporaryFile(suffix=".wav", delete=False)
+    try:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="Upload too large")
+            # Chunks are ≤ 64 KB; a page-cache write doesn't stall the loop.
+            tmp.write(chunk)
+        tmp.close()
+        if not size:
+            raise HTTPException(status_code=400, detail="Empty request body")
+    except BaseException:
+        tmp.close()
+        os.unlink(tmp.name)
+        raise
+
+    queue = _start_analysis(
+        tmp.name, filename=filename, run_ast_model=run_ast_model,
+        run_batdetect_model=run_batdetect_model, top_k=top_k,
+        device_label=device_label,
+    )
+    return StreamingResponse(
+        _relay_events(queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/")
@@ -389,6 +621,7 @@ def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /analyze": "Upload a .wav file for analysis",
+            "POST /analyze/stream": "Raw .wav body in, progress + results out over SSE",
             "GET /health": "Service health check",
         },
     }
@@ -0,0 +1,40 @@
+"""Prometheus metrics for the upload worker, served on ``METRICS_PORT`` (default 9105)."""
+
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# Uploads run from a 1 s clip to multi-minute recordings.
+_SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+
+JOBS = Counter("worker_jobs_total", "Upload jobs finished", ["outcome"])
+DETECTIONS = Counter("worker_detections_total", "Detections persisted", ["predicted_class"])
+REJECTIONS = Counter("worker_rejections_total", "Zero-detection jobs by reason", ["reason"])
+AUDIO_SECONDS = Counter("worker_audio_seconds_total", "Seconds of uploaded audio analysed")
+POLLS = Counter("worker_polls_total", "Fallback uploadJobs queries", ["result"])
+SNAPSHOTS = Counter("worker_job_snapshots_total", "Pending-job listener snapshots received")
+LISTENER_UP = Gauge("worker_job_listener_up", "1 while the pending-job listener is subscribed")
+CACHE_LOOKUPS = Counter(
+    "worker_analysis_cache_lookups_total", "Analysis cache lookups", ["result"],
+)
+
+STAGE_SECONDS = Histogram(
+    "worker_stage_seconds", "Per-job stage wall time", ["stage"], buckets=_SECONDS_BUCKETS,
+)
+IN_PROGRESS = Gauge("worker_jobs_in_progress", "Jobs currently being analysed")
+PREFETCHED = Gauge("worker_jobs_prefetched", "Claimed jobs downloading or waiting for a process")
+LAST_JOB_TS = Gauge("worker_last_job_timestamp_seconds", "Unix time the last job finished")
+
+
+def clean_reason(reason: str) -> str:
+    """Drop the numeric suffix so the label set stays bounded."""
+    return reason.split("(")[0] if reason else "unknown"
+
+
+def start_metrics_server() -> None:
+    """Start the /metrics listener unless ``METRICS_ENABLED=false``."""
+    if os.getenv("METRICS_ENABLED", "true").lower() != "true":
+        return
+    port = int(os.getenv("METRICS_PORT", "9105"))
+    start_http_server(port, addr=os.getenv("METRICS_ADDR", "0.0.0.0"))
+    print(f"[WORKER] Metrics on :{port}/metrics")
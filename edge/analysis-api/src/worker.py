@@ -1,6 +1,6 @@
 """Firebase-driven upload worker for offline WAV analysis.
 
-Polls Firestore ``uploadJobs`` for user-uploaded .wav files, runs the
+Listens on Firestore ``uploadJobs`` for user-uploaded .wav files, runs the
 shared 4-gate bat-analysis pipeline (``bat_pipeline.run_full_pipeline``),
 and writes detections back so they appear in the dashboard's Offline
 WAV Analysis panel.
@@ -18,33 +18,58 @@ Key design points:
 * On zero-detection results, writes a ``rejectionReason`` to the
   ``uploadJobs`` doc so the user sees *why* nothing was identified
   instead of a blank "0 detections" card.
+* Jobs flow through a bounded local queue: up to ``WORKER_PREFETCH``
+  claimed jobs are downloading / waiting while ``WORKER_ANALYSIS_PROCS``
+  spawned processes (each with its own classifier) run the pipeline.
+  Firestore / Postgres writes stay on the coordinating thread.
+* Claims are Firestore transactions that re-check ``status == pending``,
+  so several workers (or a worker and the Cloud Function) never process
+  the same job twice. The claim records ``claimedBy``.
+* New jobs arrive through a snapshot listener on ``status == pending``
+  rather than a timed query, so an idle worker costs no Firestore reads
+  and an upload starts as soon as the listener delivers it. Polling is
+  only the fallback while the listener is reconnecting.
+* Uploads are cached by audio sha256 (``analysis_cache``): a repeat
+  upload with the same config skips analysis, and one that only changes
+  thresholds skips inference.
 
 Env vars — all optional, defaults match ``batdetect-service`` Pi config:
 
 * ``FIREBASE_STORAGE_BUCKET``   — required
 * ``MODEL_PATH``                — classifier checkpoint path
 * ``MODEL_VERSION``             — recorded on every detection row
-* ``UPLOAD_POLL_INTERVAL_SEC``  — default 5
+* ``UPLOAD_POLL_INTERVAL_SEC``  — fallback poll while the job listener is down (default 5)
+* ``WORKER_PREFETCH``           — claimed jobs queued / downloading ahead (default 2)
+* ``WORKER_ANALYSIS_PROCS``     — parallel analysis processes (default 1)
+* ``WORKER_ID``                 — recorded as ``claimedBy`` (default host:pid)
+* ``METRICS_PORT``              — Prometheus /metrics listener (default 9105)
 * ``DETECTION_THRESHOLD``       — user-threshold gate (default 0.5)
 * ``MIN_PREDICTION_CONF``       — classifier-confidence gate (default 0.6)
 * ``HPF_ENABLED``, ``HPF_CUTOFF_HZ``, ``HPF_ORDER``
 * ``VALIDATOR_ENABLED``, ``VALIDATOR_MIN_RMS``, ``VALIDATOR_MIN_SNR_DB``, ``VALIDATOR_MIN_BURST_RATIO``
 * ``FM_SWEEP_ENABLED``, ``FM_SWEEP_MIN_SLOPE``, ``FM_SWEEP_MAX_LOW_BAND_RATIO``, ``FM_SWEEP_MIN_R2``
+* ``STREAM_MIN_DURATION_S``, ``STREAM_WINDOW_S`` — files longer than this are analysed in windows (default 120 / 60)
+* ``ANALYSIS_CACHE_ENABLED``, ``ANALYSIS_CACHE_PREFIX`` — content-hash cache in the bucket (default true / ``analysis-cache``)
 """
 
+import multiprocessing
 import os
+import socket
+import threading
 import time
 import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from tempfile import NamedTemporaryFile
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import firebase_admin
 import psycopg2
 from firebase_admin import credentials, firestore, storage as fb_storage
 from psycopg2.extras import execute_values
 
-from src import bat_pipeline
+from src import analysis_cache, bat_pipeline, metrics
 from src.classifier import load_groups_classifier
 
 
@@ -56,6 +81,18 @@ DEVICE_LABEL = os.getenv("UPLOAD_DEVICE_LABEL", "upload")
 MODEL_PATH = os.getenv("MODEL_PATH", "/app/models/groups_model.pt")
 MODEL_VERSION = os.getenv("MODEL_VERSION", "groups_v1_post_epfu_partial_2026-04-17")
 
+WORKER_PREFETCH = max(1, int(os.getenv("WORKER_PREFETCH", "2")))
+WORKER_ANALYSIS_PROCS = max(1, int(os.getenv("WORKER_ANALYSIS_PROCS", "1")))
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# Extra pending docs read per claim pass, so losing a race to another
+# worker doesn't leave a free slot empty until the next poll.
+CLAIM_SLACK = 3
+# Re-subscribe backoff after the job listener closes.
+WATCH_RETRY_MIN_SEC = 5
+WATCH_RETRY_MAX_SEC = 300
+# Coordinator wake-up when nothing else happens (listener healthy).
+IDLE_WAKE_SEC = 60
+
 
 def _load_pipeline_cfg() -> dict:
     """Read every pipeline knob from env. Defaults match Pi live config."""
@@ -73,6 +110,9 @@ def _load_pipeline_cfg() -> dict:
         "fm_sweep_min_slope": float(os.getenv("FM_SWEEP_MIN_SLOPE", "-0.1")),
         "fm_sweep_max_low_band_ratio": float(os.getenv("FM_SWEEP_MAX_LOW_BAND_RATIO", "0.5")),
         "fm_sweep_min_r2": float(os.getenv("FM_SWEEP_MIN_R2", "0.2")),
+        # Longer files are analysed in overlapping windows (flat memory).
+        "stream_min_duration_s": float(os.getenv("STREAM_MIN_DURATION_S", "120")),
+        "stream_window_s": float(os.getenv("STREAM_WINDOW_S", "60")),
     }
 
 
@@ -136,23 +176,128 @@ def ensure_connection(conn):
 #  Job selection + status transitions
 # ---------------------------------------------------------------------------
 
-def _claim_next_pending_job(db):
-    pending = (
-        db.collection(UPLOAD_JOBS_COLLECTION)
-        .where("status", "==", "pending")
-        .order_by("createdAt")
-        .limit(1)
-        .stream()
-    )
-    first = next(pending, None)
-    if first is None:
+@firestore.transactional
+def _claim_in_transaction(transaction, job_ref) -> Optional[dict]:
+    """Flip one job pending → processing, or return None if someone beat us."""
+    snap = job_ref.get(transaction=transaction)
+    if not snap.exists or (snap.to_dict() or {}).get("status") != "pending":
         return None
-    job_ref = first.reference
-    job_ref.update({
+    transaction.update(job_ref, {
         "status": "processing",
         "processingStartedAt": firestore.SERVER_TIMESTAMP,
+        "claimedBy": WORKER_ID,
     })
-    return job_ref, first.to_dict()
+    return snap.to_dict()
+
+
+def _claim_refs(db, refs, limit: int) -> Tuple[List[Tuple[object, dict]], List[str]]:
+    """Claim up to ``limit`` of ``refs`` (oldest first), transactionally.
+
+    Returns the claimed ``(ref, data)`` pairs and the ids attempted.
+    """
+    claimed, tried = [], []
+    for job_ref in refs:
+        if len(claimed) >= limit:
+            break
+        tried.append(job_ref.id)
+        job_data = _claim_in_transaction(db.transaction(), job_ref)
+        if job_data is not None:
+            claimed.append((job_ref, job_data))
+    return claimed, tried
+
+
+def _pending_query(db):
+    return (
+        db.collection(UPLOAD_JOBS_COLLECTION)
+        .where("status", "==", "pending")
+        .order_by("createdAt")
+    )
+
+
+def _claim_pending_jobs(db, limit: int) -> List[Tuple[object, dict]]:
+    """Reconciling poll: query pending jobs and claim up to ``limit``."""
+    refs = [snap.reference for snap in _pending_query(db).limit(limit + CLAIM_SLACK).stream()]
+    claimed, _ = _claim_refs(db, refs, limit)
+    metrics.POLLS.labels(result="claimed" if claimed else "empty").inc()
+    return claimed
+
+
+class PendingJobWatch:
+    """Snapshot listener on ``uploadJobs where status == pending``.
+
+    Firestore pushes the pending set whenever it changes, so an idle
+    worker costs no reads and a new upload wakes the coordinator within
+    the listener's round-trip. The callback runs on Firestore's watch
+    thread; it only swaps in the new candidate list and sets ``wake``.
+    Claiming still goes through ``_claim_in_transaction``.
+
+    If the listener stops (network loss past the SDK's own retries, or
+    a server-side close) ``active`` goes False; the coordinator then
+    falls back to ``_claim_pending_jobs`` every ``POLL_INTERVAL_SEC``
+    and calls ``ensure`` to re-subscribe. A fresh listener's first
+    snapshot carries the full pending set, which reconciles anything
+    missed while it was down.
+    """
+
+    def __init__(self, db, wake: threading.Event):
+        self.db = db
+        self.wake = wake
+        self._lock = threading.Lock()
+        self._candidates: List[object] = []
+        self._watch = None
+        self._next_attempt = 0.0
+        self._backoff = WATCH_RETRY_MIN_SEC
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        with self._lock:
+            self._candidates = [d.reference for d in docs]
+        metrics.SNAPSHOTS.inc()
+        self.wake.set()
+
+    @property
+    def active(self) -> bool:
+        return self._watch is not None and self._watch.is_active
+
+    def ensure(self) -> bool:
+        """(Re)subscribe if the listener is down and the backoff allows it."""
+        if self.active:
+            return True
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return False
+        if self._watch is not None:
+            print("[WORKER] Job listener closed — polling until it reconnects")
+            self._watch = None
+        try:
+            self._watch = _pending_query(self.db).on_snapshot(self._on_snapshot)
+            self._backoff = WATCH_RETRY_MIN_SEC
+            print("[WORKER] Job listener subscribed")
+        except Exception as e:
+            print(f"[WORKER] Job listener subscribe failed: {e}")
+            self._next_attempt = now + self._backoff
+            self._backoff = min(self._backoff * 2, WATCH_RETRY_MAX_SEC)
+        metrics.LISTENER_UP.set(1 if self.active else 0)
+        return self.active
+
+    def candidates(self) -> List[object]:
+        """Pending refs from the latest snapshot, oldest first."""
+        with self._lock:
+            return list(self._candidates)
+
+    def discard(self, job_ids) -> None:
+        """Drop refs we already tried so they aren't re-claimed before
+        the snapshot reflecting their new status arrives."""
+        gone = set(job_ids)
+        with self._lock:
+            self._candidates = [r for r in self._candidates if r.id not in gone]
+
+    def close(self) -> None:
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception:
+                pass
+            self._watch = None
 
 
 def _mark_error(job_ref, message: str):
@@ -198,10 +343,11 @@ def _mark_done(
 # ---------------------------------------------------------------------------
 
 def _download_wav(bucket, job_id: str, dest_path: str) -> None:
-    blob = bucket.blob(f"uploads/{job_id}.wav")
-    if not blob.exists():
-        raise FileNotFoundError(f"uploads/{job_id}.wav not found in Storage")
-    blob.download_to_filename(dest_path)
+    with metrics.STAGE_SECONDS.labels(stage="download").time():
+        blob = bucket.blob(f"uploads/{job_id}.wav")
+        if not blob.exists():
+            raise FileNotFoundError(f"uploads/{job_id}.wav not found in Storage")
+        blob.download_to_filename(dest_path)
 
 
 # ---------------------------------------------------------------------------
@@ -299,78 +445,283 @@ def _persist_detections(conn, db, job_id: str, pairs, detection_time, pipeline_v
 
 
 # ---------------------------------------------------------------------------
-#  Per-job pipeline
+#  Analysis processes — each spawned child loads its own classifier once.
 # ---------------------------------------------------------------------------
 
-def process_job(conn, db, bucket, classifier_model, classifier_ckpt, pipeline_cfg, job_ref, job_data):
-    job_id = job_ref.id
-    filename = job_data.get("filename", "unknown.wav")
-    print(f"[WORKER] Processing job {job_id} ({filename})")
+_child_classifier = None
 
-    with NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        tmp_path = tmp.name
 
-    try:
-        _download_wav(bucket, job_id, tmp_path)
+def _init_analysis_process(model_path: str, torch_threads: int) -> None:
+    global _child_classifier
+    import torch
+    # Split the cores between processes instead of each grabbing all.
+    torch.set_num_threads(torch_threads)
+    _child_classifier = load_groups_classifier(model_path)
 
-        detection_time = datetime.utcnow()
-        result = bat_pipeline.run_full_pipeline(
-            tmp_path, classifier_model, classifier_ckpt, **pipeline_cfg,
-        )
 
-        if result.detections:
-            _persist_detections(
-                conn, db, job_id, result.detections,
-                detection_time, result.pipeline_version,
-            )
-            _mark_done(
-                job_ref, result.detections, result.duration_seconds,
-                stats=result.stats,
-                pipeline_version=result.pipeline_version,
-            )
-            print(
-                f"[WORKER] Job {job_id}: {len(result.detections)} detections "
-                f"({result.duration_seconds:.1f}s audio, stats={result.stats})"
-            )
-        else:
-            human = bat_pipeline.humanize_rejection(result.rejection_reason)
-            _mark_done(
-                job_ref, [], result.duration_seconds,
-                rejection_reason=result.rejection_reason,
-                rejection_message=human,
-                stats=result.stats,
-                pipeline_version=result.pipeline_version,
-            )
-            print(
-                f"[WORKER] Job {job_id}: 0 detections "
-                f"(reason={result.rejection_reason}, stats={result.stats})"
-            )
-    except Exception as e:
-        print(f"[WORKER] Job {job_id} failed: {e}")
-        traceback.print_exc()
-        _mark_error(job_ref, f"{type(e).__name__}: {e}")
-    finally:
+def _analyse(wav_path: str, raw_cfg: dict):
+    """Inference half only; the parent applies the gates (and caches)."""
+    model, ckpt = _child_classifier
+    return bat_pipeline.analyse_raw(wav_path, model, ckpt, **raw_cfg)
+
+
+def _new_analysis_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: the parent holds gRPC threads from firebase-admin.
+    threads = max(1, (os.cpu_count() or 1) // WORKER_ANALYSIS_PROCS)
+    return ProcessPoolExecutor(
+        max_workers=WORKER_ANALYSIS_PROCS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_analysis_process,
+        initargs=(MODEL_PATH, threads),
+    )
+
+
+# ---------------------------------------------------------------------------
+#  Per-job bookkeeping
+# ---------------------------------------------------------------------------
+
+class _Job:
+    """One claimed upload moving through download → analysis → persist."""
+
+    def __init__(self, job_ref, job_data: dict):
+        self.ref = job_ref
+        self.id = job_ref.id
+        self.data = job_data
+        self.filename = job_data.get("filename", "unknown.wav")
+        with NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+            self.tmp_path = tmp.name
+        self.detection_time: Optional[datetime] = None
+        self.analysis_started = 0.0
+        # Filled by _fetch_job from the analysis cache.
+        self.result_key = ""
+        self.raw_key = ""
+        self.cached_result = None
+        self.cached_raw = None
+
+    def cleanup(self) -> None:
         try:
-            os.unlink(tmp_path)
+            os.unlink(self.tmp_path)
         except FileNotFoundError:
             pass
 
 
+def _fetch_job(bucket, cache: "analysis_cache.AnalysisCache", job: _Job, pipeline_cfg: dict) -> None:
+    """Download, hash and look the upload up in the analysis cache.
+
+    Runs on the fetch pool. A result hit skips analysis entirely; a raw
+    hit (same audio, different thresholds) skips inference.
+    """
+    _download_wav(bucket, job.id, job.tmp_path)
+    job.result_key, job.raw_key = analysis_cache.cache_keys(
+        analysis_cache.sha256_of(job.tmp_path), MODEL_VERSION, pipeline_cfg,
+    )
+    hit = cache.get_result(job.result_key)
+    if hit is not None:
+        job.cached_result = hit[0]
+        metrics.CACHE_LOOKUPS.labels(result="result_hit").inc()
+        return
+    job.cached_raw = cache.get_raw(job.raw_key)
+    metrics.CACHE_LOOKUPS.labels(result="raw_hit" if job.cached_raw else "miss").inc()
+
+
+def _finish_job(conn, db, job: _Job, result) -> None:
+    """Persist one analysed job and mark it done."""
+    if result.detections:
+        with metrics.STAGE_SECONDS.labels(stage="persist").time():
+            _persist_detections(
+                conn, db, job.id, result.detections,
+                job.detection_time, result.pipeline_version,
+            )
+        for _, pred in result.detections:
+            metrics.DETECTIONS.labels(predicted_class=pred["predicted_class"]).inc()
+        metrics.JOBS.labels(outcome="detections").inc()
+        _mark_done(
+            job.ref, result.detections, result.duration_seconds,
+            stats=result.stats,
+            pipeline_version=result.pipeline_version,
+        )
+        print(
+            f"[WORKER] Job {job.id}: {len(result.detections)} detections "
+            f"({result.duration_seconds:.1f}s audio, stats={result.stats})"
+        )
+    else:
+        human = bat_pipeline.humanize_rejection(result.rejection_reason)
+        metrics.JOBS.labels(outcome="no_detections").inc()
+        metrics.REJECTIONS.labels(reason=metrics.clean_reason(result.rejection_reason)).inc()
+        _mark_done(
+            job.ref, [], result.duration_seconds,
+            rejection_reason=result.rejection_reason,
+            rejection_message=human,
+            stats=result.stats,
+            pipeline_version=result.pipeline_version,
+        )
+        print(
+            f"[WORKER] Job {job.id}: 0 detections "
+            f"(reason={result.rejection_reason}, stats={result.stats})"
+        )
+
+
+def _fail_job(job: _Job, exc: BaseException) -> None:
+    metrics.JOBS.labels(outcome="error").inc()
+    print(f"[WORKER] Job {job.id} failed: {exc}")
+    traceback.print_exception(type(exc), exc, exc.__traceback__)
+    try:
+        _mark_error(job.ref, f"{type(exc).__name__}: {exc}")
+    except Exception as e:
+        print(f"[WORKER] Job {job.id}: could not record error: {e}")
+
+
 # ---------------------------------------------------------------------------
 #  Main loop
 # ---------------------------------------------------------------------------
 
+def run_queue(conn, db, bucket, pipeline_cfg) -> None:
+    """Claim → prefetch → analyse → persist, with bounded concurrency.
+
+    At most ``WORKER_PREFETCH`` claimed jobs wait (downloading or
+    downloaded) while up to ``WORKER_ANALYSIS_PROCS`` are analysed. New
+    jobs are only claimed when a slot is free, so a stopped worker never
+    holds more than that many jobs in ``processing``.
+
+    The loop sleeps on one ``wake`` event, set by the job listener and
+    by every download / analysis future as it completes. Polling only
+    happens while the listener is down.
+
+    Downloads are hashed and looked up in the analysis cache on the
+    fetch threads: an exact repeat is persisted straight from the cached
+    result, a threshold-only change is re-gated here without inference.
+    Analysis processes return the ``RawAnalysis``; gates run in this
+    process so both cache levels can be filled.
+    """
+    downloads = {}   # future -> _Job
+    ready: deque = deque()
+    analyses = {}    # future -> _Job
+    wake = threading.Event()
+    watch = PendingJobWatch(db, wake)
+    cache = analysis_cache.AnalysisCache(bucket, tag="WORKER")
+    raw_cfg, gate_cfg = bat_pipeline.split_pipeline_config(pipeline_cfg)
+    next_poll = 0.0
+    fetch_pool = ThreadPoolExecutor(max_workers=WORKER_PREFETCH, thread_name_prefix="wav-fetch")
+    analysis_pool = _new_analysis_pool()
+    try:
+        while True:
+            # Cleared before looking at state, so a completion or
+            # snapshot landing mid-iteration still cuts the wait short.
+            wake.clear()
+            try:
+                conn = ensure_connection(conn)
+
+                # Finished downloads join the ready queue.
+                for fut in [f for f in downloads if f.done()]:
+                    job = downloads.pop(fut)
+                    if fut.exception() is not None:
+                        _fail_job(job, fut.exception())
+                        job.cleanup()
+                    else:
+                        ready.append(job)
+
+                # Finished analyses get persisted here, on the one
+                # thread that owns the DB connection and Firestore writes.
+                for fut in [f for f in analyses if f.done()]:
+                    job = analyses.pop(fut)
+                    metrics.STAGE_SECONDS.labels(stage="pipeline").observe(
+                        time.monotonic() - job.analysis_started)
+                    try:
+                        raw = fut.result()
+                        metrics.AUDIO_SECONDS.inc(raw.duration_seconds or 0)
+                        result = bat_pipeline.apply_gates(raw, **gate_cfg)
+                        _finish_job(conn, db, job, result)
+                        fetch_pool.submit(cache.put_raw, job.raw_key, raw)
+                        fetch_pool.submit(cache.put_result, job.result_key, result)
+                    except Exception as e:  # incl. BrokenProcessPool
+                        _fail_job(job, e)
+                    finally:
+                        job.cleanup()
+                        metrics.LAST_JOB_TS.set_to_current_time()
+
+                if getattr(analysis_pool, "_broken", False):
+                    # A child died (OOM on a huge WAV, usually); its jobs
+                    # were failed above. Start a fresh pool.
+                    print("[WORKER] Analysis pool broken — restarting")
+                    analysis_pool.shutdown(wait=False, cancel_futures=True)
+                    analysis_pool = _new_analysis_pool()
+
+                # Cache hits never need an analysis process.
+                for job in [j for j in ready if j.cached_result or j.cached_raw]:
+                    ready.remove(job)
+                    job.detection_time = datetime.utcnow()
+                    try:
+                        if job.cached_result is not None:
+                            print(f"[WORKER] Job {job.id}: cached result")
+                            result = job.cached_result
+                        else:
+                            print(f"[WORKER] Job {job.id}: cached raw analysis, re-gating")
+                            result = bat_pipeline.apply_gates(job.cached_raw, **gate_cfg)
+                            fetch_pool.submit(cache.put_result, job.result_key, result)
+                        _finish_job(conn, db, job, result)
+                    except Exception as e:
+                        _fail_job(job, e)
+                    finally:
+                        job.cleanup()
+                        metrics.LAST_JOB_TS.set_to_current_time()
+
+                while ready and len(analyses) < WORKER_ANALYSIS_PROCS:
+                    job = ready.popleft()
+                    job.detection_time = datetime.utcnow()
+                    job.analysis_started = time.monotonic()
+                    print(f"[WORKER] Processing job {job.id} ({job.filename})")
+                    fut = analysis_pool.submit(_analyse, job.tmp_path, raw_cfg)
+                    fut.add_done_callback(lambda _f: wake.set())
+                    analyses[fut] = job
+
+                room = WORKER_PREFETCH + WORKER_ANALYSIS_PROCS - (
+                    len(downloads) + len(ready) + len(analyses))
+                listening = watch.ensure()
+                claimed = []
+                if room > 0 and listening:
+                    refs = watch.candidates()
+                    if refs:
+                        claimed, tried = _claim_refs(db, refs, room)
+                        watch.discard(tried)
+                elif room > 0 and time.monotonic() >= next_poll:
+                    # Listener down: reconcile by polling until it's back.
+                    claimed = _claim_pending_jobs(db, room)
+                    next_poll = time.monotonic() + POLL_INTERVAL_SEC
+                for job_ref, job_data in claimed:
+                    job = _Job(job_ref, job_data)
+                    fut = fetch_pool.submit(_fetch_job, bucket, cache, job, pipeline_cfg)
+                    fut.add_done_callback(lambda _f: wake.set())
+                    downloads[fut] = job
+                if claimed:
+                    continue
+
+                metrics.IN_PROGRESS.set(len(analyses))
+                metrics.PREFETCHED.set(len(downloads) + len(ready))
+
+                wake.wait(IDLE_WAKE_SEC if listening else POLL_INTERVAL_SEC)
+            except Exception as e:
+                print(f"[WORKER] Loop error: {e}")
+                traceback.print_exc()
+                time.sleep(POLL_INTERVAL_SEC)
+    finally:
+        watch.close()
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        analysis_pool.shutdown(wait=False, cancel_futures=True)
+
+
 def main():
+    metrics.start_metrics_server()
     print("[WORKER] Initializing Firebase...")
     db = init_firebase()
     bucket = fb_storage.bucket()
     print(f"[WORKER] Firebase connected — bucket={bucket.name}")
 
-    print(f"[WORKER] Loading groups classifier from {MODEL_PATH}")
-    classifier_model, classifier_ckpt = load_groups_classifier(MODEL_PATH)
+    # Each analysis process loads its own copy; loading it here too makes
+    # a bad checkpoint fail at startup instead of breaking every job.
+    _, classifier_ckpt = load_groups_classifier(MODEL_PATH)
     print(
-        f"[WORKER] Classifier ready: {classifier_ckpt['class_names']} "
-        f"(model_version={MODEL_VERSION})"
+        f"[WORKER] Classifier: {classifier_ckpt['class_names']} "
+        f"(model_version={MODEL_VERSION}, path={MODEL_PATH})"
     )
 
     pipeline_cfg = _load_pipeline_cfg()
@@ -379,25 +730,11 @@ def main():
 
     conn = get_db_connection()
     mode = "Firestore + Postgres" if conn else "Firestore-only"
-    print(f"[WORKER] Ready ({mode}). Polling every {POLL_INTERVAL_SEC}s...")
-
-    while True:
-        try:
-            conn = ensure_connection(conn)
-            claimed = _claim_next_pending_job(db)
-            if claimed:
-                job_ref, job_data = claimed
-                process_job(
-                    conn, db, bucket,
-                    classifier_model, classifier_ckpt, pipeline_cfg,
-                    job_ref, job_data,
-                )
-                continue
-            time.sleep(POLL_INTERVAL_SEC)
-        except Exception as e:
-            print(f"[WORKER] Loop error: {e}")
-            traceback.print_exc()
-            time.sleep(POLL_INTERVAL_SEC)
+    print(
+        f"[WORKER] Ready ({mode}) as {WORKER_ID}: {WORKER_ANALYSIS_PROCS} analysis "
+        f"process(es), prefetch {WORKER_PREFETCH}, listening for pending jobs..."
+    )
+    run_queue(conn, db, bucket, pipeline_cfg)
 
 
 if __name__ == "__main__":
@@ -2,10 +2,9 @@ import asyncio
 import fcntl
 import re
 import subprocess
-from tempfile import TemporaryDirectory
-from typing import Any, AsyncGenerator
+import time
+from typing import Any, AsyncGenerator, Tuple
 
-import librosa
 import numpy as np
 
 LOCK_PATH = "/locks/audio_device.lock"
@@ -34,30 +33,57 @@ class AudioDevice:
             raise ValueError(f'Multiple devices found matching `{name}` -> {devices}')
         return devices[0]
 
-    async def continuous_capture(
-        self, sample_duration: int = 1, capture_delay: int = 0
-    ) -> AsyncGenerator[np.ndarray, Any]:
-        with TemporaryDirectory() as temp_dir:
-            temp_file = f'{temp_dir}/audio.wav'
-            command = (
-                f'arecord -d {sample_duration} -D {self.name} '
-                f'-f {self.format} -r {self.sampling_rate} '
-                f'-c {self.channels} -q {temp_file}'
+    async def capture_chunk(self, duration: int) -> Tuple[float, np.ndarray]:
+        """Record ``duration`` seconds → ``(start unix time, mono float32 audio)``.
+
+        arecord writes raw PCM to a pipe (no temp WAV, no decode) and
+        runs as an asyncio subprocess, so the event loop — and the
+        inference consumer on it — keeps going while it records. The
+        device lock is shared with batdetect-service and taken on a
+        worker thread, since it can be held for a whole 15 s bat segment.
+        """
+        if self.format != "S16_LE":
+            raise ValueError(f'Unsupported capture format `{self.format}`')
+        lock_fd = open(LOCK_PATH, 'w')
+        try:
+            await asyncio.to_thread(fcntl.flock, lock_fd, fcntl.LOCK_EX)
+            started = time.time()
+            proc = await asyncio.create_subprocess_exec(
+                'arecord', '-d', str(duration), '-D', self.name,
+                '-f', self.format, '-r', str(self.sampling_rate),
+                '-c', str(self.channels), '-t', 'raw', '-q', '-',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
-            while True:
-                lock_fd = open(LOCK_PATH, 'w')
-                try:
-                    # Block until we acquire the exclusive lock
-                    fcntl.flock(lock_fd, fcntl.LOCK_EX)
-                    subprocess.check_call(command, shell=True)
-                except subprocess.CalledProcessError:
-                    print('[AST] Audio capture failed, retrying in 2s')
-                    await asyncio.sleep(2)
-                    continue
-                finally:
-                    fcntl.flock(lock_fd, fcntl.LOCK_UN)
-                    lock_fd.close()
-
-                data, sr = librosa.load(temp_file, sr=self.sampling_rate)
-                await asyncio.sleep(capture_delay)
-                yield data
+            pcm, stderr = await proc.communicate()
+            if proc.returncode != 0:
+                raise subprocess.CalledProcessError(
+                    proc.returncode, 'arecord',
+                    stderr=(stderr or b'').decode('utf-8', 'replace'),
+                )
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            lock_fd.close()
+
+        # Same scaling as soundfile / librosa.load: int16 / 32768, mono mean.
+        audio = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+        if self.channels > 1:
+            audio = audio[: len(audio) - len(audio) % self.channels]
+            audio = audio.reshape(-1, self.channels).mean(axis=1)
+        return started, audio
+
+    async def continuous_capture(
+        self, chunk_duration: int = 5
+    ) -> AsyncGenerator[Tuple[float, np.ndarray], Any]:
+        """``capture_chunk`` forever, retrying failed captures after 2 s.
+
+        The lock is released between chunks so batdetect-service gets
+        the device; a longer chunk means fewer gaps, a shorter one less
+        waiting for the bat segments.
+        """
+        while True:
+            try:
+                yield await self.capture_chunk(chunk_duration)
+            except subprocess.CalledProcessError as e:
+                print(f'[AST] Audio capture failed ({(e.stderr or "").strip()[:200]}), retrying in 2s')
+                await asyncio.sleep(2)
@@ -1,3 +1,5 @@
+from typing import List
+
 import numpy as np
 import pandas as pd
 import torch
@@ -5,21 +7,35 @@ from transformers import AutoFeatureExtractor, ASTForAudioClassification
 
 
 class AudioClassifier:
-    def __init__(self, pretrained_ast: str = "MIT/ast-finetuned-audioset-10-10-0.4593"):
+    def __init__(self, pretrained_ast: str = "MIT/ast-finetuned-audioset-10-10-0.4593",
+                 num_threads: int = 0):
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
         self.model = ASTForAudioClassification.from_pretrained(pretrained_ast)
+        self.model.eval()
         self.feature_extractor = AutoFeatureExtractor.from_pretrained(pretrained_ast)
         self.sampling_rate = self.feature_extractor.sampling_rate
 
-    async def predict(self, audio: np.ndarray, top_k: int = 5) -> pd.DataFrame:
+    def predict_batch(self, windows: List[np.ndarray], top_k: int = 5) -> List[pd.DataFrame]:
+        """Top-k labels for each window, in one extractor + forward pass.
+
+        Blocking and CPU-bound — call it off the event loop.
+        """
         with torch.no_grad():
             inputs = self.feature_extractor(
-                audio, sampling_rate=self.sampling_rate, return_tensors='pt'
+                windows, sampling_rate=self.sampling_rate, return_tensors='pt'
             )
-            logits = self.model(**inputs).logits[0]
-            proba = torch.sigmoid(logits)
-            top_k_indices = torch.argsort(proba)[-top_k:].flip(dims=(0,)).tolist()
+            proba = torch.sigmoid(self.model(**inputs).logits)
+            scores, indices = torch.topk(proba, min(top_k, proba.shape[1]), dim=1)
 
-            return pd.DataFrame({
-                'label': [self.model.config.id2label[i] for i in top_k_indices],
-                'score': [proba[i].item() for i in top_k_indices],
+        id2label = self.model.config.id2label
+        return [
+            pd.DataFrame({
+                'label': [id2label[i] for i in row_indices],
+                'score': row_scores,
             })
+            for row_scores, row_indices in zip(scores.tolist(), indices.tolist())
+        ]
+
+    async def predict(self, audio: np.ndarray, top_k: int = 5) -> pd.DataFrame:
+        return self.predict_batch([audio], top_k=top_k)[0]
@@ -2,16 +2,19 @@ import asyncio
 import os
 import signal
 import sys
+import time
 import uuid
 from datetime import datetime
 
-import librosa
+import numpy as np
 import psycopg2
 from psycopg2.extras import execute_values
 
+from src import metrics
 from src.audio_device import AudioDevice
 from src.classifier import AudioClassifier
-from src.spl import calculate_sound_pressure_level
+from src.resample import to_model_rate
+from src.spl import window_sound_pressure_levels
 
 
 def get_db_connection():
@@ -44,29 +47,75 @@ def flush_buffer(conn, buffer):
         return conn
     conn = ensure_connection(conn)
     try:
-        with conn.cursor() as cur:
+        with metrics.FLUSH_SECONDS.time(), conn.cursor() as cur:
             execute_values(cur, """
                 INSERT INTO classifications (label, score, spl, device, sync_id, sync_time)
                 VALUES %s
             """, buffer)
-        conn.commit()
+            conn.commit()
         print(f"[AST] Flushed {len(buffer)} records to local DB")
         buffer.clear()
     except Exception as e:
+        metrics.FLUSH_FAILURES.inc()
         print(f"[AST] Flush failed: {e}")
+    metrics.BUFFERED_ROWS.set(len(buffer))
     return conn
 
 
+def analyse_chunk(classifier, audio, sample_rate, hop_s=1.0, batch_size=8, top_k=5):
+    """Classify 1 s windows every ``hop_s`` across one captured chunk.
+
+    Returns ``(offset_s, predictions, spl)`` per window. One polyphase
+    resample for the whole chunk, ``batch_size`` windows per AST
+    forward pass, SPL for every window in one pass over the
+    original-rate audio. Blocking — runs on a worker thread.
+    """
+    model_sr = classifier.sampling_rate
+    with metrics.RESAMPLE_SECONDS.time():
+        audio_16k = to_model_rate(audio, sample_rate, model_sr)
+
+    window = model_sr  # 1 second
+    if len(audio_16k) < window // 2:
+        return []
+    hop = max(1, int(round(hop_s * model_sr)))
+    # A short tail still counts if it holds at least half a window.
+    starts = np.arange(0, max(1, len(audio_16k) - window // 2 + 1), hop)
+    spl = window_sound_pressure_levels(
+        audio, (starts * sample_rate) // model_sr, sample_rate,
+    )
+
+    out = []
+    for b in range(0, len(starts), batch_size):
+        batch = starts[b : b + batch_size]
+        t0 = time.monotonic()
+        predictions = classifier.predict_batch(
+            [audio_16k[s : s + window] for s in batch], top_k=top_k,
+        )
+        metrics.INFERENCE_SECONDS.observe(time.monotonic() - t0)
+        for j, (s, pred) in enumerate(zip(batch, predictions)):
+            out.append((float(s) / model_sr, pred, float(spl[b + j])))
+    return out
+
+
 async def main():
     device_id = os.getenv("DEVICE_NAME", "AudioMoth")
     sample_rate = int(os.getenv("SAMPLE_RATE", "192000"))
-    ast_sample_rate = 16000
+    # Capture in CAPTURE_CHUNK_S recordings (the device lock is released
+    # between them for batdetect-service) and classify 1 s windows every
+    # AST_HOP_S, AST_BATCH_SIZE windows per forward pass. AST_TORCH_THREADS
+    # caps the cores inference may take from batdetect-service.
+    chunk_s = int(os.getenv("CAPTURE_CHUNK_S", "5"))
+    hop_s = float(os.getenv("AST_HOP_S", "1.0"))
+    batch_size = max(1, int(os.getenv("AST_BATCH_SIZE", "8")))
+    torch_threads = int(os.getenv("AST_TORCH_THREADS", "1"))
+
+    metrics.start_metrics_server()
 
     print(f"[AST] Initializing audio device: {device_id}")
     audio = AudioDevice(name=device_id, sampling_rate=sample_rate)
 
     print("[AST] Loading AST model (this may take a minute on first run)...")
-    classifier = AudioClassifier()
+    classifier = AudioClassifier(num_threads=torch_threads)
     print("[AST] Model loaded successfully")
 
     conn = get_db_connection()
@@ -88,42 +137,64 @@ async def main():
     signal.signal(signal.SIGTERM, handle_shutdown)
     signal.signal(signal.SIGINT, handle_shutdown)
 
-    async for sample in audio.continuous_capture(sample_duration=1, capture_delay=0):
-        try:
-            sample_count += 1
-            sample_16k = librosa.resample(sample, orig_sr=sample_rate, target_sr=ast_sample_rate)
-            predictions = await classifier.predict(sample_16k, top_k=5)
-            spl = await calculate_sound_pressure_level(sample)
-
-            sync_id = str(uuid.uuid4())
-            sync_time = datetime.utcnow()
-
-            top_label = predictions.iloc[0]
-            print(f"[AST] #{sample_count} | {top_label['label']}: {top_label['score']:.3f} | SPL: {spl:.1f} dB")
-
-            for _, row in predictions.iterrows():
-                buffer.append((
-                    row['label'], float(row['score']), spl,
-                    device_id, sync_id, sync_time
-                ))
-
-            if len(buffer) >= 25:
-                conn = flush_buffer(conn, buffer)
-
-        except Exception as e:
-            print(f"[AST] Error processing sample #{sample_count}: {e}")
-            conn = ensure_connection(conn)
+    # Capture and inference overlap: the producer keeps recording while
+    # the consumer classifies the previous chunk on a worker thread. If
+    # inference falls behind, the producer blocks once 3 chunks wait.
+    chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=3)
+
+    async def capture_producer():
+        async for started, chunk in audio.continuous_capture(chunk_duration=chunk_s):
+            await chunk_queue.put((started, chunk))
+            metrics.QUEUE_DEPTH.set(chunk_queue.qsize())
+
+    async def classify_consumer():
+        nonlocal conn, sample_count
+        while True:
+            started, chunk = await chunk_queue.get()
+            metrics.QUEUE_DEPTH.set(chunk_queue.qsize())
             try:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "INSERT INTO capture_errors (service, error_type, message) "
-                        "VALUES (%s, %s, %s)",
-                        ("ast-service", type(e).__name__, str(e)[:500]),
-                    )
-                conn.commit()
-            except Exception:
-                pass
-
+                windows = await asyncio.to_thread(
+                    analyse_chunk, classifier, chunk, sample_rate,
+                    hop_s=hop_s, batch_size=batch_size, top_k=5,
+                )
+                for offset_s, predictions, spl in windows:
+                    sample_count += 1
+                    metrics.SAMPLES.inc()
+                    sync_id = str(uuid.uuid4())
+                    sync_time = datetime.utcfromtimestamp(started + offset_s)
+
+                    top_label = predictions.iloc[0]
+                    metrics.TOP_LABELS.labels(label=top_label['label']).inc()
+                    metrics.LAST_TOP_SCORE.set(float(top_label['score']))
+                    metrics.LAST_SPL.set(spl)
+                    print(f"[AST] #{sample_count} | {top_label['label']}: {top_label['score']:.3f} | SPL: {spl:.1f} dB")
+
+                    for _, row in predictions.iterrows():
+                        buffer.append((
+                            row['label'], float(row['score']), spl,
+                            device_id, sync_id, sync_time
+                        ))
+
+                metrics.BUFFERED_ROWS.set(len(buffer))
+                if len(buffer) >= 25:
+                    conn = flush_buffer(conn, buffer)
+
+            except Exception as e:
+                metrics.SAMPLE_ERRORS.labels(error=type(e).__name__).inc()
+                print(f"[AST] Error processing chunk after sample #{sample_count}: {e}")
+                conn = ensure_connection(conn)
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            "INSERT INTO capture_errors (service, error_type, message) "
+                            "VALUES (%s, %s, %s)",
+                            ("ast-service", type(e).__name__, str(e)[:500]),
+                        )
+                    conn.commit()
+                except Exception:
+                    pass
+
+    await asyncio.gather(capture_producer(), classify_consumer())
 
 if __name__ == "__main__":
     asyncio.run(main())
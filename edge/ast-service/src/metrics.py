@@ -0,0 +1,36 @@
+"""Prometheus metrics for ast-service, served on ``METRICS_PORT`` (default 9102)."""
+
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+_SECONDS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+
+SAMPLES = Counter("ast_samples_total", "1 s windows classified")
+SAMPLE_ERRORS = Counter("ast_sample_errors_total", "Capture chunks whose processing raised", ["error"])
+TOP_LABELS = Counter("ast_top_label_total", "Top-1 AudioSet label per sample", ["label"])
+
+RESAMPLE_SECONDS = Histogram(
+    "ast_resample_seconds", "Polyphase resample to 16 kHz per capture chunk", buckets=_SECONDS_BUCKETS,
+)
+INFERENCE_SECONDS = Histogram(
+    "ast_inference_seconds", "AST forward pass per window batch", buckets=_SECONDS_BUCKETS,
+)
+FLUSH_SECONDS = Histogram(
+    "ast_flush_seconds", "classifications batch insert", buckets=_SECONDS_BUCKETS,
+)
+FLUSH_FAILURES = Counter("ast_flush_failures_total", "Failed classification flushes")
+
+QUEUE_DEPTH = Gauge("ast_queue_depth", "Captured chunks waiting for inference")
+BUFFERED_ROWS = Gauge("ast_buffered_rows", "Rows waiting for the next flush")
+LAST_SPL = Gauge("ast_last_spl_db", "Sound pressure level of the last sample")
+LAST_TOP_SCORE = Gauge("ast_last_top_score", "Top-1 score of the last sample")
+
+
+def start_metrics_server() -> None:
+    """Start the /metrics listener unless ``METRICS_ENABLED=false``."""
+    if os.getenv("METRICS_ENABLED", "true").lower() != "true":
+        return
+    port = int(os.getenv("METRICS_PORT", "9102"))
+    start_http_server(port, addr=os.getenv("METRICS_ADDR", "0.0.0.0"))
+    print(f"[AST] Metrics on :{port}/metrics")
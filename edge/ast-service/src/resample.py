@@ -0,0 +1,18 @@
+from math import gcd
+
+import numpy as np
+from scipy.signal import resample_poly
+
+
+def to_model_rate(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Polyphase resample ``audio`` from ``orig_sr`` to ``target_sr``.
+
+    192/256 kHz → 16 kHz are integer decimations (12×, 16×): one FIR
+    anti-alias filter evaluated only at the kept output samples, far
+    cheaper than librosa's default FFT-domain resampler on a whole
+    capture chunk.
+    """
+    if orig_sr == target_sr:
+        return audio.astype(np.float32, copy=False)
+    g = gcd(orig_sr, target_sr)
+    return resample_poly(audio, target_sr // g, orig_sr // g).astype(np.float32, copy=False)
@@ -0,0 +1,189 @@
+"""Content-addressed cache for offline WAV analysis.
+
+People re-upload the same WAV — to try permissive mode, after a UI
+glitch, or because a file sits in several datasets — and each upload
+used to rerun BatDetect2, the classifier, four spectrograms and the
+time-expanded render. Two cache levels, both in the Firebase Storage
+bucket the upload paths already use:
+
+* **Result** — ``<prefix>/result/<key>.json``, keyed by (audio sha256,
+  ``PIPELINE_VERSION``, ``MODEL_VERSION``, full effective pipeline
+  config). Holds the ``PipelineResult`` plus the artifact URLs rendered
+  so far (``add_artifacts``), so an exact repeat finishes without
+  decoding the audio.
+* **Raw** — ``<prefix>/raw/<key>.npz``, keyed by (audio sha256,
+  ``PIPELINE_VERSION``, ``MODEL_VERSION``, the config keys that change
+  inference — HPF, streaming, diagnostic threshold). Holds the
+  ``RawAnalysis``, so an upload that differs only in thresholds
+  (permissive mode, a retune) reruns just ``apply_gates``.
+
+Storage objects rather than Firestore docs because a long file's
+detections can exceed Firestore's 1 MB document limit. Objects under
+the prefix age out through the bucket lifecycle rule
+(``firebase/storage-lifecycle.json``); a miss only costs a recompute.
+
+Every method swallows its own errors: a cache problem must never fail
+an analysis. Shared by the upload worker and the Cloud Function (copied
+in by their Dockerfile / ``build.sh``, like ``bat_pipeline``).
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Optional, Tuple
+
+from src import bat_pipeline
+
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_PREFIX = os.getenv("ANALYSIS_CACHE_PREFIX", "analysis-cache")
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def sha256_of(src) -> str:
+    """Hex sha256 of a path or a seekable binary file object (rewound after)."""
+    h = hashlib.sha256()
+    if isinstance(src, (str, os.PathLike)):
+        with open(src, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+    else:
+        src.seek(0)
+        for chunk in iter(lambda: src.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+        src.seek(0)
+    return h.hexdigest()
+
+
+def _digest(*parts) -> str:
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def cache_keys(audio_sha256: str, model_version: str, pipeline_cfg: dict) -> Tuple[str, str]:
+    """``(result_key, raw_key)`` for one upload under one config."""
+    raw_cfg, _ = bat_pipeline.split_pipeline_config(pipeline_cfg)
+    result_key = _digest(
+        "result", audio_sha256, bat_pipeline.PIPELINE_VERSION, model_version, pipeline_cfg,
+    )
+    raw_key = _digest(
+        "raw", bat_pipeline.RAW_FORMAT_VERSION, audio_sha256,
+        bat_pipeline.PIPELINE_VERSION, model_version, raw_cfg,
+    )
+    return result_key, raw_key
+
+
+def result_to_dict(result: "bat_pipeline.PipelineResult") -> dict:
+    return {
+        "detections": [[det, pred] for det, pred in result.detections],
+        "rejection_reason": result.rejection_reason,
+        "stats": result.stats,
+        "duration_seconds": result.duration_seconds,
+        "pipeline_version": result.pipeline_version,
+    }
+
+
+def result_from_dict(d: dict) -> "bat_pipeline.PipelineResult":
+    return bat_pipeline.PipelineResult(
+        detections=[(det, pred) for det, pred in d["detections"]],
+        rejection_reason=d["rejection_reason"],
+        stats=d["stats"],
+        duration_seconds=d["duration_seconds"],
+        pipeline_version=d["pipeline_version"],
+    )
+
+
+class AnalysisCache:
+    """Result + raw cache over a ``google.cloud.storage`` bucket."""
+
+    def __init__(self, bucket, tag: str = "CACHE", enabled: bool = ANALYSIS_CACHE_ENABLED):
+        self.bucket = bucket
+        self.tag = tag
+        self.enabled = enabled
+
+    def _blob(self, kind: str, key: str, ext: str):
+        return self.bucket.blob(f"{ANALYSIS_CACHE_PREFIX}/{kind}/{key}.{ext}")
+
+    def _get(self, blob) -> Optional[bytes]:
+        from google.api_core.exceptions import NotFound
+        try:
+            return blob.download_as_bytes()
+        except NotFound:
+            return None
+
+    def get_result(self, key: str) -> Optional[Tuple["bat_pipeline.PipelineResult", dict]]:
+        """``(result, artifacts)`` for an exact repeat, else None."""
+        if not self.enabled:
+            return None
+        try:
+            data = self._get(self._blob("result", key, "json"))
+            if data is None:
+                return None
+            entry = json.loads(data)
+            return result_from_dict(entry["result"]), entry.get("artifacts") or {}
+        except Exception as e:
+            print(f"[{self.tag}] result cache read failed ({key[:12]}): {e}")
+            return None
+
+    def put_result(self, key: str, result, artifacts: Optional[dict] = None) -> None:
+        if not self.enabled:
+            return
+        try:
+            entry = {
+                "result": result_to_dict(result),
+                "artifacts": {k: v for k, v in (artifacts or {}).items() if v},
+                "created_at": time.time(),
+            }
+            self._blob("result", key, "json").upload_from_string(
+                json.dumps(entry, default=bat_pipeline.json_default),
+                content_type="application/json",
+            )
+        except Exception as e:
+            print(f"[{self.tag}] result cache write failed ({key[:12]}): {e}")
+
+    def add_artifacts(self, key: str, artifacts: dict) -> None:
+        """Merge artifacts rendered after the fact into a result entry.
+
+        Upload artifacts are rendered on demand, one at a time, long
+        after ``put_result``. A missing entry is left alone; two
+        concurrent merges can drop one URL, which only costs a re-render.
+        """
+        if not self.enabled or not artifacts:
+            return
+        try:
+            blob = self._blob("result", key, "json")
+            data = self._get(blob)
+            if data is None:
+                return
+            entry = json.loads(data)
+            entry["artifacts"] = {
+                **(entry.get("artifacts") or {}),
+                **{k: v for k, v in artifacts.items() if v},
+            }
+            blob.upload_from_string(
+                json.dumps(entry, default=bat_pipeline.json_default),
+                content_type="application/json",
+            )
+        except Exception as e:
+            print(f"[{self.tag}] artifact cache write failed ({key[:12]}): {e}")
+
+    def get_raw(self, key: str) -> Optional["bat_pipeline.RawAnalysis"]:
+        if not self.enabled:
+            return None
+        try:
+            data = self._get(self._blob("raw", key, "npz"))
+            return bat_pipeline.RawAnalysis.from_bytes(data) if data is not None else None
+        except Exception as e:
+            print(f"[{self.tag}] raw cache read failed ({key[:12]}): {e}")
+            return None
+
+    def put_raw(self, key: str, raw: "bat_pipeline.RawAnalysis") -> None:
+        if not self.enabled:
+            return
+        try:
+            self._blob("raw", key, "npz").upload_from_string(
+                raw.to_bytes(), content_type="application/octet-stream",
+            )
+        except Exception as e:
+            print(f"[{self.tag}] raw cache write failed ({key[:12]}): {e}")
@@ -36,7 +36,6 @@ from __future__ import annotations
 from typing import Optional, Tuple
 
 import numpy as np
-from scipy.signal import spectrogram
 
 
 # Bat echolocation band. NA bats of interest fall comfortably inside
@@ -58,6 +57,8 @@ def _bat_band_spectrogram(
     BatDetect2 uses internally, so we see the same kind of transient
     the detector would.
     """
+    from scipy.signal import spectrogram  # deferred: see bat_pipeline imports
+
     nperseg = max(int(nperseg_sec * sr), 32)
     noverlap = int(overlap * nperseg)
     freqs, _t, Sxx = spectrogram(
@@ -108,23 +109,68 @@ def has_bat_call_shape(
     All three must pass. Any failure returns a specific reason string.
     Returns ``(is_bat_call, reason, stats)``. ``stats`` always carries
     the measured numbers so the caller can log them for tuning.
+
+    Equivalent to ``judge_call_shape(measure_call_shape(...), ...)`` —
+    the split lets stored measurements be re-gated without the audio.
     """
-    stats = {
+    m = measure_call_shape(
+        audio, sr, start_time, end_time,
+        low_band_cutoff_hz=low_band_cutoff_hz, pad_ms=pad_ms,
+        frame_ms=frame_ms, frame_overlap=frame_overlap,
+    )
+    ok, reason = judge_call_shape(
+        m,
+        min_slope_khz_per_ms=min_slope_khz_per_ms,
+        max_low_band_ratio=max_low_band_ratio,
+        min_r2=min_r2,
+    )
+    stats = {k: m[k] for k in ("slope_khz_per_ms", "fit_r2", "low_band_ratio", "n_frames_used")}
+    # The single-pass check stopped before the sweep fit on broadband
+    # noise; keep the logged stats the same.
+    if reason.startswith("broadband_noise"):
+        stats.update(slope_khz_per_ms=None, fit_r2=None, n_frames_used=0)
+    return ok, reason, stats
+
+
+def measure_call_shape(
+    audio: np.ndarray,
+    sr: int,
+    start_time: float,
+    end_time: float,
+    low_band_cutoff_hz: float = 15000.0,
+    pad_ms: float = 10.0,
+    frame_ms: float = 1.0,
+    frame_overlap: float = 0.5,
+) -> dict:
+    """Threshold-free half of ``has_bat_call_shape``.
+
+    Returns every metric that can be computed, plus the structural
+    failure (if any) that stops the measurement: ``early_failure``
+    happens before the low-band ratio is known, ``late_failure`` after
+    it (not enough frames for the sweep fit). All values are plain
+    floats / ints / strings so the dict can be stored as JSON.
+    """
+    m = {
         "slope_khz_per_ms": None,
         "fit_r2": None,
         "low_band_ratio": None,
         "n_frames_used": 0,
+        "early_failure": None,
+        "late_failure": None,
     }
 
     if audio is None or audio.size == 0:
-        return False, "empty_audio", stats
+        m["early_failure"] = "empty_audio"
+        return m
     if end_time <= start_time:
-        return False, "invalid_bounds", stats
+        m["early_failure"] = "invalid_bounds"
+        return m
     # Guard against non-finite values (NaN/Inf) — scipy polyfit's
     # internal SVD raises LinAlgError on those, which would bubble
     # up as an uncaught exception in the main capture loop.
     if not np.isfinite(audio).all():
-        return False, "non_finite_audio", stats
+        m["early_failure"] = "non_finite_audio"
+        return m
 
     # Extract a padded window around the detection's time bounding box.
     # Padding matters — BatDetect2 gives tight bounding boxes (~10 ms
@@ -136,10 +182,13 @@ def has_bat_call_shape(
     window = audio[lo:hi]
     min_samples = int(4 * frame_ms / 1000.0 * sr)
     if len(window) < min_samples:
-        return False, f"window_too_short({len(window)}smp)", stats
+        m["early_failure"] = f"window_too_short({len(window)}smp)"
+        return m
 
     # Spectrogram. 1 ms frames give 1 kHz frequency resolution at
     # 256 kHz — fine enough to resolve LACI's ~0.4 kHz/ms sweep.
+    from scipy.signal import spectrogram
+
     nperseg = max(int(frame_ms / 1000.0 * sr), 64)
     noverlap = int(frame_overlap * nperseg)
     freqs, times, Sxx = spectrogram(
@@ -159,12 +208,14 @@ def has_bat_call_shape(
     low_band = freqs < low_band_cutoff_hz
     bat_band = freqs >= low_band_cutoff_hz
     if not low_band.any() or not bat_band.any():
-        return False, "bad_frequency_split", stats
+        m["early_failure"] = "bad_frequency_split"
+        return m
 
     # Frame with the loudest bat-band energy — anchors the measurement
     bat_max_per_frame = np.max(Sxx[bat_band, :], axis=0)
     if bat_max_per_frame.size == 0 or float(bat_max_per_frame.max()) <= 0:
-        return False, "bat_band_silent", stats
+        m["early_failure"] = "bat_band_silent"
+        return m
     peak_frame = int(np.argmax(bat_max_per_frame))
     # ±2 frame window around the peak (5 frames = ~5 ms at 1 ms frames)
     f0 = max(0, peak_frame - 2)
@@ -173,13 +224,12 @@ def has_bat_call_shape(
     peak_low = float(np.max(Sxx[low_band, f0:f1]))
     peak_bat = float(np.max(Sxx[bat_band, f0:f1]))
     if peak_bat <= 0:
-        return False, "bat_band_silent", stats
+        m["early_failure"] = "bat_band_silent"
+        return m
 
     low_band_ratio = peak_low / peak_bat
-    stats["low_band_ratio"] = round(low_band_ratio, 3)
-
-    if low_band_ratio > max_low_band_ratio:
-        return False, f"broadband_noise(lowband_ratio={low_band_ratio:.2f})", stats
+    m["low_band_ratio"] = round(low_band_ratio, 3)
+    m["_low_band_ratio_raw"] = low_band_ratio
 
     # ---- FM sweep with WEIGHTED LS (frames with more bat-band energy
     #      dominate the fit). Unweighted polyfit on a window containing
@@ -189,42 +239,66 @@ def has_bat_call_shape(
     bat_Sxx = Sxx[bat_band, :]
     bat_freqs = freqs[bat_band]
     if bat_Sxx.size == 0 or bat_Sxx.shape[1] < 4:
-        return False, "too_few_frames", stats
+        m["late_failure"] = "too_few_frames"
+        return m
 
     peak_freqs = bat_freqs[np.argmax(bat_Sxx, axis=0)]
     # Weight each frame by its bat-band peak energy (normalised).
     peak_per_frame = bat_max_per_frame  # reused from above
     w = peak_per_frame / (float(peak_per_frame.max()) + 1e-20)
-    stats["n_frames_used"] = int(len(times))
+    m["n_frames_used"] = int(len(times))
 
     # polyfit accepts per-point weights; these are sqrt(weight) internally.
     slope_hz_per_s, intercept = np.polyfit(times, peak_freqs, 1, w=w)
     slope_khz_per_ms = float(slope_hz_per_s) / 1_000_000.0
-    stats["slope_khz_per_ms"] = round(slope_khz_per_ms, 3)
+    m["slope_khz_per_ms"] = round(slope_khz_per_ms, 3)
+    m["_slope_raw"] = slope_khz_per_ms
 
     # R² on only the active frames (weight ≥ 0.3 of peak). That's the
     # frames where the call actually lives; scoring the fit against the
     # padding frames would be misleading.
     active = w >= 0.3
     if active.sum() < 4:
-        return False, "too_few_active_frames", stats
+        m["late_failure"] = "too_few_active_frames"
+        return m
     t_a = times[active]
     f_a = peak_freqs[active]
     predicted = slope_hz_per_s * t_a + intercept
     ss_res = float(np.sum((f_a - predicted) ** 2))
     ss_tot = float(np.sum((f_a - f_a.mean()) ** 2))
     r2 = 1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0
-    stats["fit_r2"] = round(r2, 3)
+    m["fit_r2"] = round(r2, 3)
+    m["_r2_raw"] = r2
+    return m
 
-    if r2 < min_r2:
-        return False, f"chaotic_peaks(r2={r2:.2f})", stats
 
+def judge_call_shape(
+    m: dict,
+    min_slope_khz_per_ms: float = -0.1,
+    max_low_band_ratio: float = 0.5,
+    min_r2: float = 0.2,
+) -> Tuple[bool, str]:
+    """Apply the shape thresholds to ``measure_call_shape`` output.
+
+    Checks run in the original order, so the reason string is the one
+    the single-pass check would have returned.
+    """
+    if m["early_failure"]:
+        return False, m["early_failure"]
+    low_band_ratio = m.get("_low_band_ratio_raw", m["low_band_ratio"])
+    if low_band_ratio > max_low_band_ratio:
+        return False, f"broadband_noise(lowband_ratio={low_band_ratio:.2f})"
+    if m["late_failure"]:
+        return False, m["late_failure"]
+    r2 = m.get("_r2_raw", m["fit_r2"])
+    if r2 < min_r2:
+        return False, f"chaotic_peaks(r2={r2:.2f})"
     # Real bat calls sweep down. min_slope_khz_per_ms is negative;
     # the measured slope must be more negative than that threshold.
-    if slope_khz_per_ms > min_slope_khz_per_ms:
-        return False, f"not_downward_sweep(slope={slope_khz_per_ms:+.2f}kHz/ms)", stats
-
-    return True, "ok", stats
+    slope = m.get("_slope_raw", m["slope_khz_per_ms"])
+    if slope > min_slope_khz_per_ms:
+        return False, f"not_downward_sweep(slope={slope:+.2f}kHz/ms)"
+    return True, "ok"
 
 
 def is_likely_bat_call(
@@ -242,41 +316,91 @@ def is_likely_bat_call(
 
     When ``is_bat`` is False the ``reason`` string includes the failing
     metric's value so callers can log it verbatim and tune later.
+    Equivalent to ``judge_segment(measure_segment(audio, sr), ...)``.
     """
+    return judge_segment(
+        measure_segment(audio, sr, stop_below_rms=min_rms),
+        min_rms=min_rms, min_snr_db=min_snr_db, min_burst_ratio=min_burst_ratio,
+    )
+
+
+def measure_segment(
+    audio: Optional[np.ndarray], sr: int, stop_below_rms: Optional[float] = None,
+) -> dict:
+    """Threshold-free half of ``is_likely_bat_call``.
+
+    ``early_failure`` stops everything; ``snr_failure`` happens after
+    RMS is known, ``burst_failure`` after SNR. JSON-safe values only.
+    ``stop_below_rms`` skips the spectrogram when the RMS gate would
+    reject anyway (the live path); leave it None to measure everything.
+    """
+    m = {
+        "rms": None,
+        "snr_db": None,
+        "burst_ratio": None,
+        "early_failure": None,
+        "snr_failure": None,
+        "burst_failure": None,
+    }
     if audio is None or audio.size == 0:
-        return False, "empty_audio"
+        m["early_failure"] = "empty_audio"
+        return m
     if not np.isfinite(audio).all():
-        return False, "non_finite_audio"
+        m["early_failure"] = "non_finite_audio"
+        return m
 
     audio_f = audio.astype(np.float32, copy=False)
 
     # ---- Test 1 — RMS floor (catches near-silent segments) ----
-    rms = float(np.sqrt(np.mean(audio_f ** 2)))
-    if rms < min_rms:
-        return False, f"rms_too_low({rms:.4f})"
+    m["rms"] = float(np.sqrt(np.mean(audio_f ** 2)))
+    if stop_below_rms is not None and m["rms"] < stop_below_rms:
+        return m
 
     # ---- Test 2 — peak-to-median SNR inside the bat band ----
     Sxx = _bat_band_spectrogram(audio_f, sr)
     if Sxx.size == 0:
-        return False, "bat_band_empty"
+        m["snr_failure"] = "bat_band_empty"
+        return m
 
     peak = float(np.max(Sxx))
     median = float(np.median(Sxx))
     if median <= 0 or peak <= 0:
-        return False, "bat_band_degenerate"
+        m["snr_failure"] = "bat_band_degenerate"
+        return m
     # Magnitude spectrogram → 20 log10
-    snr_db = 20.0 * np.log10(peak / median)
-    if snr_db < min_snr_db:
-        return False, f"snr_too_low({snr_db:.1f}dB)"
+    m["snr_db"] = float(20.0 * np.log10(peak / median))
 
     # ---- Test 3 — temporal burst (peak frame vs median frame) ----
     frame_peaks = np.max(Sxx, axis=0)
     top_frame = float(np.percentile(frame_peaks, 95))
     median_frame = float(np.median(frame_peaks))
     if median_frame <= 0 or top_frame <= 0:
-        return False, "frame_stats_degenerate"
-    burst = top_frame / median_frame
+        m["burst_failure"] = "frame_stats_degenerate"
+        return m
+    m["burst_ratio"] = top_frame / median_frame
+    return m
+
+
+def judge_segment(
+    m: dict,
+    min_rms: float = 0.002,
+    min_snr_db: float = 10.0,
+    min_burst_ratio: float = 3.0,
+) -> Tuple[bool, str]:
+    """Apply the validator thresholds to ``measure_segment`` output."""
+    if m["early_failure"]:
+        return False, m["early_failure"]
+    rms = m["rms"]
+    if rms < min_rms:
+        return False, f"rms_too_low({rms:.4f})"
+    if m["snr_failure"]:
+        return False, m["snr_failure"]
+    snr_db = m["snr_db"]
+    if snr_db < min_snr_db:
+        return False, f"snr_too_low({snr_db:.1f}dB)"
+    if m["burst_failure"]:
+        return False, m["burst_failure"]
+    burst = m["burst_ratio"]
     if burst < min_burst_ratio:
         return False, f"no_burst({burst:.2f}x)"
-
     return True, "ok"
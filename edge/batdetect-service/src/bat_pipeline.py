@@ -31,21 +31,45 @@ The return value carries ``rejection_reason`` even on zero-detection
 results so upload-driven UIs can tell the user *why* nothing was
 identified instead of showing a blank "0 detections" card.
 
+Long files (full-night uploads) are analysed in **overlapping windows**
+instead of one shot — see ``iter_audio_windows``. Each window is read,
+resampled and run through gates 1-4 on its own, so memory stays at one
+window's worth however long the file is; detections are merged across
+window boundaries and the per-file ``PipelineResult`` (``stats``,
+``rejection_reason``) is rebuilt from the per-window outcomes.
+
+The work is split in two. ``analyse_raw`` does everything expensive —
+HPF, BatDetect2 at the diagnostic threshold, the classifier, and the
+threshold-free shape / validator *measurements* — into a
+``RawAnalysis``; ``apply_gates`` then applies the thresholds. A stored
+``RawAnalysis`` can be re-gated with different thresholds in
+milliseconds, without the audio or the models.
+
 Pipeline changes bump ``PIPELINE_VERSION``. Every detection row written
 carries the version so Pi and Cloud rows can be compared across deploys.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+import io
+import json
+import os
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
-from batdetect2 import api as bat_api
-from scipy.signal import butter, sosfiltfilt
 
-from src.audio_validator import has_bat_call_shape, is_likely_bat_call
-from src.classifier import classify
+from src.audio_validator import (
+    judge_call_shape,
+    judge_segment,
+    measure_call_shape,
+    measure_segment,
+)
+
+# batdetect2 / torch (via ``src.classifier``) and scipy.signal are
+# imported inside the functions that use them. Importing this module
+# then costs numpy only, so the cold-start paths that never run
+# inference — re-gating, artifact renders — skip seconds of imports.
 
 PIPELINE_VERSION = "v1-2026-04-22"
 
@@ -63,6 +87,24 @@ DIAGNOSTIC_BD_THRESHOLD = 0.1
 # and the comment on the threshold gate below.
 CLASSIFIER_TRAINING_DET_THRESHOLD = 0.5
 
+# Streaming defaults. Files longer than STREAM_MIN_DURATION_S are read
+# STREAM_WINDOW_S at a time, padded by STREAM_OVERLAP_S on each side so
+# a call straddling a boundary is whole in at least one window (bat
+# calls last < 50 ms; the pad also swallows resample / HPF edge
+# transients). Live Pi segments (15 s) never take this path.
+STREAM_MIN_DURATION_S = 120.0
+STREAM_WINDOW_S = 60.0
+STREAM_OVERLAP_S = 1.0
+
+# BatDetect2's default ``target_samp_rate``, for callers that only read
+# or render audio and shouldn't import batdetect2 to learn it.
+# ``analyse_raw`` reads the live config.
+BD_TARGET_SAMPLE_RATE = 256000
+
+# Two detections from neighbouring windows whose start times differ by
+# less than this are the same call seen twice.
+BOUNDARY_MERGE_TOL_S = 0.01
+
 
 # -----------------------------------------------------------------------------
 # HPF design — cached by (cutoff, rate, order).
@@ -74,6 +116,7 @@ _hpf_cache: Dict[Tuple[float, int, int], np.ndarray] = {}
 def _get_hpf_sos(cutoff_hz: float, sample_rate: int, order: int) -> np.ndarray:
     key = (float(cutoff_hz), int(sample_rate), int(order))
     if key not in _hpf_cache:
+        from scipy.signal import butter
         _hpf_cache[key] = butter(
             order, cutoff_hz, btype="highpass", fs=sample_rate, output="sos"
         )
@@ -82,6 +125,7 @@ def _get_hpf_sos(cutoff_hz: float, sample_rate: int, order: int) -> np.ndarray:
 
 def _apply_hpf(audio: np.ndarray, sos: np.ndarray) -> np.ndarray:
     """Zero-phase Butterworth HPF. Preserves length and dtype."""
+    from scipy.signal import sosfiltfilt
     return sosfiltfilt(sos, audio).astype(audio.dtype, copy=False)
 
 
@@ -106,6 +150,7 @@ class PipelineResult:
     #   max_det_prob       float — highest det_prob this segment
     #   count_above_user   int  — detections ≥ user_threshold (pre-classifier)
     #   top_class          Optional[str] — raw BatDetect2 top-class label
+    #   windows            int  — only on streamed (windowed) runs
     stats: Dict[str, Any] = field(default_factory=dict)
 
     # Audio duration as loaded by BatDetect2 (seconds).
@@ -118,20 +163,423 @@ class PipelineResult:
 
 
 # -----------------------------------------------------------------------------
-# Main entry point
+# Bounded-memory audio access
 # -----------------------------------------------------------------------------
 
-def run_full_pipeline(
-    wav_path: str,
+@dataclass
+class AudioWindow:
+    """One slice of a long file, resampled to the detector rate."""
+
+    index: int
+    # Absolute time (s) of ``audio[0]`` within the file.
+    offset_s: float
+    # The part of the file this window owns. Detections starting outside
+    # [core_start_s, core_end_s) belong to a neighbouring window.
+    core_start_s: float
+    core_end_s: float
+    audio: np.ndarray
+
+
+def _to_target_rate(block: np.ndarray, native_sr: int, target_sr: int) -> np.ndarray:
+    """Mono-mix + resample the way ``bat_api.load_audio`` does."""
+    if block.ndim > 1:
+        block = block.mean(axis=1)
+    block = np.ascontiguousarray(block, dtype=np.float32)
+    if native_sr != target_sr and len(block):
+        import librosa  # BatDetect2 dependency; imported lazily like torch
+        block = librosa.resample(
+            block, orig_sr=native_sr, target_sr=target_sr, res_type="polyphase",
+        ).astype(np.float32, copy=False)
+    return block
+
+
+def _rewind(src) -> None:
+    """File objects are shared between passes; libsndfile expects offset 0."""
+    if hasattr(src, "seek"):
+        src.seek(0)
+
+
+def audio_duration(src) -> Optional[float]:
+    """Duration in seconds from the file header, or None if unreadable.
+
+    ``src`` is a path or a seekable binary file object (e.g. a Cloud
+    Storage ``blob.open("rb")`` reader).
+    """
+    import soundfile as sf
+    _rewind(src)
+    try:
+        with sf.SoundFile(src) as f:
+            return f.frames / float(f.samplerate)
+    except Exception:
+        return None
+
+
+def read_audio(src, target_sr: int = BD_TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Whole file, mono, at ``target_sr`` — ``bat_api.load_audio`` without batdetect2."""
+    import soundfile as sf
+    _rewind(src)
+    with sf.SoundFile(src) as f:
+        block = f.read(dtype="float32", always_2d=True)
+        sr = f.samplerate
+    return _to_target_rate(block, sr, target_sr)
+
+
+def load_audio_excerpt(src, start_s: float, duration_s: float, target_sr: int) -> np.ndarray:
+    """Read ``[start_s, start_s + duration_s)`` only, at ``target_sr``."""
+    import soundfile as sf
+    _rewind(src)
+    with sf.SoundFile(src) as f:
+        sr = f.samplerate
+        start = max(0, min(int(start_s * sr), f.frames))
+        f.seek(start)
+        block = f.read(int(duration_s * sr), dtype="float32", always_2d=True)
+    return _to_target_rate(block, sr, target_sr)
+
+
+def iter_audio_windows(
+    src,
+    target_sr: int,
+    window_s: float = STREAM_WINDOW_S,
+    overlap_s: float = STREAM_OVERLAP_S,
+) -> Iterator[AudioWindow]:
+    """Yield ``src`` as overlapping windows; only one is in memory at a time.
+
+    Cores tile the file exactly (``[k·window_s, (k+1)·window_s)``); each
+    window additionally carries ``overlap_s`` of context on both sides.
+    """
+    import soundfile as sf
+    _rewind(src)
+    with sf.SoundFile(src) as f:
+        sr = f.samplerate
+        total = f.frames
+        core = max(1, int(window_s * sr))
+        pad = max(0, int(overlap_s * sr))
+        for index, core_start in enumerate(range(0, total, core)):
+            core_end = min(core_start + core, total)
+            read_start = max(0, core_start - pad)
+            read_end = min(total, core_end + pad)
+            f.seek(read_start)
+            block = f.read(read_end - read_start, dtype="float32", always_2d=True)
+            yield AudioWindow(
+                index=index,
+                offset_s=read_start / sr,
+                core_start_s=core_start / sr,
+                core_end_s=core_end / sr,
+                audio=_to_target_rate(block, sr, target_sr),
+            )
+
+
+def owns_detection(window: AudioWindow, det: dict, tol_s: float = BOUNDARY_MERGE_TOL_S) -> bool:
+    """True if ``det`` (window-relative times) starts in ``window``'s core.
+
+    The core is widened by ``tol_s`` so a call right on the boundary is
+    kept by both neighbours; ``merge_boundary_duplicates`` then keeps
+    one of the two.
+    """
+    start = window.offset_s + det.get("start_time", 0.0)
+    return window.core_start_s - tol_s <= start < window.core_end_s + tol_s
+
+
+def shift_detection(det: dict, offset_s: float) -> dict:
+    """Copy of ``det`` with start/end moved from window to file time."""
+    out = dict(det)
+    out["start_time"] = det.get("start_time", 0.0) + offset_s
+    out["end_time"] = det.get("end_time", 0.0) + offset_s
+    return out
+
+
+def merge_boundary_duplicates(items: list, key=lambda x: x, tol_s: float = BOUNDARY_MERGE_TOL_S) -> list:
+    """Drop the weaker copy of calls seen by two neighbouring windows.
+
+    ``items`` carry a file-time detection dict (via ``key``) with a
+    ``"_window"`` index. Two items from *different* windows starting
+    within ``tol_s`` of each other are one call; the higher
+    ``det_prob`` survives. Returned sorted by start time.
+    """
+    items = sorted(items, key=lambda x: key(x).get("start_time", 0.0))
+    out: list = []
+    for item in items:
+        det = key(item)
+        if out:
+            prev = key(out[-1])
+            if (
+                prev.get("_window") != det.get("_window")
+                and det.get("start_time", 0.0) - prev.get("start_time", 0.0) < tol_s
+            ):
+                if det.get("det_prob", 0.0) > prev.get("det_prob", 0.0):
+                    out[-1] = item
+                continue
+        out.append(item)
+    return out
+
+
+# -----------------------------------------------------------------------------
+# Raw analysis — everything expensive, nothing threshold-dependent.
+# -----------------------------------------------------------------------------
+
+# ``run_full_pipeline`` kwargs that change what ``analyse_raw`` computes.
+# Everything else is a gate threshold that ``apply_gates`` can re-apply
+# to stored raw output in milliseconds.
+RAW_CONFIG_KEYS = (
+    "hpf_enabled", "hpf_cutoff_hz", "hpf_order",
+    "stream_min_duration_s", "stream_window_s", "stream_overlap_s",
+)
+GATE_CONFIG_KEYS = (
+    "user_threshold", "min_pred_conf",
+    "validator_enabled", "validator_min_rms", "validator_min_snr_db",
+    "validator_min_burst_ratio",
+    "fm_sweep_enabled", "fm_sweep_min_slope", "fm_sweep_max_low_band_ratio",
+    "fm_sweep_min_r2",
+)
+
+# Bumped when the ``RawAnalysis`` layout or its serialised form changes.
+RAW_FORMAT_VERSION = 1
+
+
+@dataclass
+class RawAnalysis:
+    """BatDetect2 output plus every gate measurement, for one file.
+
+    Holds the detections at the diagnostic threshold (file-relative
+    times), their 32-dim features, the classifier's prediction for each,
+    the threshold-free shape measurements per detection and the
+    validator measurements per analysed segment (the whole file, or one
+    per streaming window). ``apply_gates`` turns it into a
+    ``PipelineResult`` for any threshold set at or above
+    ``diag_threshold`` without touching the audio or the models.
+    """
+
+    detections: List[dict] = field(default_factory=list)
+    features: np.ndarray = field(default_factory=lambda: np.zeros((0, 32), np.float32))
+    predictions: List[dict] = field(default_factory=list)
+    shapes: List[dict] = field(default_factory=list)
+    # Index into ``segments`` for each detection.
+    segment_of: List[int] = field(default_factory=list)
+    # ``measure_segment`` output per segment; None where no detection
+    # needed it.
+    segments: List[Optional[dict]] = field(default_factory=list)
+    duration_seconds: float = 0.0
+    # 0 for a one-shot run, else the number of streaming windows.
+    n_windows: int = 0
+    diag_threshold: float = DIAGNOSTIC_BD_THRESHOLD
+    pipeline_version: str = PIPELINE_VERSION
+
+    def to_bytes(self) -> bytes:
+        """Compressed npz: the feature matrix plus one JSON column."""
+        meta = {
+            "format": RAW_FORMAT_VERSION,
+            "detections": self.detections,
+            "predictions": self.predictions,
+            "shapes": self.shapes,
+            "segment_of": self.segment_of,
+            "segments": self.segments,
+            "duration_seconds": self.duration_seconds,
+            "n_windows": self.n_windows,
+            "diag_threshold": self.diag_threshold,
+            "pipeline_version": self.pipeline_version,
+        }
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            features=np.asarray(self.features, dtype=np.float32),
+            meta=np.frombuffer(json.dumps(meta, default=json_default).encode(), dtype=np.uint8),
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RawAnalysis":
+        with np.load(io.BytesIO(data)) as z:
+            features = z["features"]
+            meta = json.loads(z["meta"].tobytes())
+        if meta.pop("format", None) != RAW_FORMAT_VERSION:
+            raise ValueError("unsupported RawAnalysis format")
+        return cls(features=features, **meta)
+
+
+def json_default(value):
+    # BatDetect2 and numpy hand back numpy scalars in a few places.
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"not JSON serialisable: {type(value).__name__}")
+
+
+def split_pipeline_config(cfg: dict) -> Tuple[dict, dict]:
+    """``run_full_pipeline`` kwargs → (``analyse_raw`` kwargs, ``apply_gates`` kwargs).
+
+    The diagnostic threshold is derived from ``user_threshold`` the same
+    way ``run_full_pipeline`` does, so a raw analysis is only reused for
+    thresholds it actually covers.
+    """
+    raw_cfg = {k: cfg[k] for k in RAW_CONFIG_KEYS if k in cfg}
+    gate_cfg = {k: cfg[k] for k in GATE_CONFIG_KEYS if k in cfg}
+    raw_cfg["diag_threshold"] = min(
+        DIAGNOSTIC_BD_THRESHOLD, cfg.get("user_threshold", DIAGNOSTIC_BD_THRESHOLD),
+    )
+    return raw_cfg, gate_cfg
+
+
+def warm_up_detector(
+    bd_config: Optional[dict] = None,
+    *,
+    duration_s: float = 0.25,
+    threshold: float = DIAGNOSTIC_BD_THRESHOLD,
+) -> int:
+    """One BatDetect2 forward pass on a synthetic bat call.
+
+    A 6 ms 60 → 25 kHz linear FM chirp in ``duration_s`` of faint noise.
+    A sine tone would not do: the detector ignores carriers, so only an
+    FM sweep exercises the detection head as well as the backbone. A
+    healthy model always fires on it, so zero detections at
+    ``threshold`` raises — the detector is in the degenerate state
+    described in BATDETECT2_STABILITY_FIX.md, and callers should crash
+    rather than silently report no calls. Returns the detection count.
+    """
+    from batdetect2 import api as bat_api
+    from scipy.signal import chirp
+
+    cfg = dict(bd_config if bd_config is not None else bat_api.get_config())
+    cfg["detection_threshold"] = threshold
+    sr = int(cfg.get("target_samp_rate", BD_TARGET_SAMPLE_RATE))
+    n = int(sr * 0.006)
+    t = np.linspace(0.0, 0.006, n, endpoint=False)
+    audio = 0.005 * np.random.default_rng(0).standard_normal(int(sr * duration_s)).astype(np.float32)
+    start = len(audio) // 3
+    audio[start:start + n] += 0.5 * chirp(t, f0=60_000, f1=25_000, t1=0.006, method="linear").astype(np.float32)
+    _seed_torch()
+    detections, _, _ = bat_api.process_audio(audio, config=cfg)
+    if not detections:
+        raise RuntimeError(
+            f"BatDetect2 warm-up saw 0 detections on a synthetic 60→25 kHz FM chirp "
+            f"at threshold {threshold} — model is in a degenerate state"
+        )
+    return len(detections)
+
+
+def _seed_torch() -> None:
+    # Pin torch RNG before every forward pass. Belt-and-braces for the
+    # Cloud Function nondeterminism where the same audio would return
+    # 221 raw detections on one request and 0 on the next (same warm
+    # worker). BatDetect2 doesn't advertise random behaviour but
+    # pinning here costs nothing and rules it out as a cause.
+    try:
+        import torch
+        torch.manual_seed(0)
+    except ImportError:
+        pass  # Pi edge path imports torch separately; absence = fine.
+
+
+def analyse_raw(
+    wav_path,
     classifier_model,
     classifier_ckpt,
     *,
     bd_config: Optional[dict] = None,
-    user_threshold: float = 0.3,
-    min_pred_conf: float = 0.6,
+    diag_threshold: float = DIAGNOSTIC_BD_THRESHOLD,
     hpf_enabled: bool = True,
     hpf_cutoff_hz: float = 16000.0,
     hpf_order: int = 4,
+    stream_min_duration_s: float = STREAM_MIN_DURATION_S,
+    stream_window_s: float = STREAM_WINDOW_S,
+    stream_overlap_s: float = STREAM_OVERLAP_S,
+) -> RawAnalysis:
+    """HPF → BatDetect2 → classifier → shape / validator *measurements*.
+
+    ``wav_path`` may also be a seekable binary file object, which is
+    always streamed. Paths to files longer than ``stream_min_duration_s``
+    (0 disables) are streamed in ``stream_window_s`` windows, padded by
+    ``stream_overlap_s``; otherwise the file is analysed in one shot.
+    """
+    from batdetect2 import api as bat_api
+    from src.classifier import classify
+
+    if bd_config is None:
+        bd_config = bat_api.get_config()
+    target_sr = int(bd_config.get("target_samp_rate", 256000))
+    diag_config = dict(bd_config)
+    diag_config["detection_threshold"] = diag_threshold
+    hpf_sos = _get_hpf_sos(hpf_cutoff_hz, target_sr, hpf_order) if hpf_enabled else None
+
+    streaming = not isinstance(wav_path, (str, os.PathLike))
+    if not streaming and stream_min_duration_s:
+        duration = audio_duration(wav_path)
+        streaming = duration is not None and duration > stream_min_duration_s
+
+    if streaming:
+        windows = iter_audio_windows(wav_path, target_sr, stream_window_s, stream_overlap_s)
+    else:
+        audio = bat_api.load_audio(wav_path)
+        duration_s = float(len(audio)) / float(target_sr) if target_sr else 0.0
+        windows = iter([AudioWindow(0, 0.0, 0.0, duration_s, audio)])
+
+    # (det in file time, feature row, prediction, shape, segment index)
+    records: List[tuple] = []
+    segments: List[Optional[dict]] = []
+    duration_s = 0.0
+    for win in windows:
+        duration_s = win.core_end_s
+        audio = _apply_hpf(win.audio, hpf_sos) if hpf_sos is not None else win.audio
+        segments.append(None)
+        _seed_torch()
+        detections, features, _ = bat_api.process_audio(audio, config=diag_config)
+        owned = [i for i, d in enumerate(detections) if not streaming or owns_detection(win, d)]
+        if not owned:
+            continue
+
+        preds = classify(features[owned], classifier_model, classifier_ckpt)
+        for i, pred in zip(owned, preds):
+            det = detections[i]
+            shape = measure_call_shape(
+                audio, target_sr, det.get("start_time", 0.0), det.get("end_time", 0.0),
+            )
+            if streaming:
+                det = shift_detection(det, win.offset_s)
+                det["_window"] = win.index
+            records.append((det, features[i], pred, shape, win.index))
+        segments[win.index] = measure_segment(audio, target_sr)
+        del audio, win, detections, features
+
+    if streaming:
+        records = merge_boundary_duplicates(records, key=lambda r: r[0])
+        for det, *_ in records:
+            det.pop("_window", None)
+
+    return RawAnalysis(
+        detections=[r[0] for r in records],
+        features=(
+            np.stack([np.asarray(r[1], dtype=np.float32) for r in records])
+            if records else np.zeros((0, 32), np.float32)
+        ),
+        predictions=[r[2] for r in records],
+        shapes=[r[3] for r in records],
+        segment_of=[r[4] for r in records],
+        segments=segments,
+        duration_seconds=duration_s,
+        n_windows=len(segments) if streaming else 0,
+        diag_threshold=diag_threshold,
+    )
+
+
+def reclassify(raw: RawAnalysis, classifier_model, classifier_ckpt) -> RawAnalysis:
+    """Copy of ``raw`` with predictions from another classifier checkpoint.
+
+    The classifier head only sees the stored 32-dim features, so a
+    retrained head can be evaluated on past data without BatDetect2.
+    """
+    from src.classifier import classify
+    return replace(raw, predictions=classify(raw.features, classifier_model, classifier_ckpt))
+
+
+# -----------------------------------------------------------------------------
+# Gates — thresholds only, milliseconds on any RawAnalysis.
+# -----------------------------------------------------------------------------
+
+def apply_gates(
+    raw: RawAnalysis,
+    *,
+    user_threshold: float = 0.3,
+    min_pred_conf: float = 0.6,
     validator_enabled: bool = True,
     validator_min_rms: float = 0.005,
     validator_min_snr_db: float = 10.0,
@@ -141,68 +589,44 @@ def run_full_pipeline(
     fm_sweep_max_low_band_ratio: float = 0.5,
     fm_sweep_min_r2: float = 0.2,
 ) -> PipelineResult:
-    """Run the full 4-gate analysis on a WAV file.
-
-    Parameters match the env-var knobs ``batdetect-service`` reads at
-    startup, so a Pi capture with default Docker env and a cloud-worker
-    upload with default pipeline kwargs produce identical output on the
-    same file.
+    """Gates 1-4 over stored measurements → the file's ``PipelineResult``.
 
-    ``classifier_model`` / ``classifier_ckpt`` come from
-    ``classifier.load_groups_classifier(model_path)``. Callers are
-    responsible for caching them across calls.
+    The rejection reason is the gate the last surviving detection fell
+    at, in gate order — the same code a one-shot run reports. The
+    validator is judged per segment: a detection survives only if its
+    own segment (whole file, or streaming window) passes.
     """
+    if user_threshold < raw.diag_threshold:
+        raise ValueError(
+            f"user_threshold {user_threshold} is below the raw analysis' "
+            f"diagnostic threshold {raw.diag_threshold}"
+        )
+    dets = raw.detections
     stats: Dict[str, Any] = {
-        "raw_count": 0,
+        "raw_count": len(dets),
         "max_det_prob": 0.0,
         "count_above_user": 0,
         "top_class": None,
     }
+    if raw.n_windows:
+        stats["windows"] = raw.n_windows
 
-    if bd_config is None:
-        bd_config = bat_api.get_config()
-
-    # ── Load + HPF ─────────────────────────────────────────────────
-    audio = bat_api.load_audio(wav_path)
-    target_sr = int(bd_config.get("target_samp_rate", 256000))
-    duration_s = float(len(audio)) / float(target_sr) if target_sr else 0.0
-
-    if hpf_enabled:
-        hpf_sos = _get_hpf_sos(hpf_cutoff_hz, target_sr, hpf_order)
-        audio = _apply_hpf(audio, hpf_sos)
-
-    # ── Gate 1 — BatDetect2 ────────────────────────────────────────
-    diag_config = dict(bd_config)
-    diag_config["detection_threshold"] = min(
-        DIAGNOSTIC_BD_THRESHOLD, user_threshold
-    )
-    # Pin torch RNG before every forward pass. Belt-and-braces for the
-    # Cloud Function nondeterminism where the same audio would return
-    # 221 raw detections on one request and 0 on the next (same warm
-    # worker). BatDetect2 doesn't advertise random behaviour but
-    # pinning here costs nothing and rules it out as a cause.
-    try:
-        import torch
-        torch.manual_seed(0)
-    except ImportError:
-        pass  # Pi edge path imports torch separately; absence = fine.
-    detections, features, _ = bat_api.process_audio(audio, config=diag_config)
-
-    if detections:
-        probs = [d.get("det_prob", 0.0) for d in detections]
-        stats["raw_count"] = len(detections)
-        stats["max_det_prob"] = float(max(probs))
-        stats["count_above_user"] = sum(1 for p in probs if p >= user_threshold)
-        top = max(detections, key=lambda d: d.get("det_prob", 0.0))
-        stats["top_class"] = top.get("class")
-
-    if not detections:
+    def reject(reason: str) -> PipelineResult:
         return PipelineResult(
-            rejection_reason="batdetect2_no_detections",
+            rejection_reason=reason,
             stats=stats,
-            duration_seconds=duration_s,
+            duration_seconds=raw.duration_seconds,
+            pipeline_version=raw.pipeline_version,
         )
 
+    # ── Gate 1 — BatDetect2 ────────────────────────────────────────
+    if not dets:
+        return reject("batdetect2_no_detections")
+    probs = [d.get("det_prob", 0.0) for d in dets]
+    top = max(range(len(dets)), key=lambda i: probs[i])
+    stats["max_det_prob"] = float(probs[top])
+    stats["top_class"] = dets[top].get("class")
+
     # User-threshold gate. Previous versions force-floored this at
     # CLASSIFIER_TRAINING_DET_THRESHOLD (0.5) to keep classifier inputs
     # in-distribution. April 2026 experiments on real Ohio AudioMoth
@@ -212,76 +636,133 @@ def run_full_pipeline(
     # (min_pred_conf 0.6, FM-sweep shape filter, audio-level validator)
     # absorb the out-of-distribution noise from 0.3-0.5 inputs without
     # leaking false positives. So we trust user_threshold as-is.
-    threshold = user_threshold
-    mask = np.array([d.get("det_prob", 0.0) >= threshold for d in detections])
-    if not mask.any():
-        return PipelineResult(
-            rejection_reason="all_below_user_threshold",
-            stats=stats,
-            duration_seconds=duration_s,
-        )
-
-    high_conf_dets = [d for d, m in zip(detections, mask) if m]
-    high_conf_feats = features[mask]
+    above = [i for i, p in enumerate(probs) if p >= user_threshold]
+    stats["count_above_user"] = len(above)
+    if not above:
+        return reject("all_below_user_threshold")
 
     # ── Gate 2 — Classifier head ───────────────────────────────────
-    preds = classify(high_conf_feats, classifier_model, classifier_ckpt)
-    kept = [
-        (d, p) for d, p in zip(high_conf_dets, preds)
-        if p["prediction_confidence"] >= min_pred_conf
-    ]
+    kept = [i for i in above if raw.predictions[i]["prediction_confidence"] >= min_pred_conf]
     if not kept:
-        return PipelineResult(
-            rejection_reason="all_below_min_pred_conf",
-            stats=stats,
-            duration_seconds=duration_s,
-        )
+        return reject("all_below_min_pred_conf")
 
     # ── Gate 3 — FM-sweep / low-band-ratio shape filter ────────────
     if fm_sweep_enabled:
-        passed = []
-        shape_rejections = []
-        for det, pred in kept:
-            ok, reason, _shape_stats = has_bat_call_shape(
-                audio, target_sr,
-                det.get("start_time", 0.0), det.get("end_time", 0.0),
+        passed, shape_rejections = [], []
+        for i in kept:
+            ok, reason = judge_call_shape(
+                raw.shapes[i],
                 min_slope_khz_per_ms=fm_sweep_min_slope,
                 max_low_band_ratio=fm_sweep_max_low_band_ratio,
                 min_r2=fm_sweep_min_r2,
             )
             if ok:
-                passed.append((det, pred))
+                passed.append(i)
             else:
                 shape_rejections.append(reason)
         if not passed:
             reason = shape_rejections[0] if shape_rejections else "shape_all_rejected"
-            return PipelineResult(
-                rejection_reason=f"shape:{reason}",
-                stats=stats,
-                duration_seconds=duration_s,
-            )
+            return reject(f"shape:{reason}")
         kept = passed
 
     # ── Gate 4 — Segment-level audio validator ─────────────────────
     if validator_enabled:
-        ok, reason = is_likely_bat_call(
-            audio, target_sr,
-            min_rms=validator_min_rms,
-            min_snr_db=validator_min_snr_db,
-            min_burst_ratio=validator_min_burst_ratio,
-        )
-        if not ok:
-            return PipelineResult(
-                rejection_reason=f"validator:{reason}",
-                stats=stats,
-                duration_seconds=duration_s,
-            )
+        verdicts: Dict[int, Tuple[bool, str]] = {}
+        passed, first_reason = [], None
+        for i in kept:
+            seg = raw.segment_of[i]
+            if seg not in verdicts:
+                verdicts[seg] = judge_segment(
+                    raw.segments[seg],
+                    min_rms=validator_min_rms,
+                    min_snr_db=validator_min_snr_db,
+                    min_burst_ratio=validator_min_burst_ratio,
+                )
+            ok, reason = verdicts[seg]
+            if ok:
+                passed.append(i)
+            elif first_reason is None:
+                first_reason = reason
+        if not passed:
+            return reject(f"validator:{first_reason}")
+        kept = passed
 
     return PipelineResult(
-        detections=kept,
+        detections=[(dets[i], raw.predictions[i]) for i in kept],
         rejection_reason=None,
         stats=stats,
-        duration_seconds=duration_s,
+        duration_seconds=raw.duration_seconds,
+        pipeline_version=raw.pipeline_version,
+    )
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+
+def run_full_pipeline(
+    wav_path,
+    classifier_model,
+    classifier_ckpt,
+    *,
+    bd_config: Optional[dict] = None,
+    user_threshold: float = 0.3,
+    min_pred_conf: float = 0.6,
+    hpf_enabled: bool = True,
+    hpf_cutoff_hz: float = 16000.0,
+    hpf_order: int = 4,
+    validator_enabled: bool = True,
+    validator_min_rms: float = 0.005,
+    validator_min_snr_db: float = 10.0,
+    validator_min_burst_ratio: float = 3.0,
+    fm_sweep_enabled: bool = True,
+    fm_sweep_min_slope: float = -0.1,
+    fm_sweep_max_low_band_ratio: float = 0.5,
+    fm_sweep_min_r2: float = 0.2,
+    stream_min_duration_s: float = STREAM_MIN_DURATION_S,
+    stream_window_s: float = STREAM_WINDOW_S,
+    stream_overlap_s: float = STREAM_OVERLAP_S,
+) -> PipelineResult:
+    """Run the full 4-gate analysis on a WAV file.
+
+    Parameters match the env-var knobs ``batdetect-service`` reads at
+    startup, so a Pi capture with default Docker env and a cloud-worker
+    upload with default pipeline kwargs produce identical output on the
+    same file.
+
+    ``classifier_model`` / ``classifier_ckpt`` come from
+    ``classifier.load_groups_classifier(model_path)``. Callers are
+    responsible for caching them across calls.
+
+    Shorthand for ``apply_gates(analyse_raw(...), ...)``; callers that
+    want to keep the raw analysis (see ``analysis_cache``) call the two
+    halves themselves.
+    """
+    raw = analyse_raw(
+        wav_path, classifier_model, classifier_ckpt,
+        bd_config=bd_config,
+        # BatDetect2 is queried at a permissive threshold so we can
+        # observe sub-user-threshold emissions for troubleshooting.
+        diag_threshold=min(DIAGNOSTIC_BD_THRESHOLD, user_threshold),
+        hpf_enabled=hpf_enabled,
+        hpf_cutoff_hz=hpf_cutoff_hz,
+        hpf_order=hpf_order,
+        stream_min_duration_s=stream_min_duration_s,
+        stream_window_s=stream_window_s,
+        stream_overlap_s=stream_overlap_s,
+    )
+    return apply_gates(
+        raw,
+        user_threshold=user_threshold,
+        min_pred_conf=min_pred_conf,
+        validator_enabled=validator_enabled,
+        validator_min_rms=validator_min_rms,
+        validator_min_snr_db=validator_min_snr_db,
+        validator_min_burst_ratio=validator_min_burst_ratio,
+        fm_sweep_enabled=fm_sweep_enabled,
+        fm_sweep_min_slope=fm_sweep_min_slope,
+        fm_sweep_max_low_band_ratio=fm_sweep_max_low_band_ratio,
+        fm_sweep_min_r2=fm_sweep_min_r2,
     )
 
 
@@ -31,13 +31,26 @@ class BatClassifierHead(nn.Module):
         return self.net(x)
 
 
+# Suffix of the pre-serialised copy written by ``export_fast_checkpoint``.
+FAST_CHECKPOINT_SUFFIX = ".fast.pt"
+
+
 def load_groups_classifier(model_path):
     """Load a checkpoint produced by train_classifier.py.
 
     Returns (model, ckpt) where ckpt holds class_names, scaler_mean, and
     scaler_scale — all needed at inference time.
+
+    ``*.fast.pt`` files (``export_fast_checkpoint``) hold tensors and
+    plain values only, so they load with ``weights_only`` + ``mmap``:
+    no pickle execution and no copy of the weights at load time.
     """
-    ckpt = torch.load(model_path, weights_only=False, map_location="cpu")
+    if str(model_path).endswith(FAST_CHECKPOINT_SUFFIX):
+        ckpt = torch.load(model_path, weights_only=True, mmap=True, map_location="cpu")
+        for key in ckpt.pop("numpy_keys", []):
+            ckpt[key] = ckpt[key].numpy()
+    else:
+        ckpt = torch.load(model_path, weights_only=False, map_location="cpu")
     model = BatClassifierHead(
         input_dim=ckpt["input_dim"],
         hidden_dims=tuple(ckpt["hidden_dims"]),
@@ -49,6 +62,33 @@ def load_groups_classifier(model_path):
     return model, ckpt
 
 
+def export_fast_checkpoint(model_path, out_path=None):
+    """Re-save a training checkpoint in the fast-loading form.
+
+    numpy arrays (the scaler) become tensors, recorded in ``numpy_keys``
+    so ``load_groups_classifier`` hands back the same ckpt shape; keys
+    holding anything else a ``weights_only`` load would refuse are
+    dropped. Returns the output path (default: ``<stem>.fast.pt`` next to
+    the input).
+    """
+    ckpt = torch.load(model_path, weights_only=False, map_location="cpu")
+    plain = (str, int, float, bool, type(None))
+    fast, numpy_keys = {}, []
+    for key, value in ckpt.items():
+        if isinstance(value, np.ndarray):
+            fast[key] = torch.from_numpy(np.ascontiguousarray(value))
+            numpy_keys.append(key)
+        elif key == "state_dict" or isinstance(value, plain + (torch.Tensor,)):
+            fast[key] = value
+        elif isinstance(value, (list, tuple)) and all(isinstance(v, plain) for v in value):
+            fast[key] = list(value)
+    fast["numpy_keys"] = numpy_keys
+    if out_path is None:
+        out_path = str(model_path).rsplit(".", 1)[0] + FAST_CHECKPOINT_SUFFIX
+    torch.save(fast, out_path)
+    return out_path
+
+
 def classify(features, model, ckpt):
     """Run the classifier on an (N, 32) feature matrix.
 
@@ -0,0 +1,229 @@
+"""Fixed-size ring-buffer event log.
+
+Per-segment heartbeats, rejection lines and per-detection detail used to
+go to stdout, which Docker keeps as ever-growing JSON-lines files on the
+SD card — and field diagnosis meant grepping through them. Those events
+now go here instead: typed records appended to a memory-mapped file of
+``EVENTLOG_SIZE_MB`` that wraps in place, so disk use is constant and
+the kernel coalesces the page writes instead of a log driver fsyncing
+each line.
+
+File layout::
+
+    [ header 64 B: magic | capacity | head | laps ][ data: capacity B ]
+
+Each record is an RFC 7464 JSON text sequence entry —
+``\\x1e{"t":…,"e":"rejection",…}\\n`` — with ``ensure_ascii`` JSON, so
+neither ``\\x1e`` nor ``\\n`` can occur inside a record. A reader starts
+at ``head`` (the oldest surviving byte once the ring has lapped), drops
+the fragment before the first separator, and keeps every entry that
+ends in a newline and parses. When a record doesn't fit before the end
+of the ring, the tail is zeroed and writing restarts at offset 0.
+
+High-rate types can be sampled: ``EVENTLOG_SAMPLE="segment=4"`` keeps
+one ``segment`` event in four, and each kept event carries ``"sr": 4``
+so counts can be scaled back up. Events can also echo a human-readable
+line to stdout when ``EVENTLOG_ECHO=true`` (off by default — that's the
+point).
+
+One writer per file: each service opens ``<EVENTLOG_DIR>/<service>.ring``.
+Stdlib only, so the query CLI (``edge/scripts/events.py``) can import it
+anywhere. Shared with sync-service: its Dockerfile copies this file, the
+same way analysis-api copies the pipeline modules.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+EVENTLOG_DIR = os.getenv("EVENTLOG_DIR", "/eventlog")
+EVENTLOG_SIZE_MB = int(os.getenv("EVENTLOG_SIZE_MB", "8"))
+EVENTLOG_ECHO = os.getenv("EVENTLOG_ECHO", "false").lower() == "true"
+EVENTLOG_SAMPLE = os.getenv("EVENTLOG_SAMPLE", "segment=4")
+
+MAGIC = b"EVRING01"
+_HEADER = struct.Struct("<8sQQQ")  # magic, capacity, head, laps
+HEADER_SIZE = 64
+RECORD_SEP = b"\x1e"
+MAX_RECORD_BYTES = 8192
+
+
+def parse_sample(spec: str) -> Dict[str, int]:
+    """``"segment=4,sync_cycle=2"`` → ``{"segment": 4, "sync_cycle": 2}``.
+
+    >>> parse_sample("segment=4, sync_cycle=2")
+    {'segment': 4, 'sync_cycle': 2}
+    >>> parse_sample("")
+    {}
+    """
+    out = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        name, n = part.split("=", 1)
+        out[name.strip()] = max(1, int(n))
+    return out
+
+
+def encode(record: Dict) -> bytes:
+    data = json.dumps(record, separators=(",", ":"), default=str).encode()
+    if len(data) > MAX_RECORD_BYTES:
+        data = json.dumps(
+            {"t": record.get("t"), "e": record.get("e"), "truncated": len(data)},
+            separators=(",", ":"),
+        ).encode()
+    return RECORD_SEP + data + b"\n"
+
+
+def decode(region: bytes, skip_first: bool) -> Iterator[Dict]:
+    """Yield the intact records in one contiguous slice of the ring."""
+    chunks = region.split(RECORD_SEP)
+    if skip_first:
+        chunks = chunks[1:]
+    for chunk in chunks:
+        chunk = chunk.rstrip(b"\x00")
+        if not chunk.endswith(b"\n"):
+            continue
+        try:
+            yield json.loads(chunk)
+        except ValueError:
+            continue
+
+
+class RingLog:
+    """Append-only JSON-sequence ring over an mmapped file."""
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != HEADER_SIZE + capacity:
+                os.ftruncate(fd, HEADER_SIZE + capacity)
+            self._mm = mmap.mmap(fd, HEADER_SIZE + capacity)
+        finally:
+            os.close(fd)
+        magic, cap, head, laps = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or cap != capacity or head > capacity:
+            # New file, or resized: start over rather than misread it.
+            self._mm[:] = bytes(HEADER_SIZE + capacity)
+            head, laps = 0, 0
+        self._head = head
+        self._laps = laps
+        self._write_header()
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(self._mm, 0, MAGIC, self.capacity, self._head, self._laps)
+
+    def append(self, record: Dict) -> None:
+        data = encode(record)
+        with self._lock:
+            start = HEADER_SIZE + self._head
+            if self._head + len(data) > self.capacity:
+                self._mm[start:HEADER_SIZE + self.capacity] = bytes(self.capacity - self._head)
+                self._head = 0
+                self._laps += 1
+                start = HEADER_SIZE
+            self._mm[start:start + len(data)] = data
+            self._head += len(data)
+            self._write_header()
+
+    def close(self) -> None:
+        with self._lock:
+            self._mm.flush()
+            self._mm.close()
+
+
+def read_ring(path: str) -> Iterator[Dict]:
+    """Every intact record in ``path``, oldest first."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if len(raw) < HEADER_SIZE:
+        return
+    magic, cap, head, laps = _HEADER.unpack_from(raw, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not an event ring")
+    data = raw[HEADER_SIZE:HEADER_SIZE + cap]
+    if laps:
+        yield from decode(data[head:], skip_first=True)
+    yield from decode(data[:head], skip_first=False)
+
+
+def query(
+    paths: Iterable[str],
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    types: Optional[Iterable[str]] = None,
+) -> list:
+    """Records from several rings, filtered by time and type, time-ordered."""
+    wanted = set(types) if types else None
+    out = []
+    for path in paths:
+        for rec in read_ring(path):
+            t = rec.get("t") or 0
+            if since is not None and t < since:
+                continue
+            if until is not None and t > until:
+                continue
+            if wanted and rec.get("e") not in wanted:
+                continue
+            out.append(rec)
+    out.sort(key=lambda r: r.get("t") or 0)
+    return out
+
+
+# -----------------------------------------------------------------------------
+# Process-wide writer
+# -----------------------------------------------------------------------------
+
+_log: Optional[RingLog] = None
+_service = ""
+_sample: Dict[str, int] = parse_sample(EVENTLOG_SAMPLE)
+_seen: Dict[str, int] = {}
+# emit() runs on sync-service's scheduler and worker threads; without
+# this, concurrent read-modify-writes of _seen lose counts.
+_seen_lock = threading.Lock()
+
+
+def open_log(service: str, tag: str) -> None:
+    """Open ``<EVENTLOG_DIR>/<service>.ring``; on failure, fall back to echo-only."""
+    global _log, _service
+    _service = service
+    path = os.path.join(EVENTLOG_DIR, f"{service}.ring")
+    try:
+        os.makedirs(EVENTLOG_DIR, exist_ok=True)
+        _log = RingLog(path, EVENTLOG_SIZE_MB * 1024 * 1024)
+        print(f"[{tag}] Event log: {path} ({EVENTLOG_SIZE_MB} MB ring, sample={_sample or 'off'})")
+    except OSError as e:
+        # Telemetry must never stop capture or sync.
+        _log = None
+        print(f"[{tag}] Event log disabled ({e})")
+
+
+def emit(event: str, echo: Optional[str] = None, **fields) -> None:
+    """Append one event (subject to sampling); print ``echo`` if enabled.
+
+    Without a ring (``open_log`` failed or wasn't called) the echo line
+    is always printed so nothing is silently lost.
+    """
+    if echo and (EVENTLOG_ECHO or _log is None):
+        print(echo)
+    rate = _sample.get(event, 1)
+    if rate > 1:
+        with _seen_lock:
+            n = _seen.get(event, 0)
+            _seen[event] = n + 1
+        if n % rate:
+            return
+        fields["sr"] = rate
+    if _log is None:
+        return
+    try:
+        _log.append({"t": round(time.time(), 3), "e": event, "s": _service, **fields})
+    except Exception as e:  # noqa: BLE001 — never let logging raise
+        print(f"[EVENTLOG] append failed: {e}")
@@ -4,6 +4,7 @@ import os
 import re
 import shutil
 import subprocess
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -16,9 +17,8 @@ from batdetect2 import api as bat_api
 from scipy.io import wavfile
 from scipy.signal import butter, sosfiltfilt
 
-from src import storage
-from src.audio_validator import has_bat_call_shape, is_likely_bat_call
-from src.classifier import classify, load_groups_classifier
+from src import bat_pipeline, eventlog, metrics, storage
+from src.classifier import load_groups_classifier
 
 
 def _format_bd_stats(stats: dict | None) -> str:
@@ -236,17 +236,15 @@ def _run_batdetect_legacy(audio_path, config, hpf_sos=None):
     return [(d, None) for d in detections]
 
 
-DIAGNOSTIC_BD_THRESHOLD = 0.1  # let sub-threshold emissions through for logging
-
-
 def _run_batdetect_with_classifier(
-    audio_path, classifier_model, classifier_ckpt, config, hpf_sos=None,
+    audio_path, classifier_model, classifier_ckpt, config,
+    hpf_enabled: bool = True,
     min_pred_conf: float = 0.6,
     validator_cfg: dict | None = None,
     fm_sweep_cfg: dict | None = None,
     user_threshold: float = 0.5,
 ):
-    """Returns ``(rows_data, rejection_reason, stats)``.
+    """Returns ``(rows_data, rejection_reason, stats, raw)``.
 
     ``rows_data`` is the list of surviving ``(detection, prediction)``
     tuples that will become Postgres rows. ``rejection_reason`` names
@@ -254,106 +252,44 @@ def _run_batdetect_with_classifier(
     ``stats`` is always populated and carries per-segment diagnostic
     counters so the caller can log what BatDetect2 saw even when
     nothing passed the pipeline. Keys:
-        raw_count           — total detections above DIAGNOSTIC_BD_THRESHOLD
+        raw_count           — total detections above the diagnostic threshold
         max_det_prob        — highest det_prob seen this segment (0.0 if none)
         count_above_user    — detections >= user_threshold (pre-classifier)
         top_class           — BD's top class name (UK label), or None
-    """
-    stats = {
-        "raw_count": 0,
-        "max_det_prob": 0.0,
-        "count_above_user": 0,
-        "top_class": None,
-    }
-
-    audio = bat_api.load_audio(audio_path)
-    if hpf_sos is not None:
-        audio = _apply_hpf(audio, hpf_sos)
-    # Query BatDetect2 at a permissive diagnostic threshold so we can
-    # observe sub-user-threshold emissions for troubleshooting. The
-    # user-facing DETECTION_THRESHOLD is enforced below in the mask,
-    # so downstream pipeline behaviour is unchanged.
-    diag_config = dict(config)
-    diag_config["detection_threshold"] = min(DIAGNOSTIC_BD_THRESHOLD, user_threshold)
-    detections, features, _ = bat_api.process_audio(audio, config=diag_config)
-
-    if detections:
-        probs = [d.get("det_prob", 0.0) for d in detections]
-        stats["raw_count"] = len(detections)
-        stats["max_det_prob"] = float(max(probs))
-        stats["count_above_user"] = sum(1 for p in probs if p >= user_threshold)
-        top = max(detections, key=lambda d: d.get("det_prob", 0.0))
-        stats["top_class"] = top.get("class")
-
-    if not detections:
-        return [], "batdetect2_no_detections", stats
-
-    # User-threshold gate. Previous versions force-floored this at
-    # CLASSIFIER_DET_THRESHOLD (the training-distribution value, 0.5)
-    # via max(). Lowered 2026-04-23 after the 005517.wav false-negative
-    # experiment: UK-trained BatDetect2 is under-confident on NA bats,
-    # and 0.5 was dropping real passes. Downstream gates — classifier
-    # min_pred_conf 0.6 + FM-sweep shape filter + audio-level validator
-    # — absorb the extra out-of-distribution noise. See
-    # DETECTION_TUNING_PLAYBOOK.md for the full rationale.
-    threshold = user_threshold
-    mask = np.array([d.get("det_prob", 0.0) >= threshold for d in detections])
-    if not mask.any():
-        return [], "all_below_user_threshold", stats
-
-    high_conf_dets = [d for d, m in zip(detections, mask) if m]
-    high_conf_feats = features[mask]
-    preds = classify(high_conf_feats, classifier_model, classifier_ckpt)
-
-    # Classifier-confidence gate.
-    kept = [
-        (d, p) for d, p in zip(high_conf_dets, preds)
-        if p["prediction_confidence"] >= min_pred_conf
-    ]
-    if not kept:
-        return [], "all_below_min_pred_conf", stats
-
-    # FM-sweep + low-band-ratio per-detection shape filter. Rejects
-    # detections whose audio inside the bounding box looks like a
-    # broadband click (insect, rain, mechanical) rather than a real
-    # downward FM echolocation pulse.
-    if fm_sweep_cfg and fm_sweep_cfg.get("enabled", True):
-        passed = []
-        shape_rejections = []
-        for det, pred in kept:
-            ok, reason, shape_stats = has_bat_call_shape(
-                audio, int(config.get("target_samp_rate", 256000)),
-                det.get("start_time", 0.0), det.get("end_time", 0.0),
-                min_slope_khz_per_ms=fm_sweep_cfg.get("min_slope_khz_per_ms", -0.1),
-                max_low_band_ratio=fm_sweep_cfg.get("max_low_band_ratio", 0.5),
-                min_r2=fm_sweep_cfg.get("min_r2", 0.2),
-            )
-            if ok:
-                passed.append((det, pred))
-            else:
-                shape_rejections.append(reason)
-        if not passed:
-            reason = shape_rejections[0] if shape_rejections else "shape_all_rejected"
-            return [], f"shape:{reason}", stats
-        kept = passed
-
-    # Audio-level validator — "is this actually a bat call?"
-    # Runs only when the classifier has at least one confident pick
-    # so we don't waste cycles on silence. Rate for the spectrogram
-    # checks comes from BatDetect2's target rate (its load_audio
-    # resamples to target_samp_rate).
-    if validator_cfg and validator_cfg.get("enabled", True):
-        val_sr = int(config.get("target_samp_rate", 256000))
-        ok, reason = is_likely_bat_call(
-            audio, val_sr,
-            min_rms=validator_cfg.get("min_rms", 0.005),
-            min_snr_db=validator_cfg.get("min_snr_db", 10.0),
-            min_burst_ratio=validator_cfg.get("min_burst_ratio", 3.0),
-        )
-        if not ok:
-            return [], f"validator:{reason}", stats
+    ``raw`` is the segment's ``bat_pipeline.RawAnalysis`` — everything
+    the gates looked at, so the segment can be re-gated later with
+    other thresholds (``edge/scripts/regate.py``) without the audio.
 
-    return kept, None, stats
+    The gates are ``bat_pipeline``'s, so live segments and uploads
+    share one implementation. BatDetect2 is queried at the permissive
+    diagnostic threshold; ``user_threshold`` is enforced by the gates.
+    """
+    validator_cfg = validator_cfg or {"enabled": False}
+    fm_sweep_cfg = fm_sweep_cfg or {"enabled": False}
+    raw = bat_pipeline.analyse_raw(
+        audio_path, classifier_model, classifier_ckpt,
+        bd_config=config,
+        diag_threshold=min(bat_pipeline.DIAGNOSTIC_BD_THRESHOLD, user_threshold),
+        hpf_enabled=hpf_enabled,
+        hpf_cutoff_hz=HPF_CUTOFF_HZ,
+        hpf_order=HPF_ORDER,
+        # Live segments are 15 s; never window them.
+        stream_min_duration_s=0,
+    )
+    result = bat_pipeline.apply_gates(
+        raw,
+        user_threshold=user_threshold,
+        min_pred_conf=min_pred_conf,
+        validator_enabled=validator_cfg.get("enabled", True),
+        validator_min_rms=validator_cfg.get("min_rms", 0.005),
+        validator_min_snr_db=validator_cfg.get("min_snr_db", 10.0),
+        validator_min_burst_ratio=validator_cfg.get("min_burst_ratio", 3.0),
+        fm_sweep_enabled=fm_sweep_cfg.get("enabled", True),
+        fm_sweep_min_slope=fm_sweep_cfg.get("min_slope_khz_per_ms", -0.1),
+        fm_sweep_max_low_band_ratio=fm_sweep_cfg.get("max_low_band_ratio", 0.5),
+        fm_sweep_min_r2=fm_sweep_cfg.get("min_r2", 0.2),
+    )
+    return result.detections, result.rejection_reason, result.stats, raw
 
 
 async def main():
@@ -404,10 +340,15 @@ async def main():
     # rejections manually and tell whether filter thresholds are right.
     diagnostic_save = os.getenv("DIAGNOSTIC_SAVE_REJECTIONS", "false").lower() == "true"
     diagnostic_dir = os.path.join(BAT_AUDIO_DIR, "_diagnostic")
+    # Per-segment raw analysis rows (segment_raw) for offline re-gating.
+    persist_raw = os.getenv("PERSIST_RAW_SEGMENTS", "true").lower() == "true"
     if diagnostic_save:
         os.makedirs(diagnostic_dir, exist_ok=True)
         print(f"[BAT] Diagnostic save enabled — near-miss rejections written to {diagnostic_dir}")
 
+    metrics.start_metrics_server()
+    eventlog.open_log("batdetect", "BAT")
+
     print(f"[BAT] Initializing audio capture: {device_name} @ {sample_rate} Hz")
     capture = BatAudioCapture(device_name=device_name, sampling_rate=sample_rate)
 
@@ -538,8 +479,23 @@ async def main():
                   ADD COLUMN IF NOT EXISTS bat_band_high_rms real,
                   ADD COLUMN IF NOT EXISTS bd_top_class varchar(64);
             """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS segment_raw (
+                    id SERIAL PRIMARY KEY,
+                    recorded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    sync_id UUID,
+                    device VARCHAR(100),
+                    pipeline_version VARCHAR(32),
+                    model_version VARCHAR(64),
+                    raw_count INTEGER NOT NULL,
+                    max_det_prob REAL,
+                    raw BYTEA NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_segment_raw_recorded_at
+                    ON segment_raw(recorded_at);
+            """)
         conn.commit()
-        print("[BAT] audio_levels schema migration: band-RMS + top-class columns OK")
+        print("[BAT] schema migration: audio_levels band-RMS / top-class + segment_raw OK")
     except Exception as e:
         print(f"[BAT] audio_levels migration failed (non-fatal): {e}")
 
@@ -583,14 +539,21 @@ async def main():
                 # Disk-watchdog kill switch — sync-service touches the
                 # flag when the SD card is full; we wait (no capture).
                 if HALT_FLAG.exists():
+                    metrics.RECORDING_HALTED.set(1)
+                    eventlog.emit("halted")
                     print("[BAT] Recordings halted by disk watchdog; waiting...")
                     await asyncio.sleep(60)
                     continue
-                wav_path, tmp_dir = await capture.capture_segment(
-                    duration=segment_duration
-                )
+                metrics.RECORDING_HALTED.set(0)
+                with metrics.CAPTURE_SECONDS.time():
+                    wav_path, tmp_dir = await capture.capture_segment(
+                        duration=segment_duration
+                    )
                 await segment_queue.put((wav_path, tmp_dir))
+                metrics.QUEUE_DEPTH.set(segment_queue.qsize())
             except Exception as exc:  # noqa: BLE001 — keep producer alive
+                metrics.CAPTURE_ERRORS.inc()
+                eventlog.emit("capture_error", error=type(exc).__name__, message=str(exc)[:300])
                 print(f"[BAT] capture_producer error: {exc}")
                 await asyncio.sleep(2)
 
@@ -599,14 +562,17 @@ async def main():
         nonlocal conn
         while True:
             wav_path, tmp_dir = await segment_queue.get()
+            metrics.QUEUE_DEPTH.set(segment_queue.qsize())
             try:
                 segment_counter["n"] += 1
+                metrics.SEGMENTS.inc()
                 segment_count = segment_counter["n"]
 
                 rms, peak, band_rms = _compute_audio_stats(wav_path)
 
                 rejection_reason = None
                 bd_stats = None
+                raw = None
                 # Torch inference is sync + CPU-bound. Running it on the
                 # asyncio event loop would block the producer's arecord
                 # wait for ~12 s per segment, defeating the whole
@@ -616,11 +582,12 @@ async def main():
                 # passes — the classifier model + ckpt are read-only
                 # after load, and torch inference is thread-safe for
                 # that use case.
+                inference_start = time.monotonic()
                 if enable_classifier:
-                    rows_data, rejection_reason, bd_stats = await asyncio.to_thread(
+                    rows_data, rejection_reason, bd_stats, raw = await asyncio.to_thread(
                         _run_batdetect_with_classifier,
                         wav_path, classifier_model, classifier_ckpt, config,
-                        hpf_sos=hpf_sos, min_pred_conf=min_pred_conf,
+                        hpf_enabled=hpf_sos is not None, min_pred_conf=min_pred_conf,
                         validator_cfg=validator_cfg,
                         fm_sweep_cfg=fm_sweep_cfg,
                         user_threshold=threshold,
@@ -629,6 +596,7 @@ async def main():
                     rows_data = await asyncio.to_thread(
                         _run_batdetect_legacy, wav_path, config, hpf_sos=hpf_sos,
                     )
+                metrics.INFERENCE_SECONDS.observe(time.monotonic() - inference_start)
 
                 # Model-health watchdog — "real audio but detector saw
                 # literally nothing" is the silent-failure signature.
@@ -636,6 +604,8 @@ async def main():
                 if rms is not None and rms > _HEALTH_MIN_RMS and _raw_count == 0:
                     health_state["consecutive_bad"] += 1
                     bad_n = health_state["consecutive_bad"]
+                    if bad_n % _HEALTH_BAD_THRESHOLD == 0:
+                        eventlog.emit("model_health", state="bad", streak=bad_n, rms=rms)
                     if bad_n == _HEALTH_BAD_THRESHOLD:
                         print(
                             f"[BAT] MODEL-HEALTH WARNING: {_HEALTH_BAD_THRESHOLD} "
@@ -652,11 +622,16 @@ async def main():
                         )
                 else:
                     if health_state["consecutive_bad"] >= _HEALTH_BAD_THRESHOLD:
+                        eventlog.emit(
+                            "model_health", state="recovered",
+                            streak=health_state["consecutive_bad"],
+                        )
                         print(
                             f"[BAT] MODEL-HEALTH RECOVERED after "
                             f"{health_state['consecutive_bad']} bad segments"
                         )
                     health_state["consecutive_bad"] = 0
+                metrics.MODEL_BAD_STREAK.set(health_state["consecutive_bad"])
 
                 # Diagnostic save of near-miss rejections (see
                 # DIAGNOSTIC_SAVE_REJECTIONS comment in docker-compose.yml).
@@ -694,8 +669,14 @@ async def main():
                     rejection_reason=rejection_reason,
                     bd_stats=bd_stats,
                     rows_data=rows_data,
+                    raw=raw,
                 )
             except Exception as exc:  # noqa: BLE001 — keep consumer alive
+                metrics.SEGMENT_ERRORS.labels(error=type(exc).__name__).inc()
+                eventlog.emit(
+                    "segment_error", n=segment_counter["n"],
+                    error=type(exc).__name__, message=str(exc)[:300],
+                )
                 print(f"[BAT] detect_consumer error (#{segment_counter['n']}): {exc}")
                 try:
                     conn = ensure_connection(conn)
@@ -719,17 +700,51 @@ async def main():
 
     async def _handle_detection_result(*, segment_count, wav_path, rms, peak,
                                        band_rms, rejection_reason, bd_stats,
-                                       rows_data):
+                                       rows_data, raw=None):
         """Everything after detection runs: DB insert, archive, log."""
         nonlocal conn
 
+        bd = bd_stats or {}
+        eventlog.emit(
+            "segment", n=segment_count, rms=rms, peak=peak,
+            bands=band_rms, bd_raw=bd.get("raw_count"),
+            bd_max=bd.get("max_det_prob"), bd_pass=bd.get("count_above_user"),
+            bd_top=bd.get("top_class"), dets=len(rows_data or ()),
+            rejection=rejection_reason,
+            # Listening heartbeat, 1-per-10-segments, when echo is on.
+            echo=(
+                f"[BAT] #{segment_count} | No bat calls detected{_format_bd_stats(bd_stats)}"
+                if not rows_data and not rejection_reason and segment_count % 10 == 0
+                else None
+            ),
+        )
+        if rms is not None:
+            metrics.LAST_RMS.set(rms)
+        metrics.LAST_MAX_DET_PROB.set((bd_stats or {}).get("max_det_prob") or 0.0)
+        metrics.LAST_SEGMENT_TS.set(time.time())
+        if rejection_reason:
+            metrics.REJECTIONS.labels(reason=metrics.clean_reason(rejection_reason)).inc()
+            eventlog.emit(
+                "rejection", n=segment_count, reason=rejection_reason,
+                bd_raw=bd.get("raw_count"), bd_max=bd.get("max_det_prob"),
+                bd_pass=bd.get("count_above_user"),
+                # Gate rejections echo every time; plain "nothing
+                # passed BatDetect2" reasons stay quiet, as before.
+                echo=(
+                    f"[BAT] #{segment_count} | rejected by {rejection_reason}"
+                    f"{_format_bd_stats(bd_stats)}"
+                    if rejection_reason.startswith(("validator:", "shape:")) else None
+                ),
+            )
+
         # Audio-level + BD-stats + rejection sample for dashboard
         # troubleshooting. One row per captured segment — auto-expired
         # after 7 days by sync-service.
         if rms is not None:
             try:
                 conn = ensure_connection(conn)
-                with conn.cursor() as cur:
+                with metrics.DB_WRITE_SECONDS.labels(table="audio_levels").time(), \
+                     conn.cursor() as cur:
                     cur.execute(
                         "INSERT INTO audio_levels "
                         "(rms, peak, bd_raw_count, bd_max_det_prob, "
@@ -749,7 +764,7 @@ async def main():
                             (bd_stats or {}).get("top_class"),
                         ),
                     )
-                conn.commit()
+                    conn.commit()
             except Exception as e:
                 # Non-fatal: don't let telemetry kill capture.
                 print(f"[BAT] audio_levels write failed: {e}")
@@ -757,6 +772,34 @@ async def main():
         sync_id = str(uuid.uuid4())
         detection_time = datetime.utcnow()
 
+        # Raw BD detections + features + gate measurements for any
+        # segment BatDetect2 saw something in, so a threshold retune can
+        # be replayed over past nights (edge/scripts/regate.py) instead
+        # of re-running inference. Empty segments stay empty under any
+        # thresholds and aren't stored.
+        if persist_raw and raw is not None and raw.detections:
+            try:
+                conn = ensure_connection(conn)
+                with metrics.DB_WRITE_SECONDS.labels(table="segment_raw").time(), \
+                     conn.cursor() as cur:
+                    cur.execute(
+                        "INSERT INTO segment_raw "
+                        "(recorded_at, sync_id, device, pipeline_version, "
+                        " model_version, raw_count, max_det_prob, raw) "
+                        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                        (
+                            detection_time, sync_id, device_name,
+                            raw.pipeline_version, model_version,
+                            len(raw.detections),
+                            (bd_stats or {}).get("max_det_prob"),
+                            psycopg2.Binary(raw.to_bytes()),
+                        ),
+                    )
+                    conn.commit()
+            except Exception as e:
+                # Non-fatal, like audio_levels.
+                print(f"[BAT] segment_raw write failed: {e}")
+
         if rows_data:
             print(f"[BAT] #{segment_count} | {len(rows_data)} bat call(s) detected!")
 
@@ -766,6 +809,10 @@ async def main():
             audio_saved_path = None
             file_storage_tier = None
             file_expires_at = None
+            class_folder = None
+            # Per-call detail goes to the event log; echoed only when
+            # EVENTLOG_ECHO is on.
+            detail_lines = []
 
             if enable_storage_tiering:
                 tier = storage.determine_tier(rows_data)
@@ -780,6 +827,7 @@ async def main():
                     )
                 audio_saved_path = str(archived_path) if archived_path else None
                 file_storage_tier = tier
+                metrics.TIER_ASSIGNMENTS.labels(tier=str(tier)).inc()
                 folder_str = f"/{class_folder}" if class_folder else ""
                 max_det_prob = max(
                     (d.get("det_prob", 0.0) for d, _ in rows_data), default=0.0,
@@ -788,7 +836,7 @@ async def main():
                     (p["prediction_confidence"] for _, p in rows_data if p is not None),
                     default=0.0,
                 )
-                print(
+                detail_lines.append(
                     f"  -> tier {tier}{folder_str} "
                     f"(max det_prob={max_det_prob:.3f}, "
                     f"max pred_conf={max_pred_conf:.3f}) "
@@ -819,9 +867,11 @@ async def main():
                     f" -> {predicted_class} ({prediction_confidence:.3f})"
                     if pred else ""
                 )
-                print(f"  -> {species} (prob: {det_prob:.3f}, "
-                      f"freq: {low_freq/1000:.1f}-{high_freq/1000:.1f} kHz, "
-                      f"dur: {duration_ms:.1f} ms){log_tail}")
+                detail_lines.append(
+                    f"  -> {species} (prob: {det_prob:.3f}, "
+                    f"freq: {low_freq/1000:.1f}-{high_freq/1000:.1f} kHz, "
+                    f"dur: {duration_ms:.1f} ms){log_tail}"
+                )
 
                 rows.append((
                     species, common_name, det_prob,
@@ -832,7 +882,8 @@ async def main():
                 ))
 
             conn = ensure_connection(conn)
-            with conn.cursor() as cur:
+            with metrics.DB_WRITE_SECONDS.labels(table="bat_detections").time(), \
+                 conn.cursor() as cur:
                 execute_values(cur, """
                     INSERT INTO bat_detections
                     (species, common_name, detection_prob, start_time, end_time,
@@ -842,23 +893,50 @@ async def main():
                      storage_tier, expires_at)
                     VALUES %s
                 """, rows)
-            conn.commit()
-        else:
-            # Validator rejections are logged every time so we can
-            # see what's being filtered; pure no-detection heartbeats
-            # stay at 1-per-10-segments to keep the log quiet.
-            if rejection_reason and (
-                rejection_reason.startswith("validator:")
-                or rejection_reason.startswith("shape:")
-            ):
-                bd_tail = _format_bd_stats(bd_stats)
-                print(f"[BAT] #{segment_count} | rejected by {rejection_reason}{bd_tail}")
-            elif segment_count % 10 == 0:
-                # Listening heartbeat: include BD diagnostic stats so
-                # "detector saw nothing" is distinguishable from
-                # "detector saw weak sub-threshold signal."
-                bd_tail = _format_bd_stats(bd_stats)
-                print(f"[BAT] #{segment_count} | No bat calls detected{bd_tail}")
+                conn.commit()
+            for det, pred in rows_data:
+                label = pred["predicted_class"] if pred else det.get("class", "Unknown")
+                metrics.DETECTIONS.labels(predicted_class=label).inc()
+            eventlog.emit(
+                "detection", n=segment_count, sync_id=sync_id,
+                tier=file_storage_tier, folder=class_folder, path=audio_saved_path,
+                calls=[
+                    {
+                        "species": det.get("class"),
+                        "det_prob": round(det.get("det_prob", 0.0), 4),
+                        "start": round(det.get("start_time", 0.0), 4),
+                        "low_hz": det.get("low_freq"), "high_hz": det.get("high_freq"),
+                        "class": pred["predicted_class"] if pred else None,
+                        "conf": round(pred["prediction_confidence"], 4) if pred else None,
+                    }
+                    for det, pred in rows_data
+                ],
+                echo="\n".join(detail_lines),
+            )
+
+            # Record the archived file's size once, at write time, so the
+            # sync-service disk watchdog never has to stat the archive.
+            if enable_storage_tiering and audio_saved_path:
+                try:
+                    size_bytes = os.path.getsize(audio_saved_path)
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            "INSERT INTO file_catalog "
+                            "(path, size_bytes, storage_tier, expires_at, detection_time) "
+                            "VALUES (%s, %s, %s, %s, %s) "
+                            "ON CONFLICT (path) DO UPDATE SET "
+                            "size_bytes = EXCLUDED.size_bytes, "
+                            "storage_tier = EXCLUDED.storage_tier, "
+                            "expires_at = EXCLUDED.expires_at, "
+                            "deleted_at = NULL",
+                            (audio_saved_path, size_bytes, file_storage_tier,
+                             file_expires_at, detection_time),
+                        )
+                    conn.commit()
+                except Exception as e:
+                    # Non-fatal: the watchdog's catalog backfill picks it up.
+                    conn.rollback()
+                    print(f"[BAT] file_catalog write failed: {e}")
 
     # Run producer + consumer concurrently. When the producer is in the
     # middle of a 15-second arecord call, the event loop yields control
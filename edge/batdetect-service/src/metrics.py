@@ -0,0 +1,67 @@
+"""Prometheus metrics for batdetect-service.
+
+Served on ``METRICS_PORT`` (default 9101) at ``/metrics`` from a
+background thread started by ``start_metrics_server``. Everything here
+is in-process and free to update per segment — no DB or Firestore
+round-trip — so a local scraper gets sub-second freshness for the
+numbers that used to exist only in stdout or the ``audio_levels`` rows.
+"""
+
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# Segment timings span 10 ms (DB writes) to ~60 s (a stalled arecord /
+# a cold model), so one shared bucket ladder covers every histogram.
+_SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 20, 30, 60)
+
+SEGMENTS = Counter("bat_segments_total", "Segments pulled off the capture queue")
+SEGMENT_ERRORS = Counter(
+    "bat_segment_errors_total", "Segments whose processing raised", ["error"],
+)
+CAPTURE_ERRORS = Counter("bat_capture_errors_total", "arecord / capture failures")
+REJECTIONS = Counter(
+    "bat_segment_rejections_total", "Segments rejected after detection", ["reason"],
+)
+DETECTIONS = Counter(
+    "bat_detections_total", "Detections written to bat_detections", ["predicted_class"],
+)
+TIER_ASSIGNMENTS = Counter(
+    "bat_tier_assignments_total", "Detection segments by storage tier (3 = not archived)", ["tier"],
+)
+
+CAPTURE_SECONDS = Histogram(
+    "bat_capture_seconds", "Wall time of one arecord segment", buckets=_SECONDS_BUCKETS,
+)
+INFERENCE_SECONDS = Histogram(
+    "bat_inference_seconds", "BatDetect2 (+ classifier) time per segment",
+    buckets=_SECONDS_BUCKETS,
+)
+DB_WRITE_SECONDS = Histogram(
+    "bat_db_write_seconds", "Post-detection DB writes per segment", ["table"],
+    buckets=_SECONDS_BUCKETS,
+)
+
+QUEUE_DEPTH = Gauge("bat_segment_queue_depth", "Captured segments waiting for detection")
+MODEL_BAD_STREAK = Gauge(
+    "bat_model_health_bad_streak",
+    "Consecutive non-silent segments with raw_count=0 (degenerate-model signature)",
+)
+RECORDING_HALTED = Gauge("bat_recording_halted", "1 while the disk-watchdog halt flag is set")
+LAST_RMS = Gauge("bat_last_segment_rms", "RMS of the most recent segment")
+LAST_MAX_DET_PROB = Gauge("bat_last_segment_max_det_prob", "BatDetect2 max det_prob, last segment")
+LAST_SEGMENT_TS = Gauge("bat_last_segment_timestamp_seconds", "Unix time the last segment finished")
+
+
+def clean_reason(reason: str) -> str:
+    """Bound label cardinality: ``validator:rms_too_low(0.002)`` → ``validator:rms_too_low``."""
+    return reason.split("(")[0] if reason else "unknown"
+
+
+def start_metrics_server() -> None:
+    """Start the /metrics listener unless ``METRICS_ENABLED=false``."""
+    if os.getenv("METRICS_ENABLED", "true").lower() != "true":
+        return
+    port = int(os.getenv("METRICS_PORT", "9101"))
+    start_http_server(port, addr=os.getenv("METRICS_ADDR", "0.0.0.0"))
+    print(f"[BAT] Metrics on :{port}/metrics")
@@ -20,15 +20,35 @@ Regardless of palette, red detection boxes + species labels overlay
 when ``with_boxes=True``. Image size is tuned for inline dashboard
 display (~1200 × 400 px at 100 dpi).
 
-matplotlib is imported lazily inside the function body so the module
-can be imported on machines without it installed. The Cloud Function
-lists ``matplotlib`` in its requirements; the Pi doesn't, which is
-fine as long as the Pi never calls ``generate_spectrogram``.
+Two renderers share the palette settings:
+
+``compute_spectrogram`` + ``render_png``
+    The fast path the Cloud Function uses. The STFT, dB matrix and
+    percentile scaling are computed once per palette into a
+    ``Spectrogram``; each variant (clean / annotated) is then a uint8
+    colour-index matrix pushed through a 256-entry colormap LUT, with
+    axes, boxes and labels drawn by Pillow and encoded straight to PNG
+    bytes. No matplotlib figure, no ``pcolormesh`` / ``tight_layout``.
+
+``iter_spectrogram_tiles``
+    A zoomable tile pyramid (map-tile style, time axis only) for long
+    recordings, built in one streaming pass with bounded memory.
+
+``generate_spectrogram``
+    The original matplotlib figure (colour bar, axis labels). Slower;
+    kept for thesis figures and ad-hoc inspection.
+
+matplotlib / Pillow are imported lazily inside the function bodies so
+the module can be imported on machines without them installed. The
+Cloud Function lists both in its requirements; the Pi doesn't, which is
+fine as long as the Pi never renders.
 """
 
 from __future__ import annotations
 
-from typing import Iterable, Optional, Tuple
+import io
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
 from scipy.signal import spectrogram as _spectrogram
@@ -314,3 +334,417 @@ def generate_spectrogram(
     fig.tight_layout()
     fig.savefig(out_path, dpi=dpi, bbox_inches="tight")
     plt.close(fig)
+
+
+# -----------------------------------------------------------------------------
+# Fast raster path — STFT once per palette, LUT colouring, Pillow overlay.
+# -----------------------------------------------------------------------------
+
+# Same look as the matplotlib figure: white frame, red boxes / labels.
+_FRAME_BG = (255, 255, 255)
+_FRAME_FG = (40, 40, 40)
+_BOX_RGB = (255, 59, 59)
+# Plot-area margins (px) around the raster: left, top, right, bottom.
+_MARGINS = (44, 20, 10, 26)
+
+_lut_cache: Dict[str, np.ndarray] = {}
+
+
+@dataclass
+class Spectrogram:
+    """A palette's STFT, reduced and scaled for display.
+
+    ``index`` is the dB matrix mapped to colormap indices 0-255 (rows =
+    frequency, low first; columns = time), already cropped to
+    ``max_freq_khz`` and max-pooled to the palette's column cap, so each
+    variant rendered from it is just LUT lookups and an overlay.
+    """
+
+    palette: str
+    index: np.ndarray
+    duration_s: float
+    max_freq_khz: float
+
+
+def colormap_lut(name: str) -> np.ndarray:
+    """``(256, 3)`` uint8 RGB table for ``"viridis"`` or ``"sonobat"``."""
+    if name not in _lut_cache:
+        x = np.linspace(0.0, 1.0, 256)
+        if name == "sonobat":
+            pos = [p for p, _ in _SONOBAT_STOPS]
+            rgb = np.array([
+                [int(c[i:i + 2], 16) for i in (1, 3, 5)] for _, c in _SONOBAT_STOPS
+            ], dtype=np.float64)
+            lut = np.stack([np.interp(x, pos, rgb[:, k]) for k in range(3)], axis=1)
+        else:
+            # Only the colour table, not pyplot — cheap to import.
+            from matplotlib import colormaps
+            lut = colormaps[name](x)[:, :3] * 255.0
+        _lut_cache[name] = np.round(lut).astype(np.uint8)
+    return _lut_cache[name]
+
+
+def compute_spectrogram(
+    audio: np.ndarray,
+    sr: int,
+    *,
+    palette: str = "viridis",
+    max_freq_khz: float = 140.0,
+) -> Spectrogram:
+    """STFT → dB → max-pool → percentile scaling, once per palette.
+
+    Same STFT settings, pooling and vmin/vmax rule as
+    ``generate_spectrogram``, so the raster matches the figure.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.size == 0:
+        raise ValueError("empty audio array — nothing to plot")
+
+    settings = _palette_settings(palette)
+    nperseg = max(int(settings["nperseg_sec"] * sr), 64)
+    noverlap = int(settings["overlap"] * nperseg)
+    freqs, _times, sxx = _spectrogram(
+        audio, fs=sr, window="hann",
+        nperseg=nperseg, noverlap=noverlap,
+        scaling="density", mode="magnitude",
+    )
+    db = 20.0 * np.log10(np.maximum(sxx, 1e-12), dtype=np.float32)
+    del sxx
+
+    max_cols = int(settings.get("max_display_cols", 2500))
+    if db.shape[1] > max_cols:
+        chunk = db.shape[1] // max_cols
+        db = db[:, :max_cols * chunk].reshape(db.shape[0], max_cols, chunk).max(axis=2)
+
+    vmax_percentile = 99.7 if settings["cmap_name"] == "sonobat" else 99.0
+    vmax = float(np.percentile(db, vmax_percentile))
+    vmin = vmax - settings["dynamic_range_db"]
+
+    # Show 0 … min(max_freq, Nyquist); the figure left the band above
+    # Nyquist blank, the raster just stops there.
+    top_khz = min(max_freq_khz, sr / 2000.0)
+    db = db[freqs <= top_khz * 1000.0]
+    index = np.clip((db - vmin) * (255.0 / (vmax - vmin)), 0, 255).astype(np.uint8)
+    return Spectrogram(
+        palette=palette,
+        index=index,
+        duration_s=len(audio) / float(sr),
+        max_freq_khz=top_khz,
+    )
+
+
+def _fit_axis(m: np.ndarray, n: int, axis: int) -> np.ndarray:
+    """Resize ``m`` to ``n`` along ``axis``: max-pool down, repeat up.
+
+    Max (not mean) on the way down for the same reason as above — a
+    3 ms call must survive into a 1-px column.
+    """
+    size = m.shape[axis]
+    starts = (np.arange(n) * size) // n
+    if size >= n:
+        return np.maximum.reduceat(m, starts, axis=axis)
+    return np.take(m, starts, axis=axis)
+
+
+def _nice_step(span: float, target_ticks: int) -> float:
+    raw = span / max(target_ticks, 1)
+    mag = 10 ** np.floor(np.log10(raw)) if raw > 0 else 1.0
+    for mult in (1, 2, 5, 10):
+        if raw <= mult * mag:
+            return float(mult * mag)
+    return float(10 * mag)
+
+
+def render_png(
+    spec: Spectrogram,
+    detection_pairs: Iterable[Tuple[dict, dict]] = (),
+    *,
+    with_boxes: bool = False,
+    title: Optional[str] = None,
+    size: Tuple[int, int] = (1200, 400),
+    compress_level: int = 3,
+) -> bytes:
+    """One variant of ``spec`` as PNG bytes.
+
+    ``size`` is the whole image; the raster fills it minus a thin frame
+    with kHz / seconds ticks and the optional title. Boxes + labels are
+    drawn when ``with_boxes`` is True, as in ``generate_spectrogram``.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height = size
+    left, top, right, bottom = _MARGINS
+    plot_w, plot_h = width - left - right, height - top - bottom
+
+    idx = _fit_axis(_fit_axis(spec.index, plot_w, axis=1), plot_h, axis=0)
+    raster = colormap_lut(_palette_settings(spec.palette)["cmap_name"])[idx[::-1]]
+
+    canvas = Image.new("RGB", (width, height), _FRAME_BG)
+    canvas.paste(Image.fromarray(raster, "RGB"), (left, top))
+    draw = ImageDraw.Draw(canvas)
+    font = ImageFont.load_default()
+
+    def x_of(t: float) -> float:
+        return left + t / spec.duration_s * plot_w if spec.duration_s else left
+
+    def y_of(khz: float) -> float:
+        return top + plot_h - khz / spec.max_freq_khz * plot_h
+
+    draw.rectangle([left - 1, top - 1, left + plot_w, top + plot_h], outline=_FRAME_FG)
+    for khz in np.arange(0, spec.max_freq_khz + 1e-6, 20):
+        y = y_of(khz)
+        draw.line([left - 4, y, left - 1, y], fill=_FRAME_FG)
+        draw.text((left - 6, y), f"{khz:.0f}", fill=_FRAME_FG, font=font, anchor="rm")
+    step = _nice_step(spec.duration_s, 10)
+    for t in np.arange(0, spec.duration_s + 1e-9, step):
+        x = x_of(t)
+        draw.line([x, top + plot_h, x, top + plot_h + 3], fill=_FRAME_FG)
+        draw.text((x, top + plot_h + 5), f"{t:g}", fill=_FRAME_FG, font=font, anchor="mt")
+    draw.text((4, top), "kHz", fill=_FRAME_FG, font=font)
+    draw.text((left + plot_w, height - 2), "Time (s)", fill=_FRAME_FG, font=font, anchor="rd")
+    if title:
+        draw.text((left + plot_w / 2, top / 2), title, fill=_FRAME_FG, font=font, anchor="mm")
+
+    if with_boxes:
+        for det, pred in detection_pairs:
+            start = float(det.get("start_time", 0.0))
+            end = float(det.get("end_time", start))
+            lo_khz = float(det.get("low_freq", 0.0)) / 1000.0
+            hi_khz = min(float(det.get("high_freq", 0.0)) / 1000.0, spec.max_freq_khz)
+            if end <= start or hi_khz <= lo_khz:
+                continue
+            x0, x1 = x_of(start), max(x_of(end), x_of(start) + 1)
+            y0, y1 = y_of(hi_khz), y_of(lo_khz)
+            draw.rectangle([x0, y0, x1, y1], outline=_BOX_RGB, width=1)
+            label = pred.get("predicted_class") or det.get("class", "?")
+            conf = pred.get("prediction_confidence", 0.0)
+            draw.text((x0, max(top, y0 - 2)), f"{label} {conf:.0%}",
+                      fill=_BOX_RGB, font=font, anchor="ld")
+
+    buf = io.BytesIO()
+    canvas.save(buf, format="PNG", compress_level=compress_level)
+    return buf.getvalue()
+
+
+# -----------------------------------------------------------------------------
+# Tile pyramid — zoomable long recordings, generated in one streaming pass.
+# -----------------------------------------------------------------------------
+#
+# Like map tiles, but only time zooms: every tile is TILE_SIZE columns by
+# TILE_SIZE frequency rows covering the whole displayed band. At the
+# deepest zoom (``max_zoom``) one column is ``col_s`` seconds of max-pooled
+# STFT frames; each level up halves the resolution by max-pooling column
+# pairs, until level 0 fits the recording in one tile. Tile ``z/x`` covers
+# columns ``[x·TILE_SIZE, (x+1)·TILE_SIZE)`` of level ``z``; the last tile
+# of a level is narrower.
+
+TILE_SIZE = 256
+# Deepest-zoom column width; must not be below the STFT hop (1 ms for
+# viridis, 0.3 ms for sonobat). 2 ms keeps a 3-10 ms call several columns
+# wide while a 3-minute upload stays at ~350 tiles on the deepest level.
+TILE_COL_S = 0.002
+
+
+@dataclass
+class TilePlan:
+    """Geometry + colour scaling for one recording's pyramid."""
+
+    duration_s: float
+    sr: int
+    palette: str = "viridis"
+    col_s: float = TILE_COL_S
+    tile_size: int = TILE_SIZE
+    max_freq_khz: float = 140.0
+    vmin: float = 0.0
+    vmax: float = 0.0
+
+    @property
+    def columns(self) -> int:
+        """Column count at ``max_zoom``."""
+        return max(1, int(np.ceil(self.duration_s / self.col_s)))
+
+    @property
+    def max_zoom(self) -> int:
+        return max(0, int(np.ceil(np.log2(self.columns / self.tile_size))))
+
+    @property
+    def top_khz(self) -> float:
+        return min(self.max_freq_khz, self.sr / 2000.0)
+
+    def manifest(self) -> dict:
+        """What a viewer needs to place tiles (stored next to them)."""
+        return {
+            "tileSize": self.tile_size,
+            "maxZoom": self.max_zoom,
+            "columns": self.columns,
+            "colSeconds": self.col_s,
+            "durationSeconds": self.duration_s,
+            "maxFreqKhz": self.top_khz,
+            "palette": self.palette,
+        }
+
+
+def _stft_settings(palette: str, sr: int) -> Tuple[int, int]:
+    settings = _palette_settings(palette)
+    nperseg = max(int(settings["nperseg_sec"] * sr), 64)
+    return nperseg, int(settings["overlap"] * nperseg)
+
+
+def _pooled_columns(
+    audio: np.ndarray,
+    plan: TilePlan,
+    offset_s: float,
+    core_start_s: float,
+    core_end_s: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """``(column ids, dB columns)`` for frames centred in the core.
+
+    dB columns are ``(tile_size, n)``: frequency max-pooled to the tile
+    height, frames max-pooled into ``col_s`` columns.
+    """
+    nperseg, noverlap = _stft_settings(plan.palette, plan.sr)
+    if len(audio) < nperseg:
+        return np.zeros(0, np.int64), np.zeros((plan.tile_size, 0), np.float32)
+    freqs, times, sxx = _spectrogram(
+        np.asarray(audio, dtype=np.float32), fs=plan.sr, window="hann",
+        nperseg=nperseg, noverlap=noverlap,
+        scaling="density", mode="magnitude",
+    )
+    t = times + offset_s
+    keep = (t >= core_start_s) & (t < core_end_s)
+    sxx = sxx[freqs <= plan.top_khz * 1000.0][:, keep]
+    if not sxx.shape[1]:
+        return np.zeros(0, np.int64), np.zeros((plan.tile_size, 0), np.float32)
+    db = 20.0 * np.log10(np.maximum(sxx, 1e-12), dtype=np.float32)
+    db = _fit_axis(db, plan.tile_size, axis=0)
+    ids = (t[keep] / plan.col_s).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    return ids[starts], np.maximum.reduceat(db, starts, axis=1)
+
+
+def estimate_db_range(src, plan: TilePlan, *, samples: int = 16, sample_s: float = 2.0) -> Tuple[float, float]:
+    """``(vmin, vmax)`` from a few excerpts spread over the recording.
+
+    Same percentile rule as ``compute_spectrogram``, applied to what the
+    tiles will show, without a second pass over the whole file.
+    """
+    from src import bat_pipeline
+
+    n = max(1, min(samples, int(plan.duration_s // sample_s) or 1))
+    starts = np.linspace(0.0, max(0.0, plan.duration_s - sample_s), n)
+    cols = []
+    for start in starts:
+        audio = bat_pipeline.load_audio_excerpt(src, float(start), sample_s, plan.sr)
+        _, c = _pooled_columns(audio, plan, float(start), float(start), float(start) + sample_s)
+        cols.append(c)
+    db = np.concatenate(cols, axis=1)
+    if not db.size:
+        return -120.0, -40.0
+    settings = _palette_settings(plan.palette)
+    pct = 99.7 if settings["cmap_name"] == "sonobat" else 99.0
+    vmax = float(np.percentile(db, pct))
+    return vmax - settings["dynamic_range_db"], vmax
+
+
+class _Pyramid:
+    """Accumulates deepest-level columns; emits tiles level by level.
+
+    Holds at most one partial tile and one odd column per level, so
+    memory is ``levels × tile_size²`` bytes however long the recording.
+    """
+
+    def __init__(self, max_zoom: int, tile_size: int):
+        self.tile_size = tile_size
+        self.pending = [np.zeros((tile_size, 0), np.uint8) for _ in range(max_zoom + 1)]
+        self.carry: List[Optional[np.ndarray]] = [None] * (max_zoom + 1)
+        self.next_x = [0] * (max_zoom + 1)
+        self.ready: List[Tuple[int, int, np.ndarray]] = []
+
+    def push(self, z: int, cols: np.ndarray) -> None:
+        buf = np.concatenate([self.pending[z], cols], axis=1)
+        while buf.shape[1] >= self.tile_size:
+            self._emit(z, buf[:, :self.tile_size])
+            buf = buf[:, self.tile_size:]
+        self.pending[z] = buf
+        if z == 0:
+            return
+        if self.carry[z] is not None:
+            cols = np.concatenate([self.carry[z], cols], axis=1)
+            self.carry[z] = None
+        if cols.shape[1] % 2:
+            self.carry[z] = cols[:, -1:]
+            cols = cols[:, :-1]
+        if cols.shape[1]:
+            self.push(z - 1, np.maximum(cols[:, 0::2], cols[:, 1::2]))
+
+    def flush(self) -> None:
+        for z in range(len(self.pending) - 1, -1, -1):
+            if z > 0 and self.carry[z] is not None:
+                # A lone trailing column is its own parent.
+                carry, self.carry[z] = self.carry[z], None
+                self.push(z - 1, carry)
+            if self.pending[z].shape[1]:
+                self._emit(z, self.pending[z])
+                self.pending[z] = self.pending[z][:, :0]
+
+    def _emit(self, z: int, cols: np.ndarray) -> None:
+        self.ready.append((z, self.next_x[z], np.ascontiguousarray(cols)))
+        self.next_x[z] += 1
+
+
+def _tile_png(index: np.ndarray, lut: np.ndarray, compress_level: int) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.fromarray(lut[index[::-1]], "RGB").save(buf, format="PNG", compress_level=compress_level)
+    return buf.getvalue()
+
+
+def iter_spectrogram_tiles(
+    src,
+    plan: TilePlan,
+    *,
+    window_s: float = 30.0,
+    compress_level: int = 3,
+) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield ``(z, x, png)`` for every tile of ``plan``'s pyramid.
+
+    Reads ``src`` (path or seekable file object) one window at a time
+    through ``bat_pipeline.iter_audio_windows``; tiles are yielded as
+    soon as they are complete, so callers can upload while the rest is
+    still being computed. ``plan.vmin`` / ``vmax`` must be set (see
+    ``estimate_db_range``).
+    """
+    from src import bat_pipeline
+
+    lut = colormap_lut(_palette_settings(plan.palette)["cmap_name"])
+    scale = 255.0 / (plan.vmax - plan.vmin)
+    pyramid = _Pyramid(plan.max_zoom, plan.tile_size)
+    carry_id, carry = None, None
+
+    def to_index(db: np.ndarray) -> np.ndarray:
+        return np.clip((db - plan.vmin) * scale, 0, 255).astype(np.uint8)
+
+    for win in bat_pipeline.iter_audio_windows(src, plan.sr, window_s):
+        ids, cols = _pooled_columns(win.audio, plan, win.offset_s, win.core_start_s, win.core_end_s)
+        del win
+        if not ids.size:
+            continue
+        # A column split across two windows is finished by the next one.
+        if carry is not None:
+            if ids[0] == carry_id:
+                cols[:, 0] = np.maximum(cols[:, 0], carry[:, 0])
+            else:
+                pyramid.push(plan.max_zoom, to_index(carry))
+        carry_id, carry = ids[-1], cols[:, -1:]
+        if cols.shape[1] > 1:
+            pyramid.push(plan.max_zoom, to_index(cols[:, :-1]))
+        for z, x, index in pyramid.ready:
+            yield z, x, _tile_png(index, lut, compress_level)
+        pyramid.ready.clear()
+
+    if carry is not None:
+        pyramid.push(plan.max_zoom, to_index(carry))
+    pyramid.flush()
+    for z, x, index in pyramid.ready:
+        yield z, x, _tile_png(index, lut, compress_level)
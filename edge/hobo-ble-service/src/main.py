@@ -13,6 +13,7 @@ Temperature formula (reverse-engineered, verified ±0.1°C against logged data):
 
 Environment variables:
   HOBO_POLL_INTERVAL Seconds between DB writes (default: 30)
+  METRICS_PORT / METRICS_ADDR — Prometheus /metrics listener (default 0.0.0.0:9104)
   DB_HOST / DB_NAME / DB_USER / DB_PASSWORD — PostgreSQL connection
 """
 
@@ -27,6 +28,8 @@ from bleak import BleakScanner
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
 
+from src import metrics
+
 # ── Configuration ──────────────────────────────────────────────────────────
 POLL_INTERVAL = int(os.getenv("HOBO_POLL_INTERVAL", "30"))
 DEFAULT_MODEL = os.getenv("HOBO_MODEL", "MX2201")
@@ -62,7 +65,7 @@ def write_readings(readings: dict[str, dict]):
         return
     conn = get_db_connection()
     try:
-        with conn.cursor() as cur:
+        with metrics.DB_WRITE_SECONDS.time(), conn.cursor() as cur:
             for addr, r in readings.items():
                 cur.execute(
                     """
@@ -79,7 +82,7 @@ def write_readings(readings: dict[str, dict]):
                         datetime.now(timezone.utc),
                     ),
                 )
-        conn.commit()
+            conn.commit()
     finally:
         conn.close()
 
@@ -127,6 +130,7 @@ def on_advertisement(device: BLEDevice, adv: AdvertisementData):
     if hobo_data is None or len(hobo_data) < TEMP_BYTE_INDEX + 1:
         return
 
+    metrics.ADVERTISEMENTS.inc()
     addr = device.address
     name = device.name or adv.local_name or ""
     serial = extract_serial_from_bytes(hobo_data) or extract_serial_from_name(name)
@@ -149,6 +153,7 @@ def on_advertisement(device: BLEDevice, adv: AdvertisementData):
         print(f"[HOBO]   Raw ({len(hobo_data)} bytes): {hobo_data.hex()}")
         print(f"[HOBO]   Temp byte[{TEMP_BYTE_INDEX}] = {hobo_data[TEMP_BYTE_INDEX]} → {temp_str}")
         print(f"[HOBO]   Total sensors discovered: {len(discovered)}")
+        metrics.SENSORS_DISCOVERED.set(len(discovered))
 
     # Store latest reading
     temp = decode_temperature(hobo_data)
@@ -187,11 +192,19 @@ async def poll_loop():
             await asyncio.sleep(POLL_INTERVAL)
             await scanner.stop()
         except Exception as e:
+            metrics.SCANNER_ERRORS.inc()
             print(f"[HOBO] Scanner error: {e}")
             await asyncio.sleep(10)
             continue
 
+        metrics.SENSORS_SEEN.set(len(latest_readings))
+        for addr, r in latest_readings.items():
+            sensor = r["serial"] or addr
+            metrics.TEMPERATURE_C.labels(sensor=sensor).set(r["temp_c"])
+            metrics.RSSI_DBM.labels(sensor=sensor).set(r["rssi"] or 0)
+
         if latest_readings:
+            metrics.SCAN_CYCLES.labels(outcome="readings").inc()
             try:
                 write_readings(latest_readings)
                 ts = datetime.now(timezone.utc).strftime("%H:%M:%S")
@@ -203,8 +216,10 @@ async def poll_loop():
                 print(f"[HOBO] {ts}  {len(latest_readings)} sensor(s): {', '.join(parts)}")
                 consecutive_empty = 0
             except Exception as e:
+                metrics.DB_WRITE_FAILURES.inc()
                 print(f"[HOBO] DB write error: {e}")
         else:
+            metrics.SCAN_CYCLES.labels(outcome="empty").inc()
             consecutive_empty += 1
             if consecutive_empty <= 3 or consecutive_empty % 10 == 0:
                 print(
@@ -221,4 +236,5 @@ def handle_signal(signum, frame):
 if __name__ == "__main__":
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
+    metrics.start_metrics_server()
     asyncio.run(poll_loop())
@@ -0,0 +1,32 @@
+"""Prometheus metrics for hobo-ble-service, served on ``METRICS_PORT`` (default 9104).
+
+The service runs with ``network_mode: host`` (BlueZ over D-Bus), so the
+listener binds to ``METRICS_ADDR`` — compose pins it to 127.0.0.1.
+"""
+
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+ADVERTISEMENTS = Counter("hobo_advertisements_total", "Onset BLE advertisements decoded")
+SCAN_CYCLES = Counter("hobo_scan_cycles_total", "Scan windows completed", ["outcome"])
+SCANNER_ERRORS = Counter("hobo_scanner_errors_total", "BleakScanner start/stop failures")
+DB_WRITE_FAILURES = Counter("hobo_db_write_failures_total", "Failed environmental_readings writes")
+DB_WRITE_SECONDS = Histogram(
+    "hobo_db_write_seconds", "environmental_readings batch insert",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+
+SENSORS_SEEN = Gauge("hobo_sensors_last_cycle", "Sensors heard in the last scan window")
+SENSORS_DISCOVERED = Gauge("hobo_sensors_discovered", "Distinct sensors heard since start")
+TEMPERATURE_C = Gauge("hobo_temperature_celsius", "Last decoded temperature", ["sensor"])
+RSSI_DBM = Gauge("hobo_rssi_dbm", "Last advertisement RSSI", ["sensor"])
+
+
+def start_metrics_server() -> None:
+    """Start the /metrics listener unless ``METRICS_ENABLED=false``."""
+    if os.getenv("METRICS_ENABLED", "true").lower() != "true":
+        return
+    port = int(os.getenv("METRICS_PORT", "9104"))
+    start_http_server(port, addr=os.getenv("METRICS_ADDR", "0.0.0.0"))
+    print(f"[HOBO] Metrics on :{port}/metrics")
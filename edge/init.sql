@@ -1,3 +1,7 @@
+-- classifications, bat_detections, device_status and audio_levels are
+-- created as plain tables here; sync-service converts them to daily
+-- range partitions on first start (sync-service/src/partitions.py).
+
 -- General soundscape classifications (AST model)
 CREATE TABLE IF NOT EXISTS classifications (
     id SERIAL PRIMARY KEY,
@@ -69,6 +73,30 @@ CREATE INDEX idx_bat_predicted_class ON bat_detections(predicted_class);
 CREATE INDEX idx_bat_storage_tier ON bat_detections(storage_tier);
 CREATE INDEX idx_bat_unverified ON bat_detections(verified_class) WHERE verified_class IS NULL;
 
+-- Partial indexes matching each disk-watchdog deletion stage
+-- (sync-service/src/disk_watchdog.py _STAGE_SQL).
+CREATE INDEX idx_bat_reclaim_tier4 ON bat_detections(expires_at)
+    WHERE storage_tier = 4 AND audio_path IS NOT NULL AND verified_class IS NULL;
+CREATE INDEX idx_bat_reclaim_tier2 ON bat_detections(expires_at ASC NULLS FIRST)
+    WHERE storage_tier = 2 AND audio_path IS NOT NULL AND verified_class IS NULL;
+CREATE INDEX idx_bat_reclaim_tier1 ON bat_detections(detection_time)
+    WHERE storage_tier = 1 AND audio_path IS NOT NULL
+      AND verified_class IS NULL AND synced_remote_at IS NOT NULL;
+CREATE INDEX idx_bat_audio_path ON bat_detections(audio_path) WHERE audio_path IS NOT NULL;
+
+-- Archived audio files on the Pi (one row per file, written by
+-- batdetect-service at archive time). Lets the disk watchdog size and
+-- pick deletions without statting the filesystem.
+CREATE TABLE IF NOT EXISTS file_catalog (
+    path TEXT PRIMARY KEY,
+    size_bytes BIGINT NOT NULL,
+    storage_tier SMALLINT,
+    expires_at TIMESTAMP,
+    detection_time TIMESTAMP,
+    cataloged_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    deleted_at TIMESTAMP
+);
+
 -- Device health status (collected by sync-service each cycle)
 CREATE TABLE IF NOT EXISTS device_status (
     id SERIAL PRIMARY KEY,
@@ -121,3 +149,23 @@ CREATE TABLE IF NOT EXISTS capture_errors (
 );
 
 CREATE INDEX idx_capture_errors_recorded ON capture_errors(recorded_at);
+
+-- Raw BatDetect2 output per live segment (batdetect-service): detections
+-- at the diagnostic threshold, their 32-dim features and the gate
+-- measurements, as a bat_pipeline.RawAnalysis npz blob. Only segments
+-- with at least one raw detection are stored. Lets a threshold retune be
+-- replayed over past nights without re-running inference
+-- (edge/scripts/regate.py).
+CREATE TABLE IF NOT EXISTS segment_raw (
+    id SERIAL PRIMARY KEY,
+    recorded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    sync_id UUID,
+    device VARCHAR(100),
+    pipeline_version VARCHAR(32),
+    model_version VARCHAR(64),
+    raw_count INTEGER NOT NULL,
+    max_det_prob REAL,
+    raw BYTEA NOT NULL
+);
+
+CREATE INDEX idx_segment_raw_recorded_at ON segment_raw(recorded_at);
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Query the ring-buffered event logs written by batdetect- and sync-service.
+
+Replaces ``docker compose logs … | grep`` for per-segment telemetry:
+heartbeats, rejections, per-call detection detail, model-health,
+sync cycles, watchdog / trickle / OneDrive / retention actions. See
+``edge/batdetect-service/src/eventlog.py`` for the file format.
+
+Usage (inside either container — both mount the ``eventlog`` volume):
+
+    docker compose exec -T batdetect-service \\
+        python /app/edge/scripts/events.py --since 1h --type rejection
+
+    # Rejections by reason over the last night
+    ... events.py --since 14h --type rejection --count reason
+
+    # Everything the sync-service did between two UTC times, as JSONL
+    ... events.py --service sync --since 2026-05-01T02:00 --until 2026-05-01T04:00 --json
+
+``--since`` / ``--until`` take a relative age (``90s``, ``30m``, ``6h``,
+``2d``) or an ISO-8601 timestamp (UTC if no offset). ``--count FIELD``
+prints a histogram of that field (values cut at the first ``(``, so
+measured suffixes group together) instead of the events; sampled events
+(``"sr": N``) are counted N times so totals stay comparable.
+
+Stdlib only; runs on the host too with ``--dir`` pointed at the volume.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+# Container: /app/edge/scripts → /app/src. Host: edge/batdetect-service/src.
+for candidate in (SCRIPT_DIR.parent.parent / "src",
+                  SCRIPT_DIR.parent / "batdetect-service" / "src"):
+    if (candidate / "eventlog.py").exists():
+        sys.path.insert(0, str(candidate))
+        break
+
+import eventlog  # noqa: E402
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_when(value: str, now: float) -> float:
+    """``"6h"`` → now − 6 h; ``"2026-05-01T02:00"`` → that instant (UTC default).
+
+    >>> parse_when("90s", 1000.0)
+    910.0
+    >>> parse_when("1970-01-01T00:10", 0.0)
+    600.0
+    """
+    unit = value[-1:].lower()
+    if unit in _UNITS and value[:-1].replace(".", "", 1).isdigit():
+        return now - float(value[:-1]) * _UNITS[unit]
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def format_event(rec: dict) -> str:
+    ts = datetime.fromtimestamp(rec.get("t") or 0, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    rest = {k: v for k, v in rec.items() if k not in ("t", "e", "s") and v is not None}
+    body = " ".join(
+        f"{k}={json.dumps(v, separators=(',', ':')) if isinstance(v, (dict, list)) else v}"
+        for k, v in rest.items()
+    )
+    return f"{ts} {rec.get('s', '?'):<9} {rec.get('e', '?'):<13} {body}"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dir", default=eventlog.EVENTLOG_DIR,
+                    help="directory holding *.ring files (default: %(default)s)")
+    ap.add_argument("--service", action="append",
+                    help="ring name(s), e.g. batdetect, sync (default: all)")
+    ap.add_argument("--since", help="relative age (6h) or ISO time")
+    ap.add_argument("--until", help="relative age or ISO time")
+    ap.add_argument("--type", action="append", dest="types",
+                    help="event type(s); comma-separated or repeated")
+    ap.add_argument("--limit", type=int, default=0, help="show only the last N events")
+    ap.add_argument("--count", metavar="FIELD",
+                    help="histogram of FIELD (use 'e' for event type)")
+    ap.add_argument("--json", action="store_true", help="emit raw JSONL")
+    args = ap.parse_args(argv)
+
+    ring_dir = Path(args.dir)
+    if args.service:
+        paths = [ring_dir / f"{name}.ring" for name in args.service]
+    else:
+        paths = sorted(ring_dir.glob("*.ring"))
+    paths = [p for p in paths if p.exists()]
+    if not paths:
+        print(f"no event rings found in {ring_dir}", file=sys.stderr)
+        return 1
+
+    now = time.time()
+    types = [t for arg in (args.types or []) for t in arg.split(",") if t]
+    events = eventlog.query(
+        [str(p) for p in paths],
+        since=parse_when(args.since, now) if args.since else None,
+        until=parse_when(args.until, now) if args.until else None,
+        types=types or None,
+    )
+
+    if args.count:
+        hist = Counter()
+        for rec in events:
+            # Drop measured values so "validator:rms_too_low(0.0023)"
+            # and "(0.0019)" land in one bucket.
+            hist[str(rec.get(args.count)).split("(")[0]] += rec.get("sr", 1)
+        for key, n in hist.most_common():
+            print(f"{n:8d}  {key}")
+        return 0
+
+    if args.limit:
+        events = events[-args.limit:]
+    for rec in events:
+        print(json.dumps(rec, separators=(",", ":")) if args.json else format_event(rec))
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # `events.py … | head` closes stdout early; that's not an error.
+        os._exit(0)
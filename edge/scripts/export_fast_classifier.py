@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Write the fast-loading copy of a groups classifier checkpoint.
+
+The Cloud Function loads ``models/groups_model.fast.pt`` when it exists:
+tensors + plain values only, so it loads with ``weights_only`` + ``mmap``
+instead of unpickling the training checkpoint on every cold start (see
+``classifier.export_fast_checkpoint``). ``functions/build.sh`` copies the
+file in; it can't write it itself because the deploy venv has no torch.
+Re-run whenever ``docker/models/groups_model.pt`` changes.
+
+Usage (anywhere torch is installed, e.g. the batdetect-service container):
+
+    python edge/scripts/export_fast_classifier.py docker/models/groups_model.pt
+    # -> docker/models/groups_model.fast.pt
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+def fail(msg: str):
+    print(f"FAIL: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def locate_pipeline():
+    """Put the package holding ``src/classifier.py`` on sys.path."""
+    script_dir = Path(__file__).resolve().parent
+    candidates = [
+        Path("/app"),                                  # inside batdetect-service container
+        script_dir.parent / "batdetect-service",       # repo layout (edge/scripts/.. -> edge/)
+    ]
+    for p in candidates:
+        if (p / "src" / "classifier.py").exists():
+            sys.path.insert(0, str(p))
+            return
+    fail(f"src/classifier.py not found under any of: {[str(c) for c in candidates]}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("checkpoint", type=Path, help="training checkpoint (.pt)")
+    ap.add_argument("--out", type=Path, help="default: <stem>.fast.pt next to the input")
+    args = ap.parse_args()
+    if not args.checkpoint.exists():
+        fail(f"{args.checkpoint} not found")
+
+    locate_pipeline()
+    from src.classifier import export_fast_checkpoint, load_groups_classifier  # noqa: E402
+
+    out = export_fast_checkpoint(str(args.checkpoint), str(args.out) if args.out else None)
+
+    # Round-trip check: both files must classify identically.
+    import numpy as np
+    from src.classifier import classify  # noqa: E402
+
+    t0 = time.perf_counter()
+    slow_model, slow_ckpt = load_groups_classifier(str(args.checkpoint))
+    t1 = time.perf_counter()
+    fast_model, fast_ckpt = load_groups_classifier(out)
+    t2 = time.perf_counter()
+    feats = np.random.default_rng(0).normal(size=(64, slow_ckpt["input_dim"])).astype(np.float32)
+    if classify(feats, slow_model, slow_ckpt) != classify(feats, fast_model, fast_ckpt):
+        fail("fast checkpoint classifies differently from the original")
+    print(f"wrote {out} (load {1000 * (t1 - t0):.0f} ms -> {1000 * (t2 - t1):.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
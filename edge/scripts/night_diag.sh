@@ -43,9 +43,10 @@ echo "watchdog log markers (any restarts? last 5):"
 "${COMPOSE[@]}" logs --tail 1000 sync-service 2>&1 | grep -E 'Watchdog (armed|.*stalled)|exited|restart' | tail -5 \
   || echo '  (no watchdog markers in last 1000 lines — fine if no recent restart)'
 echo
-echo "most recent sync cycle log line:"
-"${COMPOSE[@]}" logs --tail 200 sync-service 2>&1 | grep -E '\[SYNC\] Cycle' | tail -1 \
-  || echo '  (no Cycle line in last 200 — sync-service may be stuck or just started)'
+echo "most recent sync cycle (event log):"
+"${COMPOSE[@]}" exec -T sync-service python /app/edge/scripts/events.py \
+  --service sync --type sync_cycle --limit 1 2>&1 | sed 's/^/  /' \
+  || echo '  (no sync_cycle event — sync-service may be stuck or just started)'
 
 
 ROW "BAT_DETECTIONS TOTALS"
@@ -89,10 +90,20 @@ ROW "_DIAGNOSTIC (rejected segments — what FM_SWEEP / etc. threw away)"
 '
 
 
-ROW "LAST 30 [BAT] LOG LINES (raw events + verdict)"
+ROW "LAST 30 [BAT] EVENTS (segments, rejections, detections, model health)"
+# Per-segment lines live in the ring-buffered event log, not stdout
+# (see batdetect-service/src/eventlog.py); stdout keeps the rest.
+"${COMPOSE[@]}" exec -T batdetect-service python /app/edge/scripts/events.py \
+  --service batdetect --limit 30 2>&1 | sed 's/^/  /'
+echo
+echo "rejections by reason (last 14 h):"
+"${COMPOSE[@]}" exec -T batdetect-service python /app/edge/scripts/events.py \
+  --service batdetect --type rejection --since 14h --count reason 2>&1 | head -15 | sed 's/^/  /'
+echo
+echo "last 10 [BAT] stdout lines (startup, warnings, errors):"
 "${COMPOSE[@]}" logs --tail 200 batdetect-service 2>&1 \
   | grep -E '^\[BAT\]|^batdetect-service-1.*\[BAT\]' \
-  | tail -30 \
+  | tail -10 \
   | sed 's/^/  /'
 
 
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Replay the detection gates over stored raw analyses — no inference.
+
+batdetect-service stores every live segment BatDetect2 saw anything in
+as a ``segment_raw`` row: the raw detections at the diagnostic
+threshold, their 32-dim features, the classifier's predictions and the
+FM-sweep / validator measurements (``bat_pipeline.RawAnalysis``). This
+script runs ``bat_pipeline.apply_gates`` over those rows with whatever
+thresholds you pass, so a retune from DETECTION_TUNING_PLAYBOOK.md (or
+a permissive-mode preset) can be evaluated on a whole night in seconds
+instead of re-running BatDetect2 on the audio.
+
+Usage (inside the batdetect-service container):
+
+    docker compose exec -T batdetect-service \\
+        python /app/edge/scripts/regate.py --window-hours 14 \\
+        --user-threshold 0.15 --min-pred-conf 0.2 --validator-min-rms 0.0008
+
+    # Per-detection CSV on stdout, summary on stderr:
+    ... regate.py --window-hours 14 --csv > regate.csv
+
+    # Upload analyses: raw cache objects copied out of the bucket
+    # (gsutil cp gs://<bucket>/analysis-cache/raw/<key>.npz .)
+    python edge/scripts/regate.py --npz *.npz --user-threshold 0.15
+
+    # A retrained classifier head, evaluated on stored features:
+    ... regate.py --window-hours 14 --model /app/models/groups_v2.pt
+
+Gate thresholds default to the same env vars batdetect-service reads,
+so running with no flags reproduces the live decisions (as long as the
+env hasn't changed since the segments were captured). Thresholds below
+the diagnostic threshold the segment was analysed at (0.1) can't be
+evaluated — BatDetect2 never reported those detections.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+
+def fail(msg: str):
+    print(f"FAIL: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def locate_pipeline():
+    """Put the package holding ``src/bat_pipeline.py`` on sys.path."""
+    script_dir = Path(__file__).resolve().parent
+    candidates = [
+        Path("/app"),                                  # inside batdetect-service container
+        script_dir.parent / "batdetect-service",       # repo layout (edge/scripts/.. -> edge/)
+    ]
+    for p in candidates:
+        if (p / "src" / "bat_pipeline.py").exists():
+            sys.path.insert(0, str(p))
+            return
+    fail(f"src/bat_pipeline.py not found under any of: {[str(c) for c in candidates]}")
+
+
+def gate_args(ap: argparse.ArgumentParser) -> None:
+    """Gate flags; defaults mirror batdetect-service's env handling."""
+    env = os.getenv
+    g = ap.add_argument_group("gates (default: batdetect-service env)")
+    g.add_argument("--user-threshold", type=float,
+                   default=float(env("DETECTION_THRESHOLD", "0.3")))
+    g.add_argument("--min-pred-conf", type=float,
+                   default=float(env("MIN_PREDICTION_CONF", "0.3")))
+    g.add_argument("--no-validator", action="store_true",
+                   default=env("VALIDATOR_ENABLED", "true").lower() != "true")
+    g.add_argument("--validator-min-rms", type=float,
+                   default=float(env("VALIDATOR_MIN_RMS", "0.002")))
+    g.add_argument("--validator-min-snr-db", type=float,
+                   default=float(env("VALIDATOR_MIN_SNR_DB", "10.0")))
+    g.add_argument("--validator-min-burst-ratio", type=float,
+                   default=float(env("VALIDATOR_MIN_BURST_RATIO", "3.0")))
+    g.add_argument("--no-fm-sweep", action="store_true",
+                   default=env("FM_SWEEP_ENABLED", "true").lower() != "true")
+    g.add_argument("--fm-sweep-min-slope", type=float,
+                   default=float(env("FM_SWEEP_MIN_SLOPE", "-0.1")))
+    g.add_argument("--fm-sweep-max-low-band-ratio", type=float,
+                   default=float(env("FM_SWEEP_MAX_LOW_BAND_RATIO", "0.5")))
+    g.add_argument("--fm-sweep-min-r2", type=float,
+                   default=float(env("FM_SWEEP_MIN_R2", "0.2")))
+
+
+def gate_kwargs(args) -> dict:
+    return {
+        "user_threshold": args.user_threshold,
+        "min_pred_conf": args.min_pred_conf,
+        "validator_enabled": not args.no_validator,
+        "validator_min_rms": args.validator_min_rms,
+        "validator_min_snr_db": args.validator_min_snr_db,
+        "validator_min_burst_ratio": args.validator_min_burst_ratio,
+        "fm_sweep_enabled": not args.no_fm_sweep,
+        "fm_sweep_min_slope": args.fm_sweep_min_slope,
+        "fm_sweep_max_low_band_ratio": args.fm_sweep_max_low_band_ratio,
+        "fm_sweep_min_r2": args.fm_sweep_min_r2,
+    }
+
+
+def iter_db_rows(window_hours: int):
+    """``(label, recorded_at, raw bytes)`` for each stored segment, oldest first.
+
+    Server-side cursor, so a month of segments never sits in memory.
+    """
+    import psycopg2
+    conn = psycopg2.connect(
+        host=os.getenv("DB_HOST", "db"),
+        dbname=os.getenv("DB_NAME", "soundscape"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", "changeme"),
+    )
+    try:
+        with conn.cursor(name="regate") as cur:
+            cur.itersize = 500
+            cur.execute(
+                "SELECT sync_id, recorded_at, raw FROM segment_raw "
+                "WHERE recorded_at > NOW() - make_interval(hours => %s) "
+                "ORDER BY recorded_at",
+                (window_hours,),
+            )
+            for sync_id, recorded_at, raw in cur:
+                yield str(sync_id), recorded_at.isoformat(), bytes(raw)
+    finally:
+        conn.close()
+
+
+def iter_npz(paths):
+    for p in paths:
+        yield Path(p).name, "", Path(p).read_bytes()
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Re-apply detection gates to stored raw analyses (no inference).",
+    )
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--window-hours", type=int, default=14,
+                     help="segment_raw rows from the last N hours (default 14)")
+    src.add_argument("--npz", nargs="+", metavar="PATH",
+                     help="RawAnalysis .npz files instead of the database")
+    ap.add_argument("--model", type=Path,
+                    help="re-classify stored features with this classifier checkpoint")
+    ap.add_argument("--csv", action="store_true",
+                    help="emit one CSV row per surviving detection on stdout")
+    gate_args(ap)
+    args = ap.parse_args()
+
+    locate_pipeline()
+    from src import bat_pipeline  # noqa: E402
+
+    kwargs = gate_kwargs(args)
+    model = ckpt = None
+    if args.model:
+        from src.classifier import load_groups_classifier  # noqa: E402
+        model, ckpt = load_groups_classifier(str(args.model))
+
+    rows = iter_npz(args.npz) if args.npz else iter_db_rows(args.window_hours)
+    writer = None
+    if args.csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow([
+            "segment", "recorded_at", "start_time", "end_time", "det_prob",
+            "bd_class", "predicted_class", "prediction_confidence",
+        ])
+
+    started = time.monotonic()
+    n_segments = n_passing = 0
+    by_class: Counter = Counter()
+    reasons: Counter = Counter()
+    for label, recorded_at, blob in rows:
+        raw = bat_pipeline.RawAnalysis.from_bytes(blob)
+        if model is not None:
+            raw = bat_pipeline.reclassify(raw, model, ckpt)
+        try:
+            result = bat_pipeline.apply_gates(raw, **kwargs)
+        except ValueError as e:
+            fail(f"{label}: {e}")
+        n_segments += 1
+        if not result.detections:
+            reasons[result.rejection_reason.split("(")[0]] += 1
+            continue
+        n_passing += 1
+        for det, pred in result.detections:
+            by_class[pred["predicted_class"]] += 1
+            if writer:
+                writer.writerow([
+                    label, recorded_at,
+                    round(det.get("start_time", 0.0), 4), round(det.get("end_time", 0.0), 4),
+                    round(det.get("det_prob", 0.0), 4), det.get("class"),
+                    pred["predicted_class"], round(pred["prediction_confidence"], 4),
+                ])
+    elapsed = time.monotonic() - started
+
+    out = sys.stderr
+    print(f"\n=== REGATE — {n_segments} stored segment(s) in {elapsed:.2f} s ===", file=out)
+    print(f"  gates: {kwargs}", file=out)
+    if args.model:
+        print(f"  classifier: {args.model}", file=out)
+    print(f"  segments with detections : {n_passing}", file=out)
+    print(f"  detections               : {sum(by_class.values())}", file=out)
+    for cls, n in by_class.most_common():
+        print(f"    {cls:<12} {n}", file=out)
+    if reasons:
+        print("  rejected segments by reason:", file=out)
+        for reason, n in reasons.most_common():
+            print(f"    {reason:<32} {n}", file=out)
+
+
+if __name__ == "__main__":
+    main()
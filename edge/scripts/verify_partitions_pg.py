@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Partition conversion + retention checks against a real PostgreSQL.
+
+The partition DDL (re-keying the legacy table, ATTACH, index adoption)
+only fails on a real server, so unlike verify_storage_tiering.py this
+needs a database. Point it at any role that may CREATE DATABASE:
+
+    VERIFY_PG_DSN=postgresql://postgres:pw@localhost/postgres \\
+        python edge/scripts/verify_partitions_pg.py
+
+Each test runs in a scratch database built from edge/init.sql (plus the
+``audio_levels`` table sync-service creates), dropped afterwards. Exits
+0 when all tests pass, 1 otherwise; skips (exit 0) when VERIFY_PG_DSN is
+unset.
+"""
+
+import os
+import sys
+import traceback
+from datetime import timedelta
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parent.parent
+SYNC_SERVICE = REPO_ROOT / "edge" / "sync-service"
+INIT_SQL = REPO_ROOT / "edge" / "init.sql"
+
+DSN = os.getenv("VERIFY_PG_DSN")
+if not DSN:
+    print("SKIP: VERIFY_PG_DSN not set (needs a PostgreSQL >= 14 server)")
+    sys.exit(0)
+
+import psycopg2  # noqa: E402
+from psycopg2 import sql  # noqa: E402
+from psycopg2.extensions import make_dsn, parse_dsn  # noqa: E402
+
+sys.path.insert(0, str(SYNC_SERVICE))
+from src import partitions, row_counters  # noqa: E402
+
+SCRATCH_DB = f"verify_partitions_{os.getpid()}"
+
+# Same definition as the migration in sync-service/src/main.py.
+AUDIO_LEVELS_DDL = """
+    CREATE TABLE IF NOT EXISTS audio_levels (
+        id SERIAL PRIMARY KEY,
+        rms DOUBLE PRECISION NOT NULL,
+        peak DOUBLE PRECISION NOT NULL,
+        recorded_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+"""
+
+SEED_SQL = [
+    "INSERT INTO classifications (label, score, device, sync_id, sync_time, synced) "
+    "SELECT 'Speech', 0.9, 'pi', md5(g::text)::uuid, NOW() - make_interval(days => g), TRUE "
+    "FROM generate_series(1, 5) g",
+    "INSERT INTO bat_detections (species, detection_prob, device, sync_id, detection_time, synced) "
+    "SELECT 'LABO', 0.8, 'pi', md5(g::text)::uuid, NOW() - make_interval(days => g), TRUE "
+    "FROM generate_series(1, 5) g",
+    "INSERT INTO device_status (uptime_seconds, recorded_at) "
+    "SELECT g, NOW() - make_interval(days => g) FROM generate_series(1, 5) g",
+    "INSERT INTO audio_levels (rms, peak, recorded_at) "
+    "SELECT 0.1, 0.2, NOW() - make_interval(days => g) FROM generate_series(1, 5) g",
+]
+
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+
+def _admin():
+    conn = psycopg2.connect(DSN)
+    conn.autocommit = True
+    return conn
+
+
+def _connect():
+    return psycopg2.connect(make_dsn(**{**parse_dsn(DSN), "dbname": SCRATCH_DB}))
+
+
+def fresh_db():
+    """Recreate the scratch database with the device schema and seed rows."""
+    admin = _admin()
+    with admin.cursor() as cur:
+        cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(SCRATCH_DB)))
+        cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(SCRATCH_DB)))
+    admin.close()
+    conn = _connect()
+    with conn.cursor() as cur:
+        cur.execute(INIT_SQL.read_text())
+        cur.execute(AUDIO_LEVELS_DDL)
+        for stmt in SEED_SQL:
+            cur.execute(stmt)
+    conn.commit()
+    return conn
+
+
+def drop_db():
+    admin = _admin()
+    with admin.cursor() as cur:
+        cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(SCRATCH_DB)))
+    admin.close()
+
+
+def count(conn, table: str) -> int:
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        n = cur.fetchone()[0]
+    conn.rollback()
+    return n
+
+
+# -----------------------------------------------------------------------------
+# Tests
+# -----------------------------------------------------------------------------
+
+def test_convert_all_tables_keeps_rows():
+    conn = fresh_db()
+    try:
+        partitions.ensure_partitioning(conn)
+        assert partitions.status_payload()["partitionConversionErrors"] is None, \
+            partitions.status_payload()
+        for table in partitions.PARTITIONED_TABLES:
+            assert partitions.is_partitioned(conn, table), f"{table} not partitioned"
+            names = {p["name"] for p in partitions.list_partitions(conn, table)}
+            assert f"{table}_legacy" in names and f"{table}_default" in names, names
+            assert count(conn, table) == 5, table
+    finally:
+        conn.close()
+
+
+def test_new_rows_land_in_day_partitions_and_are_counted():
+    conn = fresh_db()
+    try:
+        row_counters.install(conn)
+        partitions.ensure_partitioning(conn)
+        row_counters.install(conn)
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO bat_detections (species, detection_prob, device, sync_id, detection_time) "
+                "VALUES ('LABO', 0.8, 'pi', md5('new')::uuid, NOW() + INTERVAL '2 days')"
+            )
+        conn.commit()
+        day = partitions._utc_today() + timedelta(days=2)
+        assert count(conn, partitions.partition_name("bat_detections", day)) == 1
+        assert count(conn, "bat_detections_legacy") == 5
+        counts = row_counters.read(conn)["bat_detections"]
+        assert (counts["total"], counts["unsynced"]) == (6, 1), counts
+    finally:
+        conn.close()
+
+
+def test_legacy_partition_dropped_past_retention():
+    conn = fresh_db()
+    real_today = partitions._utc_today
+    try:
+        partitions.ensure_partitioning(conn)
+        later = real_today() + timedelta(days=60)
+        partitions._utc_today = lambda: later
+        for table in partitions.PARTITIONED_TABLES:
+            partitions.drop_expired_partitions(conn, table)
+            names = {p["name"] for p in partitions.list_partitions(conn, table)}
+            assert f"{table}_legacy" not in names, f"{table}: {sorted(names)}"
+    finally:
+        partitions._utc_today = real_today
+        conn.close()
+
+
+def test_conversion_failure_is_reported_then_retried():
+    conn = fresh_db()
+    blocker = _connect()
+    try:
+        # Hold a lock the conversion can't get within DDL_LOCK_TIMEOUT.
+        with blocker.cursor() as cur:
+            cur.execute("LOCK TABLE audio_levels IN ACCESS SHARE MODE")
+        partitions.ensure_partitioning(conn)
+        errors = partitions.status_payload()["partitionConversionErrors"]
+        assert errors and set(errors) == {"audio_levels"}, errors
+        assert not partitions.is_partitioned(conn, "audio_levels")
+
+        blocker.rollback()
+        partitions.run_retention(conn, time_budget_sec=30)
+        assert partitions.status_payload()["partitionConversionErrors"] is None
+        assert partitions.is_partitioned(conn, "audio_levels")
+    finally:
+        blocker.close()
+        conn.close()
+
+
+TESTS = [
+    test_convert_all_tables_keeps_rows,
+    test_new_rows_land_in_day_partitions_and_are_counted,
+    test_legacy_partition_dropped_past_retention,
+    test_conversion_failure_is_reported_then_retried,
+]
+
+
+def main():
+    failed = []
+    for t in TESTS:
+        partitions._conversion_errors.clear()
+        try:
+            t()
+            print(f"  [OK]   {t.__name__}")
+        except Exception as e:
+            print(f"  [FAIL] {t.__name__}: {e.__class__.__name__}: {e}")
+            traceback.print_exc()
+            failed.append(t.__name__)
+    drop_db()
+    print()
+    if failed:
+        print(f"{len(failed)}/{len(TESTS)} tests failed: {failed}")
+        sys.exit(1)
+    print(f"All {len(TESTS)} tests passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ Stdlib only — no pytest dependency — so this runs on the Pi, in CI, or
 on a grad-student's laptop without any setup.
 """
 
+import json
+import os
 import sys
 import tempfile
 import traceback
@@ -34,6 +36,10 @@ import storage  # noqa: E402
 import disk_watchdog  # noqa: E402
 import onedrive_sync  # noqa: E402
 
+# disk_forecast uses the service's package imports (``from src import ...``).
+sys.path.insert(0, str(WATCHDOG_SRC.parent))
+from src import disk_forecast  # noqa: E402
+
 
 # -----------------------------------------------------------------------------
 # Helpers
@@ -419,7 +425,7 @@ def test_enforce_above_warning_below_hardcap_does_not_delete():
     with tempfile.TemporaryDirectory() as tmp:
         _reset_halt_flag_to(tmp)
         conn = _RecordingFakeConn()
-        conn.set_stage_rows("tier2_active", [(1, "/bat_audio/a.wav")])
+        conn.set_stage_rows("tier2_active", [(1, "/bat_audio/a.wav", 1024)])
         result = disk_watchdog.enforce_disk_quota(
             conn, tmp, disk_usage_fn=lambda _: _FakeUsage(used_gb=175),
         )
@@ -442,8 +448,10 @@ def test_enforce_over_hardcap_deletes_in_tier_order():
         t2_path = make("tier2_30day/fresh.wav", 6)
 
         conn = _RecordingFakeConn()
-        conn.set_stage_rows("tier4_expired", [(1, str(t4_path))])
-        conn.set_stage_rows("tier2_active", [(2, str(t2_path))])
+        # Catalog size for the tier-4 file; tier-2 file predates the
+        # catalog (None) and falls back to a stat.
+        conn.set_stage_rows("tier4_expired", [(1, str(t4_path), 6 * 1024 ** 3)])
+        conn.set_stage_rows("tier2_active", [(2, str(t2_path), None)])
 
         # Sim: 185 GB used → over 180 hard cap; need to free 15 GB to land
         # at 170 warning. Our two files = 12 GB total, still leaves 173 GB
@@ -462,19 +470,23 @@ def test_enforce_over_hardcap_deletes_in_tier_order():
             return _FakeUsage(used_gb=185 - conn._deleted_gb)
 
         conn._deleted_gb = 0
-        _orig_delete = disk_watchdog._delete_candidate
-        def tracking_delete(c, cand):
-            bytes_freed = _orig_delete(c, cand)
+        _orig_delete = disk_watchdog._delete_batch
+        def tracking_delete(c, cands):
+            bytes_freed = _orig_delete(c, cands)
             conn._deleted_gb += bytes_freed / (1024 ** 3)
+            # Deleted rows drop out of the stage query.
+            gone = {cand["audio_path"] for cand in cands}
+            for stage, rows in conn.stage_rows.items():
+                conn.stage_rows[stage] = [r for r in rows if r[1] not in gone]
             return bytes_freed
-        disk_watchdog._delete_candidate = tracking_delete
+        disk_watchdog._delete_batch = tracking_delete
 
         try:
             result = disk_watchdog.enforce_disk_quota(
                 conn, str(bat_audio), disk_usage_fn=disk_usage_fn,
             )
         finally:
-            disk_watchdog._delete_candidate = _orig_delete
+            disk_watchdog._delete_batch = _orig_delete
 
         assert result["files_deleted"] == 2
         assert not t4_path.exists()
@@ -499,15 +511,20 @@ def test_enforce_over_hardcap_success_clears_halt():
             paths.append(p)
 
         conn = _RecordingFakeConn()
-        conn.set_stage_rows("tier2_active", [(i + 1, str(p)) for i, p in enumerate(paths)])
+        conn.set_stage_rows(
+            "tier2_active", [(i + 1, str(p), 6 * 1024 ** 3) for i, p in enumerate(paths)],
+        )
 
         conn._deleted_gb = 0
-        _orig = disk_watchdog._delete_candidate
-        def tracking_delete(c, cand):
-            b = _orig(c, cand)
+        _orig = disk_watchdog._delete_batch
+        def tracking_delete(c, cands):
+            b = _orig(c, cands)
             conn._deleted_gb += b / (1024 ** 3)
+            gone = {cand["audio_path"] for cand in cands}
+            for stage, rows in conn.stage_rows.items():
+                conn.stage_rows[stage] = [r for r in rows if r[1] not in gone]
             return b
-        disk_watchdog._delete_candidate = tracking_delete
+        disk_watchdog._delete_batch = tracking_delete
 
         def disk_usage_fn(_):
             return _FakeUsage(used_gb=185 - conn._deleted_gb)
@@ -517,7 +534,7 @@ def test_enforce_over_hardcap_success_clears_halt():
                 conn, str(bat_audio), disk_usage_fn=disk_usage_fn,
             )
         finally:
-            disk_watchdog._delete_candidate = _orig
+            disk_watchdog._delete_batch = _orig
 
         # 3 × 6 GB = 18 GB freed → below 170 GB warning. No halt.
         assert result["action"] == "deleted_files"
@@ -540,6 +557,70 @@ def test_enforce_halts_when_all_candidates_protected():
         assert disk_watchdog.HALT_FLAG.exists()
 
 
+def test_stage_candidates_dedupe_shared_wav_and_use_catalog_size():
+    """Detections from one segment share a WAV: one candidate, catalog size, no stat."""
+    conn = _RecordingFakeConn()
+    conn.set_stage_rows("tier2_expired", [
+        (1, "/bat_audio/tier2_30day/seg.wav", 4096),
+        (2, "/bat_audio/tier2_30day/seg.wav", 4096),
+    ])
+    cands = disk_watchdog._fetch_stage_candidates(conn, "tier2_expired")
+    assert len(cands) == 1
+    assert cands[0]["size_bytes"] == 4096  # file doesn't exist — size came from the catalog
+
+
+# -----------------------------------------------------------------------------
+# Disk forecast + trickle reclamation
+# -----------------------------------------------------------------------------
+
+def test_forecast_hours_until_follows_diurnal_profile():
+    """Growth only at night: the cap is hit on the first night hour that crosses it."""
+    profile = [0.0] * 24
+    profile[2] = profile[3] = 10.0
+    # From 12:00 UTC nothing is added until 02:00 (hour 15 of the walk).
+    assert disk_forecast.hours_until(95, 100, profile, 12) == 15
+    assert disk_forecast.hours_until(100, 100, profile, 12) == 0
+    assert disk_forecast.hours_until(0, 100, [0.0] * 24, 0) is None
+
+
+def test_forecast_projected_growth_wraps_midnight():
+    profile = [float(h) for h in range(24)]
+    assert disk_forecast.projected_growth(profile, 23, 2) == 23.0 + 0.0
+
+
+def test_trickle_outside_window_deletes_nothing():
+    night = datetime(2026, 6, 1, 3, 0, tzinfo=timezone.utc)
+    out = disk_forecast.trickle_reclaim(object(), {"reclaim_needed_bytes": 10 ** 12}, now=night)
+    assert out == {"action": "outside_window", "files_deleted": 0, "bytes_freed": 0}
+
+
+def test_trickle_caps_files_and_only_deletes_expired():
+    noon = datetime(2026, 6, 1, 16, 0, tzinfo=timezone.utc)
+    dw = disk_forecast.disk_watchdog
+    fetched, deleted = [], []
+
+    def fake_fetch(conn, stage):
+        fetched.append(stage)
+        return [_cand(i, 100, stage) | {"audio_path": f"/bat_audio/{stage}/{i}.wav"}
+                for i in range(50)]
+
+    def fake_delete(conn, cands):
+        deleted.extend(cands)
+        return sum(c["size_bytes"] for c in cands)
+
+    orig = (dw._fetch_stage_candidates, dw._delete_batch, disk_forecast._recently_active)
+    dw._fetch_stage_candidates, dw._delete_batch = fake_fetch, fake_delete
+    disk_forecast._recently_active = lambda conn, minutes: False
+    try:
+        # Even a forecast that wants space back never reaches unexpired files.
+        out = disk_forecast.trickle_reclaim(object(), {"reclaim_needed_bytes": 10 ** 12}, now=noon)
+        assert out["files_deleted"] == disk_forecast.TRICKLE_MAX_FILES
+        assert set(fetched) <= set(disk_forecast.EXPIRED_STAGES)
+        assert all(c["stage"] == "tier4_expired" for c in deleted)
+    finally:
+        dw._fetch_stage_candidates, dw._delete_batch, disk_forecast._recently_active = orig
+
+
 def test_stage_sql_excludes_unsynced_tier1():
     """SQL text check: tier1_synced query requires synced_remote_at IS NOT NULL."""
     sql = disk_watchdog._STAGE_SQL["tier1_synced"]
@@ -622,14 +703,26 @@ def test_find_candidates_sql_requires_audio_on_disk():
 # -----------------------------------------------------------------------------
 
 class _FakeRclone:
-    """Stand-in for onedrive_sync._run_rclone; records every invocation."""
+    """Stand-in for onedrive_sync._run_rclone; records every invocation.
+
+    Speaks the batched protocol: ``lsjson --files-from`` answers with the
+    subset of listed files present in ``existing_targets`` (full
+    ``remote:path`` -> size) — like real rclone, only top-level entries
+    unless ``-R``/``--recursive`` is passed — and ``copy --files-from`` adds every listed
+    file (sized from the local source) when it succeeds.
+    """
 
     def __init__(self):
         self.calls: List[dict] = []
         self.version_ok = True
-        self.existing_targets: set = set()
-        self.copyto_succeeds = True
-        self.copyto_stderr = b""
+        self.existing_targets: dict = {}
+        self.copy_succeeds = True
+        self.copy_stderr = b""
+
+    @staticmethod
+    def _files_from(args):
+        with open(args[args.index("--files-from") + 1]) as f:
+            return [line.strip() for line in f if line.strip()]
 
     def __call__(self, args, timeout):
         self.calls.append({"args": list(args), "timeout": timeout})
@@ -642,14 +735,25 @@ class _FakeRclone:
             }
         if sub == "lsjson":
             target = args[-1]
-            if target in self.existing_targets:
-                return {"returncode": 0, "stdout": b'[{"Name":"x"}]', "stderr": b""}
-            return {"returncode": 0, "stdout": b"[]", "stderr": b""}
-        if sub == "copyto":
+            recursive = "-R" in args or "--recursive" in args
+            found = [
+                {"Path": rel, "Size": self.existing_targets[f"{target}/{rel}"]}
+                for rel in self._files_from(args)
+                if f"{target}/{rel}" in self.existing_targets
+                and (recursive or "/" not in rel)
+            ]
+            return {"returncode": 0, "stdout": json.dumps(found).encode(), "stderr": b""}
+        if sub == "copy":
+            if self.copy_succeeds:
+                source, target = args[2], args[3]
+                for rel in self._files_from(args):
+                    self.existing_targets[f"{target}/{rel}"] = os.path.getsize(
+                        os.path.join(source, rel)
+                    )
             return {
-                "returncode": 0 if self.copyto_succeeds else 1,
+                "returncode": 0 if self.copy_succeeds else 1,
                 "stdout": b"",
-                "stderr": self.copyto_stderr,
+                "stderr": self.copy_stderr,
             }
         return {"returncode": 1, "stdout": b"", "stderr": b"unknown rclone command"}
 
@@ -676,8 +780,9 @@ class _OnedriveMockCursor:
             limit = (params or (50,))[0]
             self._rows = self.conn.candidates[:limit]
         elif "UPDATE bat_detections" in sql and "remote_audio_path" in sql:
-            remote_path, row_id = params
-            self.conn.marked_synced.append({"id": row_id, "remote_audio_path": remote_path})
+            row_ids, remote_paths = params
+            for row_id, remote_path in zip(row_ids, remote_paths):
+                self.conn.marked_synced.append({"id": row_id, "remote_audio_path": remote_path})
         else:
             self._rows = []
 
@@ -794,9 +899,10 @@ def test_sync_end_to_end_with_fake_rclone():
     assert "onedrive:Bat Recordings from pi01/tier1_permanent/PESU/" in marked_by_id[1]
     assert "onedrive:Bat Recordings from pi01/tier1_permanent/LACI/" in marked_by_id[2]
 
-    # rclone was invoked version + lsjson + copyto per file.
+    # One batch: version + pre-check lsjson + one copy + confirm lsjson,
+    # independent of file count.
     subcommands = [c["args"][1] for c in fake.calls if len(c["args"]) > 1]
-    assert subcommands.count("copyto") == 2
+    assert subcommands.count("copy") == 1
     assert subcommands.count("lsjson") == 2
     assert subcommands.count("version") == 1
 
@@ -812,9 +918,9 @@ def test_sync_skips_upload_when_remote_already_exists():
         onedrive_sync.LOCAL_AUDIO_PREFIX = str(bat_audio) + "/"
         fake = _FakeRclone()
         # Pretend the file is already present on the remote.
-        fake.existing_targets.add(
-            f"onedrive:Bat Recordings from pi01/tier1_permanent/PESU/pi01_20260417T143022Z.wav"
-        )
+        fake.existing_targets[
+            "onedrive:Bat Recordings from pi01/tier1_permanent/PESU/pi01_20260417T143022Z.wav"
+        ] = 1000
         orig_run = _patch_rclone(fake)
         try:
             conn = _OnedriveMockConn([
@@ -829,9 +935,9 @@ def test_sync_skips_upload_when_remote_already_exists():
     assert result["uploads_succeeded"] == 0
     # Row was still marked — that's the whole point of backfill.
     assert len(conn.marked_synced) == 1
-    # And crucially, no copyto was issued.
+    # And crucially, no copy was issued.
     subcommands = [c["args"][1] for c in fake.calls if len(c["args"]) > 1]
-    assert "copyto" not in subcommands
+    assert "copy" not in subcommands
 
 
 def test_sync_upload_failure_does_not_mark_synced():
@@ -843,8 +949,8 @@ def test_sync_upload_failure_does_not_mark_synced():
         orig_prefix = onedrive_sync.LOCAL_AUDIO_PREFIX
         onedrive_sync.LOCAL_AUDIO_PREFIX = str(bat_audio) + "/"
         fake = _FakeRclone()
-        fake.copyto_succeeds = False
-        fake.copyto_stderr = b"network unreachable"
+        fake.copy_succeeds = False
+        fake.copy_stderr = b"network unreachable"
         orig_run = _patch_rclone(fake)
         try:
             conn = _OnedriveMockConn([
@@ -952,6 +1058,12 @@ TESTS = [
     test_enforce_over_hardcap_deletes_in_tier_order,
     test_enforce_over_hardcap_success_clears_halt,
     test_enforce_halts_when_all_candidates_protected,
+    test_stage_candidates_dedupe_shared_wav_and_use_catalog_size,
+    # disk forecast + trickle
+    test_forecast_hours_until_follows_diurnal_profile,
+    test_forecast_projected_growth_wraps_midnight,
+    test_trickle_outside_window_deletes_nothing,
+    test_trickle_caps_files_and_only_deletes_expired,
     # disk watchdog — SQL protection assertions
     test_stage_sql_excludes_unsynced_tier1,
     test_stage_sql_excludes_verified,
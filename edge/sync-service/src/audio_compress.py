@@ -0,0 +1,135 @@
+"""Lossless FLAC compression for archived bat recordings.
+
+A 15 s, 384 kHz, 16-bit mono WAV is ~11 MB. Ultrasonic field audio is
+mostly low-amplitude noise between calls, so FLAC typically lands at
+40–60 % of the PCM size with bit-exact round-trip. Used two ways:
+
+  * **Before upload** — ``onedrive_sync`` compresses tier-1 WAVs into a
+    staging dir and ships the ``.flac`` instead (``ARCHIVE_COMPRESS_UPLOADS``).
+  * **On disk** — ``compress_archive_on_disk`` replaces archived WAVs
+    with FLAC in place and repoints ``audio_path``
+    (``ARCHIVE_COMPRESS_ON_DISK``, off by default).
+
+Only integer PCM sources are compressed — float WAVs would need
+requantising, which isn't lossless, so they raise and callers fall back
+to the original file. FLAC caps sample rate at 655 350 Hz, well above
+any AudioMoth setting.
+
+soundfile is imported lazily so sync-service keeps starting (and just
+uploads raw WAV) if the wheel or libsndfile is missing.
+"""
+
+import os
+from typing import Dict, Set
+
+from src import disk_watchdog
+
+FLAC_MAX_SAMPLE_RATE = 655350
+LOSSLESS_SUBTYPES = {"PCM_S8", "PCM_U8", "PCM_16", "PCM_24"}
+BLOCK_FRAMES = 1 << 18  # ~0.7 s at 384 kHz; bounds memory per block
+
+ON_DISK_BATCH = int(os.getenv("ARCHIVE_COMPRESS_ON_DISK_BATCH", "20"))
+
+# WAVs compress_to_flac refused (float PCM, > FLAC rate) — skipped until
+# restart so they can't fill every batch.
+_unconvertible: Set[str] = set()
+
+
+def flac_name(path: str) -> str:
+    """``.../x.wav`` → ``.../x.flac`` (other suffixes get ``.flac`` appended)."""
+    root, ext = os.path.splitext(path)
+    return (root if ext.lower() == ".wav" else path) + ".flac"
+
+
+def compress_to_flac(src: str, dest: str) -> int:
+    """Stream ``src`` (integer PCM WAV) into ``dest`` as FLAC. Returns bytes written.
+
+    Writes to ``dest + '.part'`` then renames, so a crash never leaves a
+    truncated FLAC that looks complete.
+    """
+    import soundfile as sf
+
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    tmp = dest + ".part"
+    with sf.SoundFile(src) as fin:
+        if fin.subtype not in LOSSLESS_SUBTYPES:
+            raise ValueError(f"{src}: subtype {fin.subtype} can't be FLAC'd losslessly")
+        if fin.samplerate > FLAC_MAX_SAMPLE_RATE:
+            raise ValueError(f"{src}: {fin.samplerate} Hz exceeds FLAC limit")
+        subtype = "PCM_16" if fin.subtype in ("PCM_S8", "PCM_U8") else fin.subtype
+        try:
+            with sf.SoundFile(
+                tmp, "w", samplerate=fin.samplerate, channels=fin.channels,
+                format="FLAC", subtype=subtype,
+            ) as fout:
+                # int32 round-trips any ≤24-bit PCM exactly.
+                for block in fin.blocks(blocksize=BLOCK_FRAMES, dtype="int32"):
+                    fout.write(block)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    os.replace(tmp, dest)
+    return os.path.getsize(dest)
+
+
+def compress_archive_on_disk(conn, limit: int = ON_DISK_BATCH) -> Dict:
+    """Replace up to ``limit`` archived WAVs with FLAC and repoint their rows.
+
+    Every row sharing the WAV (one per detection in the segment) is
+    updated in the same transaction before the WAV is removed, so the DB
+    never points at a missing file. Oldest recordings first. A WAV that
+    is already gone is forgotten (``audio_path`` cleared, catalog row
+    soft-deleted) so it leaves the candidate set.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT audio_path
+            FROM bat_detections
+            WHERE audio_path LIKE %s
+              AND storage_tier IN (1, 2, 4)
+              AND NOT (audio_path = ANY(%s))
+            GROUP BY audio_path
+            ORDER BY MIN(detection_time), audio_path
+            LIMIT %s
+            """,
+            ("%.wav", list(_unconvertible), limit),
+        )
+        paths = [r[0] for r in cur.fetchall()]
+
+    out = {"files": 0, "bytes_before": 0, "bytes_after": 0, "errors": 0, "missing": 0}
+    missing = {wav for wav in paths if not os.path.exists(wav)}
+    if missing:
+        disk_watchdog._null_audio_paths(conn, sorted(missing))
+        out["missing"] = len(missing)
+        print(f"[COMPRESS] {len(missing)} archived WAV(s) already gone; paths cleared")
+    for wav in paths:
+        if wav in missing:
+            continue
+        dest = flac_name(wav)
+        try:
+            before = os.path.getsize(wav)
+            after = compress_to_flac(wav, dest)
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE bat_detections SET audio_path = %s WHERE audio_path = %s",
+                    (dest, wav),
+                )
+                cur.execute(
+                    "UPDATE file_catalog SET path = %s, size_bytes = %s WHERE path = %s",
+                    (dest, after, wav),
+                )
+            conn.commit()
+            os.remove(wav)
+        except Exception as e:
+            conn.rollback()
+            out["errors"] += 1
+            if isinstance(e, ValueError):
+                _unconvertible.add(wav)
+            print(f"[COMPRESS] {wav}: {type(e).__name__}: {e}")
+            continue
+        out["files"] += 1
+        out["bytes_before"] += before
+        out["bytes_after"] += after
+    return out
@@ -0,0 +1,329 @@
+"""Per-minute / per-hour rollups of ``audio_levels``.
+
+``audio_levels`` gets one row per 15 s segment (5 760/day). The health
+push used to scan the last hour of it three times every 15 s, and the
+daily summary ran six ``percentile_cont`` sorts over a day of rows —
+both cost more as the table grew. Readers now go through two small
+rollup tables instead:
+
+  * ``audio_levels_1m`` — one row per UTC minute (health: last 60 rows)
+  * ``audio_levels_1h`` — one row per UTC hour (summary: last 24 rows)
+
+Each row holds additive aggregates: segment count, RMS sum, max peak,
+BatDetect2 raw-count sum / max det_prob / segments over the user
+threshold, rejection-reason and top-class counts (JSONB), the most
+recent segment's values, and log-spaced histograms of RMS and the three
+bat-band RMS values. Percentiles come from the merged histograms —
+``HIST_BINS_PER_DECADE`` = 10 gives ±12 % resolution, plenty for
+"is the mic alive" and "is there energy in band".
+
+``rollup_new_rows`` is the maintenance job: it reads rows with ``id``
+above a watermark (``rollup_state``), folds them into both tables with a
+read-merge-write of the touched buckets, and advances the watermark in
+the same transaction. It runs on its own scheduler task; batdetect-
+service is the only ``audio_levels`` writer and inserts one row at a
+time, so ids commit in order and the watermark can't skip a row.
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+ROLLUP_BATCH_ROWS = int(os.getenv("ROLLUP_BATCH_ROWS", "5000"))
+ROLLUP_1M_RETENTION_DAYS = int(os.getenv("ROLLUP_1M_RETENTION_DAYS", "14"))
+ROLLUP_1H_RETENTION_DAYS = int(os.getenv("ROLLUP_1H_RETENTION_DAYS", "400"))
+
+HIST_MIN = 1e-6
+HIST_DECADES = 6  # 1e-6 .. 1.0 (full-scale)
+HIST_BINS_PER_DECADE = 10
+# Bin 0 = below HIST_MIN, last bin = at/above full scale.
+HIST_BINS = HIST_DECADES * HIST_BINS_PER_DECADE + 2
+
+ROLLUP_TABLES = {"audio_levels_1m": "minute", "audio_levels_1h": "hour"}
+_HISTS = ("rms_hist", "band_low_hist", "band_mid_hist", "band_high_hist")
+_LAST = ("last_at", "last_rms", "last_peak", "last_bd_raw_count",
+         "last_bd_max_det_prob", "last_bd_user_pass")
+_COLUMNS = (
+    "segments", "rms_sum", "peak_max", "bd_raw_sum", "bd_raw_n",
+    "bd_max_det_prob", "bd_pass_segments", "rejections", "top_classes",
+) + _HISTS + _LAST
+
+_ROLLUP_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        bucket TIMESTAMP PRIMARY KEY,
+        segments INTEGER NOT NULL DEFAULT 0,
+        rms_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        peak_max DOUBLE PRECISION,
+        bd_raw_sum BIGINT NOT NULL DEFAULT 0,
+        bd_raw_n INTEGER NOT NULL DEFAULT 0,
+        bd_max_det_prob DOUBLE PRECISION,
+        bd_pass_segments INTEGER NOT NULL DEFAULT 0,
+        rejections JSONB NOT NULL DEFAULT '{{}}',
+        top_classes JSONB NOT NULL DEFAULT '{{}}',
+        rms_hist INTEGER[] NOT NULL,
+        band_low_hist INTEGER[] NOT NULL,
+        band_mid_hist INTEGER[] NOT NULL,
+        band_high_hist INTEGER[] NOT NULL,
+        last_at TIMESTAMP,
+        last_rms DOUBLE PRECISION,
+        last_peak DOUBLE PRECISION,
+        last_bd_raw_count INTEGER,
+        last_bd_max_det_prob DOUBLE PRECISION,
+        last_bd_user_pass INTEGER
+    )
+"""
+
+ROLLUP_DDL = tuple(_ROLLUP_TABLE_DDL.format(table=t) for t in ROLLUP_TABLES) + ("""
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        name VARCHAR(64) PRIMARY KEY,
+        last_id BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+""",)
+
+
+# -----------------------------------------------------------------------------
+# Pure helpers
+# -----------------------------------------------------------------------------
+
+def hist_bin(value: float) -> int:
+    """Log-spaced bin index for an RMS-like value in [0, 1].
+
+    >>> hist_bin(0.0), hist_bin(1e-6), hist_bin(1.0)
+    (0, 1, 61)
+    """
+    if value is None or value < HIST_MIN:
+        return 0
+    idx = int(math.floor(math.log10(value / HIST_MIN) * HIST_BINS_PER_DECADE)) + 1
+    return min(idx, HIST_BINS - 1)
+
+
+def hist_percentile(hist: List[int], q: float) -> Optional[float]:
+    """Approximate percentile ``q`` (0–1): geometric centre of the bin holding it.
+
+    >>> h = [0] * HIST_BINS
+    >>> h[hist_bin(0.01)] = 10
+    >>> round(hist_percentile(h, 0.5), 4)
+    0.0112
+    """
+    total = sum(hist)
+    if total == 0:
+        return None
+    target = q * total
+    running = 0
+    for i, n in enumerate(hist):
+        running += n
+        if running >= target and n:
+            if i == 0:
+                return 0.0
+            lo = HIST_MIN * 10 ** ((i - 1) / HIST_BINS_PER_DECADE)
+            return lo * 10 ** (0.5 / HIST_BINS_PER_DECADE)
+    return None
+
+
+def clean_reason(reason: Optional[str]) -> str:
+    """``"validator:rms_too_low(0.002)"`` → ``"validator:rms_too_low"``."""
+    return reason.split("(")[0] if reason else "unknown"
+
+
+def empty_agg() -> Dict:
+    agg = {
+        "segments": 0, "rms_sum": 0.0, "peak_max": None,
+        "bd_raw_sum": 0, "bd_raw_n": 0, "bd_max_det_prob": None,
+        "bd_pass_segments": 0, "rejections": {}, "top_classes": {},
+    }
+    for h in _HISTS:
+        agg[h] = [0] * HIST_BINS
+    for k in _LAST:
+        agg[k] = None
+    return agg
+
+
+def _max(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def add_segment(agg: Dict, row: Dict) -> None:
+    """Fold one ``audio_levels`` row (dict keyed by column name) into ``agg``."""
+    agg["segments"] += 1
+    agg["rms_sum"] += row["rms"] or 0.0
+    agg["peak_max"] = _max(agg["peak_max"], row["peak"])
+    agg["rms_hist"][hist_bin(row["rms"])] += 1
+    for col, hist in (("bat_band_low_rms", "band_low_hist"),
+                      ("bat_band_mid_rms", "band_mid_hist"),
+                      ("bat_band_high_rms", "band_high_hist")):
+        if row[col] is not None:
+            agg[hist][hist_bin(row[col])] += 1
+    if row["bd_raw_count"] is not None:
+        agg["bd_raw_sum"] += int(row["bd_raw_count"])
+        agg["bd_raw_n"] += 1
+    agg["bd_max_det_prob"] = _max(agg["bd_max_det_prob"], row["bd_max_det_prob"])
+    if (row["bd_user_pass"] or 0) > 0:
+        agg["bd_pass_segments"] += 1
+    if row["rejection_reason"] is not None:
+        r = clean_reason(row["rejection_reason"])
+        agg["rejections"][r] = agg["rejections"].get(r, 0) + 1
+    if row["bd_top_class"] is not None:
+        c = row["bd_top_class"]
+        agg["top_classes"][c] = agg["top_classes"].get(c, 0) + 1
+    if agg["last_at"] is None or row["recorded_at"] >= agg["last_at"]:
+        agg.update(
+            last_at=row["recorded_at"], last_rms=row["rms"], last_peak=row["peak"],
+            last_bd_raw_count=row["bd_raw_count"],
+            last_bd_max_det_prob=row["bd_max_det_prob"],
+            last_bd_user_pass=row["bd_user_pass"],
+        )
+
+
+def merge_agg(into: Dict, other: Dict) -> Dict:
+    """Combine two aggregates in place (into ``into``) and return it."""
+    for k in ("segments", "rms_sum", "bd_raw_sum", "bd_raw_n", "bd_pass_segments"):
+        into[k] += other[k] or 0
+    for k in ("peak_max", "bd_max_det_prob"):
+        into[k] = _max(into[k], other[k])
+    for h in _HISTS:
+        into[h] = [a + b for a, b in zip(into[h], other[h] or [0] * HIST_BINS)]
+    for k in ("rejections", "top_classes"):
+        for name, n in (other[k] or {}).items():
+            into[k][name] = into[k].get(name, 0) + int(n)
+    if other["last_at"] is not None and (
+        into["last_at"] is None or other["last_at"] >= into["last_at"]
+    ):
+        for k in _LAST:
+            into[k] = other[k]
+    return into
+
+
+# -----------------------------------------------------------------------------
+# DB
+# -----------------------------------------------------------------------------
+
+def _load_buckets(cur, table: str, buckets: List[datetime]) -> Dict[datetime, Dict]:
+    cur.execute(
+        f"SELECT bucket, {', '.join(_COLUMNS)} FROM {table} WHERE bucket = ANY(%s)",
+        (buckets,),
+    )
+    return {row[0]: dict(zip(_COLUMNS, row[1:])) for row in cur.fetchall()}
+
+
+def _save_bucket(cur, table: str, bucket: datetime, agg: Dict) -> None:
+    values = [
+        json.dumps(agg[c]) if c in ("rejections", "top_classes") else agg[c]
+        for c in _COLUMNS
+    ]
+    placeholders = ", ".join(
+        "%s::jsonb" if c in ("rejections", "top_classes") else "%s" for c in _COLUMNS
+    )
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in _COLUMNS)
+    cur.execute(
+        f"INSERT INTO {table} (bucket, {', '.join(_COLUMNS)}) "
+        f"VALUES (%s, {placeholders}) "
+        f"ON CONFLICT (bucket) DO UPDATE SET {updates}",
+        [bucket] + values,
+    )
+
+
+def _truncate(ts: datetime, unit: str) -> datetime:
+    if unit == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(second=0, microsecond=0)
+
+
+def rollup_new_rows(conn, batch: int = ROLLUP_BATCH_ROWS) -> int:
+    """Fold up to ``batch`` new ``audio_levels`` rows into both rollups.
+
+    Returns the number of rows consumed (0 once caught up).
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO rollup_state (name) VALUES ('audio_levels') "
+            "ON CONFLICT (name) DO NOTHING"
+        )
+        cur.execute(
+            "SELECT last_id FROM rollup_state WHERE name = 'audio_levels' FOR UPDATE"
+        )
+        last_id = cur.fetchone()[0]
+        cur.execute(
+            """
+            SELECT id, recorded_at, rms, peak, bd_raw_count, bd_max_det_prob,
+                   bd_user_pass, rejection_reason, bd_top_class,
+                   bat_band_low_rms, bat_band_mid_rms, bat_band_high_rms
+            FROM audio_levels
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+            """,
+            (last_id, batch),
+        )
+        names = [d[0] for d in cur.description]
+        rows = [dict(zip(names, r)) for r in cur.fetchall()]
+        if not rows:
+            conn.rollback()
+            return 0
+
+        for table, unit in ROLLUP_TABLES.items():
+            fresh: Dict[datetime, Dict] = {}
+            for row in rows:
+                b = _truncate(row["recorded_at"], unit)
+                add_segment(fresh.setdefault(b, empty_agg()), row)
+            existing = _load_buckets(cur, table, list(fresh))
+            for b, agg in fresh.items():
+                if b in existing:
+                    agg = merge_agg(existing[b], agg)
+                _save_bucket(cur, table, b, agg)
+
+        cur.execute(
+            "UPDATE rollup_state SET last_id = %s, updated_at = NOW() "
+            "WHERE name = 'audio_levels'",
+            (rows[-1]["id"],),
+        )
+    conn.commit()
+    return len(rows)
+
+
+def prune_rollups(conn) -> int:
+    """Drop rollup rows past their retention. Returns rows deleted."""
+    deleted = 0
+    with conn.cursor() as cur:
+        for table, days in (("audio_levels_1m", ROLLUP_1M_RETENTION_DAYS),
+                            ("audio_levels_1h", ROLLUP_1H_RETENTION_DAYS)):
+            cur.execute(
+                f"DELETE FROM {table} WHERE bucket < NOW() - make_interval(days => %s)",
+                (days,),
+            )
+            deleted += cur.rowcount
+    conn.commit()
+    return deleted
+
+
+def window_agg(conn, table: str, since_sql: str) -> Dict:
+    """Merged aggregate of every ``table`` bucket newer than ``since_sql``.
+
+    ``since_sql`` is a trusted SQL expression (e.g. ``NOW() - INTERVAL
+    '1 hour'``), matching how ``daily_summary`` builds its windows.
+    """
+    agg = empty_agg()
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM {table} "
+            f"WHERE bucket >= {since_sql} ORDER BY bucket"
+        )
+        for row in cur.fetchall():
+            merge_agg(agg, dict(zip(_COLUMNS, row)))
+    return agg
+
+
+def latest_segment(conn) -> Dict:
+    """``last_*`` fields of the newest minute bucket ({} if none)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT {', '.join(_LAST)} FROM audio_levels_1m ORDER BY bucket DESC LIMIT 1"
+        )
+        row = cur.fetchone()
+    return dict(zip(_LAST, row)) if row else {}
@@ -0,0 +1,216 @@
+"""Upload bandwidth policy for archival traffic (OneDrive + Firebase Storage).
+
+Three pieces, all opt-in through env so an unconfigured Pi behaves
+exactly as before:
+
+  * **Link telemetry** — ``record_probe`` is fed the result of
+    ``health.check_internet`` every health tick (connectivity + HEAD
+    latency); ``record_transfer`` is fed the bytes/seconds of every real
+    upload batch. Both are smoothed with an EWMA and surfaced in the
+    deviceStatus payload. The HEAD probe is deliberately not turned into
+    a throughput test — on a metered LTE link a synthetic download every
+    15 s would cost more than the uploads it is meant to schedule.
+  * **Upload windows** — ``UPLOAD_WINDOWS_UTC`` (e.g. ``"14-20"`` or
+    ``"22-4,13-16"``) restricts bulk uploads to low-activity hours. Bats
+    fly at night, so daytime is when capture + inference are idle.
+  * **Daily byte budget** — ``UPLOAD_DAILY_BUDGET_MB`` caps bulk upload
+    volume per UTC day across channels. The ledger lives in Postgres
+    (``upload_ledger``) so a container restart doesn't reset it.
+
+Health pushes never go through this gate — it only throttles bulk
+archival traffic, so the small deviceStatus writes always get the link.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+UPLOAD_WINDOWS_UTC = os.getenv("UPLOAD_WINDOWS_UTC", "")
+UPLOAD_DAILY_BUDGET_MB = int(os.getenv("UPLOAD_DAILY_BUDGET_MB", "0"))  # 0 = unlimited
+# Defer bulk uploads while the last health probe's latency is above this
+# (0 disables the check). A congested LTE cell shows up here first.
+UPLOAD_MAX_LATENCY_MS = float(os.getenv("UPLOAD_MAX_LATENCY_MS", "0"))
+
+_EWMA_ALPHA = 0.3
+
+_link_lock = threading.Lock()
+_link = {
+    "connected": None,
+    "latency_ms": None,
+    "latency_ewma_ms": None,
+    "throughput_bps_ewma": None,
+    "last_probe_ts": 0.0,
+    "last_transfer_ts": 0.0,
+}
+
+
+# -----------------------------------------------------------------------------
+# Pure helpers
+# -----------------------------------------------------------------------------
+
+def parse_windows(spec: str) -> List[Tuple[int, int]]:
+    """Parse ``"22-4,13-16"`` into ``[(22, 4), (13, 16)]`` (UTC hours, end-exclusive).
+
+    >>> parse_windows("")
+    []
+    >>> parse_windows("22-4, 13-16")
+    [(22, 4), (13, 16)]
+    """
+    windows = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start_s, _, end_s = part.partition("-")
+        start, end = int(start_s), int(end_s)
+        if not (0 <= start <= 23 and 0 <= end <= 24):
+            raise ValueError(f"upload window hour out of range: {part!r}")
+        windows.append((start, end))
+    return windows
+
+
+def in_window(windows: List[Tuple[int, int]], hour: int) -> bool:
+    """True if ``hour`` falls inside any window. No windows = always open.
+
+    Windows wrap midnight when ``start > end`` (``(22, 4)`` is 22:00–04:00).
+    """
+    if not windows:
+        return True
+    for start, end in windows:
+        if start <= end:
+            if start <= hour < end:
+                return True
+        elif hour >= start or hour < end:
+            return True
+    return False
+
+
+def _ewma(prev: Optional[float], sample: float) -> float:
+    return sample if prev is None else prev + _EWMA_ALPHA * (sample - prev)
+
+
+# -----------------------------------------------------------------------------
+# Link telemetry
+# -----------------------------------------------------------------------------
+
+def record_probe(connected: bool, latency_ms: Optional[float]) -> None:
+    """Feed one ``health.check_internet`` result into the link model."""
+    with _link_lock:
+        _link["connected"] = connected
+        _link["latency_ms"] = latency_ms
+        _link["last_probe_ts"] = time.time()
+        if connected and latency_ms is not None:
+            _link["latency_ewma_ms"] = _ewma(_link["latency_ewma_ms"], latency_ms)
+
+
+def record_transfer(n_bytes: int, seconds: float) -> None:
+    """Feed one completed upload batch (wall time, all transfers) into the model."""
+    if n_bytes <= 0 or seconds <= 0:
+        return
+    with _link_lock:
+        _link["throughput_bps_ewma"] = _ewma(
+            _link["throughput_bps_ewma"], n_bytes * 8 / seconds,
+        )
+        _link["last_transfer_ts"] = time.time()
+
+
+def link_snapshot() -> Dict:
+    with _link_lock:
+        return dict(_link)
+
+
+def upload_allowed(now: Optional[datetime] = None) -> Tuple[bool, str]:
+    """Gate for bulk uploads: ``(allowed, reason)``.
+
+    Checks, in order: last probe says we're offline, current UTC hour is
+    outside ``UPLOAD_WINDOWS_UTC``, last probe latency above
+    ``UPLOAD_MAX_LATENCY_MS``.
+    """
+    now = now or datetime.now(timezone.utc)
+    snap = link_snapshot()
+    if snap["connected"] is False:
+        return False, "offline"
+    if not in_window(parse_windows(UPLOAD_WINDOWS_UTC), now.hour):
+        return False, "outside_upload_window"
+    if (
+        UPLOAD_MAX_LATENCY_MS > 0
+        and snap["latency_ms"] is not None
+        and snap["latency_ms"] > UPLOAD_MAX_LATENCY_MS
+    ):
+        return False, "link_congested"
+    return True, "ok"
+
+
+# -----------------------------------------------------------------------------
+# Daily byte budget (persisted)
+# -----------------------------------------------------------------------------
+
+def _utc_day(now: Optional[datetime] = None):
+    return (now or datetime.now(timezone.utc)).date()
+
+
+def bytes_uploaded_today(conn, now: Optional[datetime] = None) -> int:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM upload_ledger WHERE day = %s",
+            (_utc_day(now),),
+        )
+        return int(cur.fetchone()[0])
+
+
+def remaining_budget(conn, now: Optional[datetime] = None) -> Optional[int]:
+    """Bytes still allowed today, or None when no budget is configured."""
+    if UPLOAD_DAILY_BUDGET_MB <= 0:
+        return None
+    budget = UPLOAD_DAILY_BUDGET_MB * 1024 * 1024
+    try:
+        used = bytes_uploaded_today(conn, now)
+    except Exception as e:
+        # No ledger → be conservative on a metered link: spend nothing.
+        print(f"[BANDWIDTH] ledger read failed, deferring uploads: {e}")
+        conn.rollback()
+        return 0
+    return max(0, budget - used)
+
+
+def record_upload(conn, channel: str, n_bytes: int, now: Optional[datetime] = None) -> None:
+    """Add ``n_bytes`` to today's ledger row for ``channel``."""
+    if n_bytes <= 0:
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO upload_ledger (day, channel, bytes)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (day, channel)
+            DO UPDATE SET bytes = upload_ledger.bytes + EXCLUDED.bytes
+            """,
+            (_utc_day(now), channel, int(n_bytes)),
+        )
+    conn.commit()
+
+
+def status_payload(conn) -> Dict:
+    """deviceStatus fields describing the link + budget."""
+    snap = link_snapshot()
+    allowed, reason = upload_allowed()
+    try:
+        today = bytes_uploaded_today(conn)
+    except Exception:
+        conn.rollback()
+        today = None
+    return {
+        "linkLatencyEwmaMs": (
+            round(snap["latency_ewma_ms"], 1) if snap["latency_ewma_ms"] is not None else None
+        ),
+        "uploadThroughputKbps": (
+            round(snap["throughput_bps_ewma"] / 1000, 1)
+            if snap["throughput_bps_ewma"] is not None else None
+        ),
+        "uploadBytesToday": today,
+        "uploadDailyBudgetMb": UPLOAD_DAILY_BUDGET_MB or None,
+        "uploadGate": reason,
+        "uploadAllowed": allowed,
+    }
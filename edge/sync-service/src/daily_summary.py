@@ -33,6 +33,8 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Any
 
+from src import audio_rollup
+
 
 # ---------------------------------------------------------------------------
 # Data collection — one query, lots of numbers
@@ -76,62 +78,48 @@ def collect_summary(conn, site_id: str, window_hours: int = 24) -> dict:
     )
     out["detections_by_class"] = [(c, int(n)) for c, n in by_class]
 
-    # Audio levels (p50, p95, max)
-    audio = _fetchone(
-        conn,
-        f"""
-        SELECT round(percentile_cont(0.5)  WITHIN GROUP (ORDER BY rms)::numeric, 5),
-               round(percentile_cont(0.95) WITHIN GROUP (ORDER BY rms)::numeric, 5),
-               round(max(peak)::numeric, 4),
-               count(*)
-        FROM audio_levels WHERE recorded_at > {since_sql}
-        """,
-    )
-    if audio:
-        out["audio_rms_p50"] = float(audio[0]) if audio[0] is not None else None
-        out["audio_rms_p95"] = float(audio[1]) if audio[1] is not None else None
-        out["audio_peak_max"] = float(audio[2]) if audio[2] is not None else None
-        out["audio_segments"] = int(audio[3]) if audio[3] is not None else 0
+    # Audio levels, BD stats, band energy, top classes and rejections all
+    # come from the hourly audio_levels rollup (audio_rollup.py): ~24 rows
+    # instead of a day of raw segments. Percentiles are histogram-based
+    # (±12 %). The window is whole UTC hours plus the current partial one.
+    try:
+        agg = audio_rollup.window_agg(
+            conn, "audio_levels_1h",
+            f"date_trunc('hour', NOW()) - INTERVAL '{window_hours} hours'",
+        )
+    except Exception:
+        conn.rollback()
+        agg = audio_rollup.empty_agg()
+
+    def _pct(hist, q, digits):
+        v = audio_rollup.hist_percentile(hist, q)
+        return round(v, digits) if v is not None else None
+
+    out["audio_segments"] = agg["segments"]
+    if agg["segments"]:
+        out["audio_rms_p50"] = _pct(agg["rms_hist"], 0.50, 5)
+        out["audio_rms_p95"] = _pct(agg["rms_hist"], 0.95, 5)
+        out["audio_peak_max"] = (
+            round(float(agg["peak_max"]), 4) if agg["peak_max"] is not None else None
+        )
 
     # BD detector stats
-    bd = _fetchone(
-        conn,
-        f"""
-        SELECT round(avg(bd_raw_count)::numeric, 2),
-               round(max(bd_max_det_prob)::numeric, 3),
-               count(*) FILTER (WHERE bd_user_pass > 0)
-        FROM audio_levels WHERE recorded_at > {since_sql}
-        """,
-    )
-    if bd:
-        out["bd_raw_avg"] = float(bd[0]) if bd[0] is not None else None
-        out["bd_max_det_prob"] = float(bd[1]) if bd[1] is not None else None
-        out["bd_segments_passed_threshold"] = int(bd[2]) if bd[2] is not None else 0
+    if agg["bd_raw_n"]:
+        out["bd_raw_avg"] = round(agg["bd_raw_sum"] / agg["bd_raw_n"], 2)
+    if agg["bd_max_det_prob"] is not None:
+        out["bd_max_det_prob"] = round(float(agg["bd_max_det_prob"]), 3)
+    out["bd_segments_passed_threshold"] = agg["bd_pass_segments"]
 
     # Per-band RMS percentiles — added 2026-04-23 for zero-detection
     # diagnostics. If low/mid/high bat bands are all at noise floor,
     # detection failure is a "no bats or mic dead" problem. If any
     # band shows meaningful energy but bd_raw_avg is still 0, it's a
     # model-side problem. See ZERO_DETECTIONS_RUNBOOK.md.
-    band = _fetchone(
-        conn,
-        f"""
-        SELECT round(percentile_cont(0.50) WITHIN GROUP (ORDER BY bat_band_low_rms)::numeric, 6),
-               round(percentile_cont(0.95) WITHIN GROUP (ORDER BY bat_band_low_rms)::numeric, 6),
-               round(percentile_cont(0.50) WITHIN GROUP (ORDER BY bat_band_mid_rms)::numeric, 6),
-               round(percentile_cont(0.95) WITHIN GROUP (ORDER BY bat_band_mid_rms)::numeric, 6),
-               round(percentile_cont(0.50) WITHIN GROUP (ORDER BY bat_band_high_rms)::numeric, 6),
-               round(percentile_cont(0.95) WITHIN GROUP (ORDER BY bat_band_high_rms)::numeric, 6)
-        FROM audio_levels WHERE recorded_at > {since_sql}
-        """,
-    )
-    if band:
-        out["band_low_p50"] = float(band[0]) if band[0] is not None else None
-        out["band_low_p95"] = float(band[1]) if band[1] is not None else None
-        out["band_mid_p50"] = float(band[2]) if band[2] is not None else None
-        out["band_mid_p95"] = float(band[3]) if band[3] is not None else None
-        out["band_high_p50"] = float(band[4]) if band[4] is not None else None
-        out["band_high_p95"] = float(band[5]) if band[5] is not None else None
+    if any(agg["band_low_hist"]):
+        for band in ("low", "mid", "high"):
+            hist = agg[f"band_{band}_hist"]
+            out[f"band_{band}_p50"] = _pct(hist, 0.50, 6)
+            out[f"band_{band}_p95"] = _pct(hist, 0.95, 6)
 
     # BatDetect2 top-class tally — what classes did the UK-trained
     # detector most often flag as the strongest candidate, even
@@ -139,31 +127,14 @@ def collect_summary(conn, site_id: str, window_hours: int = 24) -> dict:
     # all European species (Pipistrellus, Nyctalus, Eptesicus), the
     # UK backbone is seeing bat-ish signal but labelling it wrongly —
     # that's a retrain problem, not a capture problem.
-    top_classes = _fetchall(
-        conn,
-        f"""
-        SELECT bd_top_class, count(*)
-        FROM audio_levels
-        WHERE recorded_at > {since_sql}
-          AND bd_top_class IS NOT NULL
-        GROUP BY 1 ORDER BY 2 DESC
-        LIMIT 10
-        """,
-    )
-    out["bd_top_classes"] = [(c, int(n)) for c, n in top_classes]
+    out["bd_top_classes"] = sorted(
+        agg["top_classes"].items(), key=lambda kv: kv[1], reverse=True,
+    )[:10]
 
     # Validator rejection counts
-    rejections = _fetchall(
-        conn,
-        f"""
-        SELECT split_part(rejection_reason, '(', 1) AS reason, count(*)
-        FROM audio_levels
-        WHERE rejection_reason IS NOT NULL
-          AND recorded_at > {since_sql}
-        GROUP BY 1 ORDER BY 2 DESC
-        """,
+    out["rejections"] = sorted(
+        agg["rejections"].items(), key=lambda kv: kv[1], reverse=True,
     )
-    out["rejections"] = [(r, int(n)) for r, n in rejections]
 
     # Environmental (HOBO) temperature
     env = _fetchone(
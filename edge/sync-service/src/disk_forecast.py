@@ -0,0 +1,284 @@
+"""Disk-usage forecasting and daytime trickle reclamation.
+
+The disk watchdog (``disk_watchdog.enforce_disk_quota``) is reactive: it
+does nothing until ``used_gb`` crosses ``DISK_HARD_CAP_GB``, then deletes
+in a burst — often at night, while capture is writing, and sometimes
+only after flipping ``halt_recordings``. This module gets ahead of it.
+
+**Forecast.** Archive growth is strongly diurnal (bats fly at night), so
+a single average rate over- or under-shoots depending on the hour. We
+build an hour-of-day ingest profile from ``file_catalog`` (bytes archived
+per UTC hour over the last ``FORECAST_LOOKBACK_DAYS``, counting files
+deleted since — reclaimers only soft-delete catalog rows, and
+``purge_deleted`` drops them once they leave the lookback) and scale it by
+recent activity from the ``audio_levels_1h`` rollup: the ratio of segments that
+passed the BatDetect2 user threshold in the last 24 h to the lookback
+daily average. Walking that profile forward from the current hour gives
+the hours until the warning and hard caps are hit.
+
+**Trickle.** During a daytime idle window (``TRICKLE_WINDOW_UTC``, and no
+detections in the last ``TRICKLE_IDLE_MINUTES``) we delete already-
+expired tier-4 then tier-2 files, at most ``TRICKLE_MAX_FILES`` /
+``TRICKLE_MAX_MB`` per tick, so the SD card sees a steady trickle of
+small deletes instead of a burst. Only files already past retention:
+anything still inside it is left to the watchdog, which only reaches
+for it at the hard cap. Protection rules are the watchdog's own — the
+same stage queries are reused, so verified files are never touched.
+"""
+
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from src import disk_watchdog
+from src.bandwidth import in_window, parse_windows
+
+FORECAST_LOOKBACK_DAYS = int(os.getenv("FORECAST_LOOKBACK_DAYS", "7"))
+FORECAST_HORIZON_HOURS = int(os.getenv("FORECAST_HORIZON_HOURS", "72"))
+FORECAST_MAX_HOURS = 24 * 60  # stop walking the profile after 60 days
+
+# Default 14–22 UTC ≈ 10:00–18:00 EDT — the middle of the bat-free day.
+TRICKLE_WINDOW_UTC = os.getenv("TRICKLE_WINDOW_UTC", "14-22")
+TRICKLE_IDLE_MINUTES = int(os.getenv("TRICKLE_IDLE_MINUTES", "15"))
+TRICKLE_MAX_FILES = int(os.getenv("TRICKLE_MAX_FILES", "25"))
+TRICKLE_MAX_MB = int(os.getenv("TRICKLE_MAX_MB", "512"))
+
+EXPIRED_STAGES = ("tier4_expired", "tier2_expired")
+
+# Last forecast, surfaced in the deviceStatus payload.
+_state: Dict = {"forecast": None, "trickle": None, "computed_at": 0.0}
+
+
+# -----------------------------------------------------------------------------
+# Pure helpers
+# -----------------------------------------------------------------------------
+
+def hours_until(
+    used_bytes: int,
+    limit_bytes: int,
+    hourly_profile: List[float],
+    start_hour: int,
+    max_hours: int = FORECAST_MAX_HOURS,
+) -> Optional[int]:
+    """Walk the 24-slot profile from ``start_hour`` until usage reaches the limit.
+
+    Returns 0 if already at/over the limit, None if it isn't reached
+    within ``max_hours`` (including a flat-zero profile).
+
+    >>> hours_until(90, 100, [1.0] * 24, 0)
+    10
+    >>> hours_until(90, 100, [0.0] * 24, 0) is None
+    True
+    """
+    if used_bytes >= limit_bytes:
+        return 0
+    if not any(v > 0 for v in hourly_profile):
+        return None
+    total = float(used_bytes)
+    for step in range(1, max_hours + 1):
+        total += hourly_profile[(start_hour + step - 1) % 24]
+        if total >= limit_bytes:
+            return step
+    return None
+
+
+def projected_growth(hourly_profile: List[float], start_hour: int, hours: int) -> float:
+    """Bytes the profile predicts over the next ``hours`` hours."""
+    return sum(hourly_profile[(start_hour + i) % 24] for i in range(hours))
+
+
+# -----------------------------------------------------------------------------
+# DB reads
+# -----------------------------------------------------------------------------
+
+def _ingest_profile(conn, lookback_days: int) -> List[float]:
+    """Mean bytes archived per UTC hour-of-day over the lookback window.
+
+    Keyed on ``detection_time`` so backfilled catalog rows land in the
+    hour they were recorded, not the hour the backfill ran. Soft-deleted
+    rows count: the bytes arrived even if a reclaimer has since removed
+    them. Averaged over the days the catalog actually covers (at least
+    one), so a device younger than the lookback isn't diluted by empty
+    days.
+    """
+    profile = [0.0] * 24
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT EXTRACT(EPOCH FROM NOW() - MIN(COALESCE(detection_time, cataloged_at)))
+            FROM file_catalog
+            """
+        )
+        span_s = cur.fetchone()[0]
+        if span_s is None:
+            return profile
+        days = min(float(lookback_days), max(1.0, float(span_s) / 86400))
+        cur.execute(
+            """
+            SELECT EXTRACT(HOUR FROM COALESCE(detection_time, cataloged_at))::int,
+                   COALESCE(SUM(size_bytes), 0)
+            FROM file_catalog
+            WHERE COALESCE(detection_time, cataloged_at) > NOW() - make_interval(days => %s)
+            GROUP BY 1
+            """,
+            (lookback_days,),
+        )
+        for hour, total in cur.fetchall():
+            profile[int(hour)] = float(total) / days
+    return profile
+
+
+def purge_deleted(conn, lookback_days: int = FORECAST_LOOKBACK_DAYS) -> int:
+    """Drop soft-deleted catalog rows the ingest profile can no longer see.
+
+    A file is deleted after it was recorded, so ``deleted_at`` past the
+    lookback puts ``detection_time`` past it too.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM file_catalog "
+            "WHERE deleted_at < NOW() - make_interval(days => %s)",
+            (lookback_days,),
+        )
+        n = cur.rowcount
+    conn.commit()
+    return n
+
+
+def _activity_scale(conn, lookback_days: int) -> float:
+    """Last-24 h active segments relative to the lookback daily mean (1.0 = typical).
+
+    Clamped to [0.25, 4] so one freak night doesn't swing the forecast.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT
+              COALESCE(SUM(bd_pass_segments)
+                       FILTER (WHERE bucket > NOW() - INTERVAL '24 hours'), 0),
+              COALESCE(SUM(bd_pass_segments), 0)
+            FROM audio_levels_1h
+            WHERE bucket > NOW() - make_interval(days => %s)
+            """,
+            (lookback_days,),
+        )
+        last_day, total = cur.fetchone()
+    daily_mean = (total or 0) / lookback_days
+    if daily_mean <= 0:
+        return 1.0
+    return max(0.25, min(4.0, (last_day or 0) / daily_mean))
+
+
+def _recently_active(conn, minutes: int) -> bool:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT EXISTS (SELECT 1 FROM bat_detections "
+            "WHERE detection_time > NOW() - make_interval(mins => %s))",
+            (minutes,),
+        )
+        return bool(cur.fetchone()[0])
+
+
+# -----------------------------------------------------------------------------
+# Public API
+# -----------------------------------------------------------------------------
+
+def compute_forecast(
+    conn,
+    bat_audio_dir: str,
+    disk_usage_fn: Callable = shutil.disk_usage,
+    now: Optional[datetime] = None,
+) -> Dict:
+    """Fit the ingest profile and project time-to-warning / time-to-hard-cap."""
+    now = now or datetime.now(timezone.utc)
+    usage = disk_usage_fn(bat_audio_dir)
+    base = _ingest_profile(conn, FORECAST_LOOKBACK_DAYS)
+    scale = _activity_scale(conn, FORECAST_LOOKBACK_DAYS)
+    profile = [v * scale for v in base]
+
+    warning_bytes = disk_watchdog._gb_to_bytes(disk_watchdog.DISK_WARNING_GB)
+    hard_cap_bytes = disk_watchdog._gb_to_bytes(disk_watchdog.DISK_HARD_CAP_GB)
+    growth_horizon = projected_growth(profile, now.hour, FORECAST_HORIZON_HOURS)
+    return {
+        "used_bytes": usage.used,
+        "ingest_bytes_per_day": sum(profile),
+        "activity_scale": round(scale, 2),
+        "hours_to_warning": hours_until(usage.used, warning_bytes, profile, now.hour),
+        "hours_to_hard_cap": hours_until(usage.used, hard_cap_bytes, profile, now.hour),
+        # Bytes to reclaim now so usage at the horizon stays under
+        # warning. Reported only (audioReclaimNeededGb): the trickle
+        # never goes past expired files to meet it.
+        "reclaim_needed_bytes": max(0, int(usage.used + growth_horizon - warning_bytes)),
+    }
+
+
+def trickle_reclaim(conn, forecast: Dict, now: Optional[datetime] = None) -> Dict:
+    """Delete a small, bounded slice of expired files if we're idle.
+
+    Only tier-4/tier-2 files past ``expires_at``; ``forecast`` is
+    accepted for the caller's convenience but never widens the set.
+    """
+    now = now or datetime.now(timezone.utc)
+    if not in_window(parse_windows(TRICKLE_WINDOW_UTC), now.hour):
+        return {"action": "outside_window", "files_deleted": 0, "bytes_freed": 0}
+    if _recently_active(conn, TRICKLE_IDLE_MINUTES):
+        return {"action": "capture_active", "files_deleted": 0, "bytes_freed": 0}
+
+    files_left = TRICKLE_MAX_FILES
+    bytes_left = TRICKLE_MAX_MB * 1024 * 1024
+    files_deleted = 0
+    bytes_freed = 0
+
+    for stage in EXPIRED_STAGES:
+        if files_left <= 0 or bytes_left <= 0:
+            break
+        picks = []
+        for cand in disk_watchdog._fetch_stage_candidates(conn, stage):
+            if len(picks) >= files_left or cand["size_bytes"] > bytes_left:
+                break
+            picks.append(cand)
+            bytes_left -= cand["size_bytes"]
+        if not picks:
+            continue
+        freed = disk_watchdog._delete_batch(conn, picks)
+        files_deleted += len(picks)
+        files_left -= len(picks)
+        bytes_freed += freed
+
+    return {
+        "action": "trickled" if files_deleted else "nothing_to_do",
+        "files_deleted": files_deleted,
+        "bytes_freed": bytes_freed,
+    }
+
+
+def run(conn, bat_audio_dir: str, disk_usage_fn: Callable = shutil.disk_usage) -> Dict:
+    """Scheduled entry point: forecast, then trickle. Updates ``_state``."""
+    purge_deleted(conn)
+    forecast = compute_forecast(conn, bat_audio_dir, disk_usage_fn)
+    trickle = trickle_reclaim(conn, forecast)
+    _state.update(forecast=forecast, trickle=trickle, computed_at=time.time())
+    return {"forecast": forecast, "trickle": trickle}
+
+
+def status_payload() -> Dict:
+    """deviceStatus fields for the last forecast (all None before the first run)."""
+    f = _state["forecast"] or {}
+    t = _state["trickle"] or {}
+    per_day = f.get("ingest_bytes_per_day")
+    return {
+        "audioIngestGbPerDay": (
+            round(disk_watchdog._bytes_to_gb(per_day), 3) if per_day is not None else None
+        ),
+        "audioHoursToWarning": f.get("hours_to_warning"),
+        "audioHoursToHardCap": f.get("hours_to_hard_cap"),
+        "audioReclaimNeededGb": (
+            round(disk_watchdog._bytes_to_gb(f["reclaim_needed_bytes"]), 3)
+            if f.get("reclaim_needed_bytes") is not None else None
+        ),
+        "audioActivityScale": f.get("activity_scale"),
+        "audioTrickleAction": t.get("action"),
+        "audioTrickleFilesDeleted": t.get("files_deleted"),
+    }
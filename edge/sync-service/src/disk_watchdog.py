@@ -24,6 +24,15 @@ Runs every sync cycle from sync-service/main.py. Two jobs:
 
 Tier 2/4 are never uploaded to OneDrive, so the ``synced_remote_at``
 rule doesn't apply to them — they're local-ephemeral by design.
+
+**No filesystem scan.** File sizes come from ``file_catalog``, written
+by batdetect-service when ``storage.archive_wav`` moves a WAV into
+place. Each stage query is served by a partial index with the same
+predicate (see ``STAGE_INDEX_SQL``), so picking candidates costs an
+index range scan no matter how large the archive is. Rows archived
+before the catalog existed are backfilled a few hundred at a time by
+``backfill_catalog``; until then their size falls back to a stat.
+Deletions are committed in batches of ``DELETE_BATCH_SIZE`` files.
 """
 
 import os
@@ -45,49 +54,100 @@ HALT_FLAG = Path("/control/halt_recordings")
 
 STAGES = ("tier4_expired", "tier2_expired", "tier2_active", "tier1_synced")
 
+DELETE_BATCH_SIZE = int(os.getenv("DISK_DELETE_BATCH_SIZE", "200"))
+CATALOG_BACKFILL_BATCH = int(os.getenv("CATALOG_BACKFILL_BATCH", "500"))
+
+# Sizes come from file_catalog (LEFT JOIN — legacy rows have no entry
+# yet and fall back to a stat). Predicates mirror STAGE_INDEX_SQL.
 _STAGE_SQL = {
     "tier4_expired": """
-        SELECT id, audio_path
-        FROM bat_detections
-        WHERE storage_tier = 4
-          AND expires_at IS NOT NULL AND expires_at < NOW()
-          AND audio_path IS NOT NULL
-          AND verified_class IS NULL
-        ORDER BY expires_at ASC
+        SELECT b.id, b.audio_path, c.size_bytes
+        FROM bat_detections b
+        LEFT JOIN file_catalog c ON c.path = b.audio_path AND c.deleted_at IS NULL
+        WHERE b.storage_tier = 4
+          AND b.expires_at IS NOT NULL AND b.expires_at < NOW()
+          AND b.audio_path IS NOT NULL
+          AND b.verified_class IS NULL
+        ORDER BY b.expires_at ASC
         LIMIT 500
     """,
     "tier2_expired": """
-        SELECT id, audio_path
-        FROM bat_detections
-        WHERE storage_tier = 2
-          AND expires_at IS NOT NULL AND expires_at < NOW()
-          AND audio_path IS NOT NULL
-          AND verified_class IS NULL
-        ORDER BY expires_at ASC
+        SELECT b.id, b.audio_path, c.size_bytes
+        FROM bat_detections b
+        LEFT JOIN file_catalog c ON c.path = b.audio_path AND c.deleted_at IS NULL
+        WHERE b.storage_tier = 2
+          AND b.expires_at IS NOT NULL AND b.expires_at < NOW()
+          AND b.audio_path IS NOT NULL
+          AND b.verified_class IS NULL
+        ORDER BY b.expires_at ASC
         LIMIT 500
     """,
     "tier2_active": """
-        SELECT id, audio_path
-        FROM bat_detections
-        WHERE storage_tier = 2
-          AND (expires_at IS NULL OR expires_at >= NOW())
-          AND audio_path IS NOT NULL
-          AND verified_class IS NULL
-        ORDER BY expires_at ASC NULLS FIRST
+        SELECT b.id, b.audio_path, c.size_bytes
+        FROM bat_detections b
+        LEFT JOIN file_catalog c ON c.path = b.audio_path AND c.deleted_at IS NULL
+        WHERE b.storage_tier = 2
+          AND (b.expires_at IS NULL OR b.expires_at >= NOW())
+          AND b.audio_path IS NOT NULL
+          AND b.verified_class IS NULL
+        ORDER BY b.expires_at ASC NULLS FIRST
         LIMIT 500
     """,
     "tier1_synced": """
-        SELECT id, audio_path
-        FROM bat_detections
-        WHERE storage_tier = 1
-          AND audio_path IS NOT NULL
-          AND verified_class IS NULL
-          AND synced_remote_at IS NOT NULL
-        ORDER BY detection_time ASC
+        SELECT b.id, b.audio_path, c.size_bytes
+        FROM bat_detections b
+        LEFT JOIN file_catalog c ON c.path = b.audio_path AND c.deleted_at IS NULL
+        WHERE b.storage_tier = 1
+          AND b.audio_path IS NOT NULL
+          AND b.verified_class IS NULL
+          AND b.synced_remote_at IS NOT NULL
+        ORDER BY b.detection_time ASC
         LIMIT 500
     """,
 }
 
+# Partial indexes whose predicates match the stage queries above, so
+# each stage is an ordered index range scan. Created by sync-service
+# run_migrations(). tier2 shares one index (NULLS FIRST serves the
+# active stage's ORDER BY; the expired stage is a range on the same key).
+STAGE_INDEX_SQL = (
+    """
+    CREATE INDEX IF NOT EXISTS idx_bat_reclaim_tier4
+    ON bat_detections(expires_at)
+    WHERE storage_tier = 4 AND audio_path IS NOT NULL AND verified_class IS NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_bat_reclaim_tier2
+    ON bat_detections(expires_at ASC NULLS FIRST)
+    WHERE storage_tier = 2 AND audio_path IS NOT NULL AND verified_class IS NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_bat_reclaim_tier1
+    ON bat_detections(detection_time)
+    WHERE storage_tier = 1 AND audio_path IS NOT NULL
+      AND verified_class IS NULL AND synced_remote_at IS NOT NULL
+    """,
+    # Batched deletes null every row sharing a file by path.
+    """
+    CREATE INDEX IF NOT EXISTS idx_bat_audio_path
+    ON bat_detections(audio_path)
+    WHERE audio_path IS NOT NULL
+    """,
+)
+
+FILE_CATALOG_DDL = """
+    CREATE TABLE IF NOT EXISTS file_catalog (
+        path TEXT PRIMARY KEY,
+        size_bytes BIGINT NOT NULL,
+        storage_tier SMALLINT,
+        expires_at TIMESTAMP,
+        detection_time TIMESTAMP,
+        cataloged_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        deleted_at TIMESTAMP
+    );
+    ALTER TABLE file_catalog ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP;
+"""
+
 
 # -----------------------------------------------------------------------------
 # Pure helpers
@@ -122,42 +182,116 @@ def _gb_to_bytes(gb: float) -> int:
 # -----------------------------------------------------------------------------
 
 def _fetch_stage_candidates(conn, stage: str) -> List[dict]:
+    """One page of deletable files for ``stage``, deduplicated by path.
+
+    Several detections share one segment WAV, so the same path can come
+    back on several rows; it's one file to delete and one size to count.
+    """
     with conn.cursor() as cur:
         cur.execute(_STAGE_SQL[stage])
         rows = cur.fetchall()
     out = []
-    for row_id, audio_path in rows:
-        if not audio_path:
-            continue
-        try:
-            size = os.path.getsize(audio_path)
-        except (FileNotFoundError, OSError):
-            # File missing on disk — null the row so we stop seeing it.
-            _null_audio_row(conn, row_id)
+    seen = set()
+    missing = []
+    for row_id, audio_path, size in rows:
+        if not audio_path or audio_path in seen:
             continue
+        seen.add(audio_path)
+        if size is None:
+            # Not cataloged yet (pre-catalog archive) — stat once.
+            try:
+                size = os.path.getsize(audio_path)
+            except (FileNotFoundError, OSError):
+                # File missing on disk — null the row so we stop seeing it.
+                missing.append(audio_path)
+                continue
         out.append({"id": row_id, "audio_path": audio_path, "size_bytes": size, "stage": stage})
+    if missing:
+        _null_audio_paths(conn, missing)
     return out
 
 
-def _null_audio_row(conn, row_id: int) -> None:
+def _null_audio_paths(conn, paths: List[str]) -> None:
+    """Forget ``paths`` in one transaction: rows lose audio_path, catalog
+    entries are marked deleted (kept for the ingest forecast, see
+    ``disk_forecast.purge_deleted``)."""
     with conn.cursor() as cur:
         cur.execute(
-            "UPDATE bat_detections SET audio_path = NULL, expires_at = NULL WHERE id = %s",
-            (row_id,),
+            "UPDATE bat_detections SET audio_path = NULL, expires_at = NULL "
+            "WHERE audio_path = ANY(%s)",
+            (paths,),
+        )
+        cur.execute(
+            "UPDATE file_catalog SET deleted_at = NOW() "
+            "WHERE path = ANY(%s) AND deleted_at IS NULL",
+            (paths,),
         )
     conn.commit()
 
 
-def _delete_candidate(conn, cand: dict) -> int:
-    """Remove the file and null the row. Returns bytes freed."""
-    path = cand["audio_path"]
-    size = cand["size_bytes"]
-    try:
-        os.remove(path)
-    except FileNotFoundError:
-        size = 0
-    _null_audio_row(conn, cand["id"])
-    return size
+def _delete_batch(conn, cands: List[dict]) -> int:
+    """Remove the files and null their rows in one commit. Returns bytes freed."""
+    freed = 0
+    for cand in cands:
+        try:
+            os.remove(cand["audio_path"])
+            freed += cand["size_bytes"]
+        except FileNotFoundError:
+            pass
+    _null_audio_paths(conn, [c["audio_path"] for c in cands])
+    return freed
+
+
+def backfill_catalog(conn, limit: int = CATALOG_BACKFILL_BATCH) -> int:
+    """Catalog up to ``limit`` archived files that predate ``file_catalog``.
+
+    Incremental: run every watchdog tick until it returns 0, then it's a
+    single cheap anti-join per tick. A file that is already gone is
+    forgotten (``_null_audio_paths``) so it isn't selected and stat'd
+    again next tick. Returns how many rows were added.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT DISTINCT ON (b.audio_path)
+                   b.audio_path, b.storage_tier, b.expires_at, b.detection_time
+            FROM bat_detections b
+            WHERE b.audio_path IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM file_catalog c
+                              WHERE c.path = b.audio_path AND c.deleted_at IS NULL)
+            LIMIT %s
+            """,
+            (limit,),
+        )
+        rows = cur.fetchall()
+    entries, missing = [], []
+    for path, tier, expires_at, detection_time in rows:
+        try:
+            entries.append((path, os.path.getsize(path), tier, expires_at, detection_time))
+        except FileNotFoundError:
+            missing.append(path)
+        except OSError:
+            continue
+    if missing:
+        _null_audio_paths(conn, missing)
+        print(f"[WATCHDOG] backfill: {len(missing)} archived file(s) already gone; paths cleared")
+    if not entries:
+        return 0
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO file_catalog (path, size_bytes, storage_tier, expires_at, detection_time)
+            SELECT * FROM unnest(%s::text[], %s::bigint[], %s::smallint[],
+                                 %s::timestamp[], %s::timestamp[])
+            ON CONFLICT (path) DO UPDATE SET
+                size_bytes = EXCLUDED.size_bytes, storage_tier = EXCLUDED.storage_tier,
+                expires_at = EXCLUDED.expires_at, detection_time = EXCLUDED.detection_time,
+                cataloged_at = NOW(), deleted_at = NULL
+            """,
+            tuple(list(col) for col in zip(*entries)),
+        )
+    conn.commit()
+    return len(entries)
 
 
 def _count_unsynced_tier1(conn) -> int:
@@ -274,19 +408,29 @@ def enforce_disk_quota(
     files_deleted = 0
 
     for stage in STAGES:
+        # Page through the stage: deleted rows drop out of the partial
+        # index, so re-running the same query yields the next page.
+        while total_freed < bytes_to_free:
+            candidates = _fetch_stage_candidates(conn, stage)
+            if not candidates:
+                break
+            picks = _select_files_to_delete(candidates, bytes_to_free - total_freed)
+            for start in range(0, len(picks), DELETE_BATCH_SIZE):
+                chunk = picks[start:start + DELETE_BATCH_SIZE]
+                try:
+                    total_freed += _delete_batch(conn, chunk)
+                    files_deleted += len(chunk)
+                except Exception as e:
+                    conn.rollback()
+                    print(f"[WATCHDOG] batch delete failed ({len(chunk)} files): {e}")
+                    picks = []
+                    break
+            if not picks or len(picks) < len(candidates):
+                # Either the goal is met inside this page or a batch
+                # failed; don't spin on the same page.
+                break
         if total_freed >= bytes_to_free:
             break
-        candidates = _fetch_stage_candidates(conn, stage)
-        picks = _select_files_to_delete(candidates, bytes_to_free - total_freed)
-        for cand in picks:
-            try:
-                freed = _delete_candidate(conn, cand)
-                total_freed += freed
-                files_deleted += 1
-                if total_freed >= bytes_to_free:
-                    break
-            except Exception as e:
-                print(f"[WATCHDOG] delete failed for {cand['audio_path']}: {e}")
 
     # Re-check actual disk usage (in case other processes freed / consumed).
     try:
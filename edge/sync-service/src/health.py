@@ -12,6 +12,10 @@ import socket
 import subprocess
 import time
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from src import audio_rollup, row_counters
 
 
 # ---------------------------------------------------------------------------
@@ -161,23 +165,26 @@ def _vcgencmd(*args) -> str | None:
         return None
 
 
+_POWER_KEYS = (
+    "throttled_hex",
+    "undervolt_now",
+    "undervolt_since_boot",
+    "throttled_now",
+    "throttled_since_boot",
+    "freq_capped_now",
+    "freq_capped_since_boot",
+    "core_voltage",
+    "ext5v_voltage",
+)
+
+
 def get_power_status() -> dict:
     """Return undervoltage / throttling / voltage info.
 
     Safe to call every health tick; returns a dict of None values when
     vcgencmd isn't available (e.g. running on a dev laptop).
     """
-    out = {
-        "throttled_hex": None,
-        "undervolt_now": None,
-        "undervolt_since_boot": None,
-        "throttled_now": None,
-        "throttled_since_boot": None,
-        "freq_capped_now": None,
-        "freq_capped_since_boot": None,
-        "core_voltage": None,
-        "ext5v_voltage": None,
-    }
+    out = dict.fromkeys(_POWER_KEYS)
 
     throttled = _vcgencmd("get_throttled")
     if throttled:
@@ -225,7 +232,8 @@ def get_audio_levels(conn) -> dict:
     counters over the last hour so the dashboard has enough to show
     "detector is seeing weak signal" vs "detector is seeing nothing"
     and "validator is rejecting N segments for reason R" without
-    needing log grep.
+    needing log grep. Reads at most 60 ``audio_levels_1m`` rollup rows
+    (see audio_rollup.py), so the cost doesn't grow with the raw table.
     """
     out = {
         "audio_rms_latest": None,
@@ -240,54 +248,35 @@ def get_audio_levels(conn) -> dict:
         "rejection_reasons_1h": {},
     }
     try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT rms, peak, recorded_at, "
-                "       bd_raw_count, bd_max_det_prob, bd_user_pass "
-                "FROM audio_levels "
-                "ORDER BY recorded_at DESC LIMIT 1"
-            )
-            row = cur.fetchone()
-            if row:
-                out["audio_rms_latest"] = round(float(row[0]), 6) if row[0] is not None else None
-                out["audio_peak_latest"] = round(float(row[1]), 6) if row[1] is not None else None
-                out["audio_levels_last_at"] = row[2]
-                if row[3] is not None:
-                    out["bd_raw_count_latest"] = int(row[3])
-                if row[4] is not None:
-                    out["bd_max_det_prob_latest"] = round(float(row[4]), 3)
-                if row[5] is not None:
-                    out["bd_user_pass_latest"] = int(row[5])
-
-            cur.execute(
-                "SELECT AVG(rms), AVG(bd_raw_count), MAX(bd_max_det_prob) "
-                "FROM audio_levels "
-                "WHERE recorded_at > NOW() - INTERVAL '1 hour'"
-            )
-            row = cur.fetchone()
-            if row:
-                if row[0] is not None:
-                    out["audio_rms_avg_1m"] = round(float(row[0]), 6)
-                if row[1] is not None:
-                    out["bd_raw_avg_1h"] = round(float(row[1]), 2)
-                if row[2] is not None:
-                    out["bd_max_det_prob_1h"] = round(float(row[2]), 3)
-
-            cur.execute(
-                "SELECT rejection_reason, COUNT(*) "
-                "FROM audio_levels "
-                "WHERE rejection_reason IS NOT NULL "
-                "  AND recorded_at > NOW() - INTERVAL '1 hour' "
-                "GROUP BY rejection_reason"
-            )
-            reasons = {}
-            for reason, cnt in cur.fetchall():
-                # Truncate tail like "validator:rms_too_low(0.002)" → "validator:rms_too_low"
-                clean = reason.split("(")[0] if reason else "unknown"
-                reasons[clean] = reasons.get(clean, 0) + int(cnt)
-            out["rejection_reasons_1h"] = reasons
+        agg = audio_rollup.window_agg(
+            conn, "audio_levels_1m", "date_trunc('minute', NOW() - INTERVAL '1 hour')",
+        )
+        if agg["last_at"] is None:
+            # Capture has been silent for over an hour — still report
+            # when the last segment was, from the newest rollup row.
+            agg.update(audio_rollup.latest_segment(conn))
     except Exception:
-        pass
+        conn.rollback()
+        return out
+    if agg["last_at"] is not None:
+        out["audio_levels_last_at"] = agg["last_at"]
+        if agg["last_rms"] is not None:
+            out["audio_rms_latest"] = round(float(agg["last_rms"]), 6)
+        if agg["last_peak"] is not None:
+            out["audio_peak_latest"] = round(float(agg["last_peak"]), 6)
+        if agg["last_bd_raw_count"] is not None:
+            out["bd_raw_count_latest"] = int(agg["last_bd_raw_count"])
+        if agg["last_bd_max_det_prob"] is not None:
+            out["bd_max_det_prob_latest"] = round(float(agg["last_bd_max_det_prob"]), 3)
+        if agg["last_bd_user_pass"] is not None:
+            out["bd_user_pass_latest"] = int(agg["last_bd_user_pass"])
+    if agg["segments"]:
+        out["audio_rms_avg_1m"] = round(agg["rms_sum"] / agg["segments"], 6)
+    if agg["bd_raw_n"]:
+        out["bd_raw_avg_1h"] = round(agg["bd_raw_sum"] / agg["bd_raw_n"], 2)
+    if agg["bd_max_det_prob"] is not None:
+        out["bd_max_det_prob_1h"] = round(float(agg["bd_max_det_prob"]), 3)
+    out["rejection_reasons_1h"] = dict(agg["rejections"])
     return out
 
 
@@ -315,35 +304,90 @@ def get_audiomoth_hw_sample_rate() -> int | None:
         return None
 
 
-def get_db_stats(conn) -> dict:
-    """Return database size, row counts, and unsynced count."""
-    out = {
-        "db_size_mb": None,
-        "classifications_total": None,
-        "bat_detections_total": None,
-        "unsynced_count": None,
-    }
+# Catalog-only btree bloat estimate (no pgstattuple needed): expected
+# pages = reltuples × (key width + 12 B tuple header/line pointer) at the
+# default 90 % leaf fill; anything above that is dead or half-empty pages
+# left behind by deletes. Partitions are counted individually, so a
+# dropped day partition takes its bloat with it.
+_INDEX_BLOAT_SQL = """
+    SELECT
+      COALESCE(SUM(ic.relpages::bigint * 8192), 0),
+      COALESCE(SUM(GREATEST(
+        0,
+        ic.relpages - CEIL(ic.reltuples * (12 + w.width) / (8192 * 0.9 - 24))
+      )::bigint * 8192), 0)
+    FROM pg_index i
+    JOIN pg_class ic ON ic.oid = i.indexrelid
+    JOIN pg_class tc ON tc.oid = i.indrelid
+    JOIN pg_am am ON am.oid = ic.relam AND am.amname = 'btree'
+    CROSS JOIN LATERAL (
+      SELECT COALESCE(SUM(s.avg_width), 8) AS width
+      FROM pg_attribute a
+      JOIN pg_stats s
+        ON s.schemaname = 'public' AND s.tablename = tc.relname AND s.attname = a.attname
+      WHERE a.attrelid = tc.oid AND a.attnum = ANY (i.indkey)
+    ) w
+    WHERE ic.relnamespace = 'public'::regnamespace
+      AND ic.relkind = 'i'
+      AND ic.reltuples > 0
+"""
+
+
+# pg_database_size() walks every relation file and the bloat estimate
+# joins the catalogs, so both are refreshed on their own (slower) cadence.
+DB_STATS_REFRESH_SEC = int(os.getenv("DB_STATS_REFRESH_SEC", "300"))
+_db_size_cache = {"at": 0.0, "values": {}}
+
+
+def _slow_db_stats(conn) -> dict:
+    """DB size + index size/bloat, recomputed at most every DB_STATS_REFRESH_SEC."""
+    now = time.time()
+    if _db_size_cache["values"] and now - _db_size_cache["at"] < DB_STATS_REFRESH_SEC:
+        return _db_size_cache["values"]
+    values = {}
     try:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT pg_database_size('soundscape') / (1024.0 * 1024.0)"
             )
-            out["db_size_mb"] = round(float(cur.fetchone()[0]), 2)
+            values["db_size_mb"] = round(float(cur.fetchone()[0]), 2)
+            cur.execute(_INDEX_BLOAT_SQL)
+            size_bytes, bloat_bytes = cur.fetchone()
+        values["index_size_mb"] = round(float(size_bytes) / (1024 * 1024), 2)
+        values["index_bloat_mb"] = round(float(bloat_bytes) / (1024 * 1024), 2)
+    except Exception:
+        # Catalog query failing must not poison the device_status insert.
+        conn.rollback()
+        return _db_size_cache["values"]
+    _db_size_cache.update(at=now, values=values)
+    return values
 
-            cur.execute("SELECT COUNT(*) FROM classifications")
-            out["classifications_total"] = cur.fetchone()[0]
 
-            cur.execute("SELECT COUNT(*) FROM bat_detections")
-            out["bat_detections_total"] = cur.fetchone()[0]
+def get_db_stats(conn) -> dict:
+    """Return database size, row counts, unsynced count, and index bloat.
 
-            cur.execute(
-                "SELECT "
-                "(SELECT COUNT(*) FROM classifications WHERE synced = FALSE) + "
-                "(SELECT COUNT(*) FROM bat_detections WHERE synced = FALSE)"
-            )
-            out["unsynced_count"] = cur.fetchone()[0]
+    Row counts come from the trigger-maintained ``row_counters`` table
+    (see row_counters.py) — one primary-key read per tick regardless of
+    table size.
+    """
+    out = {
+        "db_size_mb": None,
+        "classifications_total": None,
+        "bat_detections_total": None,
+        "unsynced_count": None,
+        "index_size_mb": None,
+        "index_bloat_mb": None,
+    }
+    out.update(_slow_db_stats(conn))
+    try:
+        counts = row_counters.read(conn)
+        out["classifications_total"] = counts["classifications"]["total"]
+        out["bat_detections_total"] = counts["bat_detections"]["total"]
+        out["unsynced_count"] = (
+            counts["classifications"]["unsynced"] + counts["bat_detections"]["unsynced"]
+        )
     except Exception:
-        pass
+        conn.rollback()
     return out
 
 
@@ -365,17 +409,114 @@ def get_error_count(conn, hours: int = 1) -> int:
 # Aggregate collector
 # ---------------------------------------------------------------------------
 
+# ---------------------------------------------------------------------------
+# Concurrent probe runner
+# ---------------------------------------------------------------------------
+#
+# Host probes (/proc reads, statvfs, the internet HEAD, three vcgencmd
+# subprocesses, /proc/asound) run concurrently on a small pool, each with
+# its own deadline. A probe that misses its deadline is left to finish in
+# the background and the collector serves its last good value instead
+# (listed in ``probe_stale``); it isn't resubmitted while still in flight,
+# so a hung subprocess can't pile up threads. Slow-changing probes also
+# carry a TTL and are only re-run once it expires.
+#
+# DB probes stay on the caller's thread: they share one psycopg2
+# connection, and after the rollup / counter work they're a few ms.
+
+HEALTH_INTERNET_TIMEOUT_SEC = float(os.getenv("HEALTH_INTERNET_TIMEOUT_SEC", "4"))
+
+
+class _Probe:
+    def __init__(self, name, fn, default, deadline_sec, ttl_sec=0.0):
+        self.name = name
+        self.fn = fn
+        self.default = default
+        self.deadline_sec = deadline_sec
+        self.ttl_sec = ttl_sec
+        self.value = None
+        self.value_at = 0.0
+        self.inflight = None  # Future of a run that outlived its deadline
+
+    def fresh(self, now: float) -> bool:
+        return self.value_at > 0 and now - self.value_at < self.ttl_sec
+
+    def stale_value(self):
+        return self.value if self.value_at > 0 else self.default
+
+
+_PROBES = {
+    p.name: p for p in (
+        _Probe("uptime", get_uptime, None, 1.0),
+        _Probe("cpu_temp", get_cpu_temp, None, 1.0),
+        _Probe("memory", get_memory_info, (None, None), 1.0),
+        _Probe("load", get_cpu_load, (None, None, None), 1.0),
+        _Probe("disk", get_disk_usage, (None, None), 1.0, ttl_sec=60),
+        _Probe("internet", lambda: check_internet(HEALTH_INTERNET_TIMEOUT_SEC),
+               (False, None), HEALTH_INTERNET_TIMEOUT_SEC + 1.0),
+        _Probe("audiomoth", lambda: check_audiomoth(None), False, 1.0),
+        _Probe("hw_rate", get_audiomoth_hw_sample_rate, None, 1.0, ttl_sec=600),
+        # 3 × vcgencmd at _VCGENCMD_TIMEOUT_SEC each, worst case.
+        _Probe("power", get_power_status, dict.fromkeys(_POWER_KEYS),
+               3 * _VCGENCMD_TIMEOUT_SEC + 1.0, ttl_sec=30),
+    )
+}
+
+_probe_pool = ThreadPoolExecutor(max_workers=len(_PROBES), thread_name_prefix="health-probe")
+_probe_state = {"audiomoth": None}
+
+
+def _run_probes() -> tuple[dict, list]:
+    """Run every host probe concurrently. Returns ``(values, stale_names)``."""
+    started = time.time()
+    pending = {}
+    values = {}
+    stale = []
+    for probe in _PROBES.values():
+        if probe.fresh(started):
+            values[probe.name] = probe.value
+        elif probe.inflight is not None and not probe.inflight.done():
+            values[probe.name] = probe.stale_value()
+            stale.append(probe.name)
+        else:
+            probe.inflight = None
+            pending[probe.name] = _probe_pool.submit(probe.fn)
+
+    for name, fut in pending.items():
+        probe = _PROBES[name]
+        try:
+            result = fut.result(timeout=max(0.0, started + probe.deadline_sec - time.time()))
+        except FuturesTimeout:
+            probe.inflight = fut
+            values[name] = probe.stale_value()
+            stale.append(name)
+            continue
+        except Exception:
+            result = probe.default
+        probe.value, probe.value_at = result, time.time()
+        values[name] = result
+    return values, stale
+
+
 def collect_all_metrics(conn) -> dict:
     """Collect every metric into a flat dict suitable for DB insert."""
-    uptime = get_uptime()
-    cpu_temp = get_cpu_temp()
-    mem_total, mem_available = get_memory_info()
-    load_1, load_5, load_15 = get_cpu_load()
-    disk_total, disk_used = get_disk_usage()
-    internet_ok, internet_latency = check_internet()
-    audiomoth_ok = check_audiomoth(conn)
-    audiomoth_hw_rate = get_audiomoth_hw_sample_rate() if audiomoth_ok else None
-    power = get_power_status()
+    started = time.time()
+    probes, stale = _run_probes()
+
+    audiomoth_ok = probes["audiomoth"]
+    if audiomoth_ok and _probe_state["audiomoth"] is False:
+        # Re-plugged: the device may come back at a different rate.
+        _PROBES["hw_rate"].value_at = 0.0
+    _probe_state["audiomoth"] = audiomoth_ok
+
+    uptime = probes["uptime"]
+    cpu_temp = probes["cpu_temp"]
+    mem_total, mem_available = probes["memory"]
+    load_1, load_5, load_15 = probes["load"]
+    disk_total, disk_used = probes["disk"]
+    internet_ok, internet_latency = probes["internet"]
+    audiomoth_hw_rate = probes["hw_rate"] if audiomoth_ok else None
+    power = probes["power"]
     audio_levels = get_audio_levels(conn)
     db = get_db_stats(conn)
     errors = get_error_count(conn)
@@ -395,6 +536,8 @@ def collect_all_metrics(conn) -> dict:
         "audiomoth_connected": audiomoth_ok,
         "audiomoth_hw_sample_rate": audiomoth_hw_rate,
         "capture_errors_1h": errors,
+        "probe_stale": stale,
+        "collect_ms": round((time.time() - started) * 1000, 1),
         **power,
         **audio_levels,
         **db,
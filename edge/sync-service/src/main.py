@@ -1,16 +1,21 @@
 import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
 import firebase_admin
 import psycopg2
 from firebase_admin import credentials, firestore
+from google.api_core.exceptions import NotFound
 
-from src import onedrive_sync
+from src import audio_compress, audio_rollup, bandwidth, onedrive_sync
+from src import disk_forecast, disk_watchdog, eventlog, partitions, row_counters
+from src import metrics as prom
 from src.disk_watchdog import enforce_disk_quota, get_audio_disk_stats
 from src.daily_summary import send_summary
 from src.health import collect_all_metrics
+from src.scheduler import Scheduler, Task
 
 # Module-level state so sync_device_status can surface last OneDrive
 # attempt without another round-trip of subprocess / DB calls.
@@ -20,44 +25,45 @@ _onedrive_state = {
     "rclone_available": None,
 }
 
-# Watchdog state. The main loop touches ``_watchdog_last_tick`` at the
-# top of every iteration; a separate daemon thread wakes periodically
-# and exits the process if the tick has gone stale. Combined with the
+# Watchdog state. Each scheduled task (see ``src/scheduler.py``) carries
+# its own heartbeat and timeout; a separate daemon thread wakes
+# periodically and exits the process if the dispatch loop has gone
+# silent or any task has overrun its own timeout. Combined with the
 # container's ``restart: unless-stopped`` policy this produces
 # auto-recovery from the silent-hang failure mode observed 2026-04-26
 # (container "Up X hours" but worker loop frozen, dashboard shows
-# "Device Offline" while the Pi itself is fine).
-_watchdog_last_tick = time.time()
-_watchdog_lock = threading.Lock()
+# "Device Offline" while the Pi itself is fine) — without letting a
+# slow-but-healthy OneDrive batch look like a hang.
 WATCHDOG_STALL_SECONDS = int(os.getenv("WATCHDOG_STALL_SECONDS", "120"))
 WATCHDOG_CHECK_SECONDS = int(os.getenv("WATCHDOG_CHECK_SECONDS", "30"))
 
 
-def _watchdog_loop() -> None:
-    """Daemon thread: kill the process if the main loop has stalled.
+def _watchdog_loop(sched: Scheduler) -> None:
+    """Daemon thread: kill the process if the scheduler or a task stalled.
 
-    Sleeps ``WATCHDOG_CHECK_SECONDS`` between checks. If the gap between
-    ``now`` and ``_watchdog_last_tick`` exceeds ``WATCHDOG_STALL_SECONDS``
-    we log the stall and call ``os._exit(1)`` so docker can restart us.
-    Using ``os._exit`` instead of ``sys.exit`` so the dying main thread
+    Sleeps ``WATCHDOG_CHECK_SECONDS`` between checks. The dispatch loop
+    must tick within ``WATCHDOG_STALL_SECONDS``; each task run must
+    heartbeat within its own ``timeout_sec``. On either failure we log
+    the reasons and call ``os._exit(1)`` so docker can restart us.
+    Using ``os._exit`` instead of ``sys.exit`` so a dying worker thread
     can't swallow it via a try/except.
     """
     while True:
         time.sleep(WATCHDOG_CHECK_SECONDS)
-        with _watchdog_lock:
-            age = time.time() - _watchdog_last_tick
-        if age > WATCHDOG_STALL_SECONDS:
+        reasons = sched.stalled(WATCHDOG_STALL_SECONDS)
+        if reasons:
             print(
-                f"[SYNC] WATCHDOG: main loop stalled for {age:.0f}s "
-                f"(threshold {WATCHDOG_STALL_SECONDS}s) — exiting "
+                f"[SYNC] WATCHDOG: {'; '.join(reasons)} — exiting "
                 f"for container restart",
                 flush=True,
             )
             os._exit(1)
 
 
-def _start_watchdog() -> None:
-    threading.Thread(target=_watchdog_loop, daemon=True, name="sync-watchdog").start()
+def _start_watchdog(sched: Scheduler) -> None:
+    threading.Thread(
+        target=_watchdog_loop, args=(sched,), daemon=True, name="sync-watchdog",
+    ).start()
 
 
 def init_firebase():
@@ -89,6 +95,24 @@ def get_db_connection():
     )
 
 
+def bat_detection_doc_id(row_id: int, db_token: str) -> str:
+    """Firestore document ID for a bat_detections row: ``{PI_SITE}_{token}_{id}``.
+
+    Postgres IDs are only unique per Pi, so the site prefix keeps docs
+    from several deployments apart in the shared collection; the
+    per-database token (``sync_identity``) keeps a rebuilt database,
+    whose sequence starts over, from overwriting the old one's docs.
+    """
+    return f"{os.getenv('PI_SITE', 'pi01')}_{db_token}_{row_id}"
+
+
+def get_db_token(conn) -> str:
+    """The random token minted for this database by ``run_migrations``."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT token FROM sync_identity")
+        return cur.fetchone()[0]
+
+
 def sync_classifications(conn, db):
     """Sync unsynced classification records to Firestore."""
     with conn.cursor() as cur:
@@ -154,7 +178,7 @@ def sync_bat_detections(conn, db):
                    reviewed_by, reviewed_at, verified_class, reviewer_notes,
                    temperature_c, temperature_timestamp, alignment_error_ms,
                    storage_tier, expires_at,
-                   remote_audio_path, synced_remote_at
+                   remote_audio_path, synced_remote_at, audio_url
             FROM bat_detections
             WHERE synced = FALSE
             ORDER BY detection_time ASC
@@ -165,11 +189,18 @@ def sync_bat_detections(conn, db):
     if not rows:
         return 0
 
+    db_token = get_db_token(conn)
     batch = db.batch()
     ids_to_mark = []
+    doc_ids = []
 
     for row in rows:
-        doc_ref = db.collection("batDetections").document()
+        # Deterministic document ID so later writers (audio upload,
+        # review backfill) can address the doc directly instead of
+        # querying by syncId — which isn't unique anyway: every
+        # detection in a segment shares it.
+        doc_id = bat_detection_doc_id(row[0], db_token)
+        doc_ref = db.collection("batDetections").document(doc_id)
         batch.set(doc_ref, {
             "species": row[1],
             "commonName": row[2],
@@ -197,16 +228,23 @@ def sync_bat_detections(conn, db):
             "expiresAt": row[24],
             "remoteAudioPath": row[25],
             "syncedRemoteAt": row[26],
+            "audioUrl": row[27],
             "createdAt": firestore.SERVER_TIMESTAMP,
         })
         ids_to_mark.append(row[0])
+        doc_ids.append(doc_id)
 
     batch.commit()
 
     with conn.cursor() as cur:
         cur.execute(
-            "UPDATE bat_detections SET synced = TRUE WHERE id = ANY(%s)",
-            (ids_to_mark,)
+            """
+            UPDATE bat_detections AS b
+               SET synced = TRUE, firestore_doc_id = m.doc_id
+              FROM unnest(%s::int[], %s::text[]) AS m(id, doc_id)
+             WHERE b.id = m.id
+            """,
+            (ids_to_mark, doc_ids),
         )
     conn.commit()
 
@@ -297,6 +335,25 @@ def run_migrations(conn):
                 recorded_at TIMESTAMP NOT NULL DEFAULT NOW()
             )
         """)
+        # Raw BD output per live segment, for offline re-gating. Created
+        # here too so retention never runs against a missing table.
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS segment_raw (
+                id SERIAL PRIMARY KEY,
+                recorded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                sync_id UUID,
+                device VARCHAR(100),
+                pipeline_version VARCHAR(32),
+                model_version VARCHAR(64),
+                raw_count INTEGER NOT NULL,
+                max_det_prob REAL,
+                raw BYTEA NOT NULL
+            )
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_segment_raw_recorded_at
+            ON segment_raw(recorded_at)
+        """)
         # Audio RMS / peak level per segment — one row per capture from
         # batdetect-service. Surfaced on the dashboard so a silent or
         # undervolted microphone is visible without SSH.
@@ -412,7 +469,27 @@ def run_migrations(conn):
                 ADD COLUMN IF NOT EXISTS storage_tier          SMALLINT,
                 ADD COLUMN IF NOT EXISTS expires_at            TIMESTAMP,
                 ADD COLUMN IF NOT EXISTS remote_audio_path     VARCHAR(512),
-                ADD COLUMN IF NOT EXISTS synced_remote_at      TIMESTAMP
+                ADD COLUMN IF NOT EXISTS synced_remote_at      TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS firestore_doc_id      VARCHAR(64)
+        """)
+        # One random token per database, part of every bat_detections
+        # doc ID (bat_detection_doc_id): a rebuilt DB gets a new one.
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS sync_identity (
+                singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+                token VARCHAR(16) NOT NULL
+            )
+        """)
+        cur.execute("""
+            INSERT INTO sync_identity (token)
+            VALUES (substr(md5(random()::text || clock_timestamp()::text), 1, 8))
+            ON CONFLICT DO NOTHING
+        """)
+        # Drives the audio-upload queue scan (upload_bat_audio).
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_bat_audio_pending
+            ON bat_detections(id)
+            WHERE audio_path IS NOT NULL AND audio_url IS NULL
         """)
         cur.execute("""
             CREATE INDEX IF NOT EXISTS idx_bat_predicted_class
@@ -464,7 +541,36 @@ def run_migrations(conn):
             CREATE INDEX IF NOT EXISTS idx_env_sensor_address
             ON environmental_readings(sensor_address)
         """)
+        # Local file-size catalog + partial indexes that back each disk
+        # watchdog stage (see disk_watchdog.py).
+        cur.execute(disk_watchdog.FILE_CATALOG_DDL)
+        for ddl in disk_watchdog.STAGE_INDEX_SQL:
+            cur.execute(ddl)
+        # Per-minute / per-hour audio_levels rollups read by health and
+        # the daily summary (see audio_rollup.py).
+        for ddl in audio_rollup.ROLLUP_DDL:
+            cur.execute(ddl)
+        # Bulk-upload byte ledger per UTC day and channel (onedrive,
+        # storage) — backs UPLOAD_DAILY_BUDGET_MB across restarts.
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS upload_ledger (
+                day DATE NOT NULL,
+                channel VARCHAR(32) NOT NULL,
+                bytes BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, channel)
+            )
+        """)
     conn.commit()
+    # Daily range partitions for the time-series tables (one-time in-place
+    # conversion on existing databases; see partitions.py).
+    partitions.ensure_partitioning(conn)
+    # Trigger-maintained row counts for the health push. Installed after
+    # partitioning so the triggers land on the partitioned parent.
+    try:
+        row_counters.install(conn)
+    except Exception as e:
+        conn.rollback()
+        print(f"[SYNC] Row counter install failed (health falls back to estimates): {e}")
     print("[SYNC] Database migrations complete")
 
 
@@ -480,6 +586,8 @@ def sync_device_status(conn, db):
     """
     try:
         metrics = collect_all_metrics(conn)
+        prom.observe_health(metrics)
+        bandwidth.record_probe(metrics["internet_connected"], metrics["internet_latency_ms"])
 
         # Insert into local DB
         with conn.cursor() as cur:
@@ -548,6 +656,10 @@ def sync_device_status(conn, db):
             "classificationsTotal": metrics["classifications_total"],
             "batDetectionsTotal": metrics["bat_detections_total"],
             "unsyncedCount": metrics["unsynced_count"],
+            "healthCollectMs": metrics["collect_ms"],
+            "healthProbesStale": metrics["probe_stale"],
+            "dbIndexSizeMb": metrics["index_size_mb"],
+            "dbIndexBloatMb": metrics["index_bloat_mb"],
             "sampleRateHz": sample_rate,
             "recordedAt": firestore.SERVER_TIMESTAMP,
             **get_audio_disk_stats(bat_audio_dir),
@@ -557,6 +669,9 @@ def sync_device_status(conn, db):
                 if _onedrive_state["last_run_ts"] else None
             ),
             "lastOnedriveSyncAction": _onedrive_state["last_action"],
+            **bandwidth.status_payload(conn),
+            **disk_forecast.status_payload(),
+            **partitions.status_payload(),
         }
 
         # ── Detect offline gap ──
@@ -606,15 +721,132 @@ def sync_device_status(conn, db):
 #  Bat audio upload (optional — controlled by UPLOAD_BAT_AUDIO env var)
 # ---------------------------------------------------------------------------
 
+STORAGE_UPLOAD_WORKERS = int(os.getenv("STORAGE_UPLOAD_WORKERS", "4"))
+STORAGE_UPLOAD_PAGE = int(os.getenv("STORAGE_UPLOAD_PAGE", "40"))
+STORAGE_UPLOAD_TIME_BUDGET_SEC = int(os.getenv("STORAGE_UPLOAD_TIME_BUDGET_SEC", "240"))
+_FIRESTORE_BATCH_LIMIT = 500
+
+
+def _upload_one_audio(bucket, audio_path: str, sync_id: str, compress: bool) -> tuple:
+    """Worker: push one local file to Storage. Returns ``(public_url, bytes_sent)``."""
+    staged = None
+    try:
+        src_path, ext, content_type = audio_path, ".wav", "audio/wav"
+        if audio_path.lower().endswith(".flac"):
+            ext, content_type = ".flac", "audio/flac"
+        elif compress:
+            try:
+                staged = audio_compress.flac_name(audio_path) + ".upload"
+                audio_compress.compress_to_flac(audio_path, staged)
+                src_path, ext, content_type = staged, ".flac", "audio/flac"
+            except Exception as e:
+                print(f"[SYNC] FLAC skipped for {audio_path}: {e}")
+                staged = None
+
+        blob = bucket.blob(f"bat_audio/{sync_id}{ext}")
+        blob.upload_from_filename(src_path, content_type=content_type)
+        blob.make_public()
+        return blob.public_url, os.path.getsize(src_path)
+    finally:
+        if staged and os.path.exists(staged):
+            os.remove(staged)
+
+
+def _commit_audio_urls(conn, db, done: list) -> None:
+    """Write one page of finished uploads to Firestore + Postgres in bulk.
+
+    ``done`` holds ``(audio_path, url, rows)`` with ``rows`` as
+    ``[(det_id, sync_id, firestore_doc_id), ...]``. Docs with a known
+    ID go into batched updates; rows synced before deterministic IDs
+    existed fall back to one syncId query per segment. A doc deleted
+    from the dashboard since it was synced fails its batch with
+    NotFound; that batch is then retried doc by doc and the gone doc
+    skipped.
+    """
+    updates = []
+    legacy_sync_ids = {}
+    for _, url, rows in done:
+        for _, sync_id, doc_id in rows:
+            if doc_id:
+                updates.append((doc_id, url))
+            else:
+                legacy_sync_ids[sync_id] = url
+
+    for start in range(0, len(updates), _FIRESTORE_BATCH_LIMIT):
+        chunk = updates[start:start + _FIRESTORE_BATCH_LIMIT]
+        batch = db.batch()
+        for doc_id, url in chunk:
+            batch.update(db.collection("batDetections").document(doc_id), {"audioUrl": url})
+        try:
+            batch.commit()
+        except NotFound:
+            for doc_id, url in chunk:
+                try:
+                    db.collection("batDetections").document(doc_id).update({"audioUrl": url})
+                except NotFound:
+                    print(f"[SYNC] audioUrl skipped: batDetections/{doc_id} no longer exists")
+    for sync_id, url in legacy_sync_ids.items():
+        for d in db.collection("batDetections").where("syncId", "==", sync_id).get():
+            d.reference.update({"audioUrl": url})
+
+    ids, urls = [], []
+    for _, url, rows in done:
+        for det_id, _, _ in rows:
+            ids.append(det_id)
+            urls.append(url)
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE bat_detections AS b
+               SET audio_url = m.url
+              FROM unnest(%s::int[], %s::text[]) AS m(id, url)
+             WHERE b.id = m.id
+            """,
+            (ids, urls),
+        )
+    conn.commit()
+
+    # Local copies go only after both stores point at the upload.
+    for audio_path, _, _ in done:
+        try:
+            os.remove(audio_path)
+        except FileNotFoundError:
+            pass
+    with conn.cursor() as cur:
+        cur.execute(
+            "UPDATE file_catalog SET deleted_at = NOW() "
+            "WHERE path = ANY(%s) AND deleted_at IS NULL",
+            ([audio_path for audio_path, _, _ in done],),
+        )
+    conn.commit()
+
+
 def upload_bat_audio(conn, db):
-    """Upload saved bat-call .wav files to Firebase Storage.
+    """Upload saved bat-call audio files to Firebase Storage.
 
     Only runs when UPLOAD_BAT_AUDIO=true.  The batdetect-service saves
-    .wav files to /bat_audio/ when it detects a bat call.
+    .wav files to /bat_audio/ when it detects a bat call. WAVs are sent
+    as lossless FLAC when ARCHIVE_COMPRESS_UPLOADS is on, and the whole
+    step respects the bulk-upload window / daily budget in
+    ``bandwidth``.
+
+    Drains the backlog page by page (``STORAGE_UPLOAD_PAGE`` files,
+    ``STORAGE_UPLOAD_WORKERS`` concurrent uploads) until it's empty or
+    ``STORAGE_UPLOAD_TIME_BUDGET_SEC`` runs out. Pages are of distinct
+    files, each with every detection row that shares it, so each file is
+    uploaded once and all its rows get the URL together. Each page
+    commits its Firestore ``audioUrl`` writes and Postgres marks in bulk.
     """
     if os.getenv("UPLOAD_BAT_AUDIO", "false").lower() != "true":
         return 0
 
+    allowed, reason = bandwidth.upload_allowed()
+    if not allowed:
+        return 0
+    budget = bandwidth.remaining_budget(conn)
+    if budget == 0:
+        return 0
+
     try:
         from firebase_admin import storage as fb_storage
         bucket = fb_storage.bucket()
@@ -622,52 +854,85 @@ def upload_bat_audio(conn, db):
         print(f"[SYNC] Firebase Storage not available: {e}")
         return 0
 
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT id, audio_path, sync_id
-            FROM bat_detections
-            WHERE audio_path IS NOT NULL AND audio_url IS NULL
-            LIMIT 10
-        """)
-        rows = cur.fetchall()
-
-    if not rows:
-        return 0
-
+    compress = os.getenv("ARCHIVE_COMPRESS_UPLOADS", "true").lower() == "true"
+    deadline = time.time() + STORAGE_UPLOAD_TIME_BUDGET_SEC
     uploaded = 0
-    for det_id, audio_path, sync_id in rows:
-        if not audio_path or not os.path.exists(audio_path):
-            continue
-        try:
-            blob = bucket.blob(f"bat_audio/{sync_id}.wav")
-            blob.upload_from_filename(audio_path)
-            blob.make_public()
-            audio_url = blob.public_url
-
-            # Update the Firestore document
-            docs = (
-                db.collection("batDetections")
-                .where("syncId", "==", sync_id)
-                .limit(1)
-                .get()
-            )
-            for d in docs:
-                d.reference.update({"audioUrl": audio_url})
-
-            # Update local DB
+    bytes_sent = 0
+    last_path = ""
+    started = time.time()
+
+    with ThreadPoolExecutor(max_workers=STORAGE_UPLOAD_WORKERS,
+                            thread_name_prefix="storage-upload") as pool:
+        while time.time() < deadline and (budget is None or bytes_sent < budget):
+            # Keyset pagination over files: ones that are gone are
+            # skipped instead of being re-fetched at the head of every
+            # page. A file is only taken once every row sharing it is in
+            # Firestore — the URL must land on existing docs before the
+            # local file is deleted. Synced rows without a
+            # firestore_doc_id predate deterministic IDs and go through
+            # the syncId fallback in _commit_audio_urls.
             with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE bat_detections SET audio_url = %s WHERE id = %s",
-                    (audio_url, det_id),
-                )
+                cur.execute("""
+                    SELECT audio_path
+                    FROM bat_detections
+                    WHERE audio_path IS NOT NULL AND audio_url IS NULL
+                      AND audio_path > %s
+                    GROUP BY audio_path
+                    HAVING bool_and(synced)
+                    ORDER BY audio_path
+                    LIMIT %s
+                """, (last_path, STORAGE_UPLOAD_PAGE))
+                paths = [r[0] for r in cur.fetchall()]
+                if not paths:
+                    break
+                last_path = paths[-1]
+                cur.execute("""
+                    SELECT id, audio_path, sync_id, firestore_doc_id
+                    FROM bat_detections
+                    WHERE audio_path = ANY(%s) AND audio_url IS NULL
+                    ORDER BY id
+                """, (paths,))
+                rows = cur.fetchall()
             conn.commit()
 
-            # Remove local copy
-            os.remove(audio_path)
-            uploaded += 1
-        except Exception as e:
-            print(f"[SYNC] Failed to upload audio for detection {det_id}: {e}")
-
+            by_path = {}
+            for det_id, audio_path, sync_id, doc_id in rows:
+                by_path.setdefault(audio_path, []).append((det_id, str(sync_id), doc_id))
+
+            futures = {}
+            for audio_path, path_rows in by_path.items():
+                if not os.path.exists(audio_path):
+                    continue
+                fut = pool.submit(_upload_one_audio, bucket, audio_path,
+                                  path_rows[0][1], compress)
+                futures[fut] = (audio_path, path_rows)
+
+            done = []
+            for fut in as_completed(futures):
+                audio_path, path_rows = futures[fut]
+                try:
+                    url, n_bytes = fut.result()
+                except Exception as e:
+                    print(f"[SYNC] Failed to upload audio for detection "
+                          f"{path_rows[0][0]}: {e}")
+                    continue
+                done.append((audio_path, url, path_rows))
+                bytes_sent += n_bytes
+
+            if done:
+                try:
+                    _commit_audio_urls(conn, db, done)
+                    uploaded += len(done)
+                except Exception as e:
+                    # Blobs are in Storage; the rows stay pending and the
+                    # re-upload next cycle overwrites the same object name.
+                    conn.rollback()
+                    print(f"[SYNC] audioUrl backfill failed for {len(done)} file(s): {e}")
+
+    prom.UPLOADED_FILES.labels(target="storage").inc(uploaded)
+    prom.UPLOADED_BYTES.labels(target="storage").inc(bytes_sent)
+    bandwidth.record_upload(conn, "storage", bytes_sent)
+    bandwidth.record_transfer(bytes_sent, time.time() - started)
     return uploaded
 
 
@@ -676,46 +941,57 @@ def upload_bat_audio(conn, db):
 # ---------------------------------------------------------------------------
 
 def cleanup_old_data(conn):
-    """Delete synced records older than 30 days and old health/error rows."""
+    """Apply retention: drop expired day partitions, then chunk-delete the rest.
+
+    Synced classifications / bat detections / env readings and all
+    segment_raw rows are kept 30 days, device_status / capture_errors /
+    audio_levels 7 days. Bounded
+    by RETENTION_TIME_BUDGET_SEC; anything left over is picked up next run.
+    """
     try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "DELETE FROM classifications "
-                "WHERE synced = TRUE AND sync_time < NOW() - INTERVAL '30 days'"
-            )
-            c1 = cur.rowcount
-            cur.execute(
-                "DELETE FROM bat_detections "
-                "WHERE synced = TRUE AND detection_time < NOW() - INTERVAL '30 days'"
-            )
-            c2 = cur.rowcount
-            cur.execute(
-                "DELETE FROM environmental_readings "
-                "WHERE synced = TRUE AND recorded_at < NOW() - INTERVAL '30 days'"
-            )
-            c3 = cur.rowcount
-            cur.execute(
-                "DELETE FROM device_status "
-                "WHERE recorded_at < NOW() - INTERVAL '7 days'"
-            )
-            cur.execute(
-                "DELETE FROM capture_errors "
-                "WHERE recorded_at < NOW() - INTERVAL '7 days'"
-            )
-            cur.execute(
-                "DELETE FROM audio_levels "
-                "WHERE recorded_at < NOW() - INTERVAL '7 days'"
-            )
-        conn.commit()
-        if c1 or c2 or c3:
-            print(f"[SYNC] Retention cleanup: {c1} classifications, {c2} bat detections, {c3} env readings")
+        result = partitions.run_retention(conn)
     except Exception as e:
+        conn.rollback()
         print(f"[SYNC] Retention cleanup error: {e}")
+        return
+    try:
+        result["audio_rollups"] = {
+            "dropped": 0, "deleted": audio_rollup.prune_rollups(conn), "finished": True,
+        }
+    except Exception as e:
+        conn.rollback()
+        print(f"[SYNC] Rollup prune error: {e}")
+    prom.observe_retention(result)
+    eventlog.emit("retention", tables=result)
+    parts = [
+        f"{table}: -{r['dropped']} part/-{r['deleted']} rows"
+        + ("" if r["finished"] else " (budget hit)")
+        for table, r in result.items() if r["dropped"] or r["deleted"]
+    ]
+    if parts:
+        print(f"[SYNC] Retention cleanup: {'; '.join(parts)}")
+
+
+def _with_conn(fn):
+    """Wrap ``fn(conn)`` so each scheduled run gets its own DB connection."""
+    def _job():
+        conn = get_db_connection()
+        try:
+            return fn(conn)
+        finally:
+            conn.close()
+    return _job
 
 
 def main():
     sync_interval = int(os.getenv("SYNC_INTERVAL", "60"))
     health_interval = int(os.getenv("HEALTH_INTERVAL", "15"))
+    health_timeout = int(os.getenv("HEALTH_TIMEOUT_SEC", "90"))
+    data_sync_timeout = int(os.getenv("DATA_SYNC_TIMEOUT_SEC", "600"))
+    disk_watchdog_interval = int(os.getenv("DISK_WATCHDOG_INTERVAL", str(health_interval)))
+    retention_interval = int(os.getenv("RETENTION_INTERVAL_SEC", "3600"))
+    forecast_interval = int(os.getenv("FORECAST_INTERVAL_SEC", "300"))
+    rollup_interval = int(os.getenv("ROLLUP_INTERVAL_SEC", str(health_interval)))
 
     enable_onedrive = os.getenv("ENABLE_ONEDRIVE_SYNC", "false").lower() == "true"
     onedrive_interval_sec = int(os.getenv("ONEDRIVE_SYNC_INTERVAL_MINUTES", "60")) * 60
@@ -742,109 +1018,202 @@ def main():
     except Exception as e:
         print(f"[SYNC] Migration warning: {e}")
 
-    print(f"[SYNC] Starting sync loop (data: {sync_interval}s, health: {health_interval}s)")
-    _start_watchdog()
-    print(f"[SYNC] Watchdog armed (stall threshold {WATCHDOG_STALL_SECONDS}s)")
-
     # Daily summary schedule: fire once per day at DAILY_SUMMARY_HOUR_UTC.
-    # We track the date of the last send in a module-level var so the
-    # loop can compare without persisting state.
+    # The date of the last send lives in a closure dict so the task can
+    # compare without persisting state.
     summary_enabled = os.getenv("ENABLE_DAILY_SUMMARY", "false").lower() == "true"
     summary_hour_utc = int(os.getenv("DAILY_SUMMARY_HOUR_UTC", "11"))
     site_id = os.getenv("PI_SITE", "pi01")
-    summary_last_sent_date: str | None = None
+    summary_state = {"last_sent_date": None}
     if summary_enabled:
         print(f"[SYNC] Daily summary enabled — fires at {summary_hour_utc:02d}:00 UTC")
     else:
         print("[SYNC] Daily summary disabled (ENABLE_DAILY_SUMMARY=false)")
 
-    cycle = 0
-    last_data_sync = 0.0  # force immediate first data sync
-    while True:
-        # Touch the watchdog at the top of every iteration so the
-        # external check sees us alive even if a downstream op is slow.
-        with _watchdog_lock:
-            global _watchdog_last_tick
-            _watchdog_last_tick = time.time()
+    bat_audio_dir = os.getenv("BAT_AUDIO_DIR", "/bat_audio")
+    data_state = {"cycle": 0}
+
+    def data_sync(conn):
+        class_count = sync_classifications(conn, db)
+        bat_count = sync_bat_detections(conn, db)
+        env_count = sync_environmental_readings(conn, db)
+        prom.SYNCED_ROWS.labels(table="classifications").inc(class_count)
+        prom.SYNCED_ROWS.labels(table="bat_detections").inc(bat_count)
+        prom.SYNCED_ROWS.labels(table="environmental_readings").inc(env_count)
+
+        now_str = datetime.now(timezone.utc).strftime("%H:%M:%S")
+        eventlog.emit(
+            "sync_cycle", cycle=data_state["cycle"],
+            classifications=class_count, bat_detections=bat_count,
+            environmental_readings=env_count,
+            echo=(f"[SYNC] Cycle {data_state['cycle']}: {class_count} cls, "
+                  f"{bat_count} bat, {env_count} env ({now_str})"),
+        )
+        data_state["cycle"] += 1
+
+    def storage_upload(conn):
+        audio_count = upload_bat_audio(conn, db)
+        if audio_count > 0:
+            eventlog.emit("upload", target="storage", files=audio_count)
+            print(f"[SYNC] Uploaded {audio_count} bat audio file(s)")
+
+    def daily_summary(conn):
+        # Once per UTC day, within a grace window around the scheduled hour.
+        now_utc = datetime.now(timezone.utc)
+        today_str = now_utc.strftime("%Y-%m-%d")
+        if now_utc.hour != summary_hour_utc or summary_state["last_sent_date"] == today_str:
+            return
+        summary_state["last_sent_date"] = today_str
         try:
-            conn = get_db_connection()
-            now = time.time()
-
-            # Full data sync at the longer interval
-            if now - last_data_sync >= sync_interval:
-                class_count = sync_classifications(conn, db)
-                bat_count = sync_bat_detections(conn, db)
-                env_count = sync_environmental_readings(conn, db)
-                audio_count = upload_bat_audio(conn, db)
-                last_data_sync = now
-
-                now_str = datetime.now(timezone.utc).strftime("%H:%M:%S")
-                print(f"[SYNC] Cycle {cycle}: {class_count} cls, {bat_count} bat, {env_count} env, health ok ({now_str})")
-                if audio_count > 0:
-                    print(f"[SYNC] Uploaded {audio_count} bat audio file(s)")
-
-                # Run retention cleanup once per hour
-                if cycle % (3600 // sync_interval) == 0 and cycle > 0:
-                    cleanup_old_data(conn)
-
-                cycle += 1
-
-            # Health status pushed every tick (fast interval)
-            sync_device_status(conn, db)
-
-            # Daily summary: once per UTC day, within a grace window
-            # around the scheduled hour.
-            if summary_enabled:
-                now_utc = datetime.now(timezone.utc)
-                today_str = now_utc.strftime("%Y-%m-%d")
-                if (
-                    now_utc.hour == summary_hour_utc
-                    and summary_last_sent_date != today_str
-                ):
-                    try:
-                        send_summary(conn, site_id)
-                    except Exception as e:
-                        print(f"[SUMMARY] generation failed: {e}")
-                    summary_last_sent_date = today_str
-
-            # Reclaim disk if the bat_audio store crossed the hard cap, or
-            # flip/release the halt flag based on current usage.
-            bat_audio_dir = os.getenv("BAT_AUDIO_DIR", "/bat_audio")
-            watchdog = enforce_disk_quota(conn, bat_audio_dir)
-            if watchdog["action"] != "none":
-                print(
-                    f"[SYNC] Watchdog: {watchdog['action']} "
-                    f"used={watchdog.get('used_gb')} GB "
-                    f"deleted={watchdog.get('files_deleted', 0)} "
-                    f"freed={watchdog.get('gb_freed', 0)} GB "
-                    f"halt={watchdog.get('halt_recordings', False)}"
-                )
+            send_summary(conn, site_id)
+        except Exception as e:
+            print(f"[SUMMARY] generation failed: {e}")
+
+    def disk_watchdog_task(conn):
+        # Reclaim disk if the bat_audio store crossed the hard cap, or
+        # flip/release the halt flag based on current usage.
+        cataloged = disk_watchdog.backfill_catalog(conn)
+        if cataloged:
+            print(f"[SYNC] Catalog backfill: {cataloged} file(s)")
+        watchdog = enforce_disk_quota(conn, bat_audio_dir)
+        prom.observe_watchdog(watchdog)
+        if watchdog["action"] != "none":
+            eventlog.emit(
+                "watchdog", action=watchdog["action"], used_gb=watchdog.get("used_gb"),
+                files_deleted=watchdog.get("files_deleted", 0),
+                gb_freed=watchdog.get("gb_freed", 0),
+                halt=watchdog.get("halt_recordings", False),
+            )
+            print(
+                f"[SYNC] Watchdog: {watchdog['action']} "
+                f"used={watchdog.get('used_gb')} GB "
+                f"deleted={watchdog.get('files_deleted', 0)} "
+                f"freed={watchdog.get('gb_freed', 0)} GB "
+                f"halt={watchdog.get('halt_recordings', False)}"
+            )
 
-            # OneDrive archival runs on its own (slower) cadence — uploads
-            # are network-bound, so don't tie them to the 60s sync interval.
-            now_ts = time.time()
-            if enable_onedrive and (now_ts - _onedrive_state["last_run_ts"]) >= onedrive_interval_sec:
-                result = onedrive_sync.sync_tier1_to_onedrive(conn, onedrive_cfg)
-                _onedrive_state["last_run_ts"] = now_ts
-                _onedrive_state["last_action"] = result["action"]
-                _onedrive_state["rclone_available"] = result["action"] != "error"
-                print(
-                    f"[SYNC] OneDrive: {result['action']} "
-                    f"candidates={result['candidates_found']} "
-                    f"ok={result['uploads_succeeded']} "
-                    f"failed={result['uploads_failed']} "
-                    f"bytes={result['bytes_uploaded']}"
-                )
-                if result["errors"]:
-                    for err in result["errors"][:5]:
-                        print(f"[SYNC]   err: {err.get('file')} -> {err.get('error')}")
+    def rollup(conn):
+        # Drain new audio_levels rows into the 1m / 1h rollups; a backlog
+        # (first start, long outage) is consumed a batch per run.
+        n = audio_rollup.rollup_new_rows(conn)
+        prom.ROLLUP_ROWS.inc(n)
+        if n >= audio_rollup.ROLLUP_BATCH_ROWS:
+            print(f"[SYNC] Audio rollup catching up: {n} rows this run")
+
+    def forecast(conn):
+        # Project time-to-cap and, in the daytime idle window, trickle-
+        # delete expired files so the watchdog never needs to burst.
+        res = disk_forecast.run(conn, bat_audio_dir)
+        fc, tr = res["forecast"], res["trickle"]
+        prom.observe_forecast(fc, tr)
+        if tr["files_deleted"]:
+            eventlog.emit(
+                "trickle", files_deleted=tr["files_deleted"], bytes_freed=tr["bytes_freed"],
+                hours_to_warning=fc["hours_to_warning"],
+                hours_to_hard_cap=fc["hours_to_hard_cap"],
+            )
+            print(
+                f"[SYNC] Trickle: deleted={tr['files_deleted']} "
+                f"freed={tr['bytes_freed']} bytes "
+                f"to_warning={fc['hours_to_warning']}h to_cap={fc['hours_to_hard_cap']}h"
+            )
 
-            conn.close()
+    def onedrive(conn):
+        # Bulk archival only inside the upload window and daily budget;
+        # health pushes never go through this gate.
+        allowed, reason = bandwidth.upload_allowed()
+        budget = bandwidth.remaining_budget(conn) if allowed else None
+        if not allowed or budget == 0:
+            _onedrive_state["last_action"] = f"deferred:{reason if not allowed else 'budget'}"
+            prom.ONEDRIVE_RUNS.labels(action="deferred").inc()
+            eventlog.emit("onedrive", action=_onedrive_state["last_action"])
+            return
+        result = onedrive_sync.sync_tier1_to_onedrive(conn, onedrive_cfg, byte_budget=budget)
+        _onedrive_state["last_run_ts"] = time.time()
+        _onedrive_state["last_action"] = result["action"]
+        _onedrive_state["rclone_available"] = result["action"] != "error"
+        prom.ONEDRIVE_RUNS.labels(action=result["action"]).inc()
+        prom.ONEDRIVE_FILES.labels(result="ok").inc(result["uploads_succeeded"])
+        prom.ONEDRIVE_FILES.labels(result="failed").inc(result["uploads_failed"])
+        prom.UPLOADED_FILES.labels(target="onedrive").inc(result["uploads_succeeded"])
+        prom.UPLOADED_BYTES.labels(target="onedrive").inc(result["bytes_uploaded"])
+        eventlog.emit(
+            "onedrive", action=result["action"],
+            candidates=result["candidates_found"], ok=result["uploads_succeeded"],
+            failed=result["uploads_failed"], bytes=result["bytes_uploaded"],
+            errors=result["errors"][:5],
+        )
+        if result["bytes_uploaded"]:
+            bandwidth.record_upload(conn, "onedrive", result["bytes_uploaded"])
+            bandwidth.record_transfer(result["bytes_uploaded"], result.get("upload_seconds", 0))
+        print(
+            f"[SYNC] OneDrive: {result['action']} "
+            f"candidates={result['candidates_found']} "
+            f"ok={result['uploads_succeeded']} "
+            f"failed={result['uploads_failed']} "
+            f"bytes={result['bytes_uploaded']} "
+            f"deferred={result.get('deferred_budget', 0)}"
+        )
+        if result["errors"]:
+            for err in result["errors"][:5]:
+                print(f"[SYNC]   err: {err.get('file')} -> {err.get('error')}")
 
-        except Exception as e:
-            print(f"[SYNC] Error: {e}")
+    def compress_on_disk(conn):
+        res = audio_compress.compress_archive_on_disk(conn)
+        if res["files"]:
+            print(
+                f"[SYNC] FLAC on disk: {res['files']} file(s) "
+                f"{res['bytes_before']} -> {res['bytes_after']} bytes"
+            )
 
-        time.sleep(health_interval)
+    # Each job gets its own cadence / timeout / backoff so one slow
+    # network path (OneDrive, Storage) can't hold back the health push.
+    sched = Scheduler()
+    sched.add(Task("health", _with_conn(lambda conn: sync_device_status(conn, db)),
+                   interval_sec=health_interval, timeout_sec=health_timeout,
+                   backoff_max_sec=health_interval * 4))
+    sched.add(Task("data_sync", _with_conn(data_sync),
+                   interval_sec=sync_interval, timeout_sec=data_sync_timeout))
+    if os.getenv("UPLOAD_BAT_AUDIO", "false").lower() == "true":
+        sched.add(Task("storage_upload", _with_conn(storage_upload),
+                       interval_sec=sync_interval,
+                       timeout_sec=STORAGE_UPLOAD_TIME_BUDGET_SEC + 600))
+    sched.add(Task("disk_watchdog", _with_conn(disk_watchdog_task),
+                   interval_sec=disk_watchdog_interval, timeout_sec=600))
+    sched.add(Task("audio_rollup", _with_conn(rollup),
+                   interval_sec=rollup_interval, timeout_sec=300))
+    sched.add(Task("disk_forecast", _with_conn(forecast),
+                   interval_sec=forecast_interval, timeout_sec=600))
+    sched.add(Task("retention", _with_conn(cleanup_old_data),
+                   interval_sec=retention_interval, timeout_sec=1800,
+                   initial_delay_sec=retention_interval))
+    if summary_enabled:
+        sched.add(Task("daily_summary", _with_conn(daily_summary),
+                       interval_sec=60, timeout_sec=300))
+    if os.getenv("ARCHIVE_COMPRESS_ON_DISK", "false").lower() == "true":
+        sched.add(Task("compress_on_disk", _with_conn(compress_on_disk),
+                       interval_sec=int(os.getenv("ARCHIVE_COMPRESS_INTERVAL_SEC", "300")),
+                       timeout_sec=1800))
+    if enable_onedrive:
+        # Worst case is the batched rclone copy hitting its own timeout,
+        # plus the two lsjson listings around it.
+        onedrive_timeout = onedrive_sync.batch_timeout_sec(
+            onedrive_cfg, onedrive_cfg["max_files_per_batch"],
+        ) + 2 * onedrive_sync.DEFAULT_LSJSON_TIMEOUT_SEC + 60
+        sched.add(Task("onedrive", _with_conn(onedrive),
+                       interval_sec=onedrive_interval_sec, timeout_sec=onedrive_timeout))
+
+    for task in sched.tasks.values():
+        task.fn = prom.instrument(task.name, task.fn)
+    prom.start_metrics_server(sched)
+    eventlog.open_log("sync", "SYNC")
+
+    print(f"[SYNC] Starting scheduler (data: {sync_interval}s, health: {health_interval}s, "
+          f"tasks: {', '.join(sched.tasks)})")
+    _start_watchdog(sched)
+    print(f"[SYNC] Watchdog armed (loop stall threshold {WATCHDOG_STALL_SECONDS}s, "
+          f"per-task timeouts)")
+    sched.run_forever()
 
 
 if __name__ == "__main__":
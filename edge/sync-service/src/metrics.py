@@ -0,0 +1,160 @@
+"""Prometheus metrics for sync-service.
+
+Served on ``METRICS_PORT`` (default 9103) at ``/metrics``. Scheduler
+state (runs, failures, in-flight, backoff) is read from the ``Task``
+objects at scrape time by ``SchedulerCollector``, so ``scheduler.py``
+stays dependency-free; per-run latency comes from ``instrument``, which
+wraps each task's callable. Everything else is bumped from the task
+bodies in ``main.py`` with values they already compute — no extra DB
+queries per scrape.
+"""
+
+import os
+import time
+from typing import Callable, Dict
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+# Task runs range from ~50 ms (rollup on an idle minute) to tens of
+# minutes (an OneDrive batch at the edge of its timeout).
+_TASK_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+TASK_SECONDS = Histogram(
+    "sync_task_seconds", "Wall time of one scheduled task run", ["task"],
+    buckets=_TASK_BUCKETS,
+)
+
+HEALTH_COLLECT_SECONDS = Histogram(
+    "sync_health_collect_seconds", "collect_all_metrics wall time",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8),
+)
+HEALTH_PROBES_STALE = Gauge(
+    "sync_health_probes_stale", "Health probes that missed their deadline last tick",
+)
+ROWS_TOTAL = Gauge("sync_rows_total", "Rows per counted table", ["table"])
+ROWS_UNSYNCED = Gauge(
+    "sync_rows_unsynced", "classifications + bat_detections rows not yet in Firestore",
+)
+DB_SIZE_MB = Gauge("sync_db_size_mb", "Postgres database size")
+CAPTURE_ERRORS_1H = Gauge("sync_capture_errors_1h", "capture_errors rows in the last hour")
+INTERNET_UP = Gauge("sync_internet_connected", "1 when the internet probe succeeded")
+
+SYNCED_ROWS = Counter("sync_synced_rows_total", "Rows pushed to Firestore", ["table"])
+UPLOADED_FILES = Counter("sync_uploaded_files_total", "Audio files uploaded", ["target"])
+UPLOADED_BYTES = Counter("sync_uploaded_bytes_total", "Bytes uploaded", ["target"])
+
+WATCHDOG_ACTIONS = Counter("sync_watchdog_actions_total", "Disk watchdog actions", ["action"])
+RECLAIMED_FILES = Counter("sync_reclaimed_files_total", "Audio files deleted", ["source"])
+RECLAIMED_BYTES = Counter("sync_reclaimed_bytes_total", "Audio bytes freed", ["source"])
+AUDIO_USED_BYTES = Gauge("sync_audio_disk_used_bytes", "Bytes used on the bat_audio volume")
+HOURS_TO_WARNING = Gauge(
+    "sync_audio_hours_to_warning", "Forecast hours until DISK_WARNING_GB (-1 = not within range)",
+)
+HOURS_TO_HARD_CAP = Gauge(
+    "sync_audio_hours_to_hard_cap", "Forecast hours until DISK_HARD_CAP_GB (-1 = not within range)",
+)
+
+ONEDRIVE_RUNS = Counter("sync_onedrive_runs_total", "OneDrive task outcomes", ["action"])
+ONEDRIVE_FILES = Counter("sync_onedrive_files_total", "OneDrive file results", ["result"])
+
+ROLLUP_ROWS = Counter("sync_rollup_rows_total", "audio_levels rows folded into rollups")
+RETENTION_ROWS = Counter(
+    "sync_retention_rows_total", "Rows deleted by chunked retention", ["table"],
+)
+RETENTION_PARTITIONS = Counter(
+    "sync_retention_partitions_dropped_total", "Day partitions dropped", ["table"],
+)
+
+
+class SchedulerCollector:
+    """Expose ``Task.snapshot()`` fields as metrics at scrape time."""
+
+    def __init__(self, sched):
+        self.sched = sched
+
+    def collect(self):
+        started = CounterMetricFamily(
+            "sync_task_runs", "Task runs started", labels=["task"])
+        failed = CounterMetricFamily(
+            "sync_task_failures", "Task runs that raised", labels=["task"])
+        running = GaugeMetricFamily(
+            "sync_task_running", "In-flight runs", labels=["task"])
+        streak = GaugeMetricFamily(
+            "sync_task_consecutive_failures", "Failures since the last success",
+            labels=["task"])
+        last_ok = GaugeMetricFamily(
+            "sync_task_last_finished_timestamp_seconds", "Unix time the last run ended",
+            labels=["task"])
+        for task in list(self.sched.tasks.values()):
+            snap = task.snapshot()
+            started.add_metric([task.name], snap["runs_started"])
+            failed.add_metric([task.name], snap["runs_failed"])
+            running.add_metric([task.name], snap["running"])
+            streak.add_metric([task.name], snap["consecutive_failures"])
+            last_ok.add_metric([task.name], snap["last_finished_at"] or 0)
+        return [started, failed, running, streak, last_ok]
+
+
+def instrument(name: str, fn: Callable[[], object]) -> Callable[[], object]:
+    """Wrap a task callable so each run lands in ``sync_task_seconds``."""
+    hist = TASK_SECONDS.labels(task=name)
+
+    def _timed():
+        start = time.monotonic()
+        try:
+            return fn()
+        finally:
+            hist.observe(time.monotonic() - start)
+    return _timed
+
+
+def _hours(value) -> float:
+    return -1 if value is None else value
+
+
+def observe_health(m: Dict) -> None:
+    """Mirror the gauges ``collect_all_metrics`` already produced."""
+    HEALTH_COLLECT_SECONDS.observe((m.get("collect_ms") or 0) / 1000.0)
+    HEALTH_PROBES_STALE.set(len(m.get("probe_stale") or ()))
+    ROWS_TOTAL.labels(table="classifications").set(m.get("classifications_total") or 0)
+    ROWS_TOTAL.labels(table="bat_detections").set(m.get("bat_detections_total") or 0)
+    ROWS_UNSYNCED.set(m.get("unsynced_count") or 0)
+    DB_SIZE_MB.set(m.get("db_size_mb") or 0)
+    CAPTURE_ERRORS_1H.set(m.get("capture_errors_1h") or 0)
+    INTERNET_UP.set(1 if m.get("internet_connected") else 0)
+
+
+def observe_forecast(forecast: Dict, trickle: Dict) -> None:
+    AUDIO_USED_BYTES.set(forecast["used_bytes"])
+    HOURS_TO_WARNING.set(_hours(forecast["hours_to_warning"]))
+    HOURS_TO_HARD_CAP.set(_hours(forecast["hours_to_hard_cap"]))
+    if trickle["files_deleted"]:
+        RECLAIMED_FILES.labels(source="trickle").inc(trickle["files_deleted"])
+        RECLAIMED_BYTES.labels(source="trickle").inc(trickle["bytes_freed"])
+
+
+def observe_watchdog(result: Dict) -> None:
+    WATCHDOG_ACTIONS.labels(action=result["action"]).inc()
+    if result.get("files_deleted"):
+        RECLAIMED_FILES.labels(source="watchdog").inc(result["files_deleted"])
+        RECLAIMED_BYTES.labels(source="watchdog").inc(
+            int((result.get("gb_freed") or 0) * 1024 ** 3))
+
+
+def observe_retention(result: Dict) -> None:
+    for table, r in result.items():
+        if r["deleted"]:
+            RETENTION_ROWS.labels(table=table).inc(r["deleted"])
+        if r["dropped"]:
+            RETENTION_PARTITIONS.labels(table=table).inc(r["dropped"])
+
+
+def start_metrics_server(sched) -> None:
+    """Register the scheduler collector and start the /metrics listener."""
+    if os.getenv("METRICS_ENABLED", "true").lower() != "true":
+        return
+    REGISTRY.register(SchedulerCollector(sched))
+    port = int(os.getenv("METRICS_PORT", "9103"))
+    start_http_server(port, addr=os.getenv("METRICS_ADDR", "0.0.0.0"))
+    print(f"[SYNC] Metrics on :{port}/metrics")
@@ -6,9 +6,21 @@ and ``remote_audio_path IS NULL``, copies the WAV to OneDrive and
 records the remote path + timestamp. **Never deletes the local file** —
 that's the disk watchdog's job once pressure hits the hard cap.
 
-Idempotency: if a previous run uploaded the file but the DB update
-failed, we detect it via ``rclone lsjson`` and just backfill the row,
-so network retries don't produce duplicate uploads.
+Batching: a whole batch costs four rclone processes regardless of size —
+``rclone version`` as an availability probe, then:
+
+  1. ``rclone lsjson --files-from`` checks which candidates are already
+     on OneDrive (one listing, direct lookups, no per-file ``lsjson``).
+  2. ``rclone copy --files-from --transfers N`` pushes the rest with N
+     concurrent transfers inside a single process.
+  3. A second ``lsjson --files-from`` confirms what actually landed, so
+     a partially failed batch marks exactly the files that made it.
+
+Idempotency / resume: anything already present remotely (from a prior
+run where the DB update failed, or the completed part of an interrupted
+batch) is backfilled in the DB without re-uploading, so a killed or
+timed-out batch picks up where it left off on the next run. Files that
+don't match by size are re-sent by ``rclone copy`` itself.
 
 Safety:
   * All rclone calls go through ``_run_rclone`` with a bounded timeout.
@@ -20,9 +32,12 @@ Safety:
 """
 
 import json
+import math
 import os
 import subprocess
-from typing import Callable, Dict, List, Optional
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 
 # -----------------------------------------------------------------------------
 # Defaults — overridable via env. Config is passed into the public API so
@@ -32,10 +47,14 @@ from typing import Callable, Dict, List, Optional
 DEFAULT_RCLONE_BIN = "rclone"
 DEFAULT_MAX_FILES_PER_BATCH = 50
 DEFAULT_TIMEOUT_PER_FILE_SEC = 300
+DEFAULT_TRANSFERS = 4
 DEFAULT_RCLONE_VERSION_TIMEOUT_SEC = 10
-DEFAULT_LSJSON_TIMEOUT_SEC = 30
+DEFAULT_LSJSON_TIMEOUT_SEC = 120
 
 LOCAL_AUDIO_PREFIX = "/bat_audio/"
+# Compressed copies waiting for upload. Same filesystem as the archive so
+# it's covered by the disk watchdog's usage numbers.
+DEFAULT_STAGING_DIR = "/bat_audio/_upload_staging/"
 
 
 def config_from_env() -> Dict:
@@ -46,6 +65,10 @@ def config_from_env() -> Dict:
         "rclone_bin": os.getenv("RCLONE_BIN", DEFAULT_RCLONE_BIN),
         "max_files_per_batch": int(os.getenv("ONEDRIVE_MAX_FILES_PER_BATCH", str(DEFAULT_MAX_FILES_PER_BATCH))),
         "timeout_per_file_sec": int(os.getenv("ONEDRIVE_TIMEOUT_PER_FILE_SEC", str(DEFAULT_TIMEOUT_PER_FILE_SEC))),
+        "transfers": max(1, int(os.getenv("ONEDRIVE_TRANSFERS", str(DEFAULT_TRANSFERS)))),
+        "bwlimit": os.getenv("ONEDRIVE_BWLIMIT", ""),
+        "compress": os.getenv("ARCHIVE_COMPRESS_UPLOADS", "true").lower() == "true",
+        "staging_dir": os.getenv("ONEDRIVE_STAGING_DIR", DEFAULT_STAGING_DIR),
         "pi_site": os.getenv("PI_SITE", "pi01"),
         "dry_run": os.getenv("ONEDRIVE_DRY_RUN", "false").lower() == "true",
     }
@@ -79,6 +102,22 @@ def _build_remote_path(local_path: str, pi_site: str, remote_base: str) -> str:
     return f"{base}/{relative}"
 
 
+def _relative_path(local_path: str) -> str:
+    """Path of a local WAV relative to ``LOCAL_AUDIO_PREFIX``."""
+    return local_path[len(LOCAL_AUDIO_PREFIX):]
+
+
+def batch_timeout_sec(config: Dict, n_files: int) -> int:
+    """Upper bound for one ``rclone copy`` of ``n_files`` files.
+
+    Each file may take up to ``timeout_per_file_sec``; ``transfers`` of
+    them run concurrently.
+    """
+    transfers = max(1, config.get("transfers", DEFAULT_TRANSFERS))
+    per_file = config.get("timeout_per_file_sec", DEFAULT_TIMEOUT_PER_FILE_SEC)
+    return per_file * max(1, math.ceil(n_files / transfers))
+
+
 # -----------------------------------------------------------------------------
 # Subprocess seam — tests monkeypatch this function, not subprocess.run.
 # -----------------------------------------------------------------------------
@@ -103,6 +142,7 @@ def _run_rclone(args: List[str], timeout: int) -> Dict:
 # -----------------------------------------------------------------------------
 
 def _rclone_is_available(config: Dict) -> bool:
+    """One ``rclone version`` per batch (not per file)."""
     res = _run_rclone(
         [config["rclone_bin"], "version"],
         timeout=DEFAULT_RCLONE_VERSION_TIMEOUT_SEC,
@@ -110,56 +150,86 @@ def _rclone_is_available(config: Dict) -> bool:
     return res["returncode"] == 0
 
 
-def _remote_exists(config: Dict, remote_path: str) -> Optional[bool]:
-    """Return True/False for file presence, None if we couldn't tell.
+def _write_files_from(relative_paths: List[str]) -> str:
+    """Write a ``--files-from`` list to a temp file; caller deletes it."""
+    fd, path = tempfile.mkstemp(prefix="rclone-files-", suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for rel in relative_paths:
+            f.write(rel + "\n")
+    return path
+
 
-    ``rclone lsjson`` on a specific file returns a one-element array if
-    the file exists and ``[]`` if the parent dir exists but the file
-    doesn't. It errors on missing parent dirs — in that case we don't
-    know (parent may not exist yet), so we conservatively return False
-    so the caller uploads.
+def _remote_sizes(config: Dict, relative_paths: List[str]) -> Optional[Dict[str, int]]:
+    """Map relative path -> remote size for every candidate already on OneDrive.
+
+    One ``rclone lsjson --files-from`` call for the whole batch. With a
+    files-from list rclone looks each entry up directly instead of
+    walking the archive, so cost scales with the batch, not the archive.
+    ``-R`` is required: without it lsjson only answers for entries at the
+    top level of ``target`` and silently drops every nested tier path.
+    Returns None if the listing failed (caller treats that as "nothing
+    known to exist" for the pre-check and "nothing confirmed" after).
     """
-    target = f"{config['rclone_remote_name']}:{remote_path}"
-    res = _run_rclone(
-        [config["rclone_bin"], "lsjson", "--files-only", target],
-        timeout=DEFAULT_LSJSON_TIMEOUT_SEC,
-    )
+    if not relative_paths:
+        return {}
+    list_path = _write_files_from(relative_paths)
+    try:
+        target = f"{config['rclone_remote_name']}:{config['remote_base_path'].rstrip('/')}"
+        res = _run_rclone(
+            [
+                config["rclone_bin"], "lsjson", "-R", "--files-only", "--no-mimetype",
+                "--files-from", list_path, target,
+            ],
+            timeout=DEFAULT_LSJSON_TIMEOUT_SEC,
+        )
+    finally:
+        os.unlink(list_path)
     if res["returncode"] != 0:
-        return False
+        return None
     try:
         parsed = json.loads(res["stdout"].decode("utf-8") or "[]")
     except (json.JSONDecodeError, UnicodeDecodeError):
         return None
-    return len(parsed) > 0
+    return {entry["Path"]: int(entry.get("Size", -1)) for entry in parsed}
 
 
-def _upload_file(local_path: str, remote_path: str, config: Dict) -> Dict:
-    """Copy (not move) one local WAV to OneDrive. Returns a result dict."""
-    target = f"{config['rclone_remote_name']}:{remote_path}"
-    bytes_on_disk = 0
-    try:
-        bytes_on_disk = os.path.getsize(local_path)
-    except OSError:
-        return {"success": False, "bytes": 0, "error": "local_file_missing"}
+def _upload_batch(
+    relative_paths: List[str], config: Dict, source_root: str = None,
+) -> Dict:
+    """Copy every listed file to OneDrive in one ``rclone copy`` process.
 
-    if config.get("dry_run"):
-        return {"success": True, "bytes": bytes_on_disk, "error": None, "dry_run": True}
-
-    res = _run_rclone(
-        [
-            config["rclone_bin"], "copyto",
-            local_path, target,
-            "--timeout", "60s",
-            "--contimeout", "30s",
-            "--low-level-retries", "3",
-            "--retries", "1",
-        ],
-        timeout=config.get("timeout_per_file_sec", DEFAULT_TIMEOUT_PER_FILE_SEC),
-    )
+    rclone runs ``transfers`` uploads concurrently and skips files that
+    already match remotely, so re-running a batch after a timeout only
+    sends what's missing. A nonzero exit just means *some* files failed
+    — the caller confirms per-file outcome with a follow-up listing.
+    """
+    list_path = _write_files_from(relative_paths)
+    transfers = max(1, config.get("transfers", DEFAULT_TRANSFERS))
+    args = [
+        config["rclone_bin"], "copy",
+        source_root or LOCAL_AUDIO_PREFIX,
+        f"{config['rclone_remote_name']}:{config['remote_base_path'].rstrip('/')}",
+        "--files-from", list_path,
+        "--no-traverse",
+        "--transfers", str(transfers),
+        "--checkers", str(transfers * 2),
+        "--timeout", "60s",
+        "--contimeout", "30s",
+        "--low-level-retries", "3",
+        "--retries", "2",
+    ]
+    if config.get("bwlimit"):
+        # rclone accepts a plain rate ("512k") or a timetable
+        # ("08:00,256k 20:00,off") — passed through verbatim.
+        args += ["--bwlimit", config["bwlimit"]]
+    try:
+        res = _run_rclone(args, timeout=batch_timeout_sec(config, len(relative_paths)))
+    finally:
+        os.unlink(list_path)
     if res["returncode"] != 0:
-        stderr_text = res["stderr"].decode("utf-8", errors="replace")[:500]
-        return {"success": False, "bytes": 0, "error": stderr_text or "nonzero_exit"}
-    return {"success": True, "bytes": bytes_on_disk, "error": None}
+        stderr_text = res["stderr"].decode("utf-8", errors="replace")[-500:]
+        return {"success": False, "error": stderr_text or "nonzero_exit"}
+    return {"success": True, "error": None}
 
 
 # -----------------------------------------------------------------------------
@@ -187,16 +257,20 @@ def _find_upload_candidates(conn, limit: int) -> List[Dict]:
     ]
 
 
-def _mark_synced(conn, row_id: int, full_remote_path: str) -> None:
+def _mark_synced(conn, marks: List[Tuple[int, str]]) -> None:
+    """Record ``(row_id, full_remote_path)`` pairs in one UPDATE + commit."""
+    if not marks:
+        return
     with conn.cursor() as cur:
         cur.execute(
             """
-            UPDATE bat_detections
-               SET remote_audio_path = %s,
+            UPDATE bat_detections AS b
+               SET remote_audio_path = m.remote_path,
                    synced_remote_at  = NOW()
-             WHERE id = %s
+              FROM unnest(%s::int[], %s::text[]) AS m(id, remote_path)
+             WHERE b.id = m.id
             """,
-            (full_remote_path, row_id),
+            ([m[0] for m in marks], [m[1] for m in marks]),
         )
     conn.commit()
 
@@ -205,11 +279,38 @@ def _mark_synced(conn, row_id: int, full_remote_path: str) -> None:
 # Public orchestrator
 # -----------------------------------------------------------------------------
 
-def sync_tier1_to_onedrive(conn, config: Optional[Dict] = None) -> Dict:
+def _stage_compressed(local_path: str, rel: str, config: Dict) -> Optional[Tuple[str, int]]:
+    """FLAC ``local_path`` into the staging dir. Returns ``(rel_flac, size)``.
+
+    A staged copy left by an earlier run (deferred by the byte budget) is
+    reused. Returns None on any failure so the caller ships the WAV.
+    """
+    # Imported here so the module stays importable standalone
+    # (verify_storage_tiering.py) and without soundfile installed.
+    from src import audio_compress
+
+    rel_flac = audio_compress.flac_name(rel)
+    staged = os.path.join(config.get("staging_dir", DEFAULT_STAGING_DIR), rel_flac)
+    try:
+        if os.path.exists(staged) and os.path.getmtime(staged) >= os.path.getmtime(local_path):
+            return rel_flac, os.path.getsize(staged)
+        return rel_flac, audio_compress.compress_to_flac(local_path, staged)
+    except Exception as e:
+        print(f"[ONEDRIVE] compression skipped for {local_path}: {type(e).__name__}: {e}")
+        return None
+
+
+def sync_tier1_to_onedrive(
+    conn, config: Optional[Dict] = None, byte_budget: Optional[int] = None,
+) -> Dict:
     """Find tier-1 files that need uploading and push them to OneDrive.
 
     Safe to call when the feature flag is off — the caller just won't
     pass a config, or sets config["_enabled"] = False.
+
+    ``byte_budget`` (from ``bandwidth.remaining_budget``) caps the bytes
+    sent this run; files past the budget are deferred, not failed. None
+    means unlimited.
     """
     if config is None:
         config = config_from_env()
@@ -251,17 +352,29 @@ def sync_tier1_to_onedrive(conn, config: Optional[Dict] = None) -> Dict:
 
     pi_site = config.get("pi_site", "pi01")
     remote_base = config["remote_base_path"]
+    staging_root = config.get("staging_dir", DEFAULT_STAGING_DIR).rstrip("/") + "/"
 
     uploads_attempted = 0
     uploads_succeeded = 0
     uploads_failed = 0
     bytes_uploaded = 0
+    deferred = 0
+    upload_seconds = 0.0
     errors: List[Dict] = []
 
+    # upload-relative path -> (row ids, full remote path, size, source
+    # root). Several detections from one segment share a WAV, so one
+    # file can back several rows.
+    pending: Dict[str, Tuple[List[int], str, int, str]] = {}
+    by_local: Dict[str, str] = {}
     for cand in candidates:
         local_path = cand["audio_path"]
-
-        if not os.path.exists(local_path):
+        if local_path in by_local:
+            pending[by_local[local_path]][0].append(cand["id"])
+            continue
+        try:
+            size = os.path.getsize(local_path)
+        except OSError:
             # File vanished between tier-1 insert and sync — skip without
             # marking synced. Leave the row for the watchdog / operator.
             errors.append({"file": local_path, "error": "local_file_missing"})
@@ -269,30 +382,87 @@ def sync_tier1_to_onedrive(conn, config: Optional[Dict] = None) -> Dict:
             continue
 
         try:
-            remote_path = _build_remote_path(local_path, pi_site, remote_base)
+            _build_remote_path(local_path, pi_site, remote_base)
         except ValueError as e:
             errors.append({"file": local_path, "error": str(e)})
             uploads_failed += 1
             continue
 
-        full_remote = f"{config['rclone_remote_name']}:{remote_path}"
+        rel, source = _relative_path(local_path), LOCAL_AUDIO_PREFIX
+        if config.get("compress") and rel.lower().endswith(".wav"):
+            staged = _stage_compressed(local_path, rel, config)
+            if staged is not None:
+                (rel, size), source = staged, staging_root
 
-        # Idempotency: if the file is already on OneDrive from a prior run
-        # where the DB update failed, just backfill the row — no re-upload.
-        already_there = _remote_exists(config, remote_path)
-        if already_there is True:
-            _mark_synced(conn, cand["id"], full_remote)
-            continue
-
-        uploads_attempted += 1
-        result = _upload_file(local_path, remote_path, config)
-        if result["success"]:
-            _mark_synced(conn, cand["id"], full_remote)
-            uploads_succeeded += 1
-            bytes_uploaded += result["bytes"]
+        remote_path = _build_remote_path(LOCAL_AUDIO_PREFIX + rel, pi_site, remote_base)
+        full_remote = f"{config['rclone_remote_name']}:{remote_path}"
+        pending[rel] = ([cand["id"]], full_remote, size, source)
+        by_local[local_path] = rel
+
+    # Idempotency: anything already on OneDrive with the right size (a
+    # prior run where the DB update failed, or the finished part of an
+    # interrupted batch) is just backfilled — no re-upload.
+    already = _remote_sizes(config, list(pending)) or {}
+    backfill = []
+    for rel, remote_size in already.items():
+        entry = pending.get(rel)
+        if entry is not None and remote_size == entry[2]:
+            backfill.extend((row_id, entry[1]) for row_id in entry[0])
+            del pending[rel]
+    _mark_synced(conn, backfill)
+
+    # Byte budget: oldest first, stop at the first file that doesn't fit
+    # so the queue order is stable across runs.
+    to_send = list(pending)
+    if byte_budget is not None:
+        spent = 0
+        for i, rel in enumerate(to_send):
+            if spent + pending[rel][2] > byte_budget:
+                deferred = len(to_send) - i
+                to_send = to_send[:i]
+                break
+            spent += pending[rel][2]
+
+    if to_send:
+        uploads_attempted = len(to_send)
+        batch_errors: List[str] = []
+        if config.get("dry_run"):
+            landed = {rel: pending[rel][2] for rel in to_send}
         else:
-            uploads_failed += 1
-            errors.append({"file": local_path, "error": result["error"]})
+            started = time.time()
+            all_ok = True
+            for source in sorted({pending[rel][3] for rel in to_send}):
+                group = [rel for rel in to_send if pending[rel][3] == source]
+                batch = _upload_batch(group, config, source)
+                all_ok = all_ok and batch["success"]
+                if batch["error"]:
+                    batch_errors.append(batch["error"])
+            upload_seconds = time.time() - started
+            landed = _remote_sizes(config, to_send)
+            if landed is None:
+                # Can't confirm — trust a clean exit, otherwise retry
+                # everything next run (rclone skips what's already there).
+                landed = {rel: pending[rel][2] for rel in to_send} if all_ok else {}
+
+        marks = []
+        for rel in to_send:
+            row_ids, full_remote, size, source = pending[rel]
+            if landed.get(rel) == size:
+                marks.extend((row_id, full_remote) for row_id in row_ids)
+                uploads_succeeded += 1
+                bytes_uploaded += size
+                if source == staging_root and not config.get("dry_run"):
+                    try:
+                        os.remove(source + rel)
+                    except OSError:
+                        pass
+            else:
+                uploads_failed += 1
+                errors.append({
+                    "file": source + rel,
+                    "error": "; ".join(batch_errors) or "not_confirmed_remote",
+                })
+        _mark_synced(conn, marks)
 
     return {
         "action": "synced",
@@ -301,5 +471,7 @@ def sync_tier1_to_onedrive(conn, config: Optional[Dict] = None) -> Dict:
         "uploads_succeeded": uploads_succeeded,
         "uploads_failed": uploads_failed,
         "bytes_uploaded": bytes_uploaded,
+        "deferred_budget": deferred,
+        "upload_seconds": round(upload_seconds, 2),
         "errors": errors,
     }
@@ -0,0 +1,387 @@
+"""Daily range partitions and time-budgeted retention for the time-series tables.
+
+``cleanup_old_data`` used to run six unbounded ``DELETE … WHERE ts <
+NOW() - INTERVAL`` statements in one transaction. On an SD card that
+meant minutes-long locks and a WAL spike every hour once ``audio_levels``
+(5 760 rows/day) and ``classifications`` got big.
+
+``classifications``, ``bat_detections``, ``device_status`` and
+``audio_levels`` are now ``PARTITION BY RANGE`` on their timestamp with
+one partition per UTC day, so retention is mostly ``DROP TABLE`` on a
+whole day. Everything else (and any rows a drop can't cover) goes
+through ``chunked_delete``: ``RETENTION_CHUNK_ROWS`` rows per
+transaction, stopping at ``RETENTION_TIME_BUDGET_SEC``; the next hourly
+run picks up where this one stopped.
+
+**Converting an existing database** is done in place, once, without
+copying rows: the plain table is renamed ``<table>_legacy`` and attached
+as the partition ``FROM (MINVALUE) TO (<tomorrow>)``; its indexes are
+re-declared on the new parent, which adopts the existing ones. From
+then on new rows land in daily partitions, and the legacy partition is
+emptied by chunked deletes and finally dropped once its upper bound is
+past retention. A ``<table>_default`` partition catches rows outside any
+day range (e.g. a clock jump before NTP sync); they are moved into the
+proper day partition when it is created.
+
+Partitioned tables need the partition key in the primary key, so the
+PK becomes ``(id, <ts>)`` — on the legacy partition too, which is
+re-keyed before it is attached. ``id`` stays a serial and every lookup
+in this codebase is by ``id``, which the PK index still leads with.
+
+A table whose conversion fails stays a plain table (chunked deletes
+still cover it); the error is reported on deviceStatus as
+``partitionConversionErrors`` and retried on every retention run.
+"""
+
+import os
+import re
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src import row_counters
+
+RETENTION_CHUNK_ROWS = int(os.getenv("RETENTION_CHUNK_ROWS", "5000"))
+RETENTION_TIME_BUDGET_SEC = int(os.getenv("RETENTION_TIME_BUDGET_SEC", "300"))
+PARTITION_PREMAKE_DAYS = int(os.getenv("PARTITION_PREMAKE_DAYS", "3"))
+# Don't queue writers behind DDL: give up and retry next run instead.
+DDL_LOCK_TIMEOUT = "5s"
+
+# table -> (partition column, retention days, only delete synced rows)
+PARTITIONED_TABLES: Dict[str, Tuple[str, int, bool]] = {
+    "classifications": ("sync_time", 30, True),
+    "bat_detections": ("detection_time", 30, True),
+    "device_status": ("recorded_at", 7, False),
+    "audio_levels": ("recorded_at", 7, False),
+}
+CHUNKED_TABLES: Dict[str, Tuple[str, int, bool]] = {
+    "environmental_readings": ("recorded_at", 30, True),
+    "capture_errors": ("recorded_at", 7, False),
+    "segment_raw": ("recorded_at", 30, False),
+}
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+# table -> last conversion error; surfaced on deviceStatus until a retry
+# (next migration or hourly retention run) succeeds.
+_conversion_errors: Dict[str, str] = {}
+
+
+# -----------------------------------------------------------------------------
+# Pure helpers
+# -----------------------------------------------------------------------------
+
+def partition_name(table: str, day: date) -> str:
+    """``audio_levels`` + 2026-10-19 → ``audio_levels_p20261019``."""
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def parse_bound(expr: str) -> Optional[Tuple[Optional[datetime], Optional[datetime]]]:
+    """Parse ``pg_get_expr(relpartbound)`` into ``(lower, upper)``.
+
+    ``MINVALUE`` / ``MAXVALUE`` map to None; the default partition
+    (``DEFAULT``) returns None.
+
+    >>> parse_bound("FOR VALUES FROM (MINVALUE) TO ('2026-10-20 00:00:00')")
+    (None, datetime.datetime(2026, 10, 20, 0, 0))
+    >>> parse_bound("DEFAULT") is None
+    True
+    """
+    m = _BOUND_RE.search(expr)
+    if not m:
+        return None
+
+    def _one(v: str) -> Optional[datetime]:
+        v = v.strip().strip("'")
+        if v in ("MINVALUE", "MAXVALUE"):
+            return None
+        return datetime.fromisoformat(v)
+
+    return _one(m.group(1)), _one(m.group(2))
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+# -----------------------------------------------------------------------------
+# Partition management
+# -----------------------------------------------------------------------------
+
+def is_partitioned(conn, table: str) -> bool:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace)",
+            (table,),
+        )
+        return bool(cur.fetchone()[0])
+
+
+def list_partitions(conn, table: str) -> List[Dict]:
+    """Child partitions of ``table``: ``{name, lower, upper, default}``."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = %s AND p.relnamespace = 'public'::regnamespace
+            """,
+            (table,),
+        )
+        rows = cur.fetchall()
+    out = []
+    for name, expr in rows:
+        bound = parse_bound(expr or "")
+        out.append({
+            "name": name,
+            "lower": bound[0] if bound else None,
+            "upper": bound[1] if bound else None,
+            "default": bound is None,
+        })
+    return out
+
+
+def convert_to_partitioned(conn, table: str, column: str) -> None:
+    """Turn plain ``table`` into a daily-partitioned parent, in one transaction."""
+    legacy = f"{table}_legacy"
+    cutover = _utc_today() + timedelta(days=1)
+    with conn.cursor() as cur:
+        cur.execute(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'")
+        cur.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = 'public' AND tablename = %s",
+            (table,),
+        )
+        indexes = [(n, d) for n, d in cur.fetchall() if n != f"{table}_pkey"]
+        cur.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+        seq = cur.fetchone()[0]
+
+        cur.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        # The parent's PK is (id, <ts>); ATTACH refuses a partition that
+        # already has a different primary key ("multiple primary keys"),
+        # so re-key the legacy table to match. The parent adopts it.
+        cur.execute(
+            f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey, "
+            f"ADD CONSTRAINT {legacy}_pkey PRIMARY KEY (id, {column})"
+        )
+        # Counter triggers belong on the parent (row_counters.install
+        # re-creates them there after migrations).
+        row_counters.drop_triggers(cur, table, legacy)
+        for name, _ in indexes:
+            cur.execute(f"ALTER INDEX {name} RENAME TO {name}_legacy")
+
+        cur.execute(
+            f"CREATE TABLE {table} ("
+            f"LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS, "
+            f"PRIMARY KEY (id, {column})"
+            f") PARTITION BY RANGE ({column})"
+        )
+        if seq:
+            # Keep the id sequence alive when the legacy partition is dropped.
+            cur.execute(f"ALTER SEQUENCE {seq} OWNED BY {table}.id")
+        cur.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+            f"FOR VALUES FROM (MINVALUE) TO (%s)",
+            (cutover.isoformat(),),
+        )
+        cur.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        # Same definitions on the parent; Postgres adopts the matching
+        # (renamed) index on the legacy partition instead of rebuilding.
+        for name, ddl in indexes:
+            if "UNIQUE" in ddl.upper():
+                print(f"[PARTITION] {table}: skipping unique index {name} "
+                      f"(must include {column} on a partitioned table)")
+                continue
+            cur.execute(ddl)
+    conn.commit()
+    print(f"[PARTITION] {table} converted; legacy rows live in {legacy} "
+          f"until {cutover} ages out")
+
+
+def create_day_partition(conn, table: str, day: date) -> bool:
+    """Create the partition for ``day`` if missing. Returns True if created.
+
+    Built as a standalone table, filled with any rows that landed in the
+    default partition for that day, then attached — attaching over a
+    default partition that still held those rows would fail.
+    """
+    name = partition_name(table, day)
+    lo, hi = day.isoformat(), (day + timedelta(days=1)).isoformat()
+    column = PARTITIONED_TABLES[table][0]
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", (f"public.{name}",))
+        if cur.fetchone()[0] is not None:
+            conn.rollback()
+            return False
+        cur.execute(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'")
+        cur.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cur.execute(
+            f"WITH moved AS (DELETE FROM {table}_default "
+            f"WHERE {column} >= %s AND {column} < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            (lo, hi),
+        )
+        cur.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+                    (lo, hi))
+    conn.commit()
+    return True
+
+
+def ensure_day_partitions(conn, table: str, days_ahead: int = PARTITION_PREMAKE_DAYS) -> int:
+    """Make sure today .. today+``days_ahead`` have partitions. Returns how many were created."""
+    ranged = [p for p in list_partitions(conn, table) if not p["default"]]
+    covered_until = max((p["upper"] for p in ranged if p["upper"]), default=None)
+    created = 0
+    today = _utc_today()
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if covered_until and datetime.combine(day, datetime.min.time()) < covered_until:
+            continue  # still inside the legacy partition's range
+        try:
+            if create_day_partition(conn, table, day):
+                created += 1
+        except Exception as e:
+            conn.rollback()
+            print(f"[PARTITION] {partition_name(table, day)} not created: {e}")
+    return created
+
+
+def _ensure_converted(conn, table: str, column: str) -> bool:
+    """Convert ``table`` if it is still plain; record the outcome. True if partitioned."""
+    try:
+        if is_partitioned(conn, table):
+            _conversion_errors.pop(table, None)
+            return True
+        convert_to_partitioned(conn, table, column)
+    except Exception as e:
+        conn.rollback()
+        _conversion_errors[table] = f"{type(e).__name__}: {e}"
+        print(f"[PARTITION] {table} conversion failed: {_conversion_errors[table]}")
+        return False
+    _conversion_errors.pop(table, None)
+    # The legacy table's counter triggers were dropped; put them on the
+    # new parent now rather than at the next restart.
+    try:
+        row_counters.install(conn)
+    except Exception as e:
+        conn.rollback()
+        print(f"[PARTITION] {table}: row counter triggers not reinstalled: {e}")
+    return True
+
+
+def ensure_partitioning(conn) -> None:
+    """Migration entry point: convert (once) and pre-create day partitions."""
+    for table, (column, _, _) in PARTITIONED_TABLES.items():
+        if not _ensure_converted(conn, table, column):
+            continue
+        try:
+            ensure_day_partitions(conn, table)
+        except Exception as e:
+            conn.rollback()
+            print(f"[PARTITION] {table}: {type(e).__name__}: {e}")
+
+
+def status_payload() -> Dict:
+    """deviceStatus fields: tables still unpartitioned because conversion failed."""
+    return {
+        "partitionConversionErrors": dict(_conversion_errors) or None,
+    }
+
+
+# -----------------------------------------------------------------------------
+# Retention
+# -----------------------------------------------------------------------------
+
+def drop_expired_partitions(conn, table: str) -> int:
+    """DROP every day (or legacy) partition wholly past retention. Returns count.
+
+    For synced-only tables a partition that still holds unsynced rows is
+    kept; ``chunked_delete`` trims its synced rows instead.
+    """
+    column, retain_days, synced_only = PARTITIONED_TABLES[table]
+    cutoff = datetime.combine(_utc_today() - timedelta(days=retain_days), datetime.min.time())
+    dropped = 0
+    for part in list_partitions(conn, table):
+        if part["default"] or part["upper"] is None or part["upper"] > cutoff:
+            continue
+        try:
+            with conn.cursor() as cur:
+                if synced_only:
+                    cur.execute(f"SELECT EXISTS (SELECT 1 FROM {part['name']} WHERE synced = FALSE)")
+                    if cur.fetchone()[0]:
+                        continue
+                cur.execute(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'")
+                # Triggers don't fire on DROP: take the rows out of the
+                # cached counts under the same lock.
+                cur.execute(f"LOCK TABLE {part['name']} IN ACCESS EXCLUSIVE MODE")
+                row_counters.subtract_partition(cur, table, part["name"])
+                cur.execute(f"DROP TABLE {part['name']}")
+            conn.commit()
+            dropped += 1
+        except Exception as e:
+            conn.rollback()
+            print(f"[PARTITION] drop {part['name']} failed: {e}")
+    return dropped
+
+
+def chunked_delete(
+    conn,
+    table: str,
+    column: str,
+    retain_days: int,
+    synced_only: bool,
+    deadline: float,
+    chunk_rows: int = RETENTION_CHUNK_ROWS,
+) -> Tuple[int, bool]:
+    """Delete expired rows ``chunk_rows`` at a time until done or ``deadline``.
+
+    Each chunk is its own transaction, so locks and WAL stay small.
+    Returns ``(rows_deleted, finished)``.
+    """
+    where = f"{column} < NOW() - make_interval(days => %s)"
+    if synced_only:
+        where += " AND synced = TRUE"
+    deleted = 0
+    while time.time() < deadline:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"DELETE FROM {table} WHERE id IN "
+                f"(SELECT id FROM {table} WHERE {where} LIMIT %s)",
+                (retain_days, chunk_rows),
+            )
+            n = cur.rowcount
+        conn.commit()
+        deleted += n
+        if n < chunk_rows:
+            return deleted, True
+    return deleted, False
+
+
+def run_retention(conn, time_budget_sec: float = RETENTION_TIME_BUDGET_SEC) -> Dict:
+    """Hourly retention: pre-create partitions, drop old ones, trim the rest.
+
+    Returns ``{table: {"dropped": n, "deleted": n, "finished": bool}}``.
+    """
+    deadline = time.time() + time_budget_sec
+    out: Dict[str, Dict] = {}
+    for table, (column, _, _) in PARTITIONED_TABLES.items():
+        stats = {"dropped": 0, "deleted": 0, "finished": True}
+        # A failed conversion (lock timeout, bad row) is retried here
+        # rather than waiting for the next service restart.
+        if _ensure_converted(conn, table, column):
+            ensure_day_partitions(conn, table)
+            stats["dropped"] = drop_expired_partitions(conn, table)
+        out[table] = stats
+    # Row-level trim second, so drops (cheap) always get the budget first.
+    for table, (column, retain_days, synced_only) in {
+        **PARTITIONED_TABLES, **CHUNKED_TABLES,
+    }.items():
+        stats = out.setdefault(table, {"dropped": 0, "deleted": 0, "finished": True})
+        stats["deleted"], stats["finished"] = chunked_delete(
+            conn, table, column, retain_days, synced_only, deadline,
+        )
+    return out
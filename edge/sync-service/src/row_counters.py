@@ -0,0 +1,166 @@
+"""Trigger-maintained row counts for the health push.
+
+``get_db_stats`` used to run ``COUNT(*)`` on ``classifications`` and
+``bat_detections`` — plus two ``COUNT(*) WHERE synced = FALSE`` — every
+15 s health tick: four scans that grow with the tables. The counts now
+live in ``row_counters`` (one row per table: ``total``, ``unsynced``)
+and are kept current by statement-level ``AFTER`` triggers that read
+the statement's transition tables, so a 500-row sync ``UPDATE`` costs
+one counter write, not 500.
+
+Things triggers don't see are handled explicitly:
+
+  * ``DROP`` of a day partition (``partitions.drop_expired_partitions``)
+    calls ``subtract_partition`` in the same transaction.
+  * Moving rows from the default partition into a new day partition
+    targets the partitions directly, so the parent's statement triggers
+    don't fire — correct, since the parent's count doesn't change.
+
+``install`` is idempotent: it (re)creates the triggers on the current
+parent table and seeds the counter row with one exact count only when
+it's missing. ``CREATE TRIGGER`` blocks writers until commit, so the
+seed count and the first trigger firing can't race.
+
+If the counter row is missing (e.g. install failed), ``read`` falls back
+to ``pg_class.reltuples`` summed over partitions for totals, and to the
+index-backed unsynced count — bounded by the sync backlog, not the
+table size.
+"""
+
+from typing import Dict, Optional
+
+COUNTED_TABLES = ("classifications", "bat_detections")
+
+ROW_COUNTERS_DDL = """
+    CREATE TABLE IF NOT EXISTS row_counters (
+        table_name VARCHAR(64) PRIMARY KEY,
+        total BIGINT NOT NULL DEFAULT 0,
+        unsynced BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+"""
+
+_APPLY_FN_DDL = """
+    CREATE OR REPLACE FUNCTION row_counters_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        d_total BIGINT := 0;
+        d_unsynced BIGINT := 0;
+        n BIGINT;
+        u BIGINT;
+    BEGIN
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE synced = FALSE)
+              INTO n, u FROM new_rows;
+            d_total := d_total + n;
+            d_unsynced := d_unsynced + u;
+        END IF;
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE synced = FALSE)
+              INTO n, u FROM old_rows;
+            d_total := d_total - n;
+            d_unsynced := d_unsynced - u;
+        END IF;
+        IF d_total <> 0 OR d_unsynced <> 0 THEN
+            UPDATE row_counters
+               SET total = total + d_total,
+                   unsynced = unsynced + d_unsynced,
+                   updated_at = NOW()
+             WHERE table_name = TG_TABLE_NAME;
+        END IF;
+        RETURN NULL;
+    END $$
+"""
+
+# One trigger per event: transition-table names must match what each
+# event provides (INSERT → new, DELETE → old, UPDATE → both).
+_TRIGGERS = (
+    ("ins", "INSERT", "NEW TABLE AS new_rows"),
+    ("upd", "UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("del", "DELETE", "OLD TABLE AS old_rows"),
+)
+
+
+def install(conn) -> None:
+    """Create the counter table, function and triggers; seed missing rows."""
+    with conn.cursor() as cur:
+        cur.execute(ROW_COUNTERS_DDL)
+        cur.execute(_APPLY_FN_DDL)
+        for table in COUNTED_TABLES:
+            for suffix, event, referencing in _TRIGGERS:
+                cur.execute(
+                    f"CREATE OR REPLACE TRIGGER {table}_count_{suffix} "
+                    f"AFTER {event} ON {table} "
+                    f"REFERENCING {referencing} "
+                    f"FOR EACH STATEMENT EXECUTE FUNCTION row_counters_apply()"
+                )
+            cur.execute("SELECT 1 FROM row_counters WHERE table_name = %s", (table,))
+            if cur.fetchone() is None:
+                # One-time exact seed; the triggers above hold off writers
+                # until this transaction commits.
+                cur.execute(
+                    f"INSERT INTO row_counters (table_name, total, unsynced) "
+                    f"SELECT %s, COUNT(*), COUNT(*) FILTER (WHERE synced = FALSE) FROM {table}",
+                    (table,),
+                )
+    conn.commit()
+
+
+def drop_triggers(cur, table: str, relation: str) -> None:
+    """Drop ``table``'s counter triggers from ``relation`` (its renamed legacy copy)."""
+    for suffix, _, _ in _TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_count_{suffix} ON {relation}")
+
+
+def subtract_partition(cur, table: str, partition: str) -> None:
+    """Remove ``partition``'s rows from ``table``'s counters (call before DROP)."""
+    if table not in COUNTED_TABLES:
+        return
+    cur.execute(
+        f"""
+        UPDATE row_counters c
+           SET total = c.total - p.n, unsynced = c.unsynced - p.u, updated_at = NOW()
+          FROM (SELECT COUNT(*) AS n, COUNT(*) FILTER (WHERE synced = FALSE) AS u
+                FROM {partition}) p
+         WHERE c.table_name = %s
+        """,
+        (table,),
+    )
+
+
+def _estimate_total(cur, table: str) -> Optional[int]:
+    """Planner estimate summed over the table and its partitions."""
+    cur.execute(
+        """
+        SELECT SUM(GREATEST(c.reltuples, 0))::bigint
+        FROM pg_class c
+        WHERE c.oid = %s::regclass
+           OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+        """,
+        (table, table),
+    )
+    row = cur.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def read(conn) -> Dict[str, Dict[str, Optional[int]]]:
+    """``{table: {"total": n, "unsynced": n, "exact": bool}}`` for COUNTED_TABLES."""
+    out: Dict[str, Dict[str, Optional[int]]] = {}
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT table_name, total, unsynced FROM row_counters WHERE table_name = ANY(%s)",
+            (list(COUNTED_TABLES),),
+        )
+        for name, total, unsynced in cur.fetchall():
+            out[name] = {"total": int(total), "unsynced": int(unsynced), "exact": True}
+        for table in COUNTED_TABLES:
+            if table in out:
+                continue
+            cur.execute(f"SELECT COUNT(*) FROM {table} WHERE synced = FALSE")
+            unsynced = int(cur.fetchone()[0])
+            out[table] = {
+                "total": _estimate_total(cur, table),
+                "unsynced": unsynced,
+                "exact": False,
+            }
+    return out
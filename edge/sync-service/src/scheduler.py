@@ -0,0 +1,232 @@
+"""Independent task scheduler for sync-service.
+
+Before this module every sync-service job ran back-to-back in one loop:
+data sync → Storage upload → health → daily summary → disk watchdog →
+OneDrive. A 50-file rclone batch (up to 300 s per file) held the health
+push hostage and could trip the 120 s loop watchdog even though nothing
+was actually hung.
+
+Each job is now a ``Task`` with its own:
+
+  * **cadence** — ``interval_sec`` between the *start* of runs
+  * **timeout** — ``timeout_sec`` after which a still-running invocation
+    is considered stuck. Python threads can't be cancelled, so the
+    timeout is enforced by the watchdog (process exit → docker restart),
+    not by interrupting the job.
+  * **concurrency limit** — ``max_concurrency`` overlapping runs
+    (default 1: a slow run delays its own next run, nobody else's)
+  * **backoff** — consecutive failures push the next run out
+    exponentially, capped at ``backoff_max_sec``
+  * **heartbeat** — ``last_heartbeat`` is bumped when a run starts and
+    finishes; jobs with long inner loops can call ``Task.beat()`` to
+    show progress without finishing.
+
+Threads rather than asyncio: every job here is blocking I/O (psycopg2,
+firebase-admin, rclone subprocesses), so a thread per in-flight run is
+the honest model. Each job opens its own DB connection — psycopg2
+connections must not be shared across threads mid-transaction.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_TICK_SEC = 1.0
+DEFAULT_BACKOFF_MAX_SEC = 900.0
+
+
+class Task:
+    """One independently scheduled job plus its runtime bookkeeping."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[], object],
+        interval_sec: float,
+        timeout_sec: float,
+        max_concurrency: int = 1,
+        backoff_max_sec: float = DEFAULT_BACKOFF_MAX_SEC,
+        initial_delay_sec: float = 0.0,
+    ):
+        if interval_sec <= 0:
+            raise ValueError(f"task {name!r}: interval_sec must be > 0")
+        if timeout_sec <= 0:
+            raise ValueError(f"task {name!r}: timeout_sec must be > 0")
+        if max_concurrency < 1:
+            raise ValueError(f"task {name!r}: max_concurrency must be >= 1")
+        self.name = name
+        self.fn = fn
+        self.interval_sec = float(interval_sec)
+        self.timeout_sec = float(timeout_sec)
+        self.max_concurrency = int(max_concurrency)
+        self.backoff_max_sec = float(backoff_max_sec)
+
+        self.next_due = time.time() + initial_delay_sec
+        self.consecutive_failures = 0
+        self.runs_started = 0
+        self.runs_failed = 0
+        self.last_started_at: Optional[float] = None
+        self.last_finished_at: Optional[float] = None
+        self.last_duration_sec: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_heartbeat = time.time()
+        # Start time of each in-flight run, keyed by run number.
+        self._inflight: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    # -- runtime ------------------------------------------------------------
+
+    def beat(self) -> None:
+        """Record progress from inside a long-running job."""
+        with self._lock:
+            self.last_heartbeat = time.time()
+            # Progress counts as liveness for every in-flight run.
+            for run_id in self._inflight:
+                self._inflight[run_id] = self.last_heartbeat
+
+    def is_due(self, now: float) -> bool:
+        with self._lock:
+            return now >= self.next_due and len(self._inflight) < self.max_concurrency
+
+    def _backoff_delay(self) -> float:
+        """Seconds until the next attempt after ``consecutive_failures`` errors."""
+        if self.consecutive_failures == 0:
+            return self.interval_sec
+        delay = self.interval_sec * (2 ** min(self.consecutive_failures, 16))
+        return min(delay, max(self.backoff_max_sec, self.interval_sec))
+
+    def _start(self, now: float) -> int:
+        with self._lock:
+            self.runs_started += 1
+            run_id = self.runs_started
+            self._inflight[run_id] = now
+            self.last_started_at = now
+            self.last_heartbeat = now
+            # Cadence is measured start-to-start; a run that outlasts its
+            # interval is simply followed immediately by the next one
+            # (subject to max_concurrency).
+            self.next_due = now + self.interval_sec
+        return run_id
+
+    def _finish(self, run_id: int, started: float, error: Optional[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._inflight.pop(run_id, None)
+            self.last_finished_at = now
+            self.last_duration_sec = now - started
+            self.last_heartbeat = now
+            if error is None:
+                self.consecutive_failures = 0
+                self.last_error = None
+            else:
+                self.consecutive_failures += 1
+                self.runs_failed += 1
+                self.last_error = error
+                self.next_due = now + self._backoff_delay()
+
+    def overdue_runs(self, now: float) -> List[float]:
+        """Ages (s) of in-flight runs with no heartbeat inside ``timeout_sec``."""
+        with self._lock:
+            return [
+                now - beat for beat in self._inflight.values()
+                if now - beat > self.timeout_sec
+            ]
+
+    def snapshot(self) -> Dict:
+        """Plain-dict view for logs / deviceStatus."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "running": len(self._inflight),
+                "runs_started": self.runs_started,
+                "runs_failed": self.runs_failed,
+                "consecutive_failures": self.consecutive_failures,
+                "last_started_at": self.last_started_at,
+                "last_finished_at": self.last_finished_at,
+                "last_duration_sec": (
+                    round(self.last_duration_sec, 3)
+                    if self.last_duration_sec is not None else None
+                ),
+                "last_error": self.last_error,
+                "next_due": self.next_due,
+            }
+
+
+class Scheduler:
+    """Dispatch loop that starts each ``Task`` on its own thread when due."""
+
+    def __init__(self, tick_sec: float = DEFAULT_TICK_SEC):
+        self.tick_sec = tick_sec
+        self.tasks: Dict[str, Task] = {}
+        self.last_tick = time.time()
+        self._stop = threading.Event()
+
+    def add(self, task: Task) -> Task:
+        if task.name in self.tasks:
+            raise ValueError(f"duplicate task name: {task.name!r}")
+        self.tasks[task.name] = task
+        return task
+
+    def _run_task(self, task: Task, run_id: int, started: float) -> None:
+        error = None
+        try:
+            task.fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(
+                f"[SCHED] {task.name} failed "
+                f"(#{task.consecutive_failures + 1} in a row): {error}",
+                flush=True,
+            )
+        finally:
+            task._finish(run_id, started, error)
+
+    def tick(self, now: Optional[float] = None) -> List[str]:
+        """Start every due task once. Returns the names that were started."""
+        now = time.time() if now is None else now
+        self.last_tick = now
+        started = []
+        for task in self.tasks.values():
+            if not task.is_due(now):
+                continue
+            run_id = task._start(now)
+            threading.Thread(
+                target=self._run_task,
+                args=(task, run_id, now),
+                daemon=True,
+                name=f"task-{task.name}-{run_id}",
+            ).start()
+            started.append(task.name)
+        return started
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(self.tick_sec)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stalled(self, loop_stall_sec: float, now: Optional[float] = None) -> List[str]:
+        """Human-readable reasons the process should be restarted, if any.
+
+        Two failure modes: the dispatch loop itself stopped ticking, or a
+        task has an in-flight run with no heartbeat for longer than its
+        own ``timeout_sec``. A slow-but-within-timeout task is *not*
+        a stall — that's the whole point of per-task timeouts.
+        """
+        now = time.time() if now is None else now
+        reasons = []
+        loop_age = now - self.last_tick
+        if loop_age > loop_stall_sec:
+            reasons.append(f"scheduler loop silent for {loop_age:.0f}s")
+        for task in self.tasks.values():
+            for age in task.overdue_runs(now):
+                reasons.append(
+                    f"{task.name} run silent for {age:.0f}s "
+                    f"(timeout {task.timeout_sec:.0f}s)"
+                )
+        return reasons
+
+    def snapshot(self) -> List[Dict]:
+        return [t.snapshot() for t in self.tasks.values()]
@@ -16,7 +16,7 @@ repo="$(cd "$here/.." && pwd)"
 src_dir="$repo/edge/batdetect-service/src"
 model_src="$repo/docker/models/groups_model.pt"
 
-for f in bat_pipeline.py audio_validator.py classifier.py spectrogram.py; do
+for f in bat_pipeline.py audio_validator.py classifier.py spectrogram.py analysis_cache.py; do
     src="$src_dir/$f"
     if [[ ! -f "$src" ]]; then
         echo "FAIL: $src not found — cannot sync shared pipeline" >&2
@@ -32,9 +32,23 @@ fi
 mkdir -p "$here/models"
 cp "$model_src" "$here/models/groups_model.pt"
 
+# Optional mmap-loadable copy (edge/scripts/export_fast_classifier.py).
+# The function prefers it on cold start; a stale one would shadow a
+# retrained checkpoint, so it is only taken if it is the newer file.
+fast_src="${model_src%.pt}.fast.pt"
+rm -f "$here/models/groups_model.fast.pt"
+if [[ -f "$fast_src" && "$fast_src" -nt "$model_src" ]]; then
+    cp "$fast_src" "$here/models/groups_model.fast.pt"
+    fast_note="models/groups_model.fast.pt <- docker/models/"
+else
+    fast_note="models/groups_model.fast.pt    (none — run edge/scripts/export_fast_classifier.py)"
+fi
+
 echo "functions/ synced:"
 echo "  src/bat_pipeline.py        <- edge/batdetect-service/src/"
 echo "  src/audio_validator.py     <- edge/batdetect-service/src/"
 echo "  src/classifier.py          <- edge/batdetect-service/src/"
 echo "  src/spectrogram.py         <- edge/batdetect-service/src/"
+echo "  src/analysis_cache.py      <- edge/batdetect-service/src/"
 echo "  models/groups_model.pt     <- docker/models/"
+echo "  $fast_note"
@@ -6,6 +6,11 @@ the shared 4-gate bat-analysis pipeline (``src.bat_pipeline.run_full_pipeline``)
 and writes detections back to Firestore so the dashboard's Offline
 WAV Analysis panel shows them in place.
 
+Spectrograms, the time-expanded WAV and the tile pyramid are rendered
+on demand: ``process_upload`` stores only the metadata needed to render
+them, and the dashboard calls ``render_artifact`` for each one the first
+time it is viewed.
+
 Runs the exact same pipeline as the Pi's live capture path — the
 ``src/`` modules are synced from ``edge/batdetect-service/src/`` by
 ``build.sh`` (predeploy hook in ``firebase.json``).
@@ -24,24 +29,50 @@ per-deploy with env vars:
 * ``FIREBASE_STORAGE_BUCKET``  — provided automatically by Firebase at runtime
 * ``DETECTION_THRESHOLD``, ``MIN_PREDICTION_CONF``
 * ``HPF_*``, ``VALIDATOR_*``, ``FM_SWEEP_*`` — pipeline knobs, defaults mirror Pi
+* ``STREAM_MIN_DURATION_S``, ``STREAM_WINDOW_S`` — windowed analysis for long files
+* ``STREAM_MIN_BYTES``         — uploads larger than this are read straight
+  from Storage instead of downloaded to ``/tmp`` (which is RAM-backed here)
+* ``ARTIFACT_EXCERPT_S``       — long files get spectrograms / time-expanded
+  audio for this many seconds around the strongest detection
+* ``SPECTROGRAM_TILES_ENABLED``, ``SPECTROGRAM_TILES_MIN_S`` — recordings at
+  least this long also get a zoomable tile pyramid (``spectrogramTiles``)
+* ``UPLOAD_BATCH_SIZE``, ``UPLOAD_BATCH_WORKERS`` — how many pending jobs
+  one invocation drains and how many at once (default 1; ``_drain_pending``)
+* ``UPLOAD_EST_BASE_S``, ``UPLOAD_EST_S_PER_MB``, ``UPLOAD_CLAIM_MARGIN_S`` —
+  a job is only claimed when its estimated run time fits what is left of
+  the invocation's timeout
+* ``UPLOAD_LEASE_GRACE_S``, ``UPLOAD_MAX_ATTEMPTS`` — a job whose
+  invocation died is reclaimed once its lease (``leaseExpiresAt``) has
+  lapsed, and failed after this many attempts
+* ``UPLOAD_SWEEP_MINUTES``     — how often ``sweep_upload_jobs`` requeues
+  lapsed leases and drains anything still pending (default 10)
+* ``ARTIFACT_RENDERING``       — ``lazy`` (default, ``render_artifact``) or
+  ``eager`` (render everything before marking the job done)
+* ``ANALYSIS_CACHE_ENABLED``   — reuse results / raw detections for
+  re-uploads of identical audio (``src.analysis_cache``, default true)
 """
 
 from __future__ import annotations
 
 import os
 import tempfile
+import time
 import traceback
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import firebase_admin
 from firebase_admin import firestore, storage as fb_storage
-from firebase_functions import firestore_fn, options
+from firebase_functions import firestore_fn, https_fn, options, scheduler_fn
 
 # ---------------------------------------------------------------------------
 #  Firebase init — runs once per cold start
 # ---------------------------------------------------------------------------
 
+# Cold-start clock (``_log_cold_start``); starts once the stdlib +
+# Firebase SDK imports above are done.
+_MODULE_T0 = time.monotonic()
+
 firebase_admin.initialize_app()
 
 
@@ -52,6 +83,51 @@ firebase_admin.initialize_app()
 MODEL_VERSION = os.getenv("MODEL_VERSION", "groups_v1_post_epfu_partial_2026-04-17")
 DEVICE_LABEL = os.getenv("UPLOAD_DEVICE_LABEL", "upload")
 BAT_DETECTIONS_COLLECTION = os.getenv("BAT_DETECTIONS_COLLECTION", "batDetections")
+# /tmp in Cloud Functions counts against the 4 GB memory limit, so a
+# full-night WAV can't be downloaded there. Above this size the pipeline
+# reads the blob through a seekable Storage reader instead.
+STREAM_MIN_BYTES = int(os.getenv("STREAM_MIN_BYTES", str(64 * 1024 * 1024)))
+ARTIFACT_EXCERPT_S = float(os.getenv("ARTIFACT_EXCERPT_S", "30"))
+# The excerpt spectrograms above only show part of a long file; the
+# tile pyramid covers all of it at every zoom level.
+SPECTROGRAM_TILES_ENABLED = os.getenv("SPECTROGRAM_TILES_ENABLED", "true").lower() == "true"
+SPECTROGRAM_TILES_MIN_S = float(os.getenv("SPECTROGRAM_TILES_MIN_S", "60"))
+SPECTROGRAM_TILES_PALETTE = os.getenv("SPECTROGRAM_TILES_PALETTE", "viridis")
+# Bulk uploads: each process_upload invocation keeps claiming pending
+# jobs (oldest first, up to UPLOAD_BATCH_SIZE in total) through the
+# instance's already-warm pipeline, instead of every job paying its own
+# cold start. A job is only claimed when its estimate —
+# UPLOAD_EST_BASE_S + UPLOAD_EST_S_PER_MB per MB of WAV — still fits in
+# what is left of UPLOAD_TIMEOUT_S, less UPLOAD_CLAIM_MARGIN_S.
+# UPLOAD_BATCH_SIZE=1 is one job per invocation.
+UPLOAD_TIMEOUT_S = 540  # process_upload's timeout_sec
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "16"))
+# Jobs run side by side share one classifier and the global torch RNG
+# that analyse_raw seeds per call, so results are only reproducible per
+# job with a single worker.
+UPLOAD_BATCH_WORKERS = max(1, int(os.getenv("UPLOAD_BATCH_WORKERS", "1")))
+UPLOAD_EST_BASE_S = float(os.getenv("UPLOAD_EST_BASE_S", "20"))
+UPLOAD_EST_S_PER_MB = float(os.getenv("UPLOAD_EST_S_PER_MB", "3"))
+UPLOAD_CLAIM_MARGIN_S = float(os.getenv("UPLOAD_CLAIM_MARGIN_S", "30"))
+# Claims carry a lease that ends when the claiming invocation is killed
+# (plus this grace). A job still ``processing`` past its lease was lost
+# with its instance and is claimed again, at most UPLOAD_MAX_ATTEMPTS
+# times in total before it is marked as an error.
+UPLOAD_LEASE_GRACE_S = float(os.getenv("UPLOAD_LEASE_GRACE_S", "60"))
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "2"))
+# Without a new upload nothing else would notice a lapsed lease, so a
+# scheduled sweep requeues them and drains the queue itself.
+UPLOAD_SWEEP_MINUTES = int(os.getenv("UPLOAD_SWEEP_MINUTES", "10"))
+# Most uploads are looked at in one palette, if at all. "lazy" leaves
+# every artifact to ``render_artifact``; "eager" renders them all before
+# the job is marked done (the pre-2026-10 behaviour).
+ARTIFACT_RENDERING = os.getenv("ARTIFACT_RENDERING", "lazy").lower()
+# render_artifact guards: at most this many instances render at once,
+# and one render per job + variant is in flight (its marker on the job
+# doc, ``artifactRendering.<variant>``, lapses after RENDER_LEASE_S in
+# case the instance dies).
+RENDER_MAX_INSTANCES = int(os.getenv("RENDER_MAX_INSTANCES", "4"))
+RENDER_LEASE_S = 600
 
 
 # ---------------------------------------------------------------------------
@@ -62,6 +138,36 @@ _classifier_cache: Optional[tuple] = None
 _bd_warmed_up = False
 
 
+def _model_path() -> str:
+    """``MODEL_PATH``, else the bundled checkpoint — the mmap-loadable
+    ``.fast.pt`` copy when ``build.sh`` shipped one."""
+    if os.getenv("MODEL_PATH"):
+        return os.environ["MODEL_PATH"]
+    models = os.path.join(os.path.dirname(__file__), "models")
+    fast = os.path.join(models, "groups_model.fast.pt")
+    return fast if os.path.exists(fast) else os.path.join(models, "groups_model.pt")
+
+
+def _log_cold_start(function: str, **phases_s: float) -> None:
+    """One structured log line per cold start.
+
+    Cloud Logging parses JSON stdout into ``jsonPayload``, so a
+    log-based distribution metric on ``jsonPayload.coldStart.total_ms``
+    charts cold-start latency (see OFFLINE_WAV_ANALYSIS.md). ``total``
+    counts from module import, so it includes Firebase init and the
+    wait for the first event.
+    """
+    import json
+
+    phases_ms = {f"{k}_ms": round(v * 1000.0) for k, v in phases_s.items()}
+    phases_ms["total_ms"] = round((time.monotonic() - _MODULE_T0) * 1000.0)
+    print(json.dumps({
+        "severity": "INFO",
+        "message": f"[CF] cold start ({function}): {phases_ms}",
+        "coldStart": {"function": function, **phases_ms},
+    }))
+
+
 def _get_classifier():
     """Lazy-load ``torch`` + ``batdetect2`` + the classifier checkpoint.
 
@@ -79,13 +185,18 @@ def _get_classifier():
     cold-starts deterministic; if the warm-up itself fails the worker
     crashes and CF restarts it, which is the outcome we want over the
     current "silently returns garbage" behaviour.
+
+    ``concurrency=1`` makes cold starts common, so each phase is timed
+    and logged as a metric (``_log_cold_start``).
     """
     global _classifier_cache, _bd_warmed_up
     if _classifier_cache is None:
-        import numpy as np
+        t0 = time.monotonic()
         import torch
         from batdetect2 import api as bat_api
+        from src import bat_pipeline
         from src.classifier import load_groups_classifier  # noqa: E402
+        t_imports = time.monotonic()
 
         # Pin single-threaded inference — CF workers share CPU with
         # other tenants and torch's intra-op threadpool is a well-known
@@ -93,47 +204,34 @@ def _get_classifier():
         torch.set_num_threads(1)
         torch.set_num_interop_threads(1)
 
-        model_path = os.getenv(
-            "MODEL_PATH",
-            os.path.join(os.path.dirname(__file__), "models", "groups_model.pt"),
-        )
+        model_path = _model_path()
         print(f"[CF] Loading classifier from {model_path}")
         _classifier_cache = load_groups_classifier(model_path)
         ckpt = _classifier_cache[1]
         print(f"[CF] Classifier ready: {ckpt['class_names']}")
+        t_classifier = time.monotonic()
 
-        # Warm-up pass through BatDetect2. We don't strictly need
-        # detections on the warm-up — we only need torch to do a real
-        # forward pass so the lazy weight init + any JIT tracing
-        # happens while the worker is guaranteed idle. But a pure
-        # sine tone doesn't exercise the detection HEAD (the detector
-        # is trained to ignore carriers, only fires on FM sweeps).
-        # Using a bat-like FM-chirp signal forces a full forward pass
-        # through both the backbone AND the detection head, which is
-        # the state we care about refreshing. Worked out the hard way
-        # on the Pi — see commit that introduced this comment.
+        # Warm-up pass through BatDetect2 so lazy weight init and any
+        # JIT state settle while the worker is idle. One 6 ms FM chirp
+        # in 0.25 s of audio: the detection head still has to fire on
+        # it (zero detections raises → CF restarts the instance), at a
+        # quarter of the old 1 s / 5-chirp clip's cost.
         if not _bd_warmed_up:
-            from scipy.signal import chirp as _chirp
-            cfg = bat_api.get_config()
-            sr = int(cfg.get("target_samp_rate", 256000))
-            audio = np.zeros(sr, dtype=np.float32)
-            chirp_dur = 0.006
-            chirp_n = int(sr * chirp_dur)
-            chirp_t = np.linspace(0.0, chirp_dur, chirp_n, endpoint=False)
-            chirp_sig = _chirp(
-                chirp_t, f0=60_000, f1=25_000, t1=chirp_dur, method="linear",
-            ).astype(np.float32)
-            for i in range(5):
-                start = int((0.1 + 0.15 * i) * sr)
-                audio[start:start + chirp_n] += 0.5 * chirp_sig
-            audio += 0.005 * np.random.randn(sr).astype(np.float32)
             try:
-                bat_api.process_audio(audio, config=cfg)
-                print("[CF] BatDetect2 warm-up complete")
+                n = bat_pipeline.warm_up_detector(bat_api.get_config())
+                print(f"[CF] BatDetect2 warm-up complete (raw_dets={n})")
             except Exception as e:  # noqa: BLE001 — want CF to restart
                 print(f"[CF] BatDetect2 warm-up FAILED: {e}")
                 raise
             _bd_warmed_up = True
+        t_warmup = time.monotonic()
+        _log_cold_start(
+            "process_upload",
+            before_first_request=t0 - _MODULE_T0,
+            imports=t_imports - t0,
+            classifier=t_classifier - t_imports,
+            warmup=t_warmup - t_classifier,
+        )
     return _classifier_cache
 
 
@@ -156,6 +254,9 @@ def _load_pipeline_cfg() -> dict:
         "fm_sweep_min_slope": float(os.getenv("FM_SWEEP_MIN_SLOPE", "-0.1")),
         "fm_sweep_max_low_band_ratio": float(os.getenv("FM_SWEEP_MAX_LOW_BAND_RATIO", "0.5")),
         "fm_sweep_min_r2": float(os.getenv("FM_SWEEP_MIN_R2", "0.2")),
+        # Longer files are analysed in overlapping windows (flat memory).
+        "stream_min_duration_s": float(os.getenv("STREAM_MIN_DURATION_S", "120")),
+        "stream_window_s": float(os.getenv("STREAM_WINDOW_S", "60")),
     }
 
 
@@ -182,6 +283,8 @@ PERMISSIVE_OVERRIDES = {
 #  Persistence — Firestore only (no Postgres in the cloud)
 # ---------------------------------------------------------------------------
 
+FIRESTORE_BATCH_LIMIT = 500
+
 def _flatten(det: dict, pred: dict, pipeline_version: str) -> dict:
     species = det.get("class", "Unknown")
     start = det.get("start_time", 0.0)
@@ -203,12 +306,23 @@ def _flatten(det: dict, pred: dict, pipeline_version: str) -> dict:
 
 
 def _write_detections(db, job_id: str, pairs, detection_time, pipeline_version: str):
-    if not pairs:
-        return
-    batch = db.batch()
-    for det, pred in pairs:
+    """Queue detection rows in Firestore write batches.
+
+    Commits every full batch (Firestore caps one at 500 writes) and
+    returns the last one uncommitted, with room for one more write, so
+    the caller can add the job's ``done`` update (``_mark_done(batch=)``)
+    and land the final rows and the status flip in one commit.
+    """
+    batch, n = db.batch(), 0
+    for i, (det, pred) in enumerate(pairs):
+        if n == FIRESTORE_BATCH_LIMIT - 1:
+            batch.commit()
+            batch, n = db.batch(), 0
+        n += 1
         row = _flatten(det, pred, pipeline_version)
-        doc_ref = db.collection(BAT_DETECTIONS_COLLECTION).document()
+        # Positional IDs: a job reclaimed after its instance died
+        # overwrites the rows it had already committed.
+        doc_ref = db.collection(BAT_DETECTIONS_COLLECTION).document(f"{job_id}_{i:05d}")
         batch.set(doc_ref, {
             "species": row["species"],
             "commonName": row["common_name"],
@@ -241,7 +355,7 @@ def _write_detections(db, job_id: str, pairs, detection_time, pipeline_version:
             "syncedRemoteAt": None,
             "createdAt": firestore.SERVER_TIMESTAMP,
         })
-    batch.commit()
+    return batch
 
 
 def _mark_done(
@@ -258,7 +372,11 @@ def _mark_done(
     spectrogram_sonobat_url: Optional[str] = None,
     spectrogram_sonobat_annotated_url: Optional[str] = None,
     time_expanded_audio_url: Optional[str] = None,
+    spectrogram_tiles: Optional[dict] = None,
+    artifact_key: Optional[str] = None,
+    artifact_variants: Optional[list] = None,
     permissive_mode: bool = False,
+    batch=None,
 ):
     species_found = sorted({
         (pred.get("predicted_class") or det.get("class") or "Unknown")
@@ -287,12 +405,47 @@ def _mark_done(
         payload["spectrogramSonobatAnnotatedUrl"] = spectrogram_sonobat_annotated_url
     if time_expanded_audio_url:
         payload["timeExpandedAudioUrl"] = time_expanded_audio_url
+    if spectrogram_tiles:
+        payload["spectrogramTiles"] = spectrogram_tiles
+    if artifact_key:
+        # What ``render_artifact`` needs to render the rest on demand.
+        payload["artifactKey"] = artifact_key
+        payload["artifactVariants"] = artifact_variants or []
     if permissive_mode:
         payload["permissiveMode"] = True
-    job_ref.update(payload)
+    if batch is not None:
+        batch.update(job_ref, payload)
+        batch.commit()
+    else:
+        job_ref.update(payload)
 
 
-def _render_and_upload_time_expanded(bucket, wav_path: str, job_id: str, expansion: int = 10) -> Optional[str]:
+def _firebase_url(bucket, blob) -> str:
+    import urllib.parse
+    encoded = urllib.parse.quote(blob.name, safe="")
+    return (
+        f"https://firebasestorage.googleapis.com/v0/b/{bucket.name}"
+        f"/o/{encoded}?alt=media&token={blob.metadata['firebaseStorageDownloadTokens']}"
+    )
+
+
+def _upload_bytes(bucket, data: bytes, remote_name: str, content_type: str,
+                  token: Optional[str] = None) -> str:
+    """Upload ``data`` with a Firebase download token; returns the URL.
+
+    The token rides on the upload's own metadata, so there is no
+    separate ``patch()`` round trip. Pass ``token`` to share one across
+    a set of objects (the spectrogram tiles).
+    """
+    import uuid
+
+    blob = bucket.blob(remote_name)
+    blob.metadata = {"firebaseStorageDownloadTokens": token or uuid.uuid4().hex}
+    blob.upload_from_string(data, content_type=content_type)
+    return _firebase_url(bucket, blob)
+
+
+def _render_and_upload_time_expanded(bucket, audio, sr: int, job_id: str, expansion: int = 10) -> Optional[str]:
     """Render a time-expanded WAV so ultrasonic bat calls become audible.
 
     Writes the same samples at 1/``expansion`` the sample rate — this
@@ -304,59 +457,55 @@ def _render_and_upload_time_expanded(bucket, wav_path: str, job_id: str, expansi
     Uploaded to ``audio/{jobId}.expanded.wav`` with a Firebase download
     token. Returns the URL or None on failure.
     """
+    if audio is None:
+        return None
     try:
-        import urllib.parse
-        import uuid
+        import io
         import soundfile as sf
-        from batdetect2 import api as bat_api
 
-        audio = bat_api.load_audio(wav_path)
-        sr = int(bat_api.get_config().get("target_samp_rate", 256000))
         expanded_sr = max(sr // expansion, 8000)
-
-        expanded_path = wav_path + ".expanded.wav"
         # 16-bit PCM for wide browser / <audio> tag compatibility.
-        sf.write(expanded_path, audio, expanded_sr, subtype="PCM_16")
-
-        blob = bucket.blob(f"audio/{job_id}.expanded.wav")
-        token = uuid.uuid4().hex
-        blob.metadata = {"firebaseStorageDownloadTokens": token}
-        blob.upload_from_filename(expanded_path, content_type="audio/wav")
-        blob.patch()
-
-        try:
-            os.unlink(expanded_path)
-        except OSError:
-            pass
-
-        encoded = urllib.parse.quote(blob.name, safe="")
-        return (
-            f"https://firebasestorage.googleapis.com/v0/b/{bucket.name}"
-            f"/o/{encoded}?alt=media&token={token}"
+        # Encoded in memory: /tmp is RAM here anyway.
+        buf = io.BytesIO()
+        sf.write(buf, audio, expanded_sr, format="WAV", subtype="PCM_16")
+        return _upload_bytes(
+            bucket, buf.getvalue(), f"audio/{job_id}.expanded.wav", "audio/wav",
         )
     except Exception as e:
         print(f"[CF] time-expanded audio render/upload failed for {job_id}: {e}")
         return None
 
 
-def _upload_png(bucket, local_path: str, remote_name: str) -> Optional[str]:
-    """Helper: upload a PNG to Firebase Storage with a download token."""
-    import urllib.parse
-    import uuid
+# (key, remote filename, palette, with_boxes)
+SPECTROGRAM_VARIANTS = [
+    ("viridis_clean",     "viridis.clean.png",     "viridis", False),
+    ("viridis_annotated", "viridis.annotated.png", "viridis", True),
+    ("sonobat_clean",     "sonobat.clean.png",     "sonobat", False),
+    ("sonobat_annotated", "sonobat.annotated.png", "sonobat", True),
+]
 
-    blob = bucket.blob(remote_name)
-    token = uuid.uuid4().hex
-    blob.metadata = {"firebaseStorageDownloadTokens": token}
-    blob.upload_from_filename(local_path, content_type="image/png")
-    blob.patch()
-    encoded = urllib.parse.quote(blob.name, safe="")
-    return (
-        f"https://firebasestorage.googleapis.com/v0/b/{bucket.name}"
-        f"/o/{encoded}?alt=media&token={token}"
-    )
 
+def _render_palette(bucket, audio, sr: int, palette: str, job_id: str, pairs, filename: str, pool) -> dict:
+    """One STFT for ``palette``, then its clean + annotated PNGs.
+
+    Uploads are handed to ``pool`` as each PNG is encoded; returns
+    ``{key: future → url}``.
+    """
+    from src.spectrogram import compute_spectrogram, render_png
+
+    spec = compute_spectrogram(audio, sr, palette=palette)
+    futures = {}
+    for key, remote_name, pal, with_boxes in SPECTROGRAM_VARIANTS:
+        if pal != palette:
+            continue
+        png = render_png(spec, pairs, with_boxes=with_boxes, title=filename)
+        futures[key] = pool.submit(
+            _upload_bytes, bucket, png, f"spectrograms/{job_id}.{remote_name}", "image/png",
+        )
+    return futures
 
-def _render_and_upload_spectrograms(bucket, wav_path: str, job_id: str, pairs, filename: str) -> dict:
+
+def _render_and_upload_spectrograms(bucket, audio, sr: int, job_id: str, pairs, filename: str, pool) -> dict:
     """Render FOUR spectrograms (2 palettes × clean/annotated) and
     upload all of them. Dashboard picks one based on the user's
     toggle state.
@@ -371,53 +520,194 @@ def _render_and_upload_spectrograms(bucket, wav_path: str, job_id: str, pairs, f
       * ``sonobat_clean``    — bat-research style, no boxes
       * ``sonobat_annotated`` — bat-research style, with boxes
 
-    The doubled upload cost (~200 KB total per job instead of 100 KB)
-    is negligible under the 7-day Storage TTL.
+    Each palette's STFT is computed once and shared by its two
+    variants; the palettes render on ``pool`` side by side and every
+    PNG uploads as soon as it is encoded.
     """
-    urls: dict = {
-        "viridis_clean": None,
-        "viridis_annotated": None,
-        "sonobat_clean": None,
-        "sonobat_annotated": None,
+    urls: dict = {key: None for key, *_ in SPECTROGRAM_VARIANTS}
+    if audio is None:
+        return urls
+    palettes = {
+        palette: pool.submit(
+            _render_palette, bucket, audio, sr, palette, job_id, pairs, filename, pool,
+        )
+        for palette in ("viridis", "sonobat")
     }
-    try:
-        from batdetect2 import api as bat_api
-        from src.spectrogram import generate_spectrogram
+    for palette, fut in palettes.items():
+        try:
+            uploads = fut.result()
+        except Exception as e:
+            print(f"[CF] spectrogram {palette} render failed for {job_id}: {e}")
+            continue
+        for key, up in uploads.items():
+            try:
+                urls[key] = up.result()
+            except Exception as e:
+                print(f"[CF] spectrogram {key} upload failed for {job_id}: {e}")
+    return urls
 
-        audio = bat_api.load_audio(wav_path)
-        sr = int(bat_api.get_config().get("target_samp_rate", 256000))
 
-        variants = [
-            # (key, local filename, remote filename, palette, with_boxes)
-            ("viridis_clean",     ".spec.v_c.png", "viridis.clean.png",     "viridis", False),
-            ("viridis_annotated", ".spec.v_a.png", "viridis.annotated.png", "viridis", True),
-            ("sonobat_clean",     ".spec.s_c.png", "sonobat.clean.png",     "sonobat", False),
-            ("sonobat_annotated", ".spec.s_a.png", "sonobat.annotated.png", "sonobat", True),
-        ]
+def _render_and_upload_tiles(bucket, source, duration_s: float, sr: int, job_id: str) -> Optional[dict]:
+    """Zoomable tile pyramid for the whole recording → manifest, or None.
 
-        paths = []
-        for key, local_suffix, remote_name, palette, with_boxes in variants:
-            try:
-                p = wav_path + local_suffix
-                generate_spectrogram(
-                    audio, sr, pairs, p,
-                    title=filename, with_boxes=with_boxes, palette=palette,
-                )
-                paths.append(p)
-                urls[key] = _upload_png(
-                    bucket, p, f"spectrograms/{job_id}.{remote_name}",
-                )
-            except Exception as e:
-                print(f"[CF] spectrogram {key} failed for {job_id}: {e}")
+    Tiles go to ``spectrograms/{jobId}/{z}/{x}.png`` (see
+    ``src.spectrogram.iter_spectrogram_tiles`` for the geometry). They
+    all share one download token, so the manifest carries a single URL
+    template instead of hundreds of URLs. The audio is streamed from
+    ``source`` one window at a time and every tile uploads as soon as
+    it is encoded, with a bounded number in flight.
+    """
+    if not (SPECTROGRAM_TILES_ENABLED and sr and duration_s >= SPECTROGRAM_TILES_MIN_S):
+        return None
+    import urllib.parse
+    import uuid
+    from concurrent.futures import ThreadPoolExecutor
+    from src.spectrogram import TilePlan, estimate_db_range, iter_spectrogram_tiles
 
-        for p in paths:
-            try:
-                os.unlink(p)
-            except OSError:
-                pass
+    try:
+        plan = TilePlan(duration_s=duration_s, sr=sr, palette=SPECTROGRAM_TILES_PALETTE)
+        plan.vmin, plan.vmax = estimate_db_range(source, plan)
+        token = uuid.uuid4().hex
+        prefix = f"spectrograms/{job_id}"
+        n_tiles = 0
+        with ThreadPoolExecutor(max_workers=8, thread_name_prefix="tiles") as pool:
+            in_flight = []
+            for z, x, png in iter_spectrogram_tiles(source, plan):
+                in_flight.append(pool.submit(
+                    _upload_bytes, bucket, png, f"{prefix}/{z}/{x}.png", "image/png", token,
+                ))
+                n_tiles += 1
+                if len(in_flight) >= 32:
+                    in_flight.pop(0).result()
+            for fut in in_flight:
+                fut.result()
+        template = (
+            f"https://firebasestorage.googleapis.com/v0/b/{bucket.name}/o/"
+            f"{urllib.parse.quote(prefix, safe='')}%2F{{z}}%2F{{x}}.png"
+            f"?alt=media&token={token}"
+        )
+        print(f"[CF] {job_id}: {n_tiles} spectrogram tiles (zoom 0-{plan.max_zoom})")
+        return {"urlTemplate": template, **plan.manifest()}
     except Exception as e:
-        print(f"[CF] spectrogram render/upload failed for {job_id}: {e}")
-    return urls
+        print(f"[CF] spectrogram tiles failed for {job_id}: {e}")
+        return None
+
+
+def _artifact_sr() -> int:
+    """Rate every artifact renders at — BatDetect2's, as before.
+
+    The library default rather than ``bat_api.get_config()``, so the
+    render paths never import batdetect2 / torch.
+    """
+    from src import bat_pipeline
+    return bat_pipeline.BD_TARGET_SAMPLE_RATE
+
+
+def _load_artifact_audio(source, result, streamed: bool):
+    """Audio + detection pairs for the spectrogram / time-expanded renders.
+
+    Short files render whole, as before. For long ones the render covers
+    ``ARTIFACT_EXCERPT_S`` seconds around the strongest detection (the
+    start of the file when there is none), with the pairs re-timed to
+    the excerpt — a full-night spectrogram would neither fit in memory
+    nor be readable.
+    """
+    from src import bat_pipeline
+
+    sr = _artifact_sr()
+    if not streamed:
+        return bat_pipeline.read_audio(source, sr), sr, result.detections
+
+    start = 0.0
+    if result.detections:
+        top, _ = max(result.detections, key=lambda p: p[0].get("det_prob", 0.0))
+        start = max(0.0, top.get("start_time", 0.0) - ARTIFACT_EXCERPT_S / 2)
+    end = start + ARTIFACT_EXCERPT_S
+    audio = bat_pipeline.load_audio_excerpt(source, start, ARTIFACT_EXCERPT_S, sr)
+    pairs = [
+        (bat_pipeline.shift_detection(det, -start), pred)
+        for det, pred in result.detections
+        if start <= det.get("start_time", 0.0) < end
+    ]
+    return audio, sr, pairs
+
+
+def _lease_expired(job: dict) -> bool:
+    """A cloud-function claim whose invocation must have died by now."""
+    lease = job.get("leaseExpiresAt")
+    return (
+        job.get("status") == "processing"
+        and lease is not None
+        and lease < datetime.now(timezone.utc)
+    )
+
+
+def _attempts_exhausted(attempts: int) -> dict:
+    """Job update for a lapsed lease that has no attempts left."""
+    return {
+        "status": "error",
+        "errorMessage": (
+            f"analysis did not finish within the function timeout "
+            f"({attempts} attempt(s)); try a shorter recording"
+        ),
+        "completedAt": firestore.SERVER_TIMESTAMP,
+    }
+
+
+@firestore.transactional
+def _requeue_expired(transaction, job_ref) -> Optional[str]:
+    """Lapsed lease → ``pending`` again, or ``error`` with no attempts left.
+
+    Returns the new status, or None if the job was finished or re-claimed
+    since it was listed.
+    """
+    snap = job_ref.get(transaction=transaction)
+    if not snap.exists:
+        return None
+    job = snap.to_dict() or {}
+    if not _lease_expired(job):
+        return None
+    attempts = int(job.get("attempts") or 0)
+    if attempts >= UPLOAD_MAX_ATTEMPTS:
+        transaction.update(job_ref, _attempts_exhausted(attempts))
+        return "error"
+    transaction.update(job_ref, {
+        "status": "pending",
+        "claimedBy": firestore.DELETE_FIELD,
+        "leaseExpiresAt": firestore.DELETE_FIELD,
+    })
+    return "pending"
+
+
+@firestore.transactional
+def _claim_job(transaction, job_ref, deadline: float) -> bool:
+    """pending (or an expired lease) → processing, leased until ``deadline``.
+
+    ``deadline`` is the claiming invocation's ``time.monotonic()`` kill
+    time. A lapsed lease that has used up ``UPLOAD_MAX_ATTEMPTS`` is
+    marked as an error instead of being claimed again.
+    """
+    snap = job_ref.get(transaction=transaction)
+    if not snap.exists:
+        return False
+    job = snap.to_dict() or {}
+    reclaim = _lease_expired(job)
+    if job.get("status", "pending") != "pending" and not reclaim:
+        return False
+    attempts = int(job.get("attempts") or 0)
+    if reclaim and attempts >= UPLOAD_MAX_ATTEMPTS:
+        transaction.update(job_ref, _attempts_exhausted(attempts))
+        return False
+    lease_s = deadline - time.monotonic() + UPLOAD_LEASE_GRACE_S
+    transaction.update(job_ref, {
+        "status": "processing",
+        "processingStartedAt": firestore.SERVER_TIMESTAMP,
+        "claimedBy": "cloud-function",
+        "claimedAt": firestore.SERVER_TIMESTAMP,
+        "leaseExpiresAt": datetime.now(timezone.utc) + timedelta(seconds=lease_s),
+        "attempts": attempts + 1,
+    })
+    return True
 
 
 def _mark_error(job_ref, message: str):
@@ -428,60 +718,198 @@ def _mark_error(job_ref, message: str):
     })
 
 
+def _render_artifacts(bucket, source, result, job_id: str, filename: str) -> dict:
+    """Spectrograms + time-expanded audio → ``{variant: url}``.
+
+    Long recordings also get ``"tiles"``, the tile-pyramid manifest.
+
+    Everything renders and uploads concurrently: numpy / scipy, PNG
+    compression and the Storage uploads all release the GIL, and the
+    function has 2 vCPUs.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Artifacts are nice-to-have; a failed excerpt read must not
+    # fail the job (the renderers below tolerate ``None`` audio).
+    try:
+        artifact_audio, artifact_sr, artifact_pairs = _load_artifact_audio(
+            source, result, streamed="windows" in result.stats,
+        )
+    except Exception as e:
+        print(f"[CF] {job_id}: artifact audio load failed: {e}")
+        artifact_audio, artifact_sr, artifact_pairs = None, 0, []
+
+    # Two palette renders, the expanded WAV and the tile pyramid, with
+    # the PNG uploads queued behind them as each one is encoded.
+    with ThreadPoolExecutor(max_workers=5, thread_name_prefix="artifact") as pool:
+        # Time-expanded (10×) audio — the 40 kHz bat call becomes a
+        # 4 kHz audible chirp. Ecologists rely on this to verify
+        # detector output by ear.
+        expanded = pool.submit(
+            _render_and_upload_time_expanded, bucket, artifact_audio, artifact_sr, job_id,
+        )
+        # Tile pyramid over the whole file. The only task here that
+        # reads ``source`` again; it streams, so memory stays flat.
+        tiles = pool.submit(
+            _render_and_upload_tiles, bucket, source, result.duration_seconds,
+            artifact_sr, job_id,
+        )
+        # Spectrograms — rendered for every outcome (even rejected
+        # segments) so advisors can see *why* the pipeline decided what
+        # it decided. FOUR variants (viridis / sonobat × clean /
+        # annotated) so the dashboard can toggle palette and overlay
+        # independently.
+        artifacts = _render_and_upload_spectrograms(
+            bucket, artifact_audio, artifact_sr, job_id,
+            artifact_pairs, filename, pool,
+        )
+        artifacts["time_expanded"] = expanded.result()
+        artifacts["tiles"] = tiles.result()
+    return artifacts
+
+
+# Artifact key (``_render_artifacts`` / ``render_artifact``) → job field.
+ARTIFACT_FIELDS = {
+    "viridis_clean": "spectrogramUrl",
+    "viridis_annotated": "spectrogramAnnotatedUrl",
+    "sonobat_clean": "spectrogramSonobatUrl",
+    "sonobat_annotated": "spectrogramSonobatAnnotatedUrl",
+    "time_expanded": "timeExpandedAudioUrl",
+    "tiles": "spectrogramTiles",
+}
+
+
+def _artifact_variants(duration_s: float) -> list:
+    """Artifacts ``render_artifact`` can produce for a recording this long."""
+    variants = [key for key, *_ in SPECTROGRAM_VARIANTS] + ["time_expanded"]
+    if SPECTROGRAM_TILES_ENABLED and duration_s >= SPECTROGRAM_TILES_MIN_S:
+        variants.append("tiles")
+    return variants
+
+
+def _render_variant(bucket, source, result, job_id: str, filename: str, variant: str):
+    """Render + upload ONE artifact → the value for its job field.
+
+    Same output (and Storage name) as the matching part of
+    ``_render_artifacts``. Returns None on failure.
+    """
+    if variant == "tiles":
+        return _render_and_upload_tiles(
+            bucket, source, result.duration_seconds, _artifact_sr(), job_id,
+        )
+    audio, sr, pairs = _load_artifact_audio(
+        source, result, streamed="windows" in result.stats,
+    )
+    if variant == "time_expanded":
+        return _render_and_upload_time_expanded(bucket, audio, sr, job_id)
+
+    from src.spectrogram import compute_spectrogram, render_png
+
+    _, remote_name, palette, with_boxes = next(
+        v for v in SPECTROGRAM_VARIANTS if v[0] == variant
+    )
+    try:
+        spec = compute_spectrogram(audio, sr, palette=palette)
+        png = render_png(spec, pairs, with_boxes=with_boxes, title=filename)
+        return _upload_bytes(bucket, png, f"spectrograms/{job_id}.{remote_name}", "image/png")
+    except Exception as e:
+        print(f"[CF] spectrogram {variant} render failed for {job_id}: {e}")
+        return None
+
+
+def _result_from_job(db, job_id: str, job_data: dict):
+    """Rebuild enough of a ``PipelineResult`` to render from Firestore.
+
+    Fallback for ``render_artifact`` when the result cache entry has
+    aged out or caching is off: the job doc has the duration and stats,
+    the ``batDetections`` rows the surviving pairs (only the fields the
+    renderers read).
+    """
+    from src import bat_pipeline
+
+    pairs = []
+    for d in db.collection(BAT_DETECTIONS_COLLECTION).where("syncId", "==", job_id).get():
+        row = d.to_dict() or {}
+        if row.get("source") != "upload":
+            continue
+        pairs.append((
+            {
+                "start_time": row.get("startTime", 0.0),
+                "end_time": row.get("endTime", 0.0),
+                "low_freq": row.get("lowFreq", 0.0),
+                "high_freq": row.get("highFreq", 0.0),
+                "det_prob": row.get("detectionProb", 0.0),
+                "class": row.get("species"),
+            },
+            {
+                "predicted_class": row.get("predictedClass"),
+                "prediction_confidence": row.get("predictionConfidence", 0.0),
+            },
+        ))
+    pairs.sort(key=lambda p: p[0]["start_time"])
+    return bat_pipeline.PipelineResult(
+        detections=pairs,
+        rejection_reason=job_data.get("rejectionReason"),
+        stats=job_data.get("stats") or {},
+        duration_seconds=float(job_data.get("durationSeconds") or 0.0),
+        pipeline_version=job_data.get("pipelineVersion") or bat_pipeline.PIPELINE_VERSION,
+    )
+
+
+def _open_upload(bucket, job_id: str):
+    """``(source, tmp_path, reader)`` for ``uploads/{jobId}.wav``.
+
+    Small files are downloaded to ``/tmp``; above ``STREAM_MIN_BYTES``
+    the blob is read through a seekable Storage reader instead, so the
+    file is never materialised. Close with ``_close_upload``.
+    """
+    blob = bucket.get_blob(f"uploads/{job_id}.wav")
+    if blob is None:
+        raise FileNotFoundError(f"uploads/{job_id}.wav not found in Storage")
+
+    if blob.size and blob.size > STREAM_MIN_BYTES:
+        print(f"[CF] {job_id}: {blob.size / 1e6:.0f} MB — streaming from Storage")
+        reader = blob.open("rb", chunk_size=8 * 1024 * 1024)
+        return reader, None, reader
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+        tmp_path = tmp.name
+    blob.download_to_filename(tmp_path)
+    return tmp_path, tmp_path, None
+
+
+def _close_upload(tmp_path: Optional[str], reader) -> None:
+    if reader is not None:
+        reader.close()
+    if tmp_path and os.path.exists(tmp_path):
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
 # ---------------------------------------------------------------------------
 #  Trigger
 # ---------------------------------------------------------------------------
 
-@firestore_fn.on_document_created(
-    document="uploadJobs/{jobId}",
-    region="us-central1",
-    memory=options.MemoryOption.GB_4,
-    cpu=2,
-    timeout_sec=540,
-    concurrency=1,
-)
-def process_upload(event: firestore_fn.Event[firestore_fn.DocumentSnapshot]) -> None:
-    """Runs on every new upload job. One job per cold start typically."""
-    # Heavy imports deferred here so Firebase CLI parse (which runs this
-    # file's top-level code) doesn't need torch / batdetect2 installed
-    # in the local venv.
-    from src import bat_pipeline  # noqa: E402
+def _process_job(db, bucket, job_id: str, job_data: dict) -> None:
+    """Analyse one claimed job end to end; never raises.
 
-    job_id = event.params["jobId"]
-    snap = event.data
-    if snap is None:
-        print(f"[CF] {job_id}: event.data is None (doc deleted?) — skipping")
-        return
+    Failures are recorded on the job doc (``status: error``) so one bad
+    WAV can't take down the rest of a batch.
+    """
+    from src import analysis_cache, bat_pipeline  # noqa: E402
 
-    job_data = snap.to_dict() or {}
     filename = job_data.get("filename", "unknown.wav")
     print(f"[CF] Processing {job_id} ({filename})")
-
-    db = firestore.client()
     job_ref = db.collection("uploadJobs").document(job_id)
 
-    # Transition to processing so the dashboard spinner updates even if
-    # we later crash.
-    try:
-        job_ref.update({
-            "status": "processing",
-            "processingStartedAt": firestore.SERVER_TIMESTAMP,
-        })
-    except Exception as e:
-        print(f"[CF] {job_id}: failed to mark processing: {e}")
-
     tmp_path = None
+    reader = None
     try:
-        bucket = fb_storage.bucket()
-        blob = bucket.blob(f"uploads/{job_id}.wav")
-        if not blob.exists():
-            raise FileNotFoundError(f"uploads/{job_id}.wav not found in Storage")
+        # Large files are never materialised: the pipeline (and any
+        # eager artifact render) seeks around in them over the network.
+        source, tmp_path, reader = _open_upload(bucket, job_id)
 
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp_path = tmp.name
-        blob.download_to_filename(tmp_path)
-
-        classifier_model, classifier_ckpt = _get_classifier()
         pipeline_cfg = _load_pipeline_cfg()
 
         # Per-upload "permissive mode" — opt-in checkbox on the dashboard
@@ -500,31 +928,49 @@ def process_upload(event: firestore_fn.Event[firestore_fn.DocumentSnapshot]) ->
             )
 
         detection_time = datetime.utcnow()
-        result = bat_pipeline.run_full_pipeline(
-            tmp_path, classifier_model, classifier_ckpt, **pipeline_cfg,
-        )
-
-        # Spectrograms — rendered for every outcome (even rejected
-        # segments) so advisors can see *why* the pipeline decided what
-        # it decided. FOUR variants (viridis / sonobat × clean /
-        # annotated) so the dashboard can toggle palette and overlay
-        # independently.
-        spec_urls = _render_and_upload_spectrograms(
-            bucket, tmp_path, job_id, result.detections, filename,
-        )
-        spectrogram_url = spec_urls.get("viridis_clean")
-        spectrogram_annotated_url = spec_urls.get("viridis_annotated")
-        spectrogram_sonobat_url = spec_urls.get("sonobat_clean")
-        spectrogram_sonobat_annotated_url = spec_urls.get("sonobat_annotated")
-        # Time-expanded (10×) audio — the 40 kHz bat call becomes a
-        # 4 kHz audible chirp. Ecologists rely on this to verify
-        # detector output by ear.
-        time_expanded_audio_url = _render_and_upload_time_expanded(
-            bucket, tmp_path, job_id,
+        # Re-uploads of identical audio (permissive-mode retries, the
+        # same file in two datasets) reuse earlier work: an exact repeat
+        # skips the pipeline and the renders, a threshold-only change
+        # skips inference.
+        cache = analysis_cache.AnalysisCache(bucket, tag="CF")
+        result_key, raw_key = analysis_cache.cache_keys(
+            analysis_cache.sha256_of(source), MODEL_VERSION, pipeline_cfg,
         )
+        artifacts = {}
+        cached = cache.get_result(result_key)
+        if cached is not None:
+            result, artifacts = cached
+            print(f"[CF] {job_id}: cached result ({len(artifacts)} artifact(s))")
+        else:
+            raw_cfg, gate_cfg = bat_pipeline.split_pipeline_config(pipeline_cfg)
+            raw = cache.get_raw(raw_key)
+            if raw is not None:
+                print(f"[CF] {job_id}: cached raw analysis — re-gating only")
+            else:
+                classifier_model, classifier_ckpt = _get_classifier()
+                raw = bat_pipeline.analyse_raw(
+                    source, classifier_model, classifier_ckpt, **raw_cfg,
+                )
+                cache.put_raw(raw_key, raw)
+            result = bat_pipeline.apply_gates(raw, **gate_cfg)
+            del raw
+
+        if cached is None:
+            # Lazy mode stores the result alone; ``render_artifact``
+            # adds each artifact to the entry as it is first rendered.
+            if ARTIFACT_RENDERING == "eager":
+                artifacts = _render_artifacts(bucket, source, result, job_id, filename)
+            cache.put_result(result_key, result, artifacts)
+        artifact_variants = _artifact_variants(result.duration_seconds)
+        spectrogram_url = artifacts.get("viridis_clean")
+        spectrogram_annotated_url = artifacts.get("viridis_annotated")
+        spectrogram_sonobat_url = artifacts.get("sonobat_clean")
+        spectrogram_sonobat_annotated_url = artifacts.get("sonobat_annotated")
+        time_expanded_audio_url = artifacts.get("time_expanded")
+        spectrogram_tiles = artifacts.get("tiles")
 
         if result.detections:
-            _write_detections(
+            batch = _write_detections(
                 db, job_id, result.detections,
                 detection_time, result.pipeline_version,
             )
@@ -537,7 +983,11 @@ def process_upload(event: firestore_fn.Event[firestore_fn.DocumentSnapshot]) ->
                 spectrogram_sonobat_url=spectrogram_sonobat_url,
                 spectrogram_sonobat_annotated_url=spectrogram_sonobat_annotated_url,
                 time_expanded_audio_url=time_expanded_audio_url,
+                spectrogram_tiles=spectrogram_tiles,
+                artifact_key=result_key,
+                artifact_variants=artifact_variants,
                 permissive_mode=permissive_mode,
+                batch=batch,
             )
             print(
                 f"[CF] {job_id}: {len(result.detections)} detections "
@@ -556,6 +1006,9 @@ def process_upload(event: firestore_fn.Event[firestore_fn.DocumentSnapshot]) ->
                 spectrogram_sonobat_url=spectrogram_sonobat_url,
                 spectrogram_sonobat_annotated_url=spectrogram_sonobat_annotated_url,
                 time_expanded_audio_url=time_expanded_audio_url,
+                spectrogram_tiles=spectrogram_tiles,
+                artifact_key=result_key,
+                artifact_variants=artifact_variants,
                 permissive_mode=permissive_mode,
             )
             print(
@@ -570,8 +1023,281 @@ def process_upload(event: firestore_fn.Event[firestore_fn.DocumentSnapshot]) ->
         except Exception:
             pass
     finally:
-        if tmp_path and os.path.exists(tmp_path):
+        _close_upload(tmp_path, reader)
+
+
+def _estimate_job_s(job_data: dict) -> float:
+    """Rough wall-clock seconds to analyse a job, from its upload size."""
+    size_mb = float(job_data.get("sizeBytes") or 0) / (1024 * 1024)
+    return UPLOAD_EST_BASE_S + UPLOAD_EST_S_PER_MB * size_mb
+
+
+def _claim_next_pending(db, tried: set, deadline: float) -> Optional[tuple]:
+    """Claim the next job that fits before ``deadline`` → ``(job_id, job_data)`` or None.
+
+    Lapsed leases first (their invocations died; ``sweep_upload_jobs``
+    requeues any a drain doesn't reach), then pending jobs oldest first. Jobs that don't fit the
+    remaining budget are left for their own trigger or a later drain.
+    ``tried`` collects ids already looked at by this invocation, so a job
+    another instance claimed first isn't re-read forever.
+    """
+    jobs = db.collection("uploadJobs")
+    candidates = (
+        jobs.where("status", "==", "processing")
+            .where("leaseExpiresAt", "<", datetime.now(timezone.utc))
+            .order_by("leaseExpiresAt").limit(8),
+        jobs.where("status", "==", "pending").order_by("createdAt").limit(8),
+    )
+    budget_s = deadline - time.monotonic() - UPLOAD_CLAIM_MARGIN_S
+    for query in candidates:
+        for snap in query.get():
+            if snap.id in tried:
+                continue
+            tried.add(snap.id)
+            job_data = snap.to_dict() or {}
+            if _estimate_job_s(job_data) > budget_s:
+                continue
             try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
+                if _claim_job(db.transaction(), snap.reference, deadline):
+                    return snap.id, job_data
+            except Exception as e:
+                print(f"[CF] {snap.id}: claim failed: {e}")
+    return None
+
+
+def _drain_pending(db, bucket, first: tuple, deadline: float) -> None:
+    """Process ``first``, then keep claiming jobs on this instance.
+
+    ``UPLOAD_BATCH_WORKERS`` threads each loop claim → process until the
+    batch is ``UPLOAD_BATCH_SIZE`` jobs or no waiting job fits before
+    ``deadline`` (``_claim_next_pending``). Claims are the same
+    transaction the trigger uses, so the triggers of jobs drained here
+    find them taken and exit before loading anything.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    lock = threading.Lock()
+    tried = {first[0]}
+    claimed = [1]
+    pending = [first]
+
+    def worker() -> None:
+        while True:
+            with lock:
+                if pending:
+                    job = pending.pop()
+                elif claimed[0] >= UPLOAD_BATCH_SIZE:
+                    return
+                else:
+                    job = _claim_next_pending(db, tried, deadline)
+                    if job is None:
+                        return
+                    claimed[0] += 1
+            _process_job(db, bucket, *job)
+
+    n_workers = min(UPLOAD_BATCH_WORKERS, UPLOAD_BATCH_SIZE)
+    if n_workers > 1:
+        # Load + warm the models once, before the workers race for them.
+        _get_classifier()
+    with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="job") as pool:
+        for fut in [pool.submit(worker) for _ in range(n_workers)]:
+            fut.result()
+    if claimed[0] > 1:
+        print(f"[CF] batch: {claimed[0]} job(s) on this instance")
+
+
+@firestore_fn.on_document_created(
+    document="uploadJobs/{jobId}",
+    region="us-central1",
+    memory=options.MemoryOption.GB_4,
+    cpu=2,
+    timeout_sec=UPLOAD_TIMEOUT_S,
+    concurrency=1,
+)
+def process_upload(event: firestore_fn.Event[firestore_fn.DocumentSnapshot]) -> None:
+    """Runs on every new upload job.
+
+    Claims its own job, then drains other pending jobs on the same warm
+    instance (``_drain_pending``) — a 100-file drop is processed by a
+    handful of instances instead of paying 100 cold starts.
+    """
+    deadline = time.monotonic() + UPLOAD_TIMEOUT_S
+    job_id = event.params["jobId"]
+    snap = event.data
+    if snap is None:
+        print(f"[CF] {job_id}: event.data is None (doc deleted?) — skipping")
+        return
+
+    db = firestore.client()
+    job_ref = db.collection("uploadJobs").document(job_id)
+
+    # Claim pending → processing in a transaction so the dashboard spinner
+    # updates even if we later crash, and so a legacy upload worker
+    # polling the same collection (or a batch on another instance)
+    # can't pick the job up as well.
+    try:
+        if not _claim_job(db.transaction(), job_ref, deadline):
+            print(f"[CF] {job_id}: no longer pending (claimed elsewhere) — skipping")
+            return
+    except Exception as e:
+        print(f"[CF] {job_id}: failed to mark processing: {e}")
+
+    _drain_pending(db, fb_storage.bucket(), (job_id, snap.to_dict() or {}), deadline)
+
+
+@scheduler_fn.on_schedule(
+    schedule=f"every {UPLOAD_SWEEP_MINUTES} minutes",
+    region="us-central1",
+    memory=options.MemoryOption.GB_4,
+    cpu=2,
+    timeout_sec=UPLOAD_TIMEOUT_S,
+    max_instances=1,
+)
+def sweep_upload_jobs(event: scheduler_fn.ScheduledEvent) -> None:
+    """Requeue jobs whose invocation died, then drain the queue.
+
+    ``_claim_next_pending`` only runs when a new upload arrives; after a
+    lost instance on a quiet device, this is what picks the job up again
+    (or fails it once ``UPLOAD_MAX_ATTEMPTS`` are used). Most runs find
+    nothing and return before any model is loaded.
+    """
+    deadline = time.monotonic() + UPLOAD_TIMEOUT_S
+    db = firestore.client()
+    expired = (
+        db.collection("uploadJobs")
+        .where("status", "==", "processing")
+        .where("leaseExpiresAt", "<", datetime.now(timezone.utc))
+        .order_by("leaseExpiresAt")
+        .limit(50)
+    )
+    outcomes = {"pending": 0, "error": 0}
+    for snap in expired.get():
+        try:
+            outcome = _requeue_expired(db.transaction(), snap.reference)
+        except Exception as e:
+            print(f"[CF] sweep: {snap.id}: requeue failed: {e}")
+            continue
+        if outcome:
+            outcomes[outcome] += 1
+    if outcomes["pending"] or outcomes["error"]:
+        print(f"[CF] sweep: requeued {outcomes['pending']}, failed {outcomes['error']} lapsed job(s)")
+
+    first = _claim_next_pending(db, set(), deadline)
+    if first is not None:
+        _drain_pending(db, fb_storage.bucket(), first, deadline)
+
+
+# ---------------------------------------------------------------------------
+#  On-demand artifacts
+# ---------------------------------------------------------------------------
+
+@firestore.transactional
+def _start_render(transaction, job_ref, variant: str) -> dict:
+    """Validate a render request and mark it in flight → the job's data.
+
+    Raises ``HttpsError`` when the job or variant isn't renderable, the
+    artifact already exists, or another render of it holds the marker.
+    """
+    snap = job_ref.get(transaction=transaction)
+    if not snap.exists:
+        raise https_fn.HttpsError(https_fn.FunctionsErrorCode.NOT_FOUND, f"no upload job {job_ref.id}")
+    job_data = snap.to_dict() or {}
+    if job_data.get(ARTIFACT_FIELDS[variant]):
+        raise https_fn.HttpsError(
+            https_fn.FunctionsErrorCode.ALREADY_EXISTS, f"{variant} is already rendered",
+        )
+    if job_data.get("status") != "done" or variant not in (job_data.get("artifactVariants") or []):
+        raise https_fn.HttpsError(
+            https_fn.FunctionsErrorCode.FAILED_PRECONDITION, f"{variant} is not available for {job_ref.id}",
+        )
+    now = datetime.now(timezone.utc)
+    lease = (job_data.get("artifactRendering") or {}).get(variant)
+    if lease is not None and lease > now:
+        raise https_fn.HttpsError(
+            https_fn.FunctionsErrorCode.ABORTED, f"{variant} is already being rendered",
+        )
+    transaction.update(job_ref, {
+        f"artifactRendering.{variant}": now + timedelta(seconds=RENDER_LEASE_S),
+    })
+    return job_data
+
+
+@https_fn.on_call(
+    region="us-central1",
+    memory=options.MemoryOption.GB_2,
+    cpu=1,
+    timeout_sec=540,
+    max_instances=RENDER_MAX_INSTANCES,
+)
+def render_artifact(req: https_fn.CallableRequest) -> dict:
+    """Render one upload artifact the first time the dashboard asks for it.
+
+    ``req.data`` is ``{"jobId": ..., "variant": ...}`` with ``variant``
+    one of the job's ``artifactVariants``. The value is written to the
+    job doc (``ARTIFACT_FIELDS``), so the dashboard's snapshot listener
+    picks it up, and merged into the job's result cache entry, so a
+    re-upload of the same audio gets it for free.
+
+    Callers must be signed in or carry an App Check token. A variant
+    that is already on the job, or already being rendered, is refused
+    (``already-exists`` / ``aborted``); its value arrives through the
+    job snapshot either way.
+    """
+    if req.auth is None and req.app is None:
+        raise https_fn.HttpsError(
+            https_fn.FunctionsErrorCode.UNAUTHENTICATED, "sign-in or App Check is required",
+        )
+    job_id = str((req.data or {}).get("jobId") or "")
+    variant = str((req.data or {}).get("variant") or "")
+    if not job_id or variant not in ARTIFACT_FIELDS:
+        raise https_fn.HttpsError(
+            https_fn.FunctionsErrorCode.INVALID_ARGUMENT, "jobId and a known variant are required",
+        )
+    field = ARTIFACT_FIELDS[variant]
+
+    db = firestore.client()
+    job_ref = db.collection("uploadJobs").document(job_id)
+    job_data = _start_render(db.transaction(), job_ref, variant)
+    try:
+        value = _render_artifact_value(db, job_id, job_data, variant)
+    except BaseException:
+        job_ref.update({f"artifactRendering.{variant}": firestore.DELETE_FIELD})
+        raise
+    job_ref.update({field: value, f"artifactRendering.{variant}": firestore.DELETE_FIELD})
+    return {"variant": variant, "value": value}
+
+
+def _render_artifact_value(db, job_id: str, job_data: dict, variant: str):
+    """``variant``'s value for a job: from the result cache, else rendered."""
+    from src import analysis_cache  # noqa: E402
+
+    bucket = fb_storage.bucket()
+    cache = analysis_cache.AnalysisCache(bucket, tag="CF")
+    artifact_key = job_data.get("artifactKey")
+    cached = cache.get_result(artifact_key) if artifact_key else None
+    value = cached[1].get(variant) if cached else None
+    if value:
+        print(f"[CF] {job_id}: {variant} from cache")
+    else:
+        result = cached[0] if cached else _result_from_job(db, job_id, job_data)
+        try:
+            source, tmp_path, reader = _open_upload(bucket, job_id)
+        except FileNotFoundError:
+            # Uploads age out of the bucket after 7 days.
+            raise https_fn.HttpsError(
+                https_fn.FunctionsErrorCode.FAILED_PRECONDITION,
+                "the uploaded audio has expired; re-upload the file to render this view",
+            )
+        try:
+            value = _render_variant(
+                bucket, source, result, job_id, job_data.get("filename", "unknown.wav"), variant,
+            )
+        finally:
+            _close_upload(tmp_path, reader)
+        if not value:
+            raise https_fn.HttpsError(https_fn.FunctionsErrorCode.INTERNAL, f"{variant} render failed")
+        print(f"[CF] {job_id}: rendered {variant} on demand")
+        if artifact_key:
+            cache.add_artifacts(artifact_key, {variant: value})
+    return value